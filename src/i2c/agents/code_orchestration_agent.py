@@ -87,17 +87,23 @@ class CodeOrchestrationAgent(Agent):
         # Initialize reusable knowledge enhancer to avoid recreating instances
         from i2c.agents.core_team.enhancer import AgentKnowledgeEnhancer
         self.knowledge_enhancer = AgentKnowledgeEnhancer()
-
-        # # Flush Cache
-        # if "knowledge_cache" in self.session_state:
-        #     self.session_state["knowledge_cache"] = {}
+        # Background knowledge lookups for planned steps (see _start_step_prefetch)
+        self._prefetcher = None
+        # Context from knowledge bases the shared cache cannot key (no version or location)
+        self._local_knowledge_context = {}
+        # Chunks behind the current knowledge context, for effectiveness feedback
+        self._knowledge_used = []
+        self._knowledge_used_by_key = {}
+
+        # Knowledge context is cached in i2c.utils.knowledge_context_cache;
+        # drop the unbounded dict older sessions kept in session_state
+        if self.session_state is not None:
+            self.session_state.pop("knowledge_cache", None)
         # Store knowledge base if provided
         self.knowledge_base = knowledge_base
         if knowledge_base and self.session_state:
             if "knowledge_base" not in self.session_state:
                 self.session_state["knowledge_base"] = knowledge_base
-            if "knowledge_cache" not in self.session_state:
-                self.session_state["knowledge_cache"] = {}
 
         
         self.knowledge_scorer = KnowledgeApplicationScorer()
@@ -176,14 +182,15 @@ class CodeOrchestrationAgent(Agent):
         self.issue_resolution_operator = None
     
     def flush_knowledge_cache(self):
-        if self.session_state is not None and "knowledge_cache" in self.session_state:
-            self.session_state["knowledge_cache"] = {}
+        from i2c.utils.knowledge_context_cache import knowledge_context_cache
+        knowledge_context_cache.clear(namespace="orchestration")
+        self._local_knowledge_context.clear()
             
     def _retrieve_knowledge_context(self, objective: Dict[str, Any], 
                                     architectural_context: Dict[str, Any]) -> str:
         """
         Retrieve relevant knowledge context from the knowledge base following Agno patterns.
-        Includes in-memory caching using session_state["knowledge_cache"] if available.
+        Results are cached per task, architecture and knowledge-base version.
         """
         ARCHITECTURE_PATTERN_MAP = {
             "monolith": "monolith architecture",
@@ -202,13 +209,27 @@ class CodeOrchestrationAgent(Agent):
         if not self.knowledge_base or not hasattr(self.knowledge_base, 'retrieve_knowledge'):
             return ""
 
-        # Define cache key
-        cache_key = f"{objective.get('task', '')}::{architectural_context.get('system_type', '')}::{architectural_context.get('architecture_pattern', '')}"
-        cache = self.session_state.get("knowledge_cache", {}) if self.session_state else {}
-
-        if cache_key in cache:
+        # Keyed by content and knowledge-base version, so writes to the knowledge table invalidate it
+        from i2c.utils.knowledge_context_cache import knowledge_context_cache
+        cache_key = knowledge_context_cache.make_key(
+            "orchestration", self.knowledge_base,
+            objective.get("task", ""),
+            architectural_context.get("system_type", ""),
+            architectural_context.get("architecture_pattern", ""),
+        )
+        local_key = (
+            objective.get("task", ""),
+            architectural_context.get("system_type", ""),
+            architectural_context.get("architecture_pattern", ""),
+        )
+        if cache_key is None:
+            cached = self._local_knowledge_context.get(local_key)
+        else:
+            cached = knowledge_context_cache.get(cache_key)
+        if cached is not None:
             canvas.info("[KNOWLEDGE] Loaded knowledge context from cache.")
-            return cache[cache_key]
+            self._knowledge_used = self._knowledge_used_by_key.get(local_key, [])
+            return cached
 
         try:
             task = objective.get("task", "")
@@ -242,42 +263,42 @@ class CodeOrchestrationAgent(Agent):
             implementation_query = f"implementation tips for {task}"
             implementation_chunks = self.knowledge_base.retrieve_knowledge(query=implementation_query, limit=3)
 
-            all_chunks = []
-            seen_content = set()
-
-            for chunk in main_chunks:
-                content = chunk.get("content", "")
-                if content and content not in seen_content:
-                    all_chunks.append(chunk)
-                    seen_content.add(content)
-
-            for chunk in pattern_chunks or []:
-                content = chunk.get("content", "")
-                if content and content not in seen_content:
-                    all_chunks.append(chunk)
-                    seen_content.add(content)
-
-            for chunk in implementation_chunks or []:
-                content = chunk.get("content", "")
-                if content and content not in seen_content:
-                    all_chunks.append(chunk)
-                    seen_content.add(content)
+            # Drop exact and near-duplicate chunks (SimHash), keeping the best-ranked copy
+            from i2c.utils.near_dup import suppress_near_duplicates
+            all_chunks = suppress_near_duplicates(
+                [c for c in list(main_chunks) + list(pattern_chunks or []) + list(implementation_chunks or [])
+                 if c.get("content")]
+            )
 
+            # Pack the highest-ranked chunks into the orchestrator's token budget
+            from i2c.utils.context_packer import pack_context, token_budget
+            packed = pack_context(
+                all_chunks,
+                token_budget("orchestrator"),
+                overhead=lambda c: len(str(c.get("source", ""))) // 4 + 6,
+                label="orchestrator",
+            )
             formatted_chunks = []
-            for i, chunk in enumerate(all_chunks):
-                source = chunk.get("source", "Unknown")
-                content = chunk.get("content", "").strip()
-                if len(content) > 1000:
-                    content = content[:1000] + "..."
+            for i, entry in enumerate(packed.entries):
+                source = entry["item"].get("source", "Unknown")
+                content = entry["text"] + ("\n..." if entry["trimmed"] else "")
                 formatted_chunks.append(f"[Knowledge {i+1}] {source}:\n{content}")
 
             combined_context = "\n\n".join(formatted_chunks)
+            self._knowledge_used = [
+                {"knowledge_space": entry["item"].get("knowledge_space", ""),
+                 "content_hash": entry["item"].get("content_hash", "")}
+                for entry in packed.entries
+            ]
+            self._knowledge_used_by_key[local_key] = self._knowledge_used
 
-            token_estimate = len(combined_context.split()) * 1.3
-            canvas.success(f"[KNOWLEDGE] Retrieved {len(all_chunks)} chunks (~{int(token_estimate)} tokens) for orchestration context")
+            canvas.success(f"[KNOWLEDGE] Retrieved {len(all_chunks)} chunks, packed {len(packed.entries)} "
+                           f"({packed.used_tokens}/{packed.budget} tokens) for orchestration context")
 
-            if self.session_state is not None:
-                self.session_state.setdefault("knowledge_cache", {})[cache_key] = combined_context
+            if cache_key is None:
+                self._local_knowledge_context[local_key] = combined_context
+            else:
+                knowledge_context_cache.put(cache_key, combined_context)
 
             return combined_context
 
@@ -890,6 +911,45 @@ class CodeOrchestrationAgent(Agent):
         except Exception:
             return "python"  # Safe fallback
         
+    @staticmethod
+    def _step_query(step: Dict[str, Any]) -> str:
+        return " ".join(str(step.get(k, "")) for k in ("what", "how", "file")).strip()
+
+    def _start_step_prefetch(self, plan: Dict[str, Any]) -> None:
+        """Speculatively retrieve knowledge for each planned step in the background."""
+        from i2c.utils.retrieval_prefetch import knowledge_prefetcher
+
+        steps = plan.get("steps") or []
+        if not steps:
+            return
+        if self._prefetcher is None:
+            self._prefetcher = knowledge_prefetcher(self.knowledge_base, label="StepPrefetch")
+        if self._prefetcher:
+            # Keyed by query so replanned steps reuse identical lookups
+            self._prefetcher.prefetch({q: q for q in map(self._step_query, steps)})
+            canvas.info(f"🔍 Prefetching knowledge for {len(steps)} planned steps")
+
+    def _prefetched_step_knowledge(self, plan: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Knowledge prefetched for the plan's steps that is ready now (lookups
+        still running are not waited for): the chunks and a prompt section.
+        """
+        steps = plan.get("steps") or []
+        if not (self._prefetcher and steps):
+            return [], ""
+        from i2c.utils.context_packer import token_budget
+        from i2c.utils.retrieval_prefetch import format_prefetched
+
+        per_step = max(token_budget("modifier") // len(steps), 100)
+        chunks, sections = [], []
+        for step in steps:
+            ready = self._prefetcher.get(self._step_query(step))
+            section = format_prefetched(ready, per_step)
+            if section:
+                chunks.extend(ready)
+                sections.append(f"## {step.get('file', '')}: {step.get('what', '')}\n{section}")
+        return chunks, ("\n\nRELEVANT KNOWLEDGE PER STEP:\n" + "\n\n".join(sections) if sections else "")
+
     async def _execute_modifications(self, plan: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the modification plan using the modification workflow"""
         # Track this step in the reasoning trajectory
@@ -939,7 +999,12 @@ class CodeOrchestrationAgent(Agent):
             canvas.info(f"🔧 Using direct agent modification for: {task}")
 
             try:
-                agent = get_rag_enabled_agent("code_builder", session_state=self.session_state)
+                # Knowledge retrieved for the plan's steps while the plan was being
+                # validated replaces the agent's own lookup when it is ready
+                step_chunks, step_knowledge = self._prefetched_step_knowledge(plan)
+                agent = get_rag_enabled_agent(
+                    "code_builder", session_state=self.session_state, knowledge_context=step_chunks or None,
+                )
                 
                 # Build prompt with existing files context
                 existing_files_context = ""
@@ -956,7 +1021,7 @@ class CodeOrchestrationAgent(Agent):
             - Maintain existing functionality while implementing the requested changes
             - Add proper error handling and type hints where appropriate
 
-            {existing_files_context}
+            {existing_files_context}{step_knowledge}
 
             Return the complete modified file contents."""
 
@@ -1160,6 +1225,10 @@ class CodeOrchestrationAgent(Agent):
                 self.session_state["final_quality_results"] = quality_results
                 self.session_state["final_sre_results"] = sre_results
                 self.session_state["final_modification_result"] = modification_result
+            if self._prefetcher:
+                self._prefetcher.log_stats()
+                self._prefetcher.shutdown()
+                self._prefetcher = None
                 
             # 8. Final decision - enhanced with knowledge context when available
             decision, reason = self._make_final_decision(
@@ -1660,6 +1729,9 @@ class CodeOrchestrationAgent(Agent):
                 },
                 "knowledge_applied": bool(planning_knowledge)
             }
+            # Start knowledge retrieval for every step now, so the modifier
+            # does not wait on embed + search
+            self._start_step_prefetch(plan)
             
             self._add_reasoning_step("Modification Planning", 
                                 f"Generated architecturally-validated plan with {len(validated_steps)} steps", 
@@ -2048,6 +2120,12 @@ class CodeOrchestrationAgent(Agent):
                 success=application_score['overall_score'] > 0.7
             )
             
+            # Feed the score back to the chunks behind the context (write-behind)
+            from i2c.utils.knowledge_usage import usage_counters
+            usage_counters.record_effectiveness(
+                getattr(self, "_knowledge_used", []), application_score['overall_score']
+            )
+
             # Store results for continuous improvement
             if hasattr(self, 'session_state') and self.session_state:
                 if 'knowledge_effectiveness' not in self.session_state:
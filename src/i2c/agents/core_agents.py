@@ -21,7 +21,6 @@ except ImportError:
         def error(self, msg): print(f"[ERROR] {msg}")
     canvas = DummyCanvas()
     
-_expertise_cache = {}
 
 def filter_session_state_for_agent(session_state: dict, agent_type: str) -> dict:
     """
@@ -155,8 +154,14 @@ except:
     project_context_analyzer_agent = None
 
 # Set up factory functions for session state aware instantiation
-def get_rag_enabled_agent(agent_type, session_state=None):
-    """AGNO-native agent factory with dynamic knowledge access"""
+def get_rag_enabled_agent(agent_type, session_state=None, knowledge_context=None):
+    """AGNO-native agent factory with dynamic knowledge access
+
+    ``knowledge_context`` is knowledge already retrieved for this agent's
+    task (e.g. prefetched chunks) that the caller packs into the task
+    prompt; when given, the agent neither looks knowledge up nor injects any
+    of its own, so the same knowledge does not reach it twice.
+    """
     
     # =================================================================
     # DIAGNOSTIC LOGGING - PHASE 1: Measure session_state size
@@ -285,7 +290,8 @@ def get_rag_enabled_agent(agent_type, session_state=None):
                 enhanced_agent = create_knowledge_enhanced_agent(
                     agent_class, 
                     knowledge_base, 
-                    agent_type
+                    agent_type,
+                    expertise=[] if knowledge_context else None,
                 )
                 canvas.warning(f"⚠️ Using legacy enhancement for {agent_type} (consider updating to AGNO-native)")
             
@@ -300,14 +306,17 @@ def get_rag_enabled_agent(agent_type, session_state=None):
                 else:
                     canvas.info(f"🔍 DEBUG: No important session keys found in {len(filtered_session_state)} total keys")
             
-            # SIMPLIFIED: Use retrieved_context for all agents
-            if "retrieved_context" in filtered_session_state:
+            # SIMPLIFIED: Use retrieved_context for all agents (unless the caller's prompt carries the knowledge)
+            retrieved_context = filtered_session_state.get("retrieved_context")
+            if knowledge_context:
+                canvas.info(f"🔍 {agent_type} gets {len(knowledge_context)} prefetched chunks in its prompt")
+            elif retrieved_context:
                 try:
                     from i2c.agents.core_team.enhancer import AgentKnowledgeEnhancer
                     enhancer = AgentKnowledgeEnhancer()
                     enhanced_agent = enhancer.enhance_agent_with_knowledge(
                         enhanced_agent, 
-                        filtered_session_state["retrieved_context"], 
+                        retrieved_context, 
                         agent_type
                     )
                     canvas.success(f"✅ Enhanced {agent_type} with retrieved_context")
@@ -398,14 +407,16 @@ def get_rag_enabled_agent(agent_type, session_state=None):
 def _extract_domain_expertise(knowledge_base, agent_role):
     """Let the agent search for its own expertise using agentic search"""
     
-    # Check cache first
-    cache_key = f"{agent_role}_{id(knowledge_base)}"
-    if cache_key in _expertise_cache:
-        return _expertise_cache[cache_key]
-    
     if not knowledge_base:
         canvas.error(f"🔍 DEBUG: No knowledge_base provided for {agent_role}")
         return []
+
+    # Check cache first (keyed by role and knowledge-base version)
+    from i2c.utils.knowledge_context_cache import knowledge_context_cache
+    cache_key = knowledge_context_cache.make_key("expertise", knowledge_base, agent_role)
+    cached = knowledge_context_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
     try:
         # DEBUG: Check knowledge space
@@ -422,7 +433,7 @@ def _extract_domain_expertise(knowledge_base, agent_role):
         
         if results:
             canvas.info(f"🔍 DEBUG: First result: {results[0] if results else 'None'}")
-            _expertise_cache[cache_key] = results
+            knowledge_context_cache.put(cache_key, results)
             canvas.success(f"🔍 DEBUG: Agent found {len(results)} knowledge items for {agent_role}")
             return results
         
@@ -472,8 +483,12 @@ Think like an expert who naturally reasons through problems using internalized k
     agent.instructions = enhanced_instructions
     return agent
 
-def create_knowledge_enhanced_agent(base_agent_class, knowledge_base=None, agent_role=""):
-    """Create agent with internalized knowledge instead of external references"""
+def create_knowledge_enhanced_agent(base_agent_class, knowledge_base=None, agent_role="", expertise=None):
+    """Create agent with internalized knowledge instead of external references
+
+    ``expertise`` (already retrieved knowledge items) skips the lookup; an
+    empty list adds none, for knowledge the caller puts in the prompt.
+    """
     canvas.info(f"🔍 DEBUG: create_knowledge_enhanced_agent called with agent_role='{agent_role}', knowledge_base={knowledge_base is not None}")
     if knowledge_base is None:
         canvas.warning(f"🔍 DEBUG: No knowledge_base provided for {agent_role} - returning basic agent")
@@ -484,7 +499,7 @@ def create_knowledge_enhanced_agent(base_agent_class, knowledge_base=None, agent
         canvas.info(f"🔍 DEBUG: Creating knowledge-enhanced {agent_role}")
         
         # Get domain expertise for this agent type
-        domain_knowledge = _extract_domain_expertise(knowledge_base, agent_role)
+        domain_knowledge = expertise if expertise is not None else _extract_domain_expertise(knowledge_base, agent_role)
         canvas.info(f"🔍 DEBUG: Got {len(domain_knowledge)} domain knowledge items")
         
         # Create the base agent
@@ -494,6 +509,8 @@ def create_knowledge_enhanced_agent(base_agent_class, knowledge_base=None, agent
         # Transform instructions to include internalized expertise
         if domain_knowledge:
             agent = _inject_expertise_into_agent(agent, domain_knowledge, agent_role)
+            from i2c.utils.context_packer import record_placed
+            record_placed(k for k in domain_knowledge if isinstance(k, dict))
             canvas.success(f"✅ Enhanced {agent_role} with internalized expertise")
         else:
             canvas.warning(f"⚠️ DEBUG: No domain knowledge found for {agent_role}")
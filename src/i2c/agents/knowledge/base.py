@@ -11,6 +11,9 @@ from datetime import datetime
 import hashlib
 import json
 
+from i2c.db_utils import CONTENT_HASH_FIELD
+from i2c.utils.knowledge_dedup import content_hash
+
 
 class EnhancedLanceDb(LanceDb):
     """Extended LanceDB with version filtering and knowledge spaces"""
@@ -62,13 +65,17 @@ class DocumentationKnowledgeBase(AgentKnowledge):
         document_type: str,
         metadata: Dict[str, Any] = None
     ) -> bool:
-        """Load a document with version tracking and deduplication"""
+        """
+        Load a document with version tracking and deduplication. When the
+        document was loaded before, only its new or changed sections are
+        embedded; removed sections are deleted and the rest are kept.
+        """
         if not path.exists():
             return False
             
         # Check budget before processing
         if self.budget_manager:
-            description  = f"Document ingestion: {path.name}"
+            description  = f"Document ingestion: {path.name} ({self._estimate_ingestion_cost(path).describe()})"
             prompt_text  = f"Ingest and chunk {path.name} into KB"
             model_id     = "knowledge_ingestor"           
             
@@ -90,6 +97,7 @@ class DocumentationKnowledgeBase(AgentKnowledge):
         # Ensure we have valid documents
         if not documents:
             return False
+        metadata = metadata or {}
         
         # Convert documents to data format expected by LanceDB
         lance_data = []
@@ -97,15 +105,12 @@ class DocumentationKnowledgeBase(AgentKnowledge):
             if not hasattr(doc, 'content'):
                 continue
                 
-            # Generate embedding for content
-            vector = self.vector_db.embedder.get_embedding(doc.content)
-            
             # Create record for LanceDB
             # Create record matching the EXACT field names in SCHEMA_KNOWLEDGE_BASE
             record = {
                 "source": str(path),  # This must match the schema field name exactly
                 "content": doc.content,
-                "vector": vector,
+                CONTENT_HASH_FIELD: content_hash(doc.content),
                 "category": metadata.get('category', 'document'),
                 "last_updated": datetime.now().isoformat(),
                 "knowledge_space": self.knowledge_space,
@@ -116,32 +121,49 @@ class DocumentationKnowledgeBase(AgentKnowledge):
                 "chunk_type": metadata.get('chunk_type', 'content'),
                 "source_hash": doc_hash,
                 # Convert any additional metadata to JSON string
-                "metadata_json": json.dumps(metadata or {})
+                "metadata_json": json.dumps(metadata)
             }
                             
             lance_data.append(record)
         
       
         # Add records to LanceDB
+        return self._store_source(str(path), lance_data)
+
+    def _store_source(self, source: str, lance_data: List[Dict[str, Any]]) -> bool:
+        """
+        Store the records of one source (a file or URL) in place of its
+        previous ones: sections whose text is unchanged are kept, removed
+        ones are deleted and only new or changed ones are embedded.
+        """
         try:
             # Use db_utils directly to get a fresh DB connection
-            from i2c.db_utils import get_db_connection, add_or_update_chunks, TABLE_KNOWLEDGE_BASE, SCHEMA_KNOWLEDGE_BASE            
+            from i2c.db_utils import get_db_connection, add_knowledge_chunks, sql_quote
+            from i2c.utils.knowledge_dedup import apply_section_sync, delete_sources, sync_sections
             
             db = get_db_connection()
-            if not db:
+            if db is None:
                 print("Error: Failed to get database connection")
                 return False
-                
-            success = add_or_update_chunks(
-                db=db,  # Use the new connection
-                table_name=TABLE_KNOWLEDGE_BASE,
-                schema=SCHEMA_KNOWLEDGE_BASE,
-                identifier_field="source",
-                identifier_value=str(path),
-                chunks=lance_data
-            )
-            
-            return success
+
+            # Reuse the stored sections whose text is unchanged; a first load replaces the source
+            synced = sync_sections(db, source, [
+                {k: v for k, v in r.items() if k not in ("source", "content", "knowledge_space")} for r in lance_data
+            ], self.knowledge_space)
+            if synced is None:
+                delete_sources(db, [source], scope=f"knowledge_space = {sql_quote(self.knowledge_space)}")
+            else:
+                lance_data = [lance_data[i] for i in synced.added]
+
+            # Generate embeddings for the sections to store
+            for record in lance_data:
+                record["vector"] = self.vector_db.embedder.get_embedding(record["content"])
+            if lance_data and not add_knowledge_chunks(db, lance_data, self.knowledge_space):
+                return False
+            # Only now drop the replaced sections, so a failed load keeps the stored version
+            if synced is not None:
+                apply_section_sync(db, source, self.knowledge_space, synced)
+            return True
         except Exception as e:
             print(f"Error adding documents to vector DB: {e}")
             return False
@@ -155,11 +177,10 @@ class DocumentationKnowledgeBase(AgentKnowledge):
         """Process document based on type - to be overridden by subclasses"""
         raise NotImplementedError
     
-    def _estimate_ingestion_cost(self, path: Path) -> float:
-        """Estimate cost for document ingestion"""
-        file_size = path.stat().st_size
-        estimated_tokens = file_size / 4  # Rough estimate
-        return estimated_tokens * 0.0001  # Rough cost estimate
+    def _estimate_ingestion_cost(self, path: Path):
+        """Estimate time and memory for document ingestion, from throughput measured on this machine"""
+        from i2c.agents.knowledge.ingestion_stats import get_ingestion_throughput
+        return get_ingestion_throughput().estimate([path])
 
 class PDFDocumentationKnowledgeBase(DocumentationKnowledgeBase):
     """PDF Documentation knowledge base with enhanced features"""
@@ -258,22 +279,8 @@ class MarkdownDocumentationKnowledgeBase(DocumentationKnowledgeBase):
     
     def _split_markdown_by_headers(self, content: str) -> List[str]:
         """Split markdown content by headers"""
-        lines = content.split('\n')
-        chunks = []
-        current_chunk = []
-        
-        for line in lines:
-            if line.startswith('#') and current_chunk:
-                # Start new chunk at header
-                chunks.append('\n'.join(current_chunk))
-                current_chunk = [line]
-            else:
-                current_chunk.append(line)
-        
-        if current_chunk:
-            chunks.append('\n'.join(current_chunk))
-        
-        return chunks
+        from i2c.agents.knowledge.ingestion_pipeline import split_markdown_by_headers
+        return split_markdown_by_headers(content)
 
 class HTMLDocumentationKnowledgeBase(DocumentationKnowledgeBase):
     """HTML documentation knowledge base"""
@@ -343,6 +350,15 @@ class WebDocumentationKnowledgeBase(DocumentationKnowledgeBase):
         self.max_depth = max_depth
         self.max_links = max_links
         self._loaded_urls = {}
+        self._fetcher = None
+    
+    @property
+    def fetcher(self):
+        """Shared concurrent fetcher with the conditional-request response cache"""
+        if self._fetcher is None:
+            from i2c.agents.knowledge.web_fetcher import WebFetcher
+            self._fetcher = WebFetcher()
+        return self._fetcher
     
     def load_url(
         self,
@@ -351,63 +367,111 @@ class WebDocumentationKnowledgeBase(DocumentationKnowledgeBase):
         metadata: Dict[str, Any] = None
     ) -> bool:
         """Load documentation from a URL"""
+        return self.load_urls([url], document_type, metadata)
+    
+    def load_urls(
+        self,
+        urls: List[str],
+        document_type: str = "web_documentation",
+        metadata: Dict[str, Any] = None
+    ) -> bool:
+        """
+        Crawl and load documentation from several URLs concurrently. Pages
+        the server reports as unchanged (304, or an identical body) are not
+        re-embedded; a changed page replaces its previously stored sections
+        (only its new or changed sections are embedded).
+        """
         
         # Check budget before processing
         if self.budget_manager:
-            estimated_cost = 0.05  # Estimate for web crawling
+            estimated_cost = 0.05 * len(urls)  # Estimate for web crawling
             if not self.budget_manager.request_approval(
-                f"Web documentation ingestion: {url}",
-                url,
+                f"Web documentation ingestion: {', '.join(urls)}",
+                ", ".join(urls),
                 estimated_cost
             ):
                 return False
         
-        # Calculate URL hash for deduplication
-        url_hash = hashlib.sha256(url.encode()).hexdigest()
-        
-        # Check if URL already loaded
-        if url_hash in self._loaded_urls:
-            return True
-        
         try:
-            # Create temporary WebsiteKnowledgeBase for processing
-            temp_kb = WebsiteKnowledgeBase(
-                urls=[url],
-                max_depth=self.max_depth,
-                max_links=self.max_links,
-                vector_db=self.vector_db
-            )
-            
-            # Load the website content
-            temp_kb.load(recreate=False)
-            
-            # Get the documents and enhance metadata
-            documents = temp_kb.document_lists
-            
-            for doc in documents:
-                enhanced_metadata = {
-                    "knowledge_space": self.knowledge_space,
-                    "document_type": document_type,
-                    "source_url": url,
-                    "url_hash": url_hash,
-                    "ingested_at": datetime.now().isoformat(),
-                    **(metadata or {})
-                }
-                
-                if hasattr(doc, 'meta_data') and doc.meta_data:
-                    doc.meta_data.update(enhanced_metadata)
-                else:
-                    doc.meta_data = enhanced_metadata
-            
-            # Load documents using parent class method
-            self.load_documents(documents, upsert=True)
-            self._loaded_urls[url_hash] = True
-            
-            return True
-            
+            results = self.fetcher.crawl_all(urls, max_depth=self.max_depth, max_links=self.max_links)
         except Exception as e:
-            print(f"Error loading URL {url}: {e}")
+            print(f"Error loading URLs {urls}: {e}")
             return False
+        
+        from agno.document.reader.base import Reader
+        from i2c.agents.knowledge.web_fetcher import html_to_text
+        reader = Reader()
+        metadata = metadata or {}
+        chunk_count, changed, failed = 0, [], []
+        for result in results:
+            if result.status == "error":
+                print(f"Error loading URL {result.url}: {result.error}")
+                continue
+            if not result.changed:
+                continue
+            
+            url_hash = hashlib.sha256(result.url.encode()).hexdigest()
+            enhanced_metadata = {
+                "knowledge_space": self.knowledge_space,
+                "document_type": document_type,
+                "source_url": result.url,
+                "url_hash": url_hash,
+                "content_hash": result.content_hash,
+                "ingested_at": datetime.now().isoformat(),
+                **metadata
+            }
+            text = html_to_text(result.content) if "html" in (result.content_type or "html") else result.content
+            chunks = reader.chunk_document(
+                Document(name=result.url, content=text, meta_data=enhanced_metadata)
+            ) if text.strip() else []
+            records = [{
+                "source": result.url,
+                "content": chunk.content,
+                CONTENT_HASH_FIELD: content_hash(chunk.content),
+                "category": metadata.get('category', 'web'),
+                "last_updated": enhanced_metadata["ingested_at"],
+                "knowledge_space": self.knowledge_space,
+                "document_type": document_type,
+                "framework": metadata.get('framework', ''),
+                "version": metadata.get('version', ''),
+                "parent_doc_id": metadata.get('parent_doc_id', ''),
+                "chunk_type": f"web_{i}",
+                "source_hash": result.content_hash,
+                "metadata_json": json.dumps(enhanced_metadata, default=str),
+            } for i, chunk in enumerate(chunks)]
+            # The page's earlier sections are replaced, not added to
+            if self._store_source(result.url, records):
+                chunk_count += len(records)
+                changed.append(result.url)
+            else:
+                failed.append(result.url)
+        
+        if failed:
+            print(f"Error loading documents for {failed}")
+            self.fetcher.cache.forget(failed)  # fetch them again next time
+        
+        for url in urls:
+            self.fetcher.cache.remember_source(self.knowledge_space, url, document_type, metadata)
+        for result in results:
+            if result.status != "error" and result.url not in failed:
+                self._loaded_urls[hashlib.sha256(result.url.encode()).hexdigest()] = True
+        
+        fetched = {r.url: r for r in results}
+        print(f"Web documentation: {len(changed)} changed of {len(results)} pages, "
+              f"{chunk_count} chunks stored")
+        return not failed and all(fetched.get(url) is not None and fetched[url].status != "error" for url in urls)
+    
+    def refresh(self) -> bool:
+        """Re-check every URL loaded into this knowledge space; only changed pages are re-embedded"""
+        groups: Dict[tuple, List[str]] = {}
+        for source in self.fetcher.cache.sources(self.knowledge_space):
+            key = (source["document_type"], json.dumps(source["metadata"], sort_keys=True))
+            groups.setdefault(key, []).append(source["url"])
+        success = True
+        for (document_type, metadata_json), urls in groups.items():
+            if not self.load_urls(urls, document_type, json.loads(metadata_json)):
+                success = False
+        return success
 
 class APIDocumentationKnowledgeBase(WebDocumentationKnowledgeBase):
     """Specialized knowledge base for API documentation"""
@@ -441,12 +505,7 @@ class APIDocumentationKnowledgeBase(WebDocumentationKnowledgeBase):
             **(metadata or {})
         }
         
-        success = True
-        for url in urls_to_load:
-            if not self.load_url(url, "api_documentation", api_metadata):
-                success = False
-        
-        return success
+        return self.load_urls(urls_to_load, "api_documentation", api_metadata)
 
 class FrameworkDocumentationKnowledgeBase(WebDocumentationKnowledgeBase):
     """Knowledge base for framework documentation (React, Django, etc.)"""
@@ -470,13 +529,9 @@ class FrameworkDocumentationKnowledgeBase(WebDocumentationKnowledgeBase):
         }
         
         if sections:
-            # Load specific sections
-            success = True
-            for section in sections:
-                section_url = f"{docs_url.rstrip('/')}/{section.lstrip('/')}"
-                if not self.load_url(section_url, "framework_documentation", framework_metadata):
-                    success = False
-            return success
+            # Load specific sections (fetched concurrently)
+            section_urls = [f"{docs_url.rstrip('/')}/{section.lstrip('/')}" for section in sections]
+            return self.load_urls(section_urls, "framework_documentation", framework_metadata)
         else:
             # Load entire documentation site
             return self.load_url(docs_url, "framework_documentation", framework_metadata)
@@ -592,6 +647,24 @@ class KnowledgeBaseFactory:
         else:
             return None
 
+def refresh_web_documentation(knowledge_space: str, budget_manager=None, uri: str = "./data/lancedb") -> bool:
+    """Re-check the web documentation loaded into a knowledge space; only changed pages are re-embedded"""
+    from agno.embedder.sentence_transformer import SentenceTransformerEmbedder
+    
+    vector_db = EnhancedLanceDb(
+        knowledge_space=knowledge_space,
+        uri=uri,
+        embedder=SentenceTransformerEmbedder()
+    )
+    web_kb = WebDocumentationKnowledgeBase(
+        knowledge_space=knowledge_space,
+        vector_db=vector_db,
+        budget_manager=budget_manager
+    )
+    success = web_kb.refresh()
+    web_kb.fetcher.log_stats()
+    return success
+
 # Enhanced usage examples
 def load_react_documentation(project_name: str):
     """Example: Load React documentation for a project"""
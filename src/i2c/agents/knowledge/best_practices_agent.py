@@ -13,7 +13,7 @@ from i2c.cli.controller import canvas
 from builtins import llm_highest
 from agno.agent import Agent
 from i2c.agents.reflective.context_aware_operator import ContextAwareOperator, ValidationHook
-from i2c.db_utils import query_context, TABLE_CODE_CONTEXT
+from i2c.db_utils import query_context, TABLE_CODE_CONTEXT, get_project_id
 from i2c.workflow.modification.rag_retrieval import retrieve_context_for_step
 
 class BestPracticesAgent(ContextAwareOperator):
@@ -79,7 +79,10 @@ class BestPracticesAgent(ContextAwareOperator):
         try:
             # Retrieve RAG context - use the correct function signature
             step_stub = {"what": user_request}
-            code_context = retrieve_context_for_step(step_stub, db, self.embed_model)
+            code_context = retrieve_context_for_step(
+                step_stub, db, self.embed_model,
+                project_id=get_project_id(project_path) if project_path else None,
+            )
             if not code_context:
                 canvas.warning("No relevant code context found.")
                 code_context = []
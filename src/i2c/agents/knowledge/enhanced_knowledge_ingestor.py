@@ -1,15 +1,28 @@
 # Enhanced Knowledge Ingestion System
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple, Set
+from typing import Dict, Iterable, List, Any, Optional, Tuple, Set
 import hashlib
+import os
 import datetime as _dt
 import json
 import pickle
-from dataclasses import dataclass, asdict
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, asdict, fields
 from agno.embedder.sentence_transformer import SentenceTransformerEmbedder
 from i2c.agents.budget_manager import BudgetManagerAgent
 from i2c.cli.controller import canvas
-from i2c.db_utils import get_db_connection, add_knowledge_chunks, query_context, TABLE_KNOWLEDGE_BASE
+from i2c.db_utils import (
+    get_db_connection, add_knowledge_chunks, query_context, TABLE_KNOWLEDGE_BASE,
+    CONTENT_HASH_FIELD, sql_quote,
+)
+from i2c.agents.knowledge.ingestion_pipeline import ExtractedFile, IngestionPipeline, ingest_pdf
+from i2c.agents.knowledge.ingestion_stats import IngestionThroughput, get_ingestion_throughput
+from i2c.utils.knowledge_dedup import (
+    apply_section_sync, content_hash, dedup_stats, delete_sources, known_hashes, list_sources,
+    scan_source, sync_sections,
+)
 
 # Add this right after the existing imports in enhanced_knowledge_ingestor.py
 
@@ -51,6 +64,32 @@ class SimpleCostTracker:
     def complete_operation(self, success=True, final_result=None):
         pass  # Simplified
     
+SUPPORTED_EXTENSIONS = frozenset({
+    '.pdf', '.txt', '.md', '.markdown', '.rst', '.docx',
+    '.html', '.htm', '.json', '.csv', '.py', '.js', '.ts',
+    '.java', '.cpp', '.c', '.h', '.hpp', '.cs', '.go', '.rs'
+})
+
+IGNORED_DIRS = ("__pycache__", "node_modules", ".git", ".venv", ".pytest_cache", "dist", "build")
+
+
+def list_supported_files(
+    directory_path: Path,
+    recursive: bool = True,
+    extensions: Optional[Iterable[str]] = None
+) -> List[Path]:
+    """Supported files under a directory, excluding hidden and build directories"""
+    extensions = set(extensions or SUPPORTED_EXTENSIONS)
+    pattern = "**/*" if recursive else "*"
+    return sorted(
+        f for f in directory_path.glob(pattern)
+        if (f.is_file() and
+            f.suffix.lower() in extensions and
+            not any(part.startswith('.') for part in f.parts) and
+            not any(ignore in f.parts for ignore in IGNORED_DIRS))
+    )
+
+
 @dataclass
 class DocumentMetadata:
     """Enhanced metadata tracking for documents"""
@@ -66,98 +105,175 @@ class DocumentMetadata:
     knowledge_space: str = "default"
 
 class IntelligentKnowledgeCache:
-    """Smart caching system for knowledge ingestion"""
-    
-    def __init__(self, cache_file: Path = Path(".knowledge_cache.json")):
-        self.cache_file = cache_file
-        self._cache: Dict[str, DocumentMetadata] = {}
-        self._load_cache()
-    
-    def _load_cache(self):
-        """Load existing cache from disk"""
-        if self.cache_file.exists():
-            try:
-                with open(self.cache_file, 'r') as f:
-                    cache_data = json.load(f)
-                    self._cache = {
-                        key: DocumentMetadata(**value) 
-                        for key, value in cache_data.items()
-                    }
-                canvas.info(f"Loaded cache with {len(self._cache)} entries")
-            except Exception as e:
-                canvas.warning(f"Failed to load cache: {e}")
-                self._cache = {}
-    
-    def _save_cache(self):
-        """Save cache to disk"""
+    """
+    Smart caching system for knowledge ingestion.
+
+    Entries live in a SQLite database (WAL mode) and are updated row by row.
+    Writes are buffered and flushed in one transaction every
+    ``CACHE_FLUSH_ROWS`` entries or ``CACHE_FLUSH_SECONDS``, and on
+    ``flush()``. A crash loses at most the unflushed batch, which only means
+    those files are checked again; the store itself is never left
+    half-written. Files are hashed only when their size or mtime changed.
+    """
+
+    FLUSH_ROWS = int(os.getenv("I2C_KNOWLEDGE_CACHE_FLUSH_ROWS", "256"))
+    FLUSH_SECONDS = float(os.getenv("I2C_KNOWLEDGE_CACHE_FLUSH_SECONDS", "2.0"))
+    _FIELDS = [f.name for f in fields(DocumentMetadata)]
+
+    def __init__(self, cache_file: Path = Path(".knowledge_cache.db")):
+        self.cache_file = Path(cache_file).with_suffix(".db")
+        self._lock = threading.RLock()
+        self._pending: Dict[str, Optional[DocumentMetadata]] = {}  # None = delete
+        self._last_flush = time.monotonic()
+        self._stats = {"checks": 0, "stat_hits": 0, "hashed": 0, "flushes": 0}
+        self._hashes: Dict[str, Tuple[int, float, str]] = {}  # hashes computed by should_process_file
+        self._connection: Optional[sqlite3.Connection] = None
+        self._import_json(Path(cache_file).with_suffix(".json"))
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """The store, opened (and created) on first use"""
+        with self._lock:
+            if self._connection is None:
+                conn = sqlite3.connect(str(self.cache_file), check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                columns = ", ".join(f"{name} TEXT PRIMARY KEY" if name == "source_path" else name
+                                    for name in self._FIELDS)
+                with conn:
+                    conn.execute(f"CREATE TABLE IF NOT EXISTS documents ({columns})")
+                self._connection = conn
+            return self._connection
+
+    def _import_json(self, legacy_file: Path):
+        """One-time import of the JSON cache used by earlier versions"""
+        if not legacy_file.exists() or len(self):
+            return
         try:
-            cache_data = {
-                key: asdict(value) 
-                for key, value in self._cache.items()
-            }
-            with open(self.cache_file, 'w') as f:
-                json.dump(cache_data, f, indent=2)
+            with open(legacy_file, 'r') as f:
+                cache_data = json.load(f)
+            self._write({key: DocumentMetadata(**value) for key, value in cache_data.items()})
+            canvas.info(f"Imported {len(cache_data)} entries from {legacy_file}")
         except Exception as e:
-            canvas.error(f"Failed to save cache: {e}")
-    
+            canvas.warning(f"Failed to import cache {legacy_file}: {e}")
+
+    def __len__(self) -> int:
+        self.flush()
+        return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def _write(self, changes: Dict[str, Optional[DocumentMetadata]]):
+        placeholders = ", ".join("?" for _ in self._FIELDS)
+        upserts = [tuple(getattr(m, name) for name in self._FIELDS) for m in changes.values() if m is not None]
+        deletes = [(key,) for key, m in changes.items() if m is None]
+        with self._conn:  # one transaction: all of the batch or none of it
+            if deletes:
+                self._conn.executemany("DELETE FROM documents WHERE source_path = ?", deletes)
+            if upserts:
+                self._conn.executemany(f"INSERT OR REPLACE INTO documents VALUES ({placeholders})", upserts)
+
+    def _queue(self, key: str, metadata: Optional[DocumentMetadata]):
+        with self._lock:
+            self._pending[key] = metadata
+            if (len(self._pending) >= self.FLUSH_ROWS
+                    or time.monotonic() - self._last_flush >= self.FLUSH_SECONDS):
+                self.flush()
+
+    def flush(self):
+        """Write buffered changes in one transaction"""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._pending:
+                return
+            try:
+                self._write(self._pending)
+                self._pending.clear()
+                self._stats["flushes"] += 1
+            except Exception as e:
+                canvas.error(f"Failed to save cache: {e}")
+
     def should_process_file(self, file_path: Path) -> bool:
-        """Check if file needs processing based on metadata"""
+        """Check if file needs processing: size and mtime first, content hash only if they changed"""
         try:
+            self._stats["checks"] += 1
+            cached_meta = self.get_cached_metadata(file_path)
+            if cached_meta is None:
+                return True
+
             stat = file_path.stat()
-            file_hash = self._compute_file_hash(file_path)
-            cache_key = str(file_path)
-            
-            if cache_key not in self._cache:
+            if cached_meta.file_size == stat.st_size and cached_meta.last_modified == stat.st_mtime:
+                self._stats["stat_hits"] += 1
+                return False
+            if cached_meta.file_size != stat.st_size:
                 return True
-            
-            cached_meta = self._cache[cache_key]
-            
-            # Check if file has changed
-            if (cached_meta.file_hash != file_hash or 
-                cached_meta.last_modified != stat.st_mtime or
-                cached_meta.file_size != stat.st_size):
+
+            # Same size, new mtime: only a content change needs reprocessing
+            if self.file_hash(file_path) != cached_meta.file_hash:
                 return True
-                
+            cached_meta.last_modified = stat.st_mtime
+            self._queue(str(file_path), cached_meta)
             return False
-            
+
         except Exception as e:
             canvas.warning(f"Error checking file {file_path}: {e}")
             return True  # Process if we can't determine
-    
+
+    def file_hash(self, file_path: Path) -> str:
+        """Content hash, reusing one computed for an unchanged size and mtime"""
+        stat = file_path.stat()
+        size, mtime, digest = self._hashes.get(str(file_path), (None, None, None))
+        if (size, mtime) != (stat.st_size, stat.st_mtime):
+            self._stats["hashed"] += 1
+            digest = self._compute_file_hash(file_path)
+            self._hashes[str(file_path)] = (stat.st_size, stat.st_mtime, digest)
+        return digest
+
     def mark_processed(self, file_path: Path, metadata: DocumentMetadata):
         """Mark file as processed in cache"""
-        self._cache[str(file_path)] = metadata
-        self._save_cache()
-    
+        self._hashes.pop(str(file_path), None)
+        self._queue(str(file_path), metadata)
+
     def get_cached_metadata(self, file_path: Path) -> Optional[DocumentMetadata]:
         """Get cached metadata for a file"""
-        return self._cache.get(str(file_path))
-    
+        key = str(file_path)
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            row = self._conn.execute(
+                f"SELECT {', '.join(self._FIELDS)} FROM documents WHERE source_path = ?", (key,)
+            ).fetchone()
+        return DocumentMetadata(*row) if row else None
+
     def invalidate_file(self, file_path: Path):
         """Remove file from cache (force reprocessing)"""
-        cache_key = str(file_path)
-        if cache_key in self._cache:
-            del self._cache[cache_key]
-            self._save_cache()
-    
-    def cleanup_cache(self, valid_files: Set[Path]):
-        """Remove cache entries for files that no longer exist"""
+        self._queue(str(file_path), None)
+
+    def cleanup_cache(self, valid_files: Set[Path]) -> List[str]:
+        """Remove cache entries for files that no longer exist; returns removed keys"""
         valid_paths = {str(p) for p in valid_files}
-        to_remove = [key for key in self._cache.keys() if key not in valid_paths]
-        
-        for key in to_remove:
-            del self._cache[key]
-        
-        if to_remove:
-            canvas.info(f"Cleaned up {len(to_remove)} stale cache entries")
-            self._save_cache()
-    
+        with self._lock:
+            self.flush()
+            keys = [row[0] for row in self._conn.execute("SELECT source_path FROM documents")]
+            to_remove = [key for key in keys if key not in valid_paths]
+            if to_remove:
+                self._write({key: None for key in to_remove})
+                canvas.info(f"Cleaned up {len(to_remove)} stale cache entries")
+        return to_remove
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock, self._conn:
+            self._pending.clear()
+            self._conn.execute("DELETE FROM documents")
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "pending": len(self._pending)}
+
     @staticmethod
     def _compute_file_hash(file_path: Path) -> str:
         """Compute SHA-256 hash of file content"""
         hasher = hashlib.sha256()
         with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(8192), b''):
+            for chunk in iter(lambda: f.read(1 << 20), b''):
                 hasher.update(chunk)
         return hasher.hexdigest()
 
@@ -170,6 +286,7 @@ class EnhancedKnowledgeIngestorAgent(ContextAwareOperator):
         knowledge_space: str = "default",
         embed_model=None,
         cache_file: Optional[Path] = None,
+        throughput: Optional[IngestionThroughput] = None,
         **kwargs
     ):
         super().__init__(
@@ -182,15 +299,19 @@ class EnhancedKnowledgeIngestorAgent(ContextAwareOperator):
         self.embed_model = embed_model or SentenceTransformerEmbedder()
         
         # Initialize intelligent cache
-        cache_path = cache_file or Path(f".knowledge_cache_{knowledge_space}.json")
+        cache_path = cache_file or Path(f".knowledge_cache_{knowledge_space}.db")
         self.cache = IntelligentKnowledgeCache(cache_path)
+
+        # Measured throughput, used to plan each ingestion and updated by it
+        # (the process-wide store at STATS_PATH unless one is given)
+        self.throughput = throughput if throughput is not None else get_ingestion_throughput()
+
+        # Extraction pool shared by successive runs (set by the ingestion queue
+        # for the duration of a job); None starts workers per run
+        self.pool = None
         
         # Supported file types
-        self.supported_extensions = {
-            '.pdf', '.txt', '.md', '.markdown', '.rst', '.docx',
-            '.html', '.htm', '.json', '.csv', '.py', '.js', '.ts',
-            '.java', '.cpp', '.c', '.h', '.hpp', '.cs', '.go', '.rs'
-        }
+        self.supported_extensions = set(SUPPORTED_EXTENSIONS)
     
     def execute(
         self,
@@ -230,7 +351,8 @@ class EnhancedKnowledgeIngestorAgent(ContextAwareOperator):
                 "skipped_files": 0,
                 "chunks_created": 0,
                 "cache_hits": 0,
-                "errors": []
+                "errors": [],
+                "failed_paths": []
             }
             
             if document_path.is_dir():
@@ -256,6 +378,8 @@ class EnhancedKnowledgeIngestorAgent(ContextAwareOperator):
             canvas.error(f"Error in document ingestion: {e}")
             self.cost_tracker.end_phase(success=False, feedback=str(e))
             return False, {"error": str(e), "document_path": str(document_path)}
+        finally:
+            self.cache.flush()
     
     def _process_directory(
         self,
@@ -275,37 +399,74 @@ class EnhancedKnowledgeIngestorAgent(ContextAwareOperator):
                 if f.exists() and f.is_file() and directory_path in f.parents
             ]
         else:
-            pattern = "**/*" if recursive else "*"
-            all_files = list(directory_path.glob(pattern))
-            
-            # Filter to supported file types and exclude system directories
-            files_to_process = [
-                f for f in all_files
-                if (f.is_file() and 
-                    f.suffix.lower() in self.supported_extensions and
-                    not any(part.startswith('.') for part in f.parts) and
-                    not any(ignore in f.parts for ignore in [
-                        "__pycache__", "node_modules", ".git", ".venv", 
-                        ".pytest_cache", "dist", "build"
-                    ]))
-            ]
+            files_to_process = self.list_files(directory_path, recursive)
         
         canvas.info(f"Found {len(files_to_process)} supported files in {directory_path}")
         
-        # Cleanup cache for files that no longer exist
+        # Cleanup cache and stored chunks for files that no longer exist
         if not selected_files:  # Only cleanup when processing entire directory
             valid_files = set(files_to_process)
             self.cache.cleanup_cache(valid_files)
+            removed = self.collect_garbage(directory_path, valid_files)
+            result_stats["chunks_removed"] = result_stats.get("chunks_removed", 0) + removed
         
-        # Process each file
+        # Check each file, then stream the ones that need work through the pipeline
+        to_ingest = []
         for file_path in files_to_process:
             try:
                 result_stats["processed_files"] += 1
-                self._process_file(file_path, document_type, metadata, result_stats, force_refresh)
+                if self._should_ingest(file_path, document_type, result_stats, force_refresh):
+                    to_ingest.append(file_path)
             except Exception as e:
                 result_stats["failed_files"] += 1
+                result_stats["failed_paths"].append(str(file_path))
                 result_stats["errors"].append(f"Error processing {file_path}: {e}")
                 canvas.error(f"Error processing {file_path}: {e}")
+        self._ingest_files(to_ingest, document_type, metadata, result_stats, force_refresh)
+    
+    def list_files(self, directory_path: Path, recursive: bool = True) -> List[Path]:
+        """Supported files under a directory, excluding hidden and build directories"""
+        return list_supported_files(directory_path, recursive, self.supported_extensions)
+    
+    def collect_garbage(self, directory_path: Path, live_files: Set[Path]) -> int:
+        """
+        Delete knowledge chunks whose source file under ``directory_path`` is gone.
+        
+        Diffs the sources indexed in this knowledge space against the live
+        files and removes orphans in batches. Returns the number of rows removed.
+        """
+        prefix = os.path.join(str(directory_path), "")
+        live = {str(p) for p in live_files}
+        try:
+            db = get_db_connection()
+            if db is None or TABLE_KNOWLEDGE_BASE not in db.table_names():
+                return 0
+            scope = f"knowledge_space = {sql_quote(self.knowledge_space)}"
+            orphans = [
+                src for src in list_sources(db, scope)
+                if src.startswith(prefix) and src not in live
+            ]
+            removed = delete_sources(db, orphans, scope=scope)
+            if orphans:
+                canvas.info(f"Removed {removed} chunks from {len(orphans)} deleted sources")
+            return removed
+        except Exception as e:
+            canvas.warning(f"Knowledge garbage collection failed: {e}")
+            return 0
+    
+    def remove_sources(self, paths: List[Path]) -> int:
+        """Tombstone deleted/renamed sources from a change feed: drop their chunks and cache entries"""
+        for path in paths:
+            self.cache.invalidate_file(path)
+        try:
+            db = get_db_connection()
+            if db is None or TABLE_KNOWLEDGE_BASE not in db.table_names():
+                return 0
+            scope = f"knowledge_space = {sql_quote(self.knowledge_space)}"
+            return delete_sources(db, [str(p) for p in paths], scope=scope)
+        except Exception as e:
+            canvas.warning(f"Failed to remove sources: {e}")
+            return 0
     
     def _process_file(
         self,
@@ -316,28 +477,46 @@ class EnhancedKnowledgeIngestorAgent(ContextAwareOperator):
         force_refresh: bool
     ) -> None:
         """Process a single file with intelligent caching"""
+        if self._should_ingest(file_path, document_type, result_stats, force_refresh):
+            self._ingest_files([file_path], document_type, metadata, result_stats, force_refresh)
+
+    def _should_ingest(
+        self,
+        file_path: Path,
+        document_type: str,
+        result_stats: Dict[str, Any],
+        force_refresh: bool
+    ) -> bool:
+        """Cache, database and budget checks before a file enters the pipeline"""
         
         # Check cache first (unless force refresh)
         if not force_refresh and not self.cache.should_process_file(file_path):
             canvas.info(f"Skipping {file_path.name} (cached, unchanged)")
             result_stats["skipped_files"] += 1
             result_stats["cache_hits"] += 1
-            return
+            return False
         
-        # Additional database check for hash-based deduplication
-        if not force_refresh:
+        # Additional database check for hash-based deduplication; a PDF may be
+        # stored in part (it is committed page by page) and resumes instead
+        if not force_refresh and file_path.suffix.lower() != ".pdf":
             try:
-                file_hash = self.cache._compute_file_hash(file_path)
+                file_hash = self.cache.file_hash(file_path)
                 db = get_db_connection()
                 if db:
                     try:
-                        table = db.open_table(TABLE_KNOWLEDGE_BASE)
-                        existing = table.search().where(
-                            f"source_hash = '{file_hash}' AND knowledge_space = '{self.knowledge_space}'"
-                        ).limit(1).to_pandas()
+                        space = f"knowledge_space = {sql_quote(self.knowledge_space)}"
+                        # Rows of the file at other versions mean an update that did not finish
+                        stored = set(scan_source(db, str(file_path), ["source_hash"], scope=space)["source_hash"])
+                        if stored:
+                            existing = stored == {file_hash}
+                        else:
+                            table = db.open_table(TABLE_KNOWLEDGE_BASE)
+                            existing = not table.search().where(
+                                f"source_hash = {sql_quote(file_hash)} AND {space}"
+                            ).limit(1).to_pandas().empty
                     except:
-                        existing = None
-                    if existing is not None and not existing.empty:
+                        existing = False
+                    if existing:
                         canvas.info(f"Skipping {file_path.name} (already in database)")
                         result_stats["skipped_files"] += 1
                         
@@ -352,77 +531,160 @@ class EnhancedKnowledgeIngestorAgent(ContextAwareOperator):
                             knowledge_space=self.knowledge_space
                         )
                         self.cache.mark_processed(file_path, cached_meta)
-                        return
+                        return False
             except Exception as e:
                 canvas.warning(f"Database check failed for {file_path}: {e}")
         
         # Budget approval
         if self.budget_manager and not self.budget_manager.request_approval(
-            description=f"Ingest file: {file_path.name}",
+            description=f"Ingest file: {file_path.name} ({self.throughput.estimate([file_path]).describe()})",
             prompt=f"Process {file_path.name} for knowledge base",
             model_id="knowledge_ingestor"
         ):
             canvas.warning(f"Budget denied for file: {file_path}")
             result_stats["skipped_files"] += 1
-            return
+            return False
 
-        try:
-            # Process the file
-            chunks = self._extract_and_embed_chunks(file_path, document_type, metadata)
-            
-            if not chunks:
-                canvas.warning(f"No content extracted from {file_path}")
+        return True
+
+    def _ingest_files(
+        self,
+        files: List[Path],
+        document_type: str,
+        metadata: Dict[str, Any],
+        result_stats: Dict[str, Any],
+        force_refresh: bool = False
+    ) -> None:
+        """Run files through the staged extract/embed/commit pipeline"""
+        if not files:
+            return
+        db = get_db_connection()
+        if db is None:  # an empty connection is falsy
+            for file_path in files:
                 result_stats["failed_files"] += 1
-                return
-            
-            # Save to database
-            db = get_db_connection()
-            if not db:
-                raise RuntimeError("Database connection failed")
+                result_stats["failed_paths"].append(str(file_path))
+                result_stats["errors"].append(f"Error processing {file_path}: database connection failed")
+            return
+
+        def make_row(extracted: ExtractedFile, index: int, text: str, vector: Optional[List[float]]) -> Dict[str, Any]:
+            return self._create_raw_chunk(text, Path(extracted.path), index, extracted.file_hash,
+                                          metadata, document_type, vector=vector)
+
+        def write(rows: List[Dict[str, Any]], new_sources: List[str]) -> bool:
+            # Re-ingested files replace their previous chunks
+            if new_sources:
+                delete_sources(db, new_sources, scope=f"knowledge_space = {sql_quote(self.knowledge_space)}")
+            return add_knowledge_chunks(db, rows, self.knowledge_space)
+
+        synced_files: Dict[str, Any] = {}  # path -> sync applied once its new sections are committed
 
-            canvas.info(f"🔍 DEBUG: About to add {len(chunks)} chunks to database")
-            canvas.info(f"🔍 DEBUG: First chunk preview: {chunks[0].get('content', '')[:100] if chunks else 'No chunks'}...")
+        def sync(extracted: ExtractedFile) -> Optional[List[int]]:
+            # A re-ingested file only embeds the sections (chunks) whose text is new;
+            # kept sections take the new metadata, but not the content or usage
+            sections = []
+            for i, text in enumerate(extracted.texts):
+                row = make_row(extracted, i, text, None)
+                sections.append({CONTENT_HASH_FIELD: content_hash(text), **{
+                    k: v for k, v in row.items()
+                    if k not in ("source", "content", "vector", "knowledge_space", "usage_frequency")
+                }})
+            synced = sync_sections(db, extracted.path, sections, self.knowledge_space)
+            if synced is None:
+                return None
+            synced_files[extracted.path] = synced
+            canvas.info(
+                f"Updating {Path(extracted.path).name}: {len(synced.added)} new or changed sections, "
+                f"{synced.kept} unchanged ({synced.moved} moved), {synced.removed} removed"
+            )
+            result_stats["sections_unchanged"] = result_stats.get("sections_unchanged", 0) + synced.kept
+            result_stats["sections_removed"] = result_stats.get("sections_removed", 0) + synced.removed
+            return synced.added
 
-            success = add_knowledge_chunks(db, chunks, self.knowledge_space)
+        def on_done(extracted: ExtractedFile, chunk_count: int) -> None:
+            synced = synced_files.pop(extracted.path, None)
+            if synced is not None:
+                # The new sections are committed: drop the replaced ones, refresh the kept ones
+                try:
+                    apply_section_sync(db, extracted.path, self.knowledge_space, synced)
+                except Exception as e:
+                    self._mark_failed(extracted.path, f"updating stored sections failed: {e}", result_stats)
+                    return
+            self._mark_done(extracted, chunk_count, document_type, metadata, result_stats)
 
-            canvas.info(f"🔍 DEBUG: add_knowledge_chunks returned: {success}")
+        def on_failed(path: str, error: str) -> None:
+            synced_files.pop(path, None)
+            self._mark_failed(path, error, result_stats)
 
-            # Verify chunks were actually added
+        def discard(extracted: ExtractedFile) -> None:
+            # The rows a failed file committed carry its new hash (a stored version being synced does not)
+            scope = f"knowledge_space = {sql_quote(self.knowledge_space)} AND source_hash = {sql_quote(extracted.file_hash)}"
+            delete_sources(db, [extracted.path], scope=scope)
+
+        # PDFs are streamed page by page, so an interrupted PDF resumes after
+        # its last committed page instead of starting over (unless forced)
+        saved_before = dedup_stats.stats()
+        pdfs = [f for f in files if Path(f).suffix.lower() == ".pdf"]
+        for pdf in pdfs:
             try:
-                from i2c.db_utils import TABLE_KNOWLEDGE_BASE
-                kb_table = db.open_table(TABLE_KNOWLEDGE_BASE)
-                df_after = kb_table.to_pandas()
-                canvas.info(f"🔍 DEBUG: Database rows after ingestion: {len(df_after)}")
+                stat = Path(pdf).stat()
+                file_hash = self.cache.file_hash(Path(pdf))
+                chunk_count = ingest_pdf(str(pdf), document_type, self.knowledge_space, self.embed_model, db,
+                                         metadata=metadata, pool=self.pool, force_refresh=force_refresh)
             except Exception as e:
-                canvas.error(f"🔍 DEBUG: Failed to verify ingestion: {e}")
-
-            if success:
-                canvas.success(f"Successfully ingested: {file_path.name} ({len(chunks)} chunks)")
-                result_stats["successful_files"] += 1
-                result_stats["chunks_created"] += len(chunks)                
-                # Update cache
-                stat = file_path.stat()
-                file_hash = self.cache._compute_file_hash(file_path)
-                cached_meta = DocumentMetadata(
-                    source_path=str(file_path),
-                    file_hash=file_hash,
-                    file_size=stat.st_size,
-                    last_modified=stat.st_mtime,
-                    document_type=document_type,
-                    framework=metadata.get("framework", ""),
-                    version=metadata.get("version", ""),
-                    chunk_count=len(chunks),
-                    ingested_at=_dt.datetime.now().isoformat(),
-                    knowledge_space=self.knowledge_space
-                )
-                self.cache.mark_processed(file_path, cached_meta)
-            else:
-                raise RuntimeError("Failed to add chunks to database")
+                on_failed(str(pdf), f"{type(e).__name__}: {e}")
+                continue
+            on_done(ExtractedFile(path=str(pdf), file_hash=file_hash, size=stat.st_size, mtime=stat.st_mtime),
+                    chunk_count)
 
-        except Exception as e:
-            canvas.error(f"Error processing file {file_path}: {e}")
-            result_stats["failed_files"] += 1
-            result_stats["errors"].append(f"Error processing file: {e}")
+        files = [f for f in files if f not in pdfs]
+        if files:
+            # Predict time and memory from measured throughput, and size the pipeline by it
+            estimate = self.throughput.estimate(files)
+            canvas.info(f"[Ingest] Estimate: {estimate.describe()}")
+            result_stats["estimated_seconds"] = result_stats.get("estimated_seconds", 0) + estimate.seconds
+
+            stats = IngestionPipeline(
+                self.embed_model, make_row, write, on_done, on_failed,
+                workers=estimate.workers, embed_batch_size=estimate.embed_batch_size,
+                known_hashes=known_hashes(db, self.knowledge_space), sync=sync, discard=discard,
+                throughput=self.throughput, predicted_ms=estimate.seconds * 1000, pool=self.pool,
+            ).run(files)
+            canvas.info(
+                f"[Ingest] {stats['texts']} chunks from {stats['files']} files in {stats['commits']} commits "
+                f"(embed {stats['embed_ms']:.0f} ms, commit {stats['commit_ms']:.0f} ms, "
+                f"waiting on extraction {stats['extract_wait_ms']:.0f} ms, "
+                f"{stats['embeddings_skipped']} duplicate chunks not re-embedded, "
+                f"{stats['texts_unchanged']} unchanged sections kept)"
+            )
+        dedup = result_stats.setdefault("dedup", dict.fromkeys(saved_before, 0))
+        for key, value in dedup_stats.stats().items():
+            dedup[key] += value - saved_before[key]
+
+    def _mark_done(self, extracted: ExtractedFile, chunk_count: int, document_type: str,
+                   metadata: Dict[str, Any], result_stats: Dict[str, Any]) -> None:
+        """Count an ingested file and cache it as processed"""
+        canvas.success(f"Successfully ingested: {Path(extracted.path).name} ({chunk_count} chunks)")
+        result_stats["successful_files"] += 1
+        result_stats["chunks_created"] += chunk_count
+        self.cache.mark_processed(Path(extracted.path), DocumentMetadata(
+            source_path=extracted.path,
+            file_hash=extracted.file_hash,
+            file_size=extracted.size,
+            last_modified=extracted.mtime,
+            document_type=document_type,
+            framework=metadata.get("framework", ""),
+            version=metadata.get("version", ""),
+            chunk_count=chunk_count,
+            ingested_at=_dt.datetime.now().isoformat(),
+            knowledge_space=self.knowledge_space
+        ))
+
+    def _mark_failed(self, path: str, error: str, result_stats: Dict[str, Any]) -> None:
+        """Count a failed file"""
+        canvas.error(f"Error processing file {path}: {error}")
+        result_stats["failed_files"] += 1
+        result_stats["failed_paths"].append(path)
+        result_stats["errors"].append(f"Error processing {path}: {error}")
 
     def _extract_principles_from_text(self, text: str) -> List[str]:
         """Extract actionable principles from text"""
@@ -557,10 +819,9 @@ class EnhancedKnowledgeIngestorAgent(ContextAwareOperator):
         }
 
     def _create_raw_chunk(self, text: str, file_path: Path, chunk_id: int,
-                        file_hash: str, metadata: Dict[str, Any], document_type: str) -> Dict[str, Any]:
-        """Create the original raw text chunk"""
-        vector = self.embed_model.get_embedding(text)
-        
+                        file_hash: str, metadata: Dict[str, Any], document_type: str,
+                        vector: Optional[List[float]]) -> Dict[str, Any]:
+        """Create the original raw text chunk (``vector`` is None for a known duplicate)"""
         return {
             "source": str(file_path),
             "content": text,
@@ -582,193 +843,6 @@ class EnhancedKnowledgeIngestorAgent(ContextAwareOperator):
             "usage_frequency": 0,
         }
  
-    def _extract_and_embed_chunks(
-        self, 
-        file_path: Path, 
-        document_type: str, 
-        metadata: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
-        """Extract content and create embedding chunks"""
-        
-        canvas.info(f"🔍 DEBUG: Starting chunk extraction for {file_path}")
-        
-        # Handle different file types
-        if file_path.suffix.lower() == ".pdf":
-            canvas.info(f"🔍 DEBUG: Processing PDF file")
-            documents = self._process_pdf(file_path)
-            canvas.info(f"🔍 DEBUG: PDF processing returned {len(documents) if documents else 0} documents")
-        elif file_path.suffix.lower() in ['.md', '.markdown']:
-            documents = self._process_markdown(file_path)
-        elif file_path.suffix.lower() in ['.html', '.htm']:
-            documents = self._process_html(file_path)
-        elif file_path.suffix.lower() == '.json':
-            documents = self._process_json(file_path)
-        else:
-            documents = self._process_text(file_path)
-        
-        if not documents:
-            canvas.warning(f"🔍 DEBUG: No documents extracted from {file_path}")
-            return []
-        
-        # Create chunks with embeddings
-        chunks = []
-        file_hash = self.cache._compute_file_hash(file_path)
-        
-        canvas.info(f"🔍 DEBUG: Creating chunks for {len(documents)} documents")
-        
-        for i, doc in enumerate(documents):
-            # Add safety limit to prevent infinite loops
-            if i > 100:
-                canvas.warning(f"🔍 DEBUG: Hit document limit, stopping at {i}")
-                break
-                
-            text = getattr(doc, 'content', str(doc))
-            if not text.strip():
-                canvas.info(f"🔍 DEBUG: Skipping empty document {i}")
-                continue
-            
-            canvas.info(f"🔍 DEBUG: Processing document {i+1}/{min(len(documents), 100)}")
-            
-            try:
-                # Create embedding for this chunk
-                canvas.info(f"🔍 DEBUG: Creating embedding for document {i}")
-                vector = self.embed_model.get_embedding(text)
-                canvas.info(f"🔍 DEBUG: Embedding created successfully for document {i}")
-                
-                # Create single chunk (simplified - no multiple types)
-                chunk = {
-                    "source": str(file_path),
-                    "content": text,
-                    "vector": vector,
-                    "category": document_type,
-                    "last_updated": _dt.datetime.now().isoformat(),
-                    "knowledge_space": self.knowledge_space,
-                    "document_type": "raw",
-                    "framework": metadata.get("framework", ""),
-                    "version": metadata.get("version", ""),
-                    "parent_doc_id": "",
-                    "chunk_type": f"raw_{i}",
-                    "source_hash": file_hash,
-                    "metadata_json": json.dumps(metadata),
-                    "knowledge_type": "raw",
-                    "application_context": "general_reference",
-                    "confidence_score": 0.7,
-                    "usage_frequency": 0,
-                }
-                
-                chunks.append(chunk)
-                canvas.info(f"🔍 DEBUG: Added chunk {i} to collection")
-                
-            except Exception as e:
-                canvas.error(f"🔍 DEBUG: Error creating chunk {i}: {e}")
-                continue
-        
-        canvas.info(f"🔍 DEBUG: Finished creating {len(chunks)} chunks")
-        return chunks
-
-    def _process_pdf(self, file_path: Path):
-        """Process PDF files"""
-        try:
-            from agno.document.reader.pdf_reader import PDFReader
-            reader = PDFReader(chunk=True)
-            return reader.read(str(file_path))
-        except ImportError:
-            canvas.warning(f"PDF processing not available for {file_path}")
-            return []
-    
-    def _process_markdown(self, file_path: Path):
-        """Process Markdown files with section splitting"""
-        from agno.document.base import Document
-        
-        try:
-            content = file_path.read_text(encoding="utf-8", errors="ignore")
-            
-            # Split by headers for better chunking
-            sections = self._split_markdown_by_headers(content)
-            
-            documents = []
-            for i, section in enumerate(sections):
-                if section.strip():
-                    documents.append(Document(
-                        content=section,
-                        name=f"{file_path.stem}_section_{i}"
-                    ))
-            
-            return documents
-        except Exception as e:
-            canvas.error(f"Error processing markdown {file_path}: {e}")
-            return []
-    
-    def _process_html(self, file_path: Path):
-        """Process HTML files"""
-        from agno.document.base import Document
-        
-        try:
-            content = file_path.read_text(encoding="utf-8", errors="ignore")
-            
-            # Basic HTML text extraction (you might want to use BeautifulSoup)
-            import re
-            # Remove script and style content
-            content = re.sub(r'<script[^>]*>.*?</script>', '', content, flags=re.DOTALL)
-            content = re.sub(r'<style[^>]*>.*?</style>', '', content, flags=re.DOTALL)
-            # Remove HTML tags
-            content = re.sub(r'<[^>]+>', '', content)
-            # Clean up whitespace
-            content = re.sub(r'\s+', ' ', content).strip()
-            
-            if content:
-                return [Document(content=content, name=file_path.stem)]
-            return []
-        except Exception as e:
-            canvas.error(f"Error processing HTML {file_path}: {e}")
-            return []
-    
-    def _process_json(self, file_path: Path):
-        """Process JSON files"""
-        from agno.document.base import Document
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Convert JSON to readable text
-            content = json.dumps(data, indent=2, ensure_ascii=False)
-            return [Document(content=content, name=file_path.stem)]
-        except Exception as e:
-            canvas.error(f"Error processing JSON {file_path}: {e}")
-            return []
-    
-    def _process_text(self, file_path: Path):
-        """Process plain text files"""
-        from agno.document.base import Document
-        
-        try:
-            content = file_path.read_text(encoding="utf-8", errors="ignore")
-            if content.strip():
-                return [Document(content=content, name=file_path.stem)]
-            return []
-        except Exception as e:
-            canvas.error(f"Error processing text {file_path}: {e}")
-            return []
-    
-    def _split_markdown_by_headers(self, content: str) -> List[str]:
-        """Split markdown content by headers for better chunking"""
-        lines = content.split('\n')
-        sections = []
-        current_section = []
-        
-        for line in lines:
-            if line.startswith('#') and current_section:
-                sections.append('\n'.join(current_section))
-                current_section = [line]
-            else:
-                current_section.append(line)
-        
-        if current_section:
-            sections.append('\n'.join(current_section))
-        
-        return sections
-    
     def _print_processing_summary(self, stats: Dict[str, Any]):
         """Print a summary of processing results"""
         canvas.info("=" * 50)
@@ -780,6 +854,13 @@ class EnhancedKnowledgeIngestorAgent(ContextAwareOperator):
         canvas.info(f"⏭️ Skipped: {stats['skipped_files']}")
         canvas.info(f"🎯 Cache hits: {stats['cache_hits']}")
         canvas.info(f"📦 Chunks created: {stats['chunks_created']}")
+        dedup = stats.get("dedup")
+        if dedup and (dedup["duplicate_rows"] or dedup["embeddings_skipped"]):
+            canvas.info(
+                f"♻️ Duplicates: {dedup['duplicate_rows']} stored as references "
+                f"(~{dedup['bytes_saved'] / 1024:.0f} KiB), {dedup['embeddings_skipped']} not re-embedded "
+                f"(~{dedup['embed_ms_saved'] / 1000:.1f}s)"
+            )
         
         if stats['errors']:
             canvas.info(f"⚠️ Errors encountered: {len(stats['errors'])}")
@@ -794,8 +875,7 @@ class EnhancedKnowledgeIngestorAgent(ContextAwareOperator):
             self.cache.invalidate_file(file_path)
             canvas.info(f"Cache invalidated for {file_path}")
         else:
-            self.cache._cache.clear()
-            self.cache._save_cache()
+            self.cache.clear()
             canvas.info("All cache entries invalidated")
 
 # Utility functions for easy usage
@@ -813,14 +893,26 @@ def batch_ingest_documentation(
     docs_path: Path,
     knowledge_space: str = "default",
     document_type: str = "documentation",
-    force_refresh: bool = False
+    force_refresh: bool = False,
+    background: bool = False
 ) -> Tuple[bool, Dict]:
-    """Convenience function for batch ingestion"""
-    ingestor = create_knowledge_ingestor(knowledge_space)
-    
-    return ingestor.execute(
-        document_path=docs_path,
-        document_type=document_type,
-        force_refresh=force_refresh,
-        recursive=True
-    )
\ No newline at end of file
+    """
+    Convenience function for batch ingestion, run as a resumable queue job.
+    With ``background`` the job is only started and ``(True, {"job_id", "status"})``
+    is returned; progress is checkpointed either way.
+    """
+    from i2c.agents.knowledge.ingestion_queue import DONE, PAUSED, get_ingestion_queue
+
+    queue = get_ingestion_queue()
+    try:
+        job = queue.enqueue(docs_path, knowledge_space, document_type, force_refresh=force_refresh)
+    except ValueError as e:  # the same folder is being ingested with other settings
+        return False, {"error": str(e), "document_path": str(docs_path)}
+    if background:
+        queue.start_background()
+        return True, {"job_id": job.id, "status": job.status}
+
+    job = queue.run_job(job.id)
+    if not job.finished and job.status != PAUSED:  # retries pending, or run by another worker
+        job = queue.wait([job.id])[0]
+    return job.status == DONE, {**job.stats, "job_id": job.id, "status": job.status}
\ No newline at end of file
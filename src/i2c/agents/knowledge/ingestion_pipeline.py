@@ -0,0 +1,549 @@
+# agents/knowledge/ingestion_pipeline.py
+"""Staged document ingestion: extract -> embed -> commit.
+
+Extraction (parsing PDF, Markdown, HTML, JSON and text, plus hashing) is
+CPU-bound and runs in a process pool; results stream back in completion
+order, so embedding starts with the first finished file and memory holds
+only the files in flight. Texts from all files are embedded in batches
+through one encoder, and rows are written in batched commits. A file counts
+as ingested only once all of its rows are committed. PDFs are streamed by
+page range and committed as they go (``ingest_pdf``), so an interrupted PDF
+resumes after its last committed page. Given a throughput store, a run
+records the per-format rates it achieved (see ``ingestion_stats``).
+
+Each run starts its own worker processes unless it is given a ``pool``;
+``worker_pool`` creates one to share across runs, e.g. the batches of an
+ingestion job.
+
+Worker-side functions live at module level and only import what they need,
+so spawned workers start quickly.
+"""
+import contextlib
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    from i2c.cli.controller import canvas
+except ImportError:
+    class FallbackCanvas:
+        def info(self, msg):    print(f"[INFO_INGEST] {msg}")
+        def warning(self, msg): print(f"[WARN_INGEST] {msg}")
+        def error(self, msg):   print(f"[ERROR_INGEST] {msg}")
+    canvas = FallbackCanvas()
+
+INGEST_WORKERS = int(os.getenv("I2C_INGEST_WORKERS", str(min(4, os.cpu_count() or 1))))
+EMBED_BATCH_SIZE = int(os.getenv("I2C_EMBED_BATCH_SIZE", "64"))
+COMMIT_BATCH_ROWS = int(os.getenv("I2C_INGEST_COMMIT_ROWS", "512"))
+PDF_PAGES_PER_TASK = int(os.getenv("I2C_PDF_PAGES_PER_TASK", "25"))
+# Below this many files, starting worker processes costs more than it saves
+PARALLEL_MIN_FILES = 4
+
+
+@dataclass
+class ExtractedFile:
+    """Texts extracted from one file, with the identity used for caching."""
+    path: str
+    file_hash: str = ""
+    size: int = 0
+    mtime: float = 0.0
+    texts: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    pages: int = 0            # PDFs only
+    extract_ms: float = 0.0   # time spent hashing and extracting
+
+
+def worker_pool(workers: int = INGEST_WORKERS) -> ProcessPoolExecutor:
+    """An extraction pool; workers are started on first use."""
+    # spawn: forking a process that already holds model threads can deadlock
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _pool(pool: Optional[ProcessPoolExecutor], workers: int):
+    """The shared ``pool`` (left running), else a pool for this call only."""
+    return contextlib.nullcontext(pool) if pool is not None else worker_pool(workers)
+
+
+# --- Extraction (runs in worker processes) ---
+
+def hash_file(path: str) -> str:
+    """SHA-256 of the file content, read in blocks."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def split_markdown_by_headers(content: str) -> List[str]:
+    """Split markdown into sections, each starting at a header line."""
+    sections, current = [], []
+    for line in content.split("\n"):
+        if line.startswith("#") and current:
+            sections.append("\n".join(current))
+            current = [line]
+        else:
+            current.append(line)
+    if current:
+        sections.append("\n".join(current))
+    return sections
+
+
+def _read_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+def _extract_pdf(path: str) -> List[str]:
+    from agno.document.reader.pdf_reader import PDFReader
+    return [d.content for d in PDFReader(chunk=True).read(path)]
+
+
+def _extract_markdown(path: str) -> List[str]:
+    return split_markdown_by_headers(_read_text(path))
+
+
+def _extract_html(path: str) -> List[str]:
+    content = _read_text(path)
+    content = re.sub(r"<script[^>]*>.*?</script>", "", content, flags=re.DOTALL)
+    content = re.sub(r"<style[^>]*>.*?</style>", "", content, flags=re.DOTALL)
+    content = re.sub(r"<[^>]+>", "", content)
+    return [re.sub(r"\s+", " ", content).strip()]
+
+
+def _extract_json(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.dumps(json.load(f), indent=2, ensure_ascii=False)]
+
+
+EXTRACTORS: Dict[str, Callable[[str], List[str]]] = {
+    ".pdf": _extract_pdf,
+    ".md": _extract_markdown,
+    ".markdown": _extract_markdown,
+    ".html": _extract_html,
+    ".htm": _extract_html,
+    ".json": _extract_json,
+}
+
+
+def extract_file(path: str) -> ExtractedFile:
+    """Hash and extract one file; errors are returned, not raised."""
+    result = ExtractedFile(path=str(path))
+    start = time.perf_counter()
+    try:
+        stat = os.stat(path)
+        result.size, result.mtime = stat.st_size, stat.st_mtime
+        result.file_hash = hash_file(path)
+        ext = os.path.splitext(path)[1].lower()
+        extractor = EXTRACTORS.get(ext, lambda p: [_read_text(p)])
+        result.texts = [t for t in extractor(path) if t and t.strip()]
+        if ext == ".pdf":
+            result.pages = pdf_page_count(path)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.extract_ms = (time.perf_counter() - start) * 1000
+    return result
+
+
+def iter_extracted(
+    paths: Iterable[str],
+    workers: int = INGEST_WORKERS,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> Iterator[ExtractedFile]:
+    """
+    Extract files in a process pool (``pool``, or one for this call),
+    yielding each as soon as it finishes. At most ``2 * workers`` files are
+    in flight, so memory stays bounded however many files are queued. Small
+    batches are extracted inline.
+    """
+    paths = [str(p) for p in paths]
+    if workers <= 1 or len(paths) < PARALLEL_MIN_FILES:
+        for path in paths:
+            yield extract_file(path)
+        return
+
+    with _pool(pool, workers) as pool:
+        queue = iter(paths)
+        pending = set()
+        for path in queue:
+            pending.add(pool.submit(extract_file, path))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                nxt = next(queue, None)
+                if nxt is not None:
+                    pending.add(pool.submit(extract_file, nxt))
+
+
+def pdf_page_count(path: str) -> int:
+    from pypdf import PdfReader
+    return len(PdfReader(path).pages)
+
+
+def extract_pdf_pages(path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """Text of pages ``start..stop-1`` as ``(page_number, text)``, 1-based; unreadable pages are skipped."""
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    pages = []
+    for i in range(start, min(stop, len(reader.pages))):
+        try:
+            pages.append((i + 1, reader.pages[i].extract_text() or ""))
+        except Exception as e:
+            pages.append((i + 1, ""))
+            canvas.warning(f"Error extracting page {i + 1} of {path}: {e}")
+    return pages
+
+
+def iter_pdf_pages(
+    path: str,
+    start: int = 0,
+    workers: int = INGEST_WORKERS,
+    pages_per_task: int = PDF_PAGES_PER_TASK,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> Iterator[List[Tuple[int, str]]]:
+    """
+    Extract a PDF from page index ``start`` in page ranges, yielding each
+    range in page order. Ranges are extracted in a process pool (``pool``,
+    or one for this call) with at most ``2 * workers`` in flight; a PDF of
+    a single range is extracted inline.
+    """
+    total = pdf_page_count(path)
+    ranges = [(i, min(i + pages_per_task, total)) for i in range(start, total, pages_per_task)]
+    if workers <= 1 or len(ranges) < 2:
+        for lo, hi in ranges:
+            yield extract_pdf_pages(path, lo, hi)
+        return
+
+    with _pool(pool, workers) as pool:
+        queue = iter(ranges)
+        in_flight = deque()
+        for lo, hi in queue:
+            in_flight.append(pool.submit(extract_pdf_pages, path, lo, hi))
+            if len(in_flight) >= 2 * workers:
+                break
+        while in_flight:
+            pages = in_flight.popleft().result()
+            nxt = next(queue, None)
+            if nxt is not None:
+                in_flight.append(pool.submit(extract_pdf_pages, path, *nxt))
+            yield pages
+
+
+# --- Embedding and commit (runs in the calling process) ---
+
+def ingest_pdf(
+    file_path: str,
+    document_type: str,
+    knowledge_space: str,
+    embed_model: Any,
+    db: Any,
+    metadata: Optional[Dict[str, Any]] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    pool: Optional[ProcessPoolExecutor] = None,
+    workers: int = INGEST_WORKERS,
+    force_refresh: bool = False,
+) -> int:
+    """
+    Stream a PDF into knowledge chunks, one chunk per page, and return the
+    number of chunks added.
+
+    Page ranges are extracted in a process pool, embedded in batches and
+    committed as they arrive, so memory holds one batch of vectors and
+    earlier pages are searchable while later ones are still processed.
+    A re-run for an unchanged file resumes after the last committed page;
+    rows from an older version of the file are replaced. ``force_refresh``
+    deletes every stored page of the file and starts over. ``progress`` is
+    called with ``(last_committed_page, page_count)`` after each commit.
+    Raises on failure; pages committed so far are kept for the next run.
+    """
+    from datetime import datetime
+
+    from i2c.db_utils import add_knowledge_chunks, sql_quote
+    from i2c.utils.knowledge_dedup import delete_sources, embed_unique, known_hashes, scan_source
+
+    file_path = str(file_path)
+    metadata = metadata or {}
+    file_hash = hash_file(file_path)
+    num_pages = pdf_page_count(file_path)
+    canvas.info(f"PDF has {num_pages} pages")
+
+    # Resume after the last page committed for this version of the file
+    # (in this knowledge space: the same file may be stored in others)
+    space = f"knowledge_space = {sql_quote(knowledge_space)}"
+    stale = space if force_refresh else f"{space} AND source_hash != {sql_quote(file_hash)}"
+    delete_sources(db, [file_path], scope=stale)
+    done = scan_source(db, file_path, columns=["chunk_type"], scope=space)
+    committed = [int(t[len("page_"):]) for t in done["chunk_type"] if t.startswith("page_")]
+    start = max(committed, default=0)
+    if start:
+        canvas.info(f"Resuming after page {start}/{num_pages}")
+
+    batch, added, committed_through = [], 0, start
+    known, embedded = known_hashes(db, knowledge_space), set()
+
+    def commit(pages, last_page):
+        nonlocal added, committed_through
+        # Pages already stored from another source are referenced, not re-embedded
+        vectors, _ = embed_unique(embed_model, [text for _, text in pages], known, embedded, EMBED_BATCH_SIZE)
+        chunks = [{
+            "source": file_path,
+            "content": text,
+            "vector": vector,
+            "category": document_type,
+            "last_updated": datetime.now().isoformat(),
+            "knowledge_space": knowledge_space,
+            "document_type": document_type,
+            "framework": metadata.get("framework", ""),
+            "version": metadata.get("version", ""),
+            "parent_doc_id": "",
+            "chunk_type": f"page_{page}",
+            "source_hash": file_hash,
+            "metadata_json": json.dumps(metadata, default=str),
+        } for (page, text), vector in zip(pages, vectors)]
+        if chunks and not add_knowledge_chunks(db, chunks, knowledge_space):
+            raise RuntimeError(f"failed to commit pages up to {last_page}")
+        added += len(chunks)
+        canvas.info(f"Committed pages {committed_through + 1}-{last_page}/{num_pages}")
+        committed_through = last_page
+        if progress:
+            progress(last_page, num_pages)
+
+    for pages in iter_pdf_pages(file_path, start=start, workers=workers, pool=pool):
+        # Skip empty pages
+        batch.extend((page, text) for page, text in pages if text and len(text.strip()) >= 10)
+        while len(batch) >= EMBED_BATCH_SIZE:
+            commit(batch[:EMBED_BATCH_SIZE], batch[EMBED_BATCH_SIZE - 1][0])
+            del batch[:EMBED_BATCH_SIZE]
+    if batch or committed_through < num_pages:
+        commit(batch, num_pages)
+    return added
+
+
+class IngestionPipeline:
+    """
+    Streams extracted files through batched embedding and batched commits.
+
+    ``make_row(extracted, index, text, vector)`` builds a table row and
+    ``write(rows, sources)`` commits rows (``sources`` are the files whose
+    rows appear in a commit for the first time, so stale rows can be
+    replaced). ``on_done(extracted, row_count)`` and ``on_failed(path,
+    error)`` report per-file outcomes; ``on_done`` runs only once the last
+    of a file's rows is committed. A file that fails leaves no rows behind:
+    its buffered rows are dropped and ``discard(extracted)`` removes those
+    already committed, so the next run ingests it again.
+
+    With ``known_hashes`` (content hashes -> those already stored), texts
+    that are stored already or were embedded earlier in the run are not
+    embedded again; their rows get ``vector=None`` and the writer stores
+    them as references.
+
+    Extraction uses ``pool`` when given, else worker processes started for
+    the run.
+
+    With a ``throughput`` store (``ingestion_stats.IngestionThroughput``)
+    the run records the rates it achieved per format, and its wall time
+    next to ``predicted_ms``.
+
+    ``sync(extracted)`` runs before a file's texts are embedded. It may match
+    the texts against the file's stored rows and return the indices of those
+    that still need embedding and writing; those rows are added to the
+    file's stored rows instead of replacing them, and ``on_done`` is where
+    the stored rows are brought up to date. Returning None writes the file
+    in full.
+    """
+
+    def __init__(
+        self,
+        embed_model: Any,
+        make_row: Callable[[ExtractedFile, int, str, List[float]], Dict[str, Any]],
+        write: Callable[[List[Dict[str, Any]], List[str]], bool],
+        on_done: Callable[[ExtractedFile, int], None],
+        on_failed: Callable[[str, str], None],
+        workers: int = INGEST_WORKERS,
+        embed_batch_size: int = EMBED_BATCH_SIZE,
+        commit_rows: int = COMMIT_BATCH_ROWS,
+        known_hashes: Optional[Callable[[List[str]], Set[str]]] = None,
+        sync: Optional[Callable[[ExtractedFile], Optional[List[int]]]] = None,
+        discard: Optional[Callable[[ExtractedFile], None]] = None,
+        throughput: Any = None,
+        predicted_ms: float = 0.0,
+        pool: Optional[ProcessPoolExecutor] = None,
+    ):
+        self.embed_model = embed_model
+        self.make_row = make_row
+        self.write = write
+        self.on_done = on_done
+        self.on_failed = on_failed
+        self.workers = workers
+        self.embed_batch_size = embed_batch_size
+        self.commit_rows = commit_rows
+        self.known_hashes = known_hashes
+        self.sync = sync
+        self.discard = discard
+        self.throughput = throughput
+        self.predicted_ms = predicted_ms
+        self.pool = pool
+        self.stats = {"files": 0, "texts": 0, "rows": 0, "commits": 0, "embeddings_skipped": 0,
+                      "texts_unchanged": 0, "extract_wait_ms": 0.0, "embed_ms": 0.0, "commit_ms": 0.0}
+
+    def _pending_texts(self, extracted: ExtractedFile) -> Optional[List[int]]:
+        if self.sync is None:
+            return None
+        try:
+            return self.sync(extracted)
+        except Exception as e:
+            canvas.warning(f"Incremental update of {extracted.path} failed, re-ingesting it in full: {e}")
+            return None
+
+    def run(self, paths: Iterable[str]) -> Dict[str, Any]:
+        from i2c.agents.knowledge.ingestion_stats import FileSample
+        from i2c.utils.knowledge_dedup import embed_unique
+
+        to_embed: List[tuple] = []      # (file, index, text) awaiting a batch
+        to_commit: List[Dict[str, Any]] = []
+        new_sources: List[str] = []
+        remaining: Dict[str, int] = {}  # texts not yet embedded, per file
+        uncommitted: Dict[str, int] = {}
+        committed: Dict[str, int] = {}  # rows written so far, per file
+        files: Dict[str, ExtractedFile] = {}
+        failed: set = set()
+        embedded_hashes: set = set()  # texts embedded in this run
+        samples: Dict[str, FileSample] = {}
+        paths = [str(p) for p in paths]
+        run_start = time.perf_counter()
+
+        def fail(path: str, error: str) -> None:
+            failed.add(path)
+            extracted = files.pop(path, None)
+            # Nothing of a failed file is kept: drop its buffered rows, remove the committed ones
+            to_commit[:] = [row for row in to_commit if row["source"] != path]
+            if path in new_sources:
+                new_sources.remove(path)
+            if committed.pop(path, 0) and self.discard is not None and extracted is not None:
+                try:
+                    self.discard(extracted)
+                except Exception as e:
+                    canvas.warning(f"Failed to remove the committed rows of {path}: {e}")
+            self.on_failed(path, error)
+
+        def finish(path: str) -> None:
+            if remaining.get(path) == 0 and uncommitted.get(path) == 0 and path not in failed:
+                extracted = files.pop(path)
+                self.on_done(extracted, len(extracted.texts))
+                remaining.pop(path), uncommitted.pop(path)
+
+        def commit() -> None:
+            if not to_commit:
+                return
+            start = time.perf_counter()
+            batch_paths = {row["source"] for row in to_commit}
+            try:
+                ok = self.write(list(to_commit), list(new_sources))
+                error = "write returned False"
+            except Exception as e:
+                ok, error = False, str(e)
+            self.stats["commit_ms"] += (time.perf_counter() - start) * 1000
+            self.stats["commits"] += 1
+            if ok:
+                self.stats["rows"] += len(to_commit)
+                for row in to_commit:
+                    uncommitted[row["source"]] -= 1
+                    committed[row["source"]] = committed.get(row["source"], 0) + 1
+            else:
+                for path in batch_paths - failed:
+                    fail(path, error)
+            to_commit.clear()
+            new_sources.clear()
+            for path in batch_paths:
+                if path in files:
+                    finish(path)
+
+        def embed() -> None:
+            if not to_embed:
+                return
+            try:
+                vectors, elapsed = embed_unique(self.embed_model, [t for _, _, t in to_embed],
+                                                self.known_hashes, embedded_hashes, self.embed_batch_size)
+            except Exception as e:
+                for path in {f.path for f, _, _ in to_embed} - failed:
+                    fail(path, f"embedding failed: {e}")
+                to_embed.clear()
+                return
+            self.stats["embed_ms"] += elapsed
+            self.stats["embeddings_skipped"] += vectors.count(None)
+            per_text = elapsed / max(1, len(vectors) - vectors.count(None))
+            for (extracted, index, text), vector in zip(to_embed, vectors):
+                if vector is not None:
+                    samples[extracted.path].embedded += 1
+                    samples[extracted.path].embed_ms += per_text
+                remaining[extracted.path] -= 1
+                if extracted.path in failed:
+                    continue
+                if extracted.path not in uncommitted:
+                    uncommitted[extracted.path] = 0
+                    new_sources.append(extracted.path)
+                uncommitted[extracted.path] += 1
+                to_commit.append(self.make_row(extracted, index, text, vector))
+            to_embed.clear()
+            if len(to_commit) >= self.commit_rows:
+                commit()
+
+        start = time.perf_counter()
+        for extracted in iter_extracted(paths, self.workers, self.pool):
+            self.stats["extract_wait_ms"] += (time.perf_counter() - start) * 1000
+            self.stats["files"] += 1
+            if extracted.error or not extracted.texts:
+                self.on_failed(extracted.path, extracted.error or "no content extracted")
+            else:
+                files[extracted.path] = extracted
+                samples[extracted.path] = FileSample(
+                    ext=os.path.splitext(extracted.path)[1].lower(), size=extracted.size,
+                    pages=extracted.pages, chunks=len(extracted.texts),
+                    text_bytes=sum(len(t.encode("utf-8")) for t in extracted.texts),
+                    extract_ms=extracted.extract_ms,
+                )
+                indices = self._pending_texts(extracted)
+                if indices is None:
+                    indices = range(len(extracted.texts))
+                else:
+                    uncommitted[extracted.path] = 0  # synced in place: rows are added, not replaced
+                    self.stats["texts_unchanged"] += len(extracted.texts) - len(indices)
+                remaining[extracted.path] = len(indices)
+                self.stats["texts"] += len(indices)
+                for index in indices:
+                    to_embed.append((extracted, index, extracted.texts[index]))
+                    if len(to_embed) >= self.embed_batch_size:
+                        embed()
+                if not indices:
+                    finish(extracted.path)
+            start = time.perf_counter()
+        embed()
+        commit()
+        self._record(paths, samples, (time.perf_counter() - run_start) * 1000)
+        return dict(self.stats)
+
+    def _record(self, paths: List[str], samples: Dict[str, Any], wall_ms: float) -> None:
+        if self.throughput is None or not samples:
+            return
+        from i2c.agents.knowledge.ingestion_stats import RunSample, peak_child_rss_mb
+        parallel = self.workers > 1 and len(paths) >= PARALLEL_MIN_FILES
+        try:
+            self.throughput.record(samples.values(), RunSample(
+                files=len(samples), bytes=sum(s.size for s in samples.values()), rows=self.stats["rows"],
+                workers=self.workers if parallel else 1, embed_batch_size=self.embed_batch_size,
+                embedded=sum(s.embedded for s in samples.values()), embed_ms=self.stats["embed_ms"],
+                commit_ms=self.stats["commit_ms"], wall_ms=wall_ms, predicted_ms=self.predicted_ms,
+                worker_peak_mb=peak_child_rss_mb() if parallel else 0.0,
+            ))
+        except Exception as e:
+            canvas.warning(f"Failed to record ingestion throughput: {e}")
@@ -0,0 +1,538 @@
+# agents/knowledge/ingestion_queue.py
+"""
+Persistent, resumable knowledge ingestion jobs.
+
+A job ingests a file or folder into a knowledge space. Jobs and their files
+are kept in a local SQLite database: the file list is recorded when a job
+starts, and every batch of files is checkpointed as it completes. A job
+interrupted by a crash or Ctrl-C resumes with the files that were not done.
+Failed files are retried with exponential backoff, up to ``MAX_ATTEMPTS``.
+All batches of a job share one extraction worker pool.
+
+Jobs run inline (``run_job``), from a bounded worker pool (``run``) or on
+a background thread (``start_background``), so a scenario can enqueue
+ingestion and carry on. ``python -m i2c.cli.ingest_jobs`` lists, pauses
+and resumes jobs.
+"""
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+try:
+    from i2c.cli.controller import canvas
+except ImportError:
+    class FallbackCanvas:
+        def info(self, msg):    print(f"[INFO_JOBS] {msg}")
+        def warning(self, msg): print(f"[WARN_JOBS] {msg}")
+        def error(self, msg):   print(f"[ERROR_JOBS] {msg}")
+        def success(self, msg): print(f"[SUCCESS_JOBS] {msg}")
+    canvas = FallbackCanvas()
+
+QUEUE_PATH = os.getenv("I2C_INGEST_QUEUE_PATH", "./data/ingest_jobs.db")
+JOB_CONCURRENCY = int(os.getenv("I2C_INGEST_JOB_CONCURRENCY", "2"))
+BATCH_FILES = int(os.getenv("I2C_INGEST_JOB_BATCH_FILES", "32"))
+MAX_ATTEMPTS = int(os.getenv("I2C_INGEST_MAX_ATTEMPTS", "3"))
+RETRY_BASE_SECONDS = float(os.getenv("I2C_INGEST_RETRY_BASE_SECONDS", "5"))
+RETRY_MAX_SECONDS = 300.0
+
+QUEUED, RUNNING, PAUSED, DONE, FAILED = "queued", "running", "paused", "done", "failed"
+PENDING = "pending"  # file status besides done/failed
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    knowledge_space TEXT NOT NULL,
+    document_type TEXT NOT NULL,
+    metadata_json TEXT NOT NULL DEFAULT '{}',
+    recursive INTEGER NOT NULL DEFAULT 1,
+    force_refresh INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    files_listed INTEGER NOT NULL DEFAULT 0,
+    owner_pid INTEGER,
+    error TEXT NOT NULL DEFAULT '',
+    stats_json TEXT NOT NULL DEFAULT '{}',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_files (
+    job_id INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    retry_at REAL NOT NULL DEFAULT 0,
+    error TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (job_id, path)
+);
+CREATE INDEX IF NOT EXISTS job_files_status ON job_files (job_id, status, retry_at);
+"""
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before retry number ``attempts`` (1-based): base * 2^(n-1), capped."""
+    return min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+
+
+@dataclass
+class IngestionJob:
+    id: int
+    path: str
+    knowledge_space: str
+    document_type: str
+    metadata: Dict[str, Any]
+    recursive: bool
+    force_refresh: bool
+    status: str
+    attempts: int = 0
+    next_attempt_at: float = 0.0
+    error: str = ""
+    stats: Dict[str, Any] = field(default_factory=dict)
+    files: Dict[str, int] = field(default_factory=dict)  # file status -> count
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == DONE
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # exists, owned by someone else
+
+
+def _merge_stats(total: Dict[str, Any], batch: Dict[str, Any]) -> None:
+    for key, value in batch.items():
+        if isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float)):
+            total[key] = total.get(key, 0) + value
+        elif key == "errors" and isinstance(value, list):
+            total["errors"] = (total.get("errors", []) + value)[-20:]
+        elif isinstance(value, dict):
+            _merge_stats(total.setdefault(key, {}), value)
+
+
+@contextlib.contextmanager
+def _job_pool(ingestor: Any) -> Iterator[None]:
+    """Give an ingestor that takes one (``pool``) an extraction pool for the whole job."""
+    if getattr(ingestor, "pool", False) is not None:
+        yield
+        return
+    from i2c.agents.knowledge.ingestion_pipeline import worker_pool
+    with worker_pool() as pool:
+        ingestor.pool = pool
+        try:
+            yield
+        finally:
+            ingestor.pool = None
+
+
+def _default_ingestor_factory(knowledge_space: str):
+    from i2c.agents.knowledge.enhanced_knowledge_ingestor import create_knowledge_ingestor
+    return create_knowledge_ingestor(knowledge_space)
+
+
+class IngestionQueue:
+    """Persistent ingestion job queue; safe to share between threads and processes."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ingestor_factory: Optional[Callable[[str], Any]] = None,
+        batch_files: int = BATCH_FILES,
+        max_attempts: int = MAX_ATTEMPTS,
+    ):
+        self.path = Path(path or QUEUE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ingestor_factory = ingestor_factory or _default_ingestor_factory
+        self.batch_files = batch_files
+        self.max_attempts = max_attempts
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False,
+                                     isolation_level=None)  # explicit transactions
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._background: Optional[threading.Thread] = None
+        self._recover()
+
+    # --- storage ---
+
+    def _tx(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+                self._conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _recover(self) -> None:
+        """Requeue jobs left running by a process that is gone."""
+        def recover(conn):
+            rows = conn.execute("SELECT id, owner_pid FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+            stale = [r["id"] for r in rows if r["owner_pid"] != os.getpid() and not _pid_alive(r["owner_pid"])]
+            for job_id in stale:
+                conn.execute("UPDATE jobs SET status = ?, owner_pid = NULL, updated_at = ? WHERE id = ?",
+                             (QUEUED, time.time(), job_id))
+            return stale
+        for job_id in self._tx(recover):
+            canvas.info(f"[Jobs] Resuming interrupted ingestion job {job_id}")
+
+    def _set(self, job_id: int, **values) -> None:
+        values["updated_at"] = time.time()
+        cols = ", ".join(f"{k} = ?" for k in values)
+        self._tx(lambda c: c.execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*values.values(), job_id)))
+
+    # --- API ---
+
+    def enqueue(
+        self,
+        path: Path,
+        knowledge_space: str,
+        document_type: str = "documentation",
+        metadata: Optional[Dict[str, Any]] = None,
+        recursive: bool = True,
+        force_refresh: bool = False,
+    ) -> IngestionJob:
+        """
+        Add a job, or return the unfinished job already ingesting ``path``
+        into ``knowledge_space``. If that job was enqueued with different
+        parameters it takes the new ones and starts over (its file list and
+        progress are dropped) unless it is running, which raises ValueError.
+        """
+        path = str(Path(path).expanduser().resolve())
+        params = {"document_type": document_type, "metadata_json": json.dumps(metadata or {}, default=str),
+                  "recursive": int(recursive), "force_refresh": int(force_refresh)}
+
+        def add(conn):
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE path = ? AND knowledge_space = ? AND status NOT IN (?, ?)",
+                (path, knowledge_space, DONE, FAILED),
+            ).fetchone()
+            now = time.time()
+            if row:
+                changed = sorted(k for k, v in params.items() if row[k] != v)
+                if not changed:
+                    return row["id"]
+                if row["status"] == RUNNING:
+                    raise ValueError(f"Ingestion job {row['id']} for {path} is running with different "
+                                     f"{', '.join(changed)}; pause it or wait for it to finish")
+                cols = ", ".join(f"{k} = ?" for k in params)
+                conn.execute(
+                    f"UPDATE jobs SET {cols}, status = ?, attempts = 0, next_attempt_at = 0, files_listed = 0, "
+                    "error = '', stats_json = '{}', updated_at = ? WHERE id = ?",
+                    (*params.values(), QUEUED, now, row["id"]),
+                )
+                conn.execute("DELETE FROM job_files WHERE job_id = ?", (row["id"],))
+                canvas.info(f"[Job {row['id']}] restarting with new {', '.join(changed)}")
+                return row["id"]
+            return conn.execute(
+                "INSERT INTO jobs (path, knowledge_space, document_type, metadata_json, recursive, "
+                "force_refresh, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, knowledge_space, *params.values(), QUEUED, now, now),
+            ).lastrowid
+        return self.get(self._tx(add))
+
+    def get(self, job_id: int) -> Optional[IngestionJob]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM job_files WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+        return IngestionJob(
+            id=row["id"], path=row["path"], knowledge_space=row["knowledge_space"],
+            document_type=row["document_type"], metadata=json.loads(row["metadata_json"]),
+            recursive=bool(row["recursive"]), force_refresh=bool(row["force_refresh"]),
+            status=row["status"], attempts=row["attempts"], next_attempt_at=row["next_attempt_at"],
+            error=row["error"], stats=json.loads(row["stats_json"]), files=counts,
+        )
+
+    def list(self, status: Optional[str] = None) -> List[IngestionJob]:
+        with self._lock:
+            if status:
+                ids = self._conn.execute("SELECT id FROM jobs WHERE status = ? ORDER BY id", (status,)).fetchall()
+            else:
+                ids = self._conn.execute("SELECT id FROM jobs ORDER BY id").fetchall()
+        return [self.get(r["id"]) for r in ids]
+
+    def pause(self, job_id: int) -> bool:
+        """Stop a job after its current batch; a queued job is held."""
+        return self._tx(lambda c: c.execute(
+            "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ? AND status IN (?, ?)",
+            (PAUSED, time.time(), job_id, QUEUED, RUNNING),
+        ).rowcount) == 1
+
+    def resume(self, job_id: int) -> bool:
+        """Requeue a paused or failed job; failed files get a fresh set of attempts."""
+        def resume(conn):
+            updated = conn.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, next_attempt_at = 0, error = '', updated_at = ? "
+                "WHERE id = ? AND status IN (?, ?)",
+                (QUEUED, time.time(), job_id, PAUSED, FAILED),
+            ).rowcount
+            if updated:
+                conn.execute("UPDATE job_files SET status = ?, attempts = 0, retry_at = 0 "
+                             "WHERE job_id = ? AND status = ?", (PENDING, job_id, FAILED))
+            return updated
+        return self._tx(resume) == 1
+
+    def runnable(self) -> List[int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? AND next_attempt_at <= ? ORDER BY id",
+                (QUEUED, time.time()),
+            ).fetchall()
+        return [r["id"] for r in rows]
+
+    # --- execution ---
+
+    def _claim(self, job_id: int) -> bool:
+        return self._tx(lambda c: c.execute(
+            "UPDATE jobs SET status = ?, owner_pid = ?, updated_at = ? WHERE id = ? AND status = ?",
+            (RUNNING, os.getpid(), time.time(), job_id, QUEUED),
+        ).rowcount) == 1
+
+    def _list_files(self, job: IngestionJob, ingestor: Any) -> None:
+        path = Path(job.path)
+        if path.is_dir():
+            from i2c.agents.knowledge.enhanced_knowledge_ingestor import list_supported_files
+            extensions = getattr(ingestor, "supported_extensions", None)
+            files = [str(f) for f in list_supported_files(
+                path, job.recursive, extensions if isinstance(extensions, (set, frozenset)) else None
+            )]
+        elif path.is_file():
+            files = [str(path)]
+        else:
+            raise FileNotFoundError(f"Document not found: {path}")
+
+        def record(conn):
+            conn.executemany("INSERT OR IGNORE INTO job_files (job_id, path) VALUES (?, ?)",
+                             [(job.id, f) for f in files])
+            conn.execute("UPDATE jobs SET files_listed = 1 WHERE id = ?", (job.id,))
+        self._tx(record)
+        canvas.info(f"[Job {job.id}] {len(files)} files to ingest from {path}")
+        from i2c.agents.knowledge.ingestion_stats import IngestionThroughput
+        throughput = getattr(ingestor, "throughput", None)
+        if isinstance(throughput, IngestionThroughput) and files:
+            canvas.info(f"[Job {job.id}] Estimate: {throughput.estimate(files).describe()}")
+
+    def _next_batch(self, job_id: int) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM job_files WHERE job_id = ? AND status = ? AND retry_at <= ? "
+                "ORDER BY attempts, path LIMIT ?",
+                (job_id, PENDING, time.time(), self.batch_files),
+            ).fetchall()
+        return [r["path"] for r in rows]
+
+    def _checkpoint(self, job_id: int, batch: List[str], failed: Dict[str, str], stats: Dict[str, Any]) -> None:
+        """Record a batch's outcome in one transaction."""
+        now = time.time()
+
+        def record(conn):
+            attempts = dict(conn.execute(
+                f"SELECT path, attempts FROM job_files WHERE job_id = ? AND path IN ({','.join('?' * len(batch))})",
+                (job_id, *batch),
+            ).fetchall())
+            for path in batch:
+                if path not in failed:
+                    conn.execute("UPDATE job_files SET status = ?, error = '' WHERE job_id = ? AND path = ?",
+                                 (DONE, job_id, path))
+                    continue
+                n = attempts.get(path, 0) + 1
+                status = FAILED if n >= self.max_attempts else PENDING
+                conn.execute(
+                    "UPDATE job_files SET status = ?, attempts = ?, retry_at = ?, error = ? "
+                    "WHERE job_id = ? AND path = ?",
+                    (status, n, now + backoff_seconds(n), failed[path][:500], job_id, path),
+                )
+            row = conn.execute("SELECT stats_json FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            total = json.loads(row["stats_json"])
+            _merge_stats(total, stats)
+            conn.execute("UPDATE jobs SET stats_json = ?, updated_at = ? WHERE id = ?",
+                         (json.dumps(total, default=str), now, job_id))
+        self._tx(record)
+
+    def _status(self, job_id: int) -> str:
+        with self._lock:
+            return self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()["status"]
+
+    def run_job(self, job_id: int) -> IngestionJob:
+        """
+        Run one queued job until it finishes, is paused, or has to wait for
+        a retry (it is then requeued with ``next_attempt_at`` set).
+        """
+        if not self._claim(job_id):
+            return self.get(job_id)
+        job = self.get(job_id)
+        try:
+            ingestor = self.ingestor_factory(job.knowledge_space)
+            with self._lock:
+                listed = self._conn.execute("SELECT files_listed FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            if not listed:
+                self._list_files(job, ingestor)
+
+            with _job_pool(ingestor):
+                while self._status(job_id) == RUNNING:
+                    batch = self._next_batch(job_id)
+                    if not batch:
+                        break
+                    self._run_batch(job, ingestor, batch)
+                    progress = self.get(job_id).files
+                    canvas.info(f"[Job {job_id}] {progress.get(DONE, 0)}/{sum(progress.values())} files done")
+
+            return self._settle(job, ingestor)
+        except KeyboardInterrupt:
+            self._set(job_id, status=QUEUED, owner_pid=None)  # resumable from the last checkpoint
+            raise
+        except Exception as e:
+            attempts = job.attempts + 1
+            canvas.error(f"[Job {job_id}] {e}")
+            if attempts >= self.max_attempts:
+                self._set(job_id, status=FAILED, attempts=attempts, error=str(e), owner_pid=None)
+            else:
+                self._set(job_id, status=QUEUED, attempts=attempts, error=str(e), owner_pid=None,
+                          next_attempt_at=time.time() + backoff_seconds(attempts))
+            return self.get(job_id)
+
+    def _run_batch(self, job: IngestionJob, ingestor: Any, batch: List[str]) -> None:
+        path = Path(job.path)
+        try:
+            ok, stats = ingestor.execute(
+                document_path=path,
+                document_type=job.document_type,
+                metadata=dict(job.metadata),
+                force_refresh=job.force_refresh,
+                recursive=job.recursive,
+                selected_files=[Path(f) for f in batch] if path.is_dir() else None,
+            )
+        except Exception as e:
+            ok, stats = False, {"error": str(e)}
+        stats = stats if isinstance(stats, dict) else {}
+        if "error" in stats:  # the whole call failed
+            failed = {f: str(stats["error"]) for f in batch}
+        else:
+            reasons = {}
+            for error in stats.get("errors", []) or []:
+                for f in batch:
+                    if f in str(error):
+                        reasons[f] = str(error)
+            failed = {f: reasons.get(f, "ingestion failed") for f in stats.get("failed_paths", []) or [] if f in batch}
+        self._checkpoint(job.id, batch, failed, {k: v for k, v in stats.items() if k != "failed_paths"})
+
+    def _settle(self, job: IngestionJob, ingestor: Any) -> IngestionJob:
+        """After a run: finish, wait for retries, or stay paused."""
+        if self._status(job.id) != RUNNING:
+            self._set(job.id, owner_pid=None)
+            return self.get(job.id)
+        with self._lock:
+            pending = self._conn.execute(
+                "SELECT MIN(retry_at) FROM job_files WHERE job_id = ? AND status = ?", (job.id, PENDING)
+            ).fetchone()[0]
+            failed = self._conn.execute(
+                "SELECT COUNT(*) FROM job_files WHERE job_id = ? AND status = ?", (job.id, FAILED)
+            ).fetchone()[0]
+        if pending is not None:
+            self._set(job.id, status=QUEUED, next_attempt_at=pending, owner_pid=None)
+            canvas.warning(f"[Job {job.id}] retrying failed files in {max(0, pending - time.time()):.0f}s")
+            return self.get(job.id)
+
+        path = Path(job.path)
+        if path.is_dir() and not failed and hasattr(ingestor, "collect_garbage"):
+            # Drop chunks of files deleted since they were ingested
+            with self._lock:
+                live = {Path(r[0]) for r in self._conn.execute(
+                    "SELECT path FROM job_files WHERE job_id = ?", (job.id,))}
+            try:
+                ingestor.collect_garbage(path, live)
+            except Exception as e:
+                canvas.warning(f"[Job {job.id}] garbage collection failed: {e}")
+        if failed:
+            self._set(job.id, status=FAILED, owner_pid=None, error=f"{failed} files failed")
+            canvas.error(f"[Job {job.id}] finished with {failed} failed files")
+        else:
+            self._set(job.id, status=DONE, owner_pid=None, error="")
+            canvas.success(f"[Job {job.id}] ingestion complete")
+        return self.get(job.id)
+
+    def run(self, concurrency: int = JOB_CONCURRENCY, wait_for_retries: bool = True,
+            stop: Optional[threading.Event] = None) -> List[IngestionJob]:
+        """
+        Run queued jobs, at most ``concurrency`` at a time, until none are
+        left. With ``wait_for_retries`` jobs waiting on backoff are waited for.
+        """
+        ran = {}
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="ingest-job") as pool:
+            while not (stop and stop.is_set()):
+                ids = self.runnable()
+                if ids:
+                    for job in pool.map(self.run_job, ids):
+                        ran[job.id] = job
+                    continue
+                waiting = self.list(QUEUED)
+                if not (wait_for_retries and waiting):
+                    break
+                delay = min(j.next_attempt_at for j in waiting) - time.time()
+                (stop.wait if stop else time.sleep)(min(max(delay, 0.05), 5.0))
+        return [self.get(job_id) for job_id in ran]
+
+    def start_background(self, concurrency: int = JOB_CONCURRENCY) -> threading.Thread:
+        """Run queued jobs on a daemon thread (one per queue); returns the thread."""
+        with self._lock:
+            if self._background is None or not self._background.is_alive():
+                self._background = threading.Thread(
+                    target=self.run, kwargs={"concurrency": concurrency}, name="ingest-queue", daemon=True
+                )
+                self._background.start()
+            return self._background
+
+    def wait(self, job_ids: Iterable[int], timeout: Optional[float] = None) -> List[IngestionJob]:
+        """Block until the jobs finish or pause (or ``timeout`` passes), running them if nobody else is."""
+        job_ids = list(job_ids)
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            jobs = [self.get(j) for j in job_ids]
+            if all(j.finished or j.status == PAUSED for j in jobs):
+                return jobs
+            if deadline is not None and time.time() >= deadline:
+                return jobs
+            if any(j.status == QUEUED for j in jobs):
+                self.start_background()
+            time.sleep(0.2)
+
+
+_queue: Optional[IngestionQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_ingestion_queue() -> IngestionQueue:
+    """The process-wide queue at ``QUEUE_PATH``."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = IngestionQueue()
+        return _queue
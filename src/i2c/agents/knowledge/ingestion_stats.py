@@ -0,0 +1,341 @@
+# agents/knowledge/ingestion_stats.py
+"""
+Measured ingestion throughput, and estimates built from it.
+
+Every pipeline run records what it achieved on this machine in a small
+SQLite store: per file format, the extraction time, pages, chunks and text
+per MiB and the embedding time per chunk; per run, the commit time per
+row, the embedding batch size, the wall time and the peak memory of the
+extraction workers. Older measurements fade out (``STATS_DECAY``), so the
+numbers follow the machine and the model in use.
+
+``estimate`` predicts the wall time and peak memory of ingesting a set of
+files for each worker count, and picks the worker count and embedding
+batch size to use within ``MEMORY_BUDGET_MB``. Formats not measured yet
+fall back to conservative defaults, and the estimate says so.
+"""
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from i2c.cli.controller import canvas
+except ImportError:
+    class FallbackCanvas:
+        def info(self, msg):    print(f"[INFO_THROUGHPUT] {msg}")
+        def warning(self, msg): print(f"[WARN_THROUGHPUT] {msg}")
+        def error(self, msg):   print(f"[ERROR_THROUGHPUT] {msg}")
+    canvas = FallbackCanvas()
+
+STATS_PATH = os.getenv("I2C_INGEST_STATS_PATH", "./data/ingest_stats.db")
+MEMORY_BUDGET_MB = float(os.getenv("I2C_INGEST_MEMORY_BUDGET_MB", "2048"))
+# Weight kept by earlier measurements each time a run is recorded
+STATS_DECAY = float(os.getenv("I2C_INGEST_STATS_DECAY", "0.8"))
+WORKER_START_SECONDS = 2.0   # spawning an extraction worker, imports included
+WORKER_BASE_MB = 150.0       # memory of one extraction worker until measured
+COMMIT_MS_PER_ROW = 0.5      # until measured
+RUNS_KEPT = 50
+# Fewer workers are preferred while they are at most this much slower
+WORKER_TOLERANCE = 0.1
+
+MB = 1024 * 1024
+
+
+@dataclass
+class FormatThroughput:
+    """Measured totals for one file format (decayed, so they are fractional)."""
+    ext: str
+    files: float = 0.0
+    bytes: float = 0.0
+    pages: float = 0.0
+    chunks: float = 0.0
+    text_bytes: float = 0.0
+    extract_ms: float = 0.0
+    embedded: float = 0.0
+    embed_ms: float = 0.0
+
+    @property
+    def measured(self) -> bool:
+        return self.files > 0 and self.bytes > 0
+
+    def per_mb(self, total: float) -> float:
+        return total / (self.bytes / MB) if self.bytes else 0.0
+
+    @property
+    def embed_ms_per_chunk(self) -> float:
+        return self.embed_ms / self.embedded if self.embedded else 0.0
+
+
+# Rates assumed per MiB of input until a format has been measured on this machine
+_TEXT_DEFAULT = FormatThroughput("*", files=1, bytes=MB, chunks=250, text_bytes=MB,
+                                 extract_ms=100, embedded=250, embed_ms=250 * 10)
+DEFAULT_THROUGHPUT: Dict[str, FormatThroughput] = {
+    ".pdf": FormatThroughput(".pdf", files=1, bytes=MB, pages=15, chunks=40, text_bytes=MB // 10,
+                             extract_ms=3000, embedded=40, embed_ms=40 * 10),
+    ".html": FormatThroughput(".html", files=1, bytes=MB, chunks=1, text_bytes=MB // 3,
+                              extract_ms=150, embedded=1, embed_ms=25),
+}
+DEFAULT_THROUGHPUT[".htm"] = DEFAULT_THROUGHPUT[".html"]
+
+_FORMAT_FIELDS = ["files", "bytes", "pages", "chunks", "text_bytes", "extract_ms", "embedded", "embed_ms"]
+
+
+@dataclass
+class FileSample:
+    """What ingesting one file took; recorded by the pipeline."""
+    ext: str
+    size: int
+    pages: int = 0
+    chunks: int = 0
+    text_bytes: int = 0
+    extract_ms: float = 0.0
+    embedded: int = 0
+    embed_ms: float = 0.0
+
+
+@dataclass
+class RunSample:
+    """Totals of one pipeline run."""
+    files: int
+    bytes: int
+    rows: int
+    workers: int
+    embed_batch_size: int
+    embedded: int
+    embed_ms: float
+    commit_ms: float
+    wall_ms: float
+    predicted_ms: float = 0.0
+    worker_peak_mb: float = 0.0
+
+
+@dataclass
+class IngestionEstimate:
+    """Predicted cost of ingesting a set of files, and the settings chosen for it."""
+    files: int
+    bytes: int
+    pages: int
+    chunks: int
+    workers: int
+    embed_batch_size: int
+    seconds: float
+    memory_mb: float
+    measured: bool                      # every format involved has been measured here
+    options: Dict[int, Tuple[float, float]] = field(default_factory=dict)  # workers -> (seconds, MiB)
+
+    def describe(self) -> str:
+        pages = f", ~{self.pages} pages" if self.pages else ""
+        text = (f"{self.files} files ({self.bytes / MB:.1f} MiB{pages}), ~{self.chunks} chunks: "
+                f"~{self.seconds:.1f}s and ~{self.memory_mb:.0f} MiB with {self.workers} "
+                f"worker{'s' if self.workers != 1 else ''}, embedding batches of {self.embed_batch_size}")
+        return text if self.measured else text + " (default rates, not yet measured on this machine)"
+
+
+class IngestionThroughput:
+    """SQLite store of measured ingestion throughput."""
+
+    def __init__(self, path: Optional[str] = None, decay: float = STATS_DECAY):
+        self.path = Path(path or STATS_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.decay = decay
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS formats (
+                ext TEXT PRIMARY KEY, {", ".join(f"{name} REAL NOT NULL DEFAULT 0" for name in _FORMAT_FIELDS)},
+                updated_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, recorded_at REAL, files INTEGER, bytes INTEGER,
+                rows INTEGER, workers INTEGER, embed_batch_size INTEGER, embedded INTEGER, embed_ms REAL,
+                commit_ms REAL, wall_ms REAL, predicted_ms REAL, worker_peak_mb REAL
+            );
+        """)
+
+    # --- recording ---
+
+    def record(self, files: Iterable[FileSample], run: Optional[RunSample] = None) -> None:
+        """Fold one run's per-file samples into the per-format totals, and log the run."""
+        totals: Dict[str, Dict[str, float]] = {}
+        for sample in files:
+            entry = totals.setdefault(sample.ext, dict.fromkeys(_FORMAT_FIELDS, 0.0))
+            entry["files"] += 1
+            for name in _FORMAT_FIELDS[1:]:
+                entry[name] += getattr(sample, "size" if name == "bytes" else name)
+        if not totals and run is None:
+            return
+        with self._lock, self._conn:
+            for ext, entry in totals.items():
+                row = self._conn.execute(
+                    f"SELECT {', '.join(_FORMAT_FIELDS)} FROM formats WHERE ext = ?", (ext,)
+                ).fetchone() or (0.0,) * len(_FORMAT_FIELDS)
+                values = [old * self.decay + entry[name] for old, name in zip(row, _FORMAT_FIELDS)]
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO formats (ext, {', '.join(_FORMAT_FIELDS)}, updated_at) "
+                    f"VALUES (?, {', '.join('?' * len(_FORMAT_FIELDS))}, ?)",
+                    (ext, *values, time.time()),
+                )
+            if run is not None:
+                self._conn.execute(
+                    "INSERT INTO runs (recorded_at, files, bytes, rows, workers, embed_batch_size, embedded, "
+                    "embed_ms, commit_ms, wall_ms, predicted_ms, worker_peak_mb) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (time.time(), run.files, run.bytes, run.rows, run.workers, run.embed_batch_size,
+                     run.embedded, run.embed_ms, run.commit_ms, run.wall_ms, run.predicted_ms,
+                     run.worker_peak_mb),
+                )
+                self._conn.execute(
+                    "DELETE FROM runs WHERE id NOT IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)",
+                    (RUNS_KEPT,),
+                )
+
+    # --- reading ---
+
+    def format(self, ext: str) -> Optional[FormatThroughput]:
+        """Measured totals for ``ext``; None when it has not been measured."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_FORMAT_FIELDS)} FROM formats WHERE ext = ?", (ext.lower(),)
+            ).fetchone()
+        measured = FormatThroughput(ext.lower(), *row) if row else None
+        return measured if measured is not None and measured.measured else None
+
+    def runs(self, limit: int = RUNS_KEPT) -> List[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM runs ORDER BY id DESC LIMIT ?", (limit,))
+            names = [d[0] for d in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def commit_ms_per_row(self) -> float:
+        runs = [r for r in self.runs() if r["rows"]]
+        rows = sum(r["rows"] for r in runs)
+        return sum(r["commit_ms"] for r in runs) / rows if rows else COMMIT_MS_PER_ROW
+
+    def worker_mb(self) -> float:
+        """Peak memory of one extraction worker seen in recent runs."""
+        peaks = [r["worker_peak_mb"] for r in self.runs() if r["workers"] > 1 and r["worker_peak_mb"]]
+        return max(peaks) if peaks else WORKER_BASE_MB
+
+    def best_batch_size(self, default: int) -> int:
+        """Embedding batch size with the lowest measured time per chunk; ``default`` until others are tried."""
+        per_size: Dict[int, List[float]] = {}
+        for run in self.runs():
+            if run["embedded"]:
+                totals = per_size.setdefault(run["embed_batch_size"], [0.0, 0.0])
+                totals[0] += run["embed_ms"]
+                totals[1] += run["embedded"]
+        if not per_size:
+            return default
+        return min(per_size, key=lambda size: per_size[size][0] / per_size[size][1])
+
+    # --- estimating ---
+
+    def estimate(
+        self,
+        paths: Iterable[Any],
+        max_workers: Optional[int] = None,
+        embed_batch_size: Optional[int] = None,
+        memory_budget_mb: float = MEMORY_BUDGET_MB,
+    ) -> IngestionEstimate:
+        """
+        Predict wall time and peak memory of ingesting ``paths`` with 1 to
+        ``max_workers`` extraction workers, and pick the worker count (the
+        fewest within ``WORKER_TOLERANCE`` of the fastest that fit the
+        memory budget) and embedding batch size.
+        """
+        from i2c.agents.knowledge.ingestion_pipeline import (
+            COMMIT_BATCH_ROWS, EMBED_BATCH_SIZE, INGEST_WORKERS, PARALLEL_MIN_FILES,
+        )
+        from i2c.db_utils import VECTOR_DIMENSION
+        max_workers = max(1, max_workers or INGEST_WORKERS)
+        batch_size = self.best_batch_size(embed_batch_size or EMBED_BATCH_SIZE)
+
+        files = total_bytes = 0
+        pages = chunks = text_bytes = extract_ms = embed_ms = largest_text = 0.0
+        rates_by_ext: Dict[str, Optional[FormatThroughput]] = {}
+        for path in paths:
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                continue
+            ext = os.path.splitext(str(path))[1].lower()
+            if ext not in rates_by_ext:
+                rates_by_ext[ext] = self.format(ext)
+            rates = rates_by_ext[ext] or DEFAULT_THROUGHPUT.get(ext, _TEXT_DEFAULT)
+            mib = size / MB
+            files += 1
+            total_bytes += size
+            pages += mib * rates.per_mb(rates.pages)
+            file_chunks = mib * rates.per_mb(rates.chunks)
+            chunks += file_chunks
+            file_text = mib * rates.per_mb(rates.text_bytes)
+            text_bytes += file_text
+            largest_text = max(largest_text, file_text)
+            extract_ms += mib * rates.per_mb(rates.extract_ms)
+            embed_ms += file_chunks * (rates.embed_ms_per_chunk or _TEXT_DEFAULT.embed_ms_per_chunk)
+
+        chunk_bytes = text_bytes / chunks if chunks else 0.0
+        row_mb = (chunk_bytes + VECTOR_DIMENSION * 4) / MB
+        buffers_mb = (batch_size + COMMIT_BATCH_ROWS) * row_mb
+        store_ms = embed_ms + chunks * self.commit_ms_per_row()
+        worker_mb = self.worker_mb()
+
+        options: Dict[int, Tuple[float, float]] = {}
+        for workers in range(1, max_workers + 1):
+            if workers == 1 or files < PARALLEL_MIN_FILES:
+                # Extracted inline, one file at a time, in turn with embedding
+                seconds = (extract_ms + store_ms) / 1000
+                memory = largest_text / MB + buffers_mb
+            else:
+                # Stages overlap: the slower of parallel extraction and embedding+commit dominates
+                seconds = max(extract_ms / min(workers, files), store_ms) / 1000 + WORKER_START_SECONDS
+                memory = workers * worker_mb + 2 * workers * largest_text / MB + buffers_mb
+            options[workers] = (seconds, memory)
+            if files < PARALLEL_MIN_FILES:
+                break
+
+        fitting = {w: o for w, o in options.items() if o[1] <= memory_budget_mb} or {1: options[1]}
+        fastest = min(seconds for seconds, _ in fitting.values())
+        workers = min(w for w, (seconds, _) in fitting.items() if seconds <= fastest * (1 + WORKER_TOLERANCE))
+        seconds, memory = options[workers]
+        return IngestionEstimate(
+            files=files, bytes=total_bytes, pages=round(pages), chunks=round(chunks),
+            workers=workers, embed_batch_size=batch_size, seconds=round(seconds, 2),
+            memory_mb=round(memory, 1), options=options,
+            measured=bool(rates_by_ext) and all(r is not None for r in rates_by_ext.values()),
+        )
+
+    def log_stats(self, label: str = "Throughput") -> None:
+        runs = [r for r in self.runs(10) if r["predicted_ms"] and r["wall_ms"]]
+        if runs:
+            error = sum(abs(r["wall_ms"] - r["predicted_ms"]) / r["wall_ms"] for r in runs) / len(runs)
+            canvas.info(f"[{label}] last {len(runs)} runs predicted within {error:.0%} of their wall time")
+
+
+def peak_child_rss_mb() -> float:
+    """Peak memory of the largest finished child process (extraction worker), 0 where unsupported."""
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        return peak / MB if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB elsewhere
+    except (ImportError, AttributeError, OSError):
+        return 0.0
+
+
+_throughput: Optional[IngestionThroughput] = None
+_throughput_lock = threading.Lock()
+
+
+def get_ingestion_throughput() -> IngestionThroughput:
+    """The process-wide store at ``STATS_PATH``."""
+    global _throughput
+    with _throughput_lock:
+        if _throughput is None:
+            _throughput = IngestionThroughput()
+        return _throughput
@@ -1,82 +1,229 @@
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from i2c.agents.knowledge.enhanced_knowledge_ingestor import EnhancedKnowledgeIngestorAgent as KnowledgeIngestorAgent
 from i2c.cli.controller import canvas
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
+# A path is re-ingested once no event arrived for it for DEBOUNCE_SECONDS,
+# or at the latest MAX_DELAY_SECONDS after its first pending event
+DEBOUNCE_SECONDS = float(os.getenv("I2C_KNOWLEDGE_DEBOUNCE_SECONDS", "1.0"))
+MAX_DELAY_SECONDS = float(os.getenv("I2C_KNOWLEDGE_MAX_DELAY_SECONDS", "30"))
+UPDATE_BATCH_FILES = int(os.getenv("I2C_KNOWLEDGE_UPDATE_BATCH_FILES", "64"))
+UPDATE_WORKERS = int(os.getenv("I2C_KNOWLEDGE_UPDATE_WORKERS", "2"))
+
+CODE_EXTENSIONS = {'.py', '.js', '.ts', '.java', '.cpp', '.c', '.h', '.hpp', '.cs', '.go', '.rs'}
+
+
 class KnowledgeUpdateHandler(FileSystemEventHandler):
-    """Handles file system events for knowledge updates"""
-    
-    def __init__(self, knowledge_ingestor: KnowledgeIngestorAgent):
+    """
+    Collects file system events for knowledge updates. Events arrive on the
+    observer thread; they are coalesced per path (a burst of saves becomes
+    one pending update) and handed out by ``drain`` once the path is quiet.
+    """
+
+    def __init__(self, knowledge_ingestor: KnowledgeIngestorAgent, debounce_seconds: float = DEBOUNCE_SECONDS):
         self.knowledge_ingestor = knowledge_ingestor
-        self.pending_updates = asyncio.Queue()
-    
+        self.debounce_seconds = debounce_seconds
+        self._lock = threading.Lock()
+        self._pending: Dict[Path, List[float]] = {}  # path -> [first event, last event]
+        self.events = 0
+        self.coalesced = 0
+
+    def _touch(self, path: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.events += 1
+            seen = self._pending.get(Path(path))
+            if seen:
+                seen[1] = now
+                self.coalesced += 1
+            else:
+                self._pending[Path(path)] = [now, now]
+
     def on_created(self, event):
         if not event.is_directory:
-            self.pending_updates.put_nowait(Path(event.src_path))
-    
+            self._touch(event.src_path)
+
     def on_modified(self, event):
         if not event.is_directory:
-            self.pending_updates.put_nowait(Path(event.src_path))
+            self._touch(event.src_path)
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self._touch(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            # Old path becomes a tombstone, new path is ingested
+            self._touch(event.src_path)
+            self._touch(event.dest_path)
+
+    def drain(self, now: Optional[float] = None, force: bool = False) -> List[Path]:
+        """Pending paths that have been quiet for the debounce window (all of them with ``force``)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            ready = [
+                path for path, (first, last) in self._pending.items()
+                if force or now - last >= self.debounce_seconds or now - first >= MAX_DELAY_SECONDS
+            ]
+            for path in ready:
+                del self._pending[path]
+        return sorted(ready)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
 
 class KnowledgeManagementWorkflow:
     """Manages knowledge base updates and maintenance"""
-    
+
     def __init__(
         self,
         knowledge_ingestor: KnowledgeIngestorAgent,
-        watch_paths: List[Path]
+        watch_paths: List[Path],
+        debounce_seconds: float = DEBOUNCE_SECONDS,
+        batch_files: int = UPDATE_BATCH_FILES,
+        max_workers: int = UPDATE_WORKERS
     ):
         self.knowledge_ingestor = knowledge_ingestor
-        self.watch_paths = watch_paths
+        self.watch_paths = [Path(p).resolve() for p in watch_paths]
         self.observer = Observer()
-        self.update_handler = KnowledgeUpdateHandler(knowledge_ingestor)
-    
+        self.update_handler = KnowledgeUpdateHandler(knowledge_ingestor, debounce_seconds)
+        self.batch_files = batch_files
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="knowledge-update")
+        self.update_stats = {"runs": 0, "ingested": 0, "unchanged": 0, "removed": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+
     async def start_monitoring(self):
         """Start monitoring for documentation updates"""
         for path in self.watch_paths:
             self.observer.schedule(self.update_handler, str(path), recursive=True)
-        
+
         self.observer.start()
-        
+        tick = max(0.05, self.update_handler.debounce_seconds / 4)
+
         # Process updates
-        while True:
-            try:
-                file_path = await self.update_handler.pending_updates.get()
+        try:
+            while True:
                 try:
-                    await self.process_update(file_path)
-                except ModuleNotFoundError as e:
-                    canvas.error(
-                        f"Documentation update for {file_path} failed: {e}. "
-                        "Make sure you’ve run `poetry add protobuf` and restarted your process."
-                    )
+                    await asyncio.sleep(tick)
+                    ready = self.update_handler.drain()
+                    if ready:
+                        await self.process_updates(ready)
+                except asyncio.CancelledError:
+                    break
                 except Exception as e:
-                    canvas.error(f"Failed to process update for {file_path}: {e}")
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                canvas.error(f"Unexpected error in monitoring loop: {e}")
-                # avoid tight busy‐loop on repeated error
-                await asyncio.sleep(1)
-    
+                    canvas.error(f"Unexpected error in monitoring loop: {e}")
+                    # avoid tight busy‐loop on repeated error
+                    await asyncio.sleep(1)
+        finally:
+            self.observer.stop()
+            self.log_stats()
+
     async def process_update(self, file_path: Path):
         """Process a documentation update"""
-        # Detect document type
-        document_type = self._detect_document_type(file_path)
-        
-        # Extract metadata
-        metadata = self._extract_metadata(file_path)
-        
-        # Ingest document
-        success, result = self.knowledge_ingestor.execute(
-            document_path=file_path,
-            document_type=document_type,
-            metadata=metadata
-        )
-        
-        if success:
-            print(f"Successfully updated: {file_path}")
-        else:
-            print(f"Failed to update: {file_path} - {result.get('error')}")
\ No newline at end of file
+        await self.process_updates([file_path])
+
+    async def process_updates(self, paths: List[Path]) -> Dict[str, int]:
+        """
+        Apply a set of changed paths: deleted ones are removed, unchanged
+        content is skipped, and the rest is re-ingested in batched runs on
+        the worker pool. Returns the counts for this call.
+        """
+        loop = asyncio.get_running_loop()
+        counts = {"runs": 0, "ingested": 0, "unchanged": 0, "removed": 0, "failed": 0}
+
+        # Deleted or renamed-away sources: drop their chunks instead of ingesting
+        gone = [p for p in paths if not p.exists()]
+        if gone:
+            removed = await loop.run_in_executor(self.executor, self.knowledge_ingestor.remove_sources, gone)
+            counts["removed"] = len(gone)
+            canvas.info(f"Removed {removed} chunks for {len(gone)} deleted sources")
+
+        # Content hash unchanged (a save without edits, a touch by a build tool);
+        # editor swap files and other unsupported types are ignored
+        changed = []
+        for path in paths:
+            if path.is_file() and path.suffix.lower() in self.knowledge_ingestor.supported_extensions:
+                if self.knowledge_ingestor.cache.should_process_file(path):
+                    changed.append(path)
+                else:
+                    counts["unchanged"] += 1
+
+        batches = list(self._batches(changed))
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, self._ingest_batch, root, document_type, files)
+            for root, document_type, files in batches
+        ))
+        for (_, _, files), (ok, stats) in zip(batches, results):
+            counts["runs"] += 1
+            counts["ingested"] += stats.get("successful_files", 0)
+            counts["failed"] += len(files) if "error" in stats else stats.get("failed_files", 0)
+
+        with self._stats_lock:
+            for key, value in counts.items():
+                self.update_stats[key] += value
+        if counts["runs"]:
+            canvas.info(
+                f"Knowledge update: {counts['ingested']} re-ingested in {counts['runs']} runs, "
+                f"{counts['unchanged']} unchanged, {counts['removed']} removed"
+            )
+        return counts
+
+    def _batches(self, paths: List[Path]):
+        """(root, document type, files) groups of at most ``batch_files`` files for one ingestor run."""
+        groups: Dict[tuple, List[Path]] = {}
+        for path in paths:
+            root = next((w for w in self.watch_paths if w in path.resolve().parents), None)
+            groups.setdefault((root, self._detect_document_type(path)), []).append(path.resolve())
+        for (root, document_type), files in groups.items():
+            if root is None:  # not under a watched folder: one run per file
+                for file_path in files:
+                    yield file_path, document_type, [file_path]
+                continue
+            for i in range(0, len(files), self.batch_files):
+                yield root, document_type, files[i:i + self.batch_files]
+
+    def _ingest_batch(self, root: Path, document_type: str, files: List[Path]):
+        try:
+            return self.knowledge_ingestor.execute(
+                document_path=root,
+                document_type=document_type,
+                metadata=self._extract_metadata(root),
+                recursive=True,
+                selected_files=files if root.is_dir() else None
+            )
+        except Exception as e:
+            canvas.error(f"Failed to update {len(files)} files under {root}: {e}")
+            return False, {"error": str(e)}
+
+    def _detect_document_type(self, file_path: Path) -> str:
+        """Document type for a watched file"""
+        return "example_code" if file_path.suffix.lower() in CODE_EXTENSIONS else "documentation"
+
+    def _extract_metadata(self, root: Path) -> Dict[str, Any]:
+        """Metadata attached to chunks from watched updates"""
+        return {"watch_root": str(root), "updated_by": "knowledge_watch"}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.update_stats)
+        stats["events"] = self.update_handler.events
+        stats["coalesced_events"] = self.update_handler.coalesced
+        stats["pending"] = len(self.update_handler)
+        return stats
+
+    def log_stats(self, label: str = "KnowledgeWatch") -> None:
+        s = self.stats()
+        if s["events"] or s["runs"]:
+            canvas.info(
+                f"[{label}] {s['events']} events ({s['coalesced_events']} coalesced), "
+                f"{s['ingested']} files re-ingested in {s['runs']} runs, "
+                f"{s['unchanged']} unchanged, {s['removed']} removed, {s['failed']} failed"
+            )
@@ -12,7 +12,7 @@ import pandas as pd
 import numpy as np
 
 from i2c.cli.controller import canvas
-from i2c.db_utils import get_db_connection, add_or_update_chunks, TABLE_KNOWLEDGE_BASE, SCHEMA_KNOWLEDGE_BASE,query_context
+from i2c.db_utils import get_db_connection, add_or_update_chunks, TABLE_KNOWLEDGE_BASE, SCHEMA_KNOWLEDGE_BASE, query_knowledge
 from i2c.workflow.modification.rag_retrieval import retrieve_context_for_planner
 from i2c.utils.embedding import get_embedding_from_model
 
@@ -68,17 +68,15 @@ class ExternalKnowledgeManager:
             canvas.error(f"Failed to ingest knowledge from {source}: {e}")
             return False
 
-    def retrieve_knowledge(self, query: str, limit: int = 5) -> Optional[List[Dict]]:
-        """Retrieve relevant knowledge for a query."""
+    def retrieve_knowledge(self, query: str, limit: int = 5, filters=None) -> Optional[List[Dict]]:
+        """Retrieve relevant knowledge for a query, optionally prefiltered by metadata."""
         try:
-            # Handle different embedding model types
-            vector = None
-            vector = get_embedding_from_model(self.embed_model, query)
-                
-            results_df = query_context(
+            # Embedding and search are cached per knowledge table version
+            results_df = query_knowledge(
                 self.db_connection,
-                TABLE_KNOWLEDGE_BASE,
-                vector,
+                query,
+                self.embed_model,
+                filters=filters,
                 limit=limit,
             )
             if results_df is None or results_df.empty:
@@ -86,7 +84,9 @@ class ExternalKnowledgeManager:
                 return []
 
             return [
-                {"source": row["source"], "content": row["content"]}
+                {"source": row["source"], "content": row["content"],
+                 "knowledge_space": row.get("knowledge_space", ""),
+                 "content_hash": row.get("content_hash", "")}
                 for _, row in results_df.iterrows()
             ]
 
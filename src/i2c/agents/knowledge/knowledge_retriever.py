@@ -1,9 +1,15 @@
 # agents/knowledge/knowledge_retriever.py
+import json
+import re
 from typing import Dict, List, Any, Optional, Tuple
 from agno.agent import Agent
 from i2c.agents.reflective.context_aware_operator import ContextAwareOperator
 from i2c.agents.budget_manager import BudgetManagerAgent
 from i2c.agents.knowledge.base import EnhancedLanceDb
+from i2c.agents.knowledge.query_analysis import MIN_LOCAL_CONFIDENCE, analyze_query, query_analysis_cache
+from i2c.utils.knowledge_filter import KnowledgeFilter
+from i2c.utils.rerank import RERANK_OVERFETCH, mmr_rerank
+from i2c.utils.retrieval_cache import retrieval_cache
 
 class KnowledgeRetrieverAgent(ContextAwareOperator):
     """Multi-stage knowledge retrieval with filtering and re-ranking"""
@@ -61,7 +67,7 @@ class KnowledgeRetrieverAgent(ContextAwareOperator):
             initial_results = self._initial_retrieval(
                 search_terms,
                 filters,
-                max_results * 2  # Retrieve more for re-ranking
+                max_results * RERANK_OVERFETCH  # Retrieve more for re-ranking
             )
             
             # Stage 3: Re-ranking and Final Selection
@@ -104,7 +110,25 @@ class KnowledgeRetrieverAgent(ContextAwareOperator):
             }
     
     def _analyze_query(self, query: str) -> List[str]:
-        """Analyze query to extract search terms and concepts"""
+        """Analyze query to extract search terms and concepts.
+
+        Terms come from the local analyzer; the LLM is asked only when the
+        local pass has low confidence. Results are cached per normalized query.
+        """
+        cached = query_analysis_cache.get(query)
+        if cached is not None:
+            return cached
+
+        analysis = analyze_query(query)
+        terms = analysis.terms or [query]
+        if analysis.confidence < MIN_LOCAL_CONFIDENCE:
+            terms = self._analyze_query_with_llm(query) or terms
+
+        query_analysis_cache.put(query, terms)
+        return terms
+
+    def _analyze_query_with_llm(self, query: str) -> List[str]:
+        """Ask the reasoning agent for search terms (low-confidence queries only)"""
         prompt = f"""
         Analyze this query and extract key search terms:
         Query: {query}
@@ -117,11 +141,25 @@ class KnowledgeRetrieverAgent(ContextAwareOperator):
         
         Return as a JSON list of search terms.
         """
-        
-        response = self.reasoning_agent.run(prompt)
-        # Parse response to extract terms
-        terms = self._parse_search_terms(response.content)
-        return terms
+        query_analysis_cache.llm_calls += 1
+        try:
+            response = self.reasoning_agent.run(prompt)
+            return self._parse_search_terms(getattr(response, "content", "") or "")
+        except Exception:
+            return []
+
+    @staticmethod
+    def _parse_search_terms(content: str) -> List[str]:
+        """Parse a JSON list of terms, falling back to comma/line separated text"""
+        match = re.search(r"\[.*\]", content, re.DOTALL)
+        if match:
+            try:
+                parsed = json.loads(match.group(0))
+                return [str(t).strip() for t in parsed if str(t).strip()]
+            except (ValueError, TypeError):
+                pass
+        parts = re.split(r"[,\n]", content)
+        return [p.strip(" -*\"'0123456789.").strip() for p in parts if p.strip(" -*\"'0123456789.").strip()]
     
     def _initial_retrieval(
         self,
@@ -132,6 +170,15 @@ class KnowledgeRetrieverAgent(ContextAwareOperator):
         """Perform initial retrieval using hybrid search"""
         # Combine search terms
         combined_query = " ".join(search_terms)
+
+        knowledge_filter = KnowledgeFilter.coerce(filters)
+        if knowledge_filter is not None:
+            # Metadata columns live in the knowledge_base table: prefilter its search
+            from i2c.db_utils import query_knowledge
+            from i2c.utils.retrieval_service import retrieval_service
+            df = query_knowledge(retrieval_service.db(), combined_query, self.embed_model, knowledge_filter, limit=limit,
+                                 with_vectors=True)
+            return [] if df is None else df.to_dict("records")
         
         # Execute search with filters
         results = self.vector_db.search(
@@ -149,54 +196,42 @@ class KnowledgeRetrieverAgent(ContextAwareOperator):
         results: List[Dict[str, Any]],
         limit: int
     ) -> List[Dict[str, Any]]:
-        """Re-rank results using advanced scoring"""
-        if not self.reranker:
-            # Simple scoring based on metadata
-            scored_results = []
-            for result in results:
-                score = self._calculate_relevance_score(original_query, result)
-                result['relevance_score'] = score
-                scored_results.append(result)
-            
-            # Sort by score
-            scored_results.sort(key=lambda x: x['relevance_score'], reverse=True)
-            return scored_results[:limit]
-        
-        # Use provided reranker
-        reranked = self.reranker.rerank(original_query, results)
-        return reranked[:limit]
-    
-    def _calculate_relevance_score(
-        self,
-        query: str,
-        result: Dict[str, Any]
-    ) -> float:
-        """Calculate relevance score based on multiple factors"""
-        score = 0.0
-        
-        # Base similarity score
-        if 'score' in result:
-            score += result['score'] * 0.5
-        
-        # Boost for exact matches
-        content = result.get('content', '').lower()
-        query_terms = query.lower().split()
-        for term in query_terms:
-            if term in content:
-                score += 0.1
-        
-        # Boost for recent documents
-        metadata = result.get('metadata', {})
-        if 'last_updated' in metadata:
-            # Implement recency boost
-            score += 0.1
-        
-        # Boost for document type relevance
-        if metadata.get('document_type') == 'api_documentation':
-            score += 0.2
-        
-        return score
-    
+        """Re-rank results by MMR over stored vectors, blended with BM25 and recency"""
+        if self.reranker:
+            # Use provided reranker
+            reranked = self.reranker.rerank(original_query, results)
+            return reranked[:limit]
+
+        candidates = [self._as_record(r) for r in results]
+        try:
+            query_vector = retrieval_cache.embed_query(self.embed_model, original_query)
+        except Exception:
+            query_vector = None  # relevance falls back to the search scores
+
+        reranked = mmr_rerank(
+            candidates,
+            k=limit,
+            query_vector=query_vector,
+            query_text=original_query,
+            bm25_weight=0.2,
+            recency_weight=0.1,
+        )
+        for result in reranked:
+            result['relevance_score'] = result['score']
+        return reranked
+
+    @staticmethod
+    def _as_record(result: Any) -> Dict[str, Any]:
+        """Normalize a search hit (dict or agno Document) to a dict"""
+        if isinstance(result, dict):
+            return result
+        return {
+            "content": getattr(result, "content", ""),
+            "vector": getattr(result, "embedding", None),
+            "metadata": getattr(result, "meta_data", {}) or {},
+            "name": getattr(result, "name", None),
+        }
+
     def _validate_results(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Validate and clean up results"""
         validated = []
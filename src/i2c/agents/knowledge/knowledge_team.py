@@ -13,7 +13,7 @@ from i2c.agents.knowledge.enhanced_knowledge_ingestor import EnhancedKnowledgeIn
 from i2c.agents.knowledge.knowledge_manager import ExternalKnowledgeManager
 from i2c.workflow.modification.rag_retrieval import retrieve_context_for_planner
 from i2c.workflow.modification.rag_config import get_embed_model
-from i2c.db_utils import get_db_connection
+from i2c.db_utils import get_db_connection, get_project_id
 from i2c.cli.controller import canvas
 
 class KnowledgeLeadAgent(Agent):
@@ -207,7 +207,8 @@ class KnowledgeLeadAgent(Agent):
                     context_str = retrieve_context_for_planner(
                         user_request=task,
                         db=db,
-                        embed_model=self.embed_model
+                        embed_model=self.embed_model,
+                        project_id=get_project_id(project_path),
                     )
                     context["context"] = context_str
                     
@@ -0,0 +1,210 @@
+# agents/knowledge/query_analysis.py
+"""Local search-term extraction for knowledge queries.
+
+Most queries name their frameworks, identifiers and versions explicitly, so
+terms can be pulled out with tokenization, identifier splitting, a framework
+dictionary and version patterns. The LLM is only needed when this local pass
+has low confidence (vague queries with few content words).
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+try:
+    from i2c.cli.controller import canvas
+except ImportError:
+    class FallbackCanvas:
+        def info(self, msg):    print(f"[INFO_QUERY] {msg}")
+        def warning(self, msg): print(f"[WARN_QUERY] {msg}")
+    canvas = FallbackCanvas()
+
+# Below this confidence the retriever asks the LLM for search terms
+MIN_LOCAL_CONFIDENCE = float(os.getenv("I2C_QUERY_ANALYSIS_MIN_CONFIDENCE", "0.4"))
+QUERY_CACHE_ENTRIES = 1024
+
+# Canonical framework/library name -> spellings found in queries
+FRAMEWORK_ALIASES: Dict[str, List[str]] = {
+    "react": ["react", "reactjs", "react.js"],
+    "nextjs": ["nextjs", "next.js"],
+    "vue": ["vue", "vuejs", "vue.js", "nuxt"],
+    "angular": ["angular", "angularjs"],
+    "svelte": ["svelte", "sveltekit"],
+    "express": ["express", "expressjs", "express.js"],
+    "nestjs": ["nestjs", "nest.js"],
+    "node": ["node", "nodejs", "node.js"],
+    "typescript": ["typescript", "ts"],
+    "tailwind": ["tailwind", "tailwindcss"],
+    "django": ["django", "drf"],
+    "flask": ["flask"],
+    "fastapi": ["fastapi"],
+    "pydantic": ["pydantic"],
+    "sqlalchemy": ["sqlalchemy"],
+    "pytest": ["pytest"],
+    "pandas": ["pandas"],
+    "numpy": ["numpy"],
+    "pytorch": ["pytorch", "torch"],
+    "tensorflow": ["tensorflow", "keras"],
+    "lancedb": ["lancedb", "lance"],
+    "agno": ["agno"],
+    "spring": ["spring", "springboot"],
+    "rails": ["rails", "ruby on rails"],
+    "laravel": ["laravel"],
+    "go": ["golang"],
+    "rust": ["rust", "cargo"],
+}
+_ALIAS_TO_FRAMEWORK = {a: name for name, aliases in FRAMEWORK_ALIASES.items() for a in aliases}
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can could do does for from how i if in into is it its
+me my of on or our should so that the their them then there these this to use used
+using via was we what when where which while who why will with would you your
+want need make get set add create write please help implement way best good new
+""".split())
+
+_VERSION = re.compile(r"\b(?:v|version\s*)?(\d+(?:\.(?:\d+|x)){1,2})\b|\b(?:v|version\s*)(\d+)\b", re.IGNORECASE)
+_NAMED_VERSION = re.compile(r"\b([a-z][\w.-]*?)\s*(?:@|==|>=|\^|~|\s)v?(\d+(?:\.\d+){0,2})\b", re.IGNORECASE)
+_WORD = re.compile(r"[A-Za-z_][\w.]*[\w]|[A-Za-z]")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+@dataclass
+class QueryAnalysis:
+    """Terms extracted from a query and how much the local pass trusts them."""
+    terms: List[str] = field(default_factory=list)
+    frameworks: List[str] = field(default_factory=list)
+    versions: List[str] = field(default_factory=list)
+    identifiers: List[str] = field(default_factory=list)
+    confidence: float = 0.0
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: case- and whitespace-insensitive."""
+    return " ".join((query or "").lower().split())
+
+
+def split_identifier(token: str) -> List[str]:
+    """Split camelCase, snake_case and dotted identifiers into lowercase parts."""
+    parts = []
+    for piece in re.split(r"[._\-]+", token):
+        parts.extend(p.lower() for p in _CAMEL.findall(piece))
+    return [p for p in parts if len(p) > 1]
+
+
+def _is_identifier(token: str) -> bool:
+    return ("_" in token or "." in token.strip(".")
+            or bool(re.search(r"[a-z][A-Z]", token)) or bool(re.match(r"[A-Z][a-z]+[A-Z]", token)))
+
+
+def analyze_query(query: str) -> QueryAnalysis:
+    """Extract search terms locally and score the result's confidence."""
+    analysis = QueryAnalysis()
+    text = query or ""
+    lowered = text.lower()
+    seen = set()
+
+    def add(term: str) -> None:
+        if term and term not in seen:
+            seen.add(term)
+            analysis.terms.append(term)
+
+    # Multi-word aliases first ("ruby on rails"), then single tokens below
+    for alias, name in _ALIAS_TO_FRAMEWORK.items():
+        if " " in alias and alias in lowered:
+            if name not in analysis.frameworks:
+                analysis.frameworks.append(name)
+            text = re.sub(re.escape(alias), name, text, flags=re.IGNORECASE)
+
+    for match in _NAMED_VERSION.finditer(text):
+        name = _ALIAS_TO_FRAMEWORK.get(match.group(1).lower())
+        if name:
+            analysis.versions.append(f"{name} {match.group(2)}")
+    if not analysis.versions:
+        analysis.versions = [m.group(1) or m.group(2) for m in _VERSION.finditer(text)]
+
+    content_terms = 0
+    for token in _WORD.findall(text):
+        low = token.lower()
+        name = _ALIAS_TO_FRAMEWORK.get(low)
+        if name:
+            if name not in analysis.frameworks:
+                analysis.frameworks.append(name)
+            continue
+        if _VERSION.fullmatch(token):
+            continue  # "v2.1" is a version, not an identifier
+        if _is_identifier(token):
+            analysis.identifiers.append(token)
+            add(token)
+            for part in split_identifier(token):
+                if part not in STOPWORDS:
+                    add(part)
+            content_terms += 1
+            continue
+        if low in STOPWORDS or len(low) < 2:
+            continue
+        add(low)
+        content_terms += 1
+
+    for name in analysis.frameworks:
+        add(name)
+    for version in analysis.versions:
+        add(version)
+
+    confidence = 0.6 * min(content_terms, 4) / 4
+    if analysis.frameworks:
+        confidence += 0.3
+    if analysis.identifiers or analysis.versions:
+        confidence += 0.1
+    analysis.confidence = round(min(confidence, 1.0), 3)
+    return analysis
+
+
+class QueryAnalysisCache:
+    """LRU of search terms per normalized query, with hit and LLM-call counters."""
+
+    def __init__(self, max_entries: int = QUERY_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.llm_calls = 0
+
+    def get(self, query: str) -> Optional[List[str]]:
+        key = normalize_query(query)
+        with self._lock:
+            terms = self._entries.get(key)
+            if terms is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(terms)
+
+    def put(self, query: str, terms: List[str]) -> None:
+        with self._lock:
+            self._entries[normalize_query(query)] = list(terms)
+            self._entries.move_to_end(normalize_query(query))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits,
+                    "misses": self.misses, "llm_calls": self.llm_calls}
+
+    def log_stats(self, label: str = "QueryAnalysis") -> None:
+        s = self.stats()
+        if s["hits"] or s["misses"]:
+            canvas.info(f"[{label}] {s['hits']} cached / {s['misses']} analyzed, "
+                        f"{s['llm_calls']} needed the LLM")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared process-wide instance
+query_analysis_cache = QueryAnalysisCache()
@@ -0,0 +1,344 @@
+# agents/knowledge/web_fetcher.py
+"""
+Concurrent fetching of web documentation with conditional requests.
+
+One pooled ``httpx.AsyncClient`` serves a whole fetch or crawl, with a cap
+on concurrent requests per host that holds across all of its roots and
+levels. Each response is kept in a local SQLite
+cache with its ETag / Last-Modified validators; the next fetch of the URL
+sends If-None-Match / If-Modified-Since and a 304 is answered from the
+cache. Every result says whether the page is new, changed or unchanged, so
+callers re-embed only what changed. ``crawl`` follows same-site links
+level by level, fetching each level concurrently.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urldefrag, urljoin, urlparse
+
+import httpx
+
+try:
+    from i2c.cli.controller import canvas
+except ImportError:
+    class FallbackCanvas:
+        def info(self, msg):    print(f"[INFO_WEB] {msg}")
+        def warning(self, msg): print(f"[WARN_WEB] {msg}")
+        def error(self, msg):   print(f"[ERROR_WEB] {msg}")
+    canvas = FallbackCanvas()
+
+WEB_CACHE_PATH = os.getenv("I2C_WEB_CACHE_PATH", "./data/web_cache.db")
+MAX_CONNECTIONS = int(os.getenv("I2C_WEB_MAX_CONNECTIONS", "16"))
+PER_HOST_LIMIT = int(os.getenv("I2C_WEB_PER_HOST_LIMIT", "4"))
+FETCH_TIMEOUT = float(os.getenv("I2C_WEB_FETCH_TIMEOUT", "20"))
+USER_AGENT = "i2c-factory-docs/1.0"
+
+NEW, CHANGED, UNCHANGED, ERROR = "new", "changed", "unchanged", "error"
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: str                 # new / changed / unchanged / error
+    content: str = ""
+    content_type: str = ""
+    content_hash: str = ""
+    http_status: int = 0
+    error: str = ""
+
+    @property
+    def changed(self) -> bool:
+        """Whether the page needs (re-)ingesting."""
+        return self.status in (NEW, CHANGED)
+
+
+class ResponseCache:
+    """Last response per URL with its validators, in SQLite."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or WEB_CACHE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_hash TEXT,
+                content_type TEXT, body TEXT, fetched_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS sources (
+                knowledge_space TEXT, url TEXT, document_type TEXT, metadata_json TEXT,
+                PRIMARY KEY (knowledge_space, url)
+            );
+        """)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content_hash, content_type, body FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("etag", "last_modified", "content_hash", "content_type", "body"), row))
+
+    def put(self, url: str, etag: str, last_modified: str, content_hash: str, content_type: str, body: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, content_hash, content_type, body, time.time()),
+            )
+
+    def forget(self, urls: Iterable[str]) -> None:
+        """Drop cached responses, so the next fetch reports the pages as new (e.g. after a failed ingest)."""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM pages WHERE url = ?", [(u,) for u in urls])
+
+    def remember_source(self, knowledge_space: str, url: str, document_type: str, metadata: Dict[str, Any]) -> None:
+        """Record a root URL loaded into a knowledge space, for later refreshes."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                (knowledge_space, url, document_type, json.dumps(metadata or {}, default=str)),
+            )
+
+    def sources(self, knowledge_space: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, document_type, metadata_json FROM sources WHERE knowledge_space = ? ORDER BY url",
+                (knowledge_space,),
+            ).fetchall()
+        return [{"url": u, "document_type": t, "metadata": json.loads(m)} for u, t, m in rows]
+
+
+class WebFetcher:
+    """Fetches pages concurrently through one pooled client, revalidating cached copies."""
+
+    def __init__(
+        self,
+        cache_path: Optional[str] = None,
+        per_host: int = PER_HOST_LIMIT,
+        max_connections: int = MAX_CONNECTIONS,
+        timeout: float = FETCH_TIMEOUT,
+    ):
+        self.cache = ResponseCache(cache_path)
+        self.per_host = max(1, per_host)
+        self.max_connections = max(1, max_connections)
+        self.timeout = timeout
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+        self.unchanged_bodies = 0
+        self.downloaded_bytes = 0
+        self.errors = 0
+
+    # --- fetching ---
+
+    def fetch_all(self, urls: Iterable[str]) -> List[FetchResult]:
+        """Blocking ``fetch_many`` for synchronous callers."""
+        return _run(self.fetch_many(list(urls)))
+
+    async def fetch_many(
+        self,
+        urls: List[str],
+        client: Optional[httpx.AsyncClient] = None,
+        limits: Optional[Dict[str, asyncio.Semaphore]] = None,
+    ) -> List[FetchResult]:
+        """
+        Fetch ``urls`` concurrently (at most ``per_host`` at a time per host);
+        results keep their order. Calls that belong to one run pass the run's
+        ``client`` and per-host ``limits``, so they share the connection pool
+        and the cap.
+        """
+        if client is None:
+            async with self._client() as client:
+                return await self.fetch_many(urls, client, limits)
+        limits = self._limits() if limits is None else limits
+        return await asyncio.gather(*(self._fetch(client, limits, url) for url in urls))
+
+    def _limits(self) -> Dict[str, asyncio.Semaphore]:
+        """Per-host request slots for one run."""
+        return defaultdict(lambda: asyncio.Semaphore(self.per_host))
+
+    def _client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections),
+            timeout=self.timeout,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+        )
+
+    async def _fetch(self, client: httpx.AsyncClient, limits: Dict[str, asyncio.Semaphore], url: str) -> FetchResult:
+        cached = self.cache.get(url)
+        headers = {}
+        if cached and cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+        try:
+            async with limits[urlparse(url).netloc]:
+                response = await client.get(url, headers=headers)
+        except httpx.HTTPError as e:
+            self._count(errors=1)
+            return FetchResult(url, ERROR, error=str(e) or type(e).__name__)
+
+        self._count(requests=1)
+        if response.status_code == 304 and cached:
+            self._count(not_modified=1)
+            return FetchResult(url, UNCHANGED, cached["body"], cached["content_type"], cached["content_hash"], 304)
+        if response.status_code != 200:
+            self._count(errors=1)
+            return FetchResult(url, ERROR, http_status=response.status_code,
+                               error=f"HTTP {response.status_code}")
+
+        body = response.text
+        digest = hashlib.sha256(response.content).hexdigest()
+        content_type = response.headers.get("content-type", "")
+        self._count(downloaded_bytes=len(response.content))
+        self.cache.put(url, response.headers.get("etag", ""), response.headers.get("last-modified", ""),
+                       digest, content_type, body)
+        if cached is None:
+            status = NEW
+        elif cached["content_hash"] == digest:  # server without validators, same body
+            self._count(unchanged_bodies=1)
+            status = UNCHANGED
+        else:
+            status = CHANGED
+        return FetchResult(url, status, body, content_type, digest, 200)
+
+    # --- crawling ---
+
+    def crawl(self, url: str, max_depth: int = 3, max_links: int = 10) -> List[FetchResult]:
+        """
+        Fetch ``url`` and the pages it links to on the same site (under its
+        path), level by level, up to ``max_depth`` levels and ``max_links``
+        pages in total.
+        """
+        return _run(self._crawl_roots([url], max_depth, max_links))[0]
+
+    def crawl_all(self, urls: Iterable[str], max_depth: int = 3, max_links: int = 10) -> List[FetchResult]:
+        """``crawl`` several roots concurrently; a page reached from two roots is listed once."""
+        results, seen = [], set()
+        for crawled in _run(self._crawl_roots(list(urls), max_depth, max_links)):
+            for result in crawled:
+                if result.url not in seen:
+                    seen.add(result.url)
+                    results.append(result)
+        return results
+
+    async def _crawl_roots(self, urls: List[str], max_depth: int, max_links: int) -> List[List[FetchResult]]:
+        """Crawl the roots through one client and one set of per-host limits."""
+        async with self._client() as client:
+            limits = self._limits()
+            return await asyncio.gather(*(
+                self._crawl(url, max_depth, max_links, client, limits) for url in urls
+            ))
+
+    async def _crawl(
+        self,
+        url: str,
+        max_depth: int,
+        max_links: int,
+        client: httpx.AsyncClient,
+        limits: Dict[str, asyncio.Semaphore],
+    ) -> List[FetchResult]:
+        root = urldefrag(url)[0]
+        seen = {root}
+        level, results = [root], []
+        for depth in range(max(1, max_depth)):
+            fetched = await self.fetch_many(level, client, limits)
+            results.extend(fetched)
+            if depth + 1 >= max_depth:
+                break
+            level = []
+            for result in fetched:
+                for link in _same_site_links(root, result):
+                    if link not in seen and len(seen) < max_links:
+                        seen.add(link)
+                        level.append(link)
+            if not level:
+                break
+        return results
+
+    # --- stats ---
+
+    def _count(self, **deltas: int) -> None:
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "requests": self.requests,
+                "not_modified": self.not_modified,
+                "unchanged_bodies": self.unchanged_bodies,
+                "downloaded_bytes": self.downloaded_bytes,
+                "errors": self.errors,
+            }
+
+    def log_stats(self, label: str = "WebFetcher") -> None:
+        s = self.stats()
+        if s["requests"] or s["errors"]:
+            canvas.info(
+                f"[{label}] {s['requests']} requests, {s['not_modified']} not modified (304), "
+                f"{s['unchanged_bodies']} unchanged bodies, {s['downloaded_bytes'] / 1024:.0f} KiB downloaded, "
+                f"{s['errors']} errors"
+            )
+
+
+def _same_site_links(root: str, result: FetchResult) -> List[str]:
+    """Links of an HTML page that stay on the root's host and under its path."""
+    if result.status == ERROR or "html" not in (result.content_type or "html"):
+        return []
+    from bs4 import BeautifulSoup
+    base = urlparse(root)
+    prefix = base.path.rsplit("/", 1)[0] + "/"
+    links = []
+    for anchor in BeautifulSoup(result.content, "html.parser").find_all("a", href=True):
+        link = urldefrag(urljoin(result.url, anchor["href"]))[0]
+        parsed = urlparse(link)
+        if parsed.scheme in ("http", "https") and parsed.netloc == base.netloc and parsed.path.startswith(prefix):
+            links.append(link)
+    return links
+
+
+def html_to_text(html: str) -> str:
+    """Readable text of an HTML page, without scripts and styles."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    for element in soup(["script", "style", "nav", "footer"]):
+        element.decompose()
+    main = soup.find("main") or soup.find("article") or soup
+    lines = (line.strip() for line in main.get_text().splitlines())
+    phrases = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return "\n".join(p for p in phrases if p)
+
+
+def _run(coro):
+    """Run a coroutine from synchronous code, also when called inside a running event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    result: Dict[str, Any] = {}
+
+    def target():
+        try:
+            result["value"] = asyncio.run(coro)
+        except BaseException as e:  # re-raised in the caller's thread
+            result["error"] = e
+    thread = threading.Thread(target=target, name="web-fetch")
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
@@ -7,6 +7,8 @@ from typing import List, Optional
 from agno.document.base import Document
 from agno.document.chunking.strategy import ChunkingStrategy
 
+from i2c.utils.parse_cache import parse_cache
+
 # Logger fallback
 try:
     from i2c.cli.controller import canvas
@@ -77,7 +79,7 @@ class ASTChunkingStrategy(ChunkingStrategy):
         content = document.content or ""
         # 1) Try plain AST parse
         try:
-            tree = ast.parse(content)
+            tree = parse_cache.parse_python(content)
         except (SyntaxError, ValueError) as e:
             canvas.warning(f"{e.__class__.__name__} in AST parse: {e}; falling back to lines")
             return SimpleLineChunker().chunk(document)
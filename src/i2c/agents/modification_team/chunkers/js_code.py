@@ -15,6 +15,7 @@ except ImportError:
     esprima = None
 
 # Your other chunkers
+from i2c.utils.parse_cache import parse_cache
 from .generic import GenericTextChunkingStrategy
 from .jsx_code import JSXCodeChunkingStrategy
 
@@ -64,7 +65,7 @@ class JSCodeChunkingStrategy(ChunkingStrategy):
 
         # 3) Try to parse
         try:
-            tree = esprima.parseScript(content, tolerant=True, loc=True)
+            tree = parse_cache.parse_js(content, tolerant=True, loc=True)
         except Exception as e:
             canvas.error(f"Failed to parse JS file with esprima: {e}")
             return JSXCodeChunkingStrategy().chunk(document)
@@ -0,0 +1,260 @@
+# src/i2c/agents/modification_team/chunkers/pdf_layout.py
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from agno.document.base import Document
+from agno.document.chunking.agentic import AgenticChunking
+from agno.document.chunking.strategy import ChunkingStrategy
+from agno.models.message import Message
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+# Logger fallback
+try:
+    from i2c.cli.controller import canvas
+except ImportError:
+    class FallbackCanvas:
+        def info(self, msg):    print(f"[INFO_PDF] {msg}")
+        def warning(self, msg): print(f"[WARN_PDF] {msg}")
+    canvas = FallbackCanvas()
+
+from .generic import GenericTextChunkingStrategy
+
+PDF_CHUNK_CACHE = Path(os.getenv("I2C_PDF_CHUNK_CACHE", ".pdf_chunk_cache.json"))
+
+_NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)*|[IVX]+\.|Chapter \d+|Section \d+)\s+\S")
+
+
+class PdfLine:
+    __slots__ = ("page", "text", "size", "bold")
+
+    def __init__(self, page: int, text: str, size: float, bold: bool):
+        self.page, self.text, self.size, self.bold = page, text, size, bold
+
+
+def _pdf_path(document: Document) -> Optional[Path]:
+    meta = document.meta_data or {}
+    for key in ("source_path", "file_path"):
+        if meta.get(key) and Path(meta[key]).is_file():
+            return Path(meta[key])
+    return None
+
+
+def extract_pdf_lines(path: Path) -> List[PdfLine]:
+    """Extract text lines with page number, effective font size and boldness."""
+    lines: List[PdfLine] = []
+    reader = pypdf.PdfReader(str(path))
+    for page_no, page in enumerate(reader.pages, 1):
+        current: List[Tuple[str, float, bool]] = []
+
+        def flush():
+            text = "".join(t for t, _, _ in current).strip()
+            if text:
+                size = max(s for _, s, _ in current)
+                bold = all(b for t, _, b in current if t.strip())
+                lines.append(PdfLine(page_no, text, size, bold))
+            current.clear()
+
+        def visitor(text, cm, tm, font_dict, font_size):
+            scale = abs(tm[3] * cm[3]) or 1.0
+            base = str((font_dict or {}).get("/BaseFont", ""))
+            bold = "Bold" in base or "Black" in base
+            parts = text.split("\n")
+            for i, part in enumerate(parts):
+                if i:
+                    flush()
+                if part:
+                    current.append((part, round(font_size * scale, 1), bold))
+
+        page.extract_text(visitor_text=visitor)
+        flush()
+    return lines
+
+
+def extract_pdf_text(path: Path) -> str:
+    """Plain text of a PDF, pages separated by blank lines."""
+    reader = pypdf.PdfReader(str(path))
+    return "\n\n".join((page.extract_text() or "").strip() for page in reader.pages)
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class PDFLayoutChunkingStrategy(ChunkingStrategy):
+    """
+    Local, deterministic PDF chunker.
+
+    Sections start at heading lines, detected from font size relative to the
+    body text, bold short lines and numbered titles. Sections larger than
+    ``max_chunk_size`` are split at page boundaries when possible and at line
+    boundaries otherwise.
+    """
+
+    def __init__(self, max_chunk_size: int = 800, heading_ratio: float = 1.2, max_heading_len: int = 120):
+        self.max_chunk_size = max_chunk_size
+        self.heading_ratio = heading_ratio
+        self.max_heading_len = max_heading_len
+
+    def is_heading(self, line: PdfLine, body_size: float) -> bool:
+        if len(line.text) > self.max_heading_len or line.text.endswith((".", ",", ";")):
+            return False
+        if body_size and line.size >= body_size * self.heading_ratio:
+            return True
+        return line.bold or bool(_NUMBERED_HEADING.match(line.text))
+
+    def chunk(self, document: Document) -> List[Document]:
+        path = _pdf_path(document)
+        if pypdf is None or path is None:
+            canvas.warning("PDF source unavailable for layout chunking; using paragraph chunking")
+            return GenericTextChunkingStrategy().chunk(document)
+        try:
+            lines = extract_pdf_lines(path)
+        except Exception as e:
+            canvas.warning(f"Failed to read PDF {path}: {e}")
+            return GenericTextChunkingStrategy().chunk(document)
+        if not lines:
+            return []
+
+        sizes = Counter()
+        for line in lines:
+            sizes[line.size] += len(line.text)
+        body_size = sizes.most_common(1)[0][0]
+
+        chunks: List[Document] = []
+        heading = "Introduction"
+        buf: List[PdfLine] = []
+
+        def flush():
+            if buf:
+                content = "\n".join(l.text for l in buf)
+                chunks.append(Document(
+                    content=content,
+                    id=f"{document.id}_{len(chunks) + 1}" if document.id else None,
+                    name=document.name,
+                    meta_data={
+                        "chunk_type": "pdf_section",
+                        "chunk_name": heading,
+                        "page_start": buf[0].page,
+                        "page_end": buf[-1].page,
+                        "start_line": -1,
+                        "end_line": -1,
+                        "language": "pdf",
+                    },
+                ))
+            buf.clear()
+
+        size = 0
+        for line in lines:
+            if self.is_heading(line, body_size):
+                flush()
+                heading, size = line.text, 0
+            elif buf and (
+                size + len(line.text) > self.max_chunk_size
+                or (line.page != buf[-1].page and size >= self.max_chunk_size // 2)
+            ):
+                flush()
+                size = 0
+            buf.append(line)
+            size += len(line.text) + 1
+        flush()
+
+        canvas.info(f"Layout-chunked {path.name}: {len(lines)} lines -> {len(chunks)} chunks")
+        return chunks
+
+
+class CachedAgenticChunking(AgenticChunking):
+    """
+    LLM-driven chunking whose break points are persisted per PDF hash.
+
+    The first run asks the model for break points exactly like
+    ``AgenticChunking``; the resulting character offsets are stored in a JSON
+    cache keyed by the document's SHA-256, so each document is chunked by the
+    LLM at most once.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, model=None, max_chunk_size: int = 800, cache_file: Optional[Path] = None):
+        super().__init__(model=model, max_chunk_size=max_chunk_size)
+        self.cache_file = Path(cache_file or PDF_CHUNK_CACHE)
+
+    def _load(self) -> Dict[str, Dict]:
+        if self.cache_file.exists():
+            try:
+                return json.loads(self.cache_file.read_text())
+            except Exception as e:
+                canvas.warning(f"Failed to load PDF chunk cache: {e}")
+        return {}
+
+    def _store(self, key: str, offsets: List[int]) -> None:
+        with self._lock:
+            cache = self._load()
+            cache[key] = {"max_chunk_size": self.max_chunk_size, "offsets": offsets}
+            tmp = self.cache_file.with_suffix(".tmp")
+            tmp.write_text(json.dumps(cache))
+            tmp.replace(self.cache_file)
+
+    def _llm_offsets(self, text: str) -> List[int]:
+        """Ask the model for break points; returns absolute end offsets."""
+        offsets, pos = [], 0
+        while pos < len(text):
+            window = text[pos:pos + self.max_chunk_size]
+            break_point = len(window)
+            if len(text) - pos > self.max_chunk_size:
+                prompt = f"""Analyze this text and determine a natural breakpoint within the first {self.max_chunk_size} characters.
+            Consider semantic completeness, paragraph boundaries, and topic transitions.
+            Return only the character position number of where to break the text:
+
+            {window}"""
+                try:
+                    response = self.model.response([Message(role="user", content=prompt)])
+                    break_point = min(int(response.content.strip()), self.max_chunk_size)
+                except Exception:
+                    break_point = self.max_chunk_size
+            pos += max(break_point, 1)
+            offsets.append(pos)
+        return offsets
+
+    def chunk(self, document: Document) -> List[Document]:
+        path = _pdf_path(document)
+        if path is not None and pypdf is not None:
+            text, key = extract_pdf_text(path), file_sha256(path)
+        else:
+            text = document.content or ""
+            key = hashlib.sha256(text.encode("utf-8", "ignore")).hexdigest()
+        text = self.clean_text(text)
+
+        entry = self._load().get(key)
+        if entry and entry.get("max_chunk_size") == self.max_chunk_size:
+            offsets = entry["offsets"]
+        else:
+            offsets = self._llm_offsets(text)
+            self._store(key, offsets)
+
+        chunks, start = [], 0
+        for n, end in enumerate(offsets, 1):
+            content = text[start:end].strip()
+            start = end
+            if not content:
+                continue
+            meta = dict(document.meta_data or {}, chunk=n, chunk_size=len(content))
+            chunks.append(Document(
+                id=f"{document.id}_{n}" if document.id else None,
+                name=document.name, meta_data=meta, content=content,
+            ))
+        return chunks
@@ -0,0 +1,129 @@
+# src/i2c/agents/modification_team/chunkers/semantic_text.py
+
+import re
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+from agno.document.base import Document
+from agno.document.chunking.strategy import ChunkingStrategy
+
+# Logger fallback
+try:
+    from i2c.cli.controller import canvas
+except ImportError:
+    class FallbackCanvas:
+        def info(self, msg):    print(f"[INFO_SEM] {msg}")
+        def warning(self, msg): print(f"[WARN_SEM] {msg}")
+    canvas = FallbackCanvas()
+
+from .generic import GenericTextChunkingStrategy
+
+# Sentence boundary: terminal punctuation followed by whitespace, or a blank line
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+Encoder = Callable[[Sequence[str]], np.ndarray]
+
+
+def _default_encoder() -> Optional[Encoder]:
+    """Batch encoder over the shared context embedding model, if it loaded."""
+    from i2c.agents.modification_team.context_utils import _embedding_model
+    if _embedding_model is None:
+        return None
+    return lambda texts: _embedding_model.encode(list(texts), batch_size=64, convert_to_numpy=True)
+
+
+class SemanticTextChunkingStrategy(ChunkingStrategy):
+    """
+    Semantic chunker for plain text.
+
+    All sentences of a document are embedded in a single batched call, split
+    points are where adjacent-sentence cosine similarity drops below the
+    threshold (or the chunk would exceed ``chunk_size`` characters), and each
+    chunk carries the normalized mean of its sentence vectors in
+    ``Document.embedding`` so indexers do not embed the text a second time.
+    """
+
+    def __init__(
+        self,
+        encoder: Optional[Encoder] = None,
+        chunk_size: int = 1000,
+        similarity_threshold: float = 0.6,
+    ):
+        self._encoder = encoder
+        self.chunk_size = chunk_size
+        self.similarity_threshold = similarity_threshold
+
+    @property
+    def encoder(self) -> Optional[Encoder]:
+        if self._encoder is None:
+            self._encoder = _default_encoder()
+        return self._encoder
+
+    @staticmethod
+    def split_sentences(text: str) -> List[tuple]:
+        """Return (start, end) character spans of the sentences in ``text``."""
+        spans, start = [], 0
+        for m in _SENTENCE_END.finditer(text):
+            if text[start:m.start()].strip():
+                spans.append((start, m.start()))
+            start = m.end()
+        if text[start:].strip():
+            spans.append((start, len(text)))
+        return spans
+
+    def breakpoints(self, embeddings: np.ndarray, lengths: np.ndarray) -> List[int]:
+        """Indices of sentences that start a new chunk (always includes 0)."""
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        unit = embeddings / np.maximum(norms, 1e-12)
+        similarity = np.einsum("ij,ij->i", unit[:-1], unit[1:])
+        semantic = set((np.nonzero(similarity < self.similarity_threshold)[0] + 1).tolist())
+
+        starts, size = [0], 0
+        for i, length in enumerate(lengths.tolist()):
+            if i and (i in semantic or size + length > self.chunk_size):
+                starts.append(i)
+                size = 0
+            size += length
+        return starts
+
+    def chunk(self, document: Document) -> List[Document]:
+        text = document.content or ""
+        spans = self.split_sentences(text)
+        encoder = self.encoder
+        if len(spans) < 2 or encoder is None:
+            if encoder is None:
+                canvas.warning("Embedding model unavailable; falling back to paragraph chunking")
+            return GenericTextChunkingStrategy().chunk(document)
+
+        try:
+            embeddings = np.asarray(encoder([text[s:e] for s, e in spans]), dtype=np.float32)
+        except Exception as e:
+            canvas.warning(f"Batch sentence embedding failed: {e}; falling back to paragraph chunking")
+            return GenericTextChunkingStrategy().chunk(document)
+
+        lengths = np.array([e - s for s, e in spans])
+        starts = self.breakpoints(embeddings, lengths)
+        bounds = zip(starts, starts[1:] + [len(spans)])
+
+        chunks: List[Document] = []
+        for n, (first, last) in enumerate(bounds, 1):
+            begin, end = spans[first][0], spans[last - 1][1]
+            vector = embeddings[first:last].mean(axis=0)
+            vector /= max(float(np.linalg.norm(vector)), 1e-12)
+            content = text[begin:end]
+            chunks.append(Document(
+                content=content,
+                id=f"{document.id}_{n}" if document.id else None,
+                name=document.name,
+                embedding=vector.tolist(),
+                meta_data={
+                    "chunk_type": "semantic_text",
+                    "chunk_name": content[:30],
+                    "start_line": text.count("\n", 0, begin) + 1,
+                    "end_line": text.count("\n", 0, end) + 1,
+                    "language": document.meta_data.get("language", "text"),
+                },
+            ))
+
+        canvas.info(f"Semantic chunking: {len(spans)} sentences -> {len(chunks)} chunks (1 batch)")
+        return chunks
@@ -342,6 +342,8 @@ from i2c.tools.neurosymbolic.semantic_tool import SemanticGraphTool
 from builtins import llm_highest, llm_highest
 from dataclasses import asdict
 from i2c.agents.modification_team.domain.modification_payload import ModPayload 
+from i2c.utils.parse_cache import parse_cache
+from i2c.utils.context_packer import pack_text, token_budget
 import difflib, json, pathlib
 import pydantic
 EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL_NAME', 'all-MiniLM-L6-v2')
@@ -2826,9 +2828,8 @@ class ValidatorAdapter(_AgentPortAdapter, IValidator):
         
         # Validate Python syntax
         if ext == '.py':
-            try:
-                compile(content, file_path, 'exec')
-            except SyntaxError as e:
+            e = parse_cache.python_syntax_error(content, file_path, compile_check=True)
+            if e is not None:
                 result["valid"] = False
                 result["messages"].append(f"Python syntax error in {file_path}, line {e.lineno}: {e.msg}")
         
@@ -3025,7 +3026,7 @@ class ValidatorAdapter(_AgentPortAdapter, IValidator):
                 
         # Add RAG context if available
         if rag_context:
-            prompt += f"\n## Codebase Context\n{rag_context[:1000]}...\n"
+            prompt += f"\n## Codebase Context\n{pack_text(rag_context, token_budget('modifier'), label='validator')}\n"
             
         # Add validation instructions
         prompt += """
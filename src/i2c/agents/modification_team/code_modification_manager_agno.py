@@ -1,7 +1,7 @@
 # /src/i2c/agents/modification_team/code_modification_manager_agno.py
 import json
 from pathlib import Path
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 from agno.agent import Agent
 from agno.team import Team
@@ -32,6 +32,25 @@ def _should_use_knowledge(modification_step: Dict[str, Any]) -> bool:
     
     return any(keyword in task for keyword in knowledge_worthy) and len(task) > 10
 
+# Knowledge types that answer a query type; the search itself excludes the rest
+QUERY_KNOWLEDGE_TYPES = {
+    "core_patterns": ["principle", "example"],
+    "error_patterns": ["antipattern"],
+}
+
+def _retrieve_typed_knowledge(knowledge_base, query: str, query_type: str, limit: int) -> List[Dict[str, Any]]:
+    """Retrieve with a knowledge_type prefilter, falling back to an unfiltered search
+    for knowledge bases without typed chunks or without filter support."""
+    types = QUERY_KNOWLEDGE_TYPES.get(query_type)
+    if types:
+        try:
+            chunks = knowledge_base.retrieve_knowledge(query=query, limit=limit, filters={"knowledge_type": types})
+            if chunks:
+                return chunks
+        except TypeError:
+            pass
+    return knowledge_base.retrieve_knowledge(query=query, limit=limit) or []
+
 def _get_principle_enhanced_context(session_state: Dict[str, Any], 
                                   modification_step: Dict[str, Any]) -> str:
     """Transform knowledge using deep contextual understanding"""
@@ -63,7 +82,7 @@ def _get_principle_enhanced_context(session_state: Dict[str, Any],
         # Retrieve all knowledge types
         all_knowledge = []
         for query_type, query in knowledge_queries.items():
-            chunks = knowledge_base.retrieve_knowledge(query=query, limit=2)
+            chunks = _retrieve_typed_knowledge(knowledge_base, query, query_type, limit=2)
             for chunk in chunks:
                 chunk["query_type"] = query_type  # Tag the knowledge type
                 all_knowledge.append(chunk)
@@ -8,9 +8,16 @@ from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from i2c.db_utils import (
+    add_signatures,
     get_db_connection,
     get_or_create_table,
     add_or_update_chunks,
+    collect_orphans,
+    ensure_scalar_index,
+    get_project_id,
+    project_filter,
+    sql_quote,
+    PROJECT_ID_FIELD,
     TABLE_CODE_CONTEXT,
     SCHEMA_CODE_CONTEXT,
 )
@@ -26,6 +33,10 @@ from ..chunkers.generic  import GenericTextChunkingStrategy
 from i2c.cli.controller import canvas
 import esprima
 
+# Fixed-size chunks (characters) for files too long for syntax-aware chunking
+COARSE_CHUNK_SIZE = int(os.getenv("I2C_COARSE_CHUNK_SIZE", "500"))
+COARSE_CHUNK_OVERLAP = int(os.getenv("I2C_COARSE_CHUNK_OVERLAP", "50"))
+
 def get_js_chunks(document: Document) -> List[Document]:
     """
     1) Check if file contains JSX syntax (< and > patterns in JS context)
@@ -74,9 +85,10 @@ class ContextIndexer:
     Scans a codebase, chunks files, embeds each chunk,
     deduplicates, and writes to LanceDB.
     """
-    def __init__(self, project_root: Path):
+    def __init__(self, project_root: Path, project_id: str | None = None):
         
         self.project_root = project_root
+        self.project_id = project_id or get_project_id(project_root)
         from i2c.config.config import load_config
         self.config = load_config()
         
@@ -92,7 +104,8 @@ class ContextIndexer:
         self.table            = None  # Will be set during index_project
         self.seen_hashes      = set()
         
-        logger.info(f"ContextIndexer initialized with max_file_size={self.max_file_size}, "
+        logger.info(f"ContextIndexer initialized for project_id={self.project_id}, "
+                    f"max_file_size={self.max_file_size}, "
                     f"max_lines_coarse={self.max_lines_coarse}, skip_dirs={self.skip_dirs}, "
                     f"workers={self.workers}")
     
@@ -185,7 +198,7 @@ class ContextIndexer:
                 return result
 
             try:
-                self.table.add(chunks)
+                self.table.add(add_signatures(self.table, chunks))
                 result['indexed'] = 1
                 result['chunks'] = len(chunks)
             except Exception as e:
@@ -216,7 +229,8 @@ class ContextIndexer:
         return status
 
     def __str__(self):
-        return f"ContextIndexer(project_root={self.project_root}, db={self.db is not None})"
+        return (f"ContextIndexer(project_root={self.project_root}, "
+                f"project_id={self.project_id}, db={self.db is not None})")
 
     def __repr__(self):
         return self.__str__()
@@ -264,7 +278,7 @@ class ContextIndexer:
             logger.info(
                 f"{file_path.name} has {len(lines)} lines (>{self.max_lines_coarse}); using FixedSizeChunking"
             )
-            chunks = FixedSizeChunking(chunk_size=500, overlap=50).chunk(doc)
+            chunks = FixedSizeChunking(chunk_size=COARSE_CHUNK_SIZE, overlap=COARSE_CHUNK_OVERLAP).chunk(doc)
         else:
             # Fine-grained chunking: route .js through get_js_chunks, everything else via factory
             try:
@@ -297,7 +311,8 @@ class ContextIndexer:
                     continue
                 self.seen_hashes.add(content_hash)
 
-                vec = embed_text(d.content)
+                # Chunkers that embed while splitting hand their vectors over
+                vec = d.embedding if d.embedding is not None else embed_text(d.content)
                 if vec is None:
                     logger.warning(f"Embedding failed for chunk in {file_path}")
                     continue
@@ -322,6 +337,7 @@ class ContextIndexer:
                     'language': meta.get('language', ''),
                     'lint_errors': meta.get('lint_errors', []),
                     'dependencies': meta.get('dependencies', []),
+                    PROJECT_ID_FIELD: self.project_id,
                 }
                 records.append(record)
             except Exception as e:
@@ -385,6 +401,8 @@ class ContextIndexer:
             for ext, count in sorted(ext_counter.items(), key=lambda x: -x[1]):
                 if ext not in _EXTENSION_MAP:
                     logger.warning(f"[Chunker] No handler for extension {ext} ({count} files)")
+            # Every file found is live, even the ones past the per-run limit
+            live_paths = {str(p.relative_to(self.project_root)) for p in files}
             # Limit number of files for testing
             if len(files) > 100:
                 logger.info(f"Limiting to 100 files for processing")
@@ -405,10 +423,9 @@ class ContextIndexer:
                     status['files_skipped'] += 1
                     continue
                 
-                # Add chunks to database
+                # Replace this file's chunks within the project namespace
                 try:
-                    # Add directly to the table
-                    self.table.add(chunks)
+                    self._replace_file_chunks(file_path, chunks)
                     status['files_indexed'] += 1
                     status['chunks_indexed'] += len(chunks)
                     total_chunks += len(chunks)
@@ -423,11 +440,31 @@ class ContextIndexer:
                 status['errors'].append(f"File processing error: {e}")
                 status['files_skipped'] += 1
         
+        # Drop chunks of files that no longer exist in this project
+        try:
+            gc = collect_orphans(self.table, 'path', live_paths, scope=project_filter(self.project_id))
+            status['files_removed'] = len(gc['orphans'])
+            status['chunks_removed'] = gc['rows_removed']
+            if gc['orphans']:
+                logger.info(f"Removed {gc['rows_removed']} chunks from {len(gc['orphans'])} deleted files")
+        except Exception as e:
+            logger.error(f"Garbage collection failed: {e}")
+            status['errors'].append(f"Garbage collection error: {e}")
+
+        # Index the namespace column so per-project queries prune instead of scanning
+        ensure_scalar_index(self.table, PROJECT_ID_FIELD)
+
         logger.info(
             f"Indexing complete: {status['files_indexed']} files, "
             f"{status['chunks_indexed']} chunks, {status['files_skipped']} skipped."
         )
         return status
+
+    def _replace_file_chunks(self, file_path: Path, records: list) -> None:
+        """Delete a file's previous chunks in this project, then add the new ones."""
+        rel_path = str(file_path.relative_to(self.project_root))
+        self.table.delete(f"path = {sql_quote(rel_path)} AND {project_filter(self.project_id)}")
+        self.table.add(add_signatures(self.table, records))
   
     def _process_file(self, file_path: Path) -> dict:
         """Process a single file into chunks and add to database."""
@@ -456,7 +493,7 @@ class ContextIndexer:
                 # Try to add directly to self.table
                 if self.table is not None:
                     try:
-                        self.table.add(records)
+                        self._replace_file_chunks(file_path, records)
                         result['indexed'] = 1
                         result['chunks'] = len(records)
                         logger.info(f"Added {len(records)} chunks from {file_path}")
@@ -473,6 +510,7 @@ class ContextIndexer:
                     'path',
                     str(file_path.relative_to(self.project_root)),
                     records,
+                    project_id=self.project_id,
                 )
                 if success:
                     result['indexed'] = 1
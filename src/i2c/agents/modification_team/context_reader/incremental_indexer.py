@@ -10,9 +10,18 @@ import json
 from datetime import datetime
 
 from i2c.db_utils import (
+    add_signatures,
     get_db_connection,
     get_or_create_table,
     add_or_update_chunks,
+    collect_orphans,
+    delete_values,
+    ensure_scalar_index,
+    get_project_id,
+    project_filter,
+    scan_table,
+    sql_quote,
+    PROJECT_ID_FIELD,
     TABLE_CODE_CONTEXT,
     SCHEMA_CODE_CONTEXT,
 )
@@ -37,6 +46,7 @@ SCHEMA_FILE_METADATA = pa.schema([
     ("content_hash", pa.string()),
     ("last_indexed", pa.string()),
     ("chunk_count", pa.int64()),
+    (PROJECT_ID_FIELD, pa.string()),
 ])
 
 TABLE_FILE_METADATA = "file_metadata"
@@ -50,10 +60,14 @@ class IncrementalContextIndexer:
     - Only reindexes files that have actually changed
     - Handles file deletions and updates
     - Significantly faster than full reindexing
+    - Scopes chunks and metadata to a per-project namespace (project_id)
+    - Garbage-collects chunks of deleted/renamed files, either by a full
+      live-vs-indexed diff or incrementally from recorded tombstones
     """
     
-    def __init__(self, project_root: Path):
+    def __init__(self, project_root: Path, project_id: Optional[str] = None):
         self.project_root = project_root
+        self.project_id = project_id or get_project_id(project_root)
         from i2c.config.config import load_config
         self.config = load_config()
         
@@ -71,7 +85,10 @@ class IncrementalContextIndexer:
         self.code_table = None
         self.metadata_table = None
         
-        logger.info(f"IncrementalContextIndexer initialized for {project_root}")
+        # Relative paths reported deleted (or renamed away) since the last GC
+        self._tombstones: Set[str] = set()
+        
+        logger.info(f"IncrementalContextIndexer initialized for {project_root} (project_id={self.project_id})")
     
     def _get_file_metadata(self, file_path: Path) -> Dict:
         """Get current file metadata for change detection"""
@@ -99,7 +116,7 @@ class IncrementalContextIndexer:
         
         try:
             if self.metadata_table is not None:
-                df = self.metadata_table.to_pandas()
+                df = scan_table(self.metadata_table, where=project_filter(self.project_id))
                 for _, row in df.iterrows():
                     stored_metadata[row['file_path']] = {
                         'file_size': row['file_size'],
@@ -139,7 +156,8 @@ class IncrementalContextIndexer:
                 'mtime': metadata['mtime'],
                 'content_hash': metadata['content_hash'],
                 'last_indexed': datetime.now().isoformat(),
-                'chunk_count': chunk_count
+                'chunk_count': chunk_count,
+                PROJECT_ID_FIELD: self.project_id,
             }
             
             # Store metadata in the file_metadata table
@@ -148,7 +166,9 @@ class IncrementalContextIndexer:
                     # First, try to remove existing record for this file
                     try:
                         # Delete any existing records for this file_path
-                        self.metadata_table.delete(f"file_path = '{file_path}'")
+                        self.metadata_table.delete(
+                            f"file_path = {sql_quote(file_path)} AND {project_filter(self.project_id)}"
+                        )
                     except Exception:
                         # If delete fails, that's okay - might not exist
                         pass
@@ -206,7 +226,8 @@ class IncrementalContextIndexer:
             
             # Create document and chunk it
             document = Document(content=metadata['content'], 
-                              meta_data={'file_path': str(file_path.relative_to(self.project_root))})
+                              meta_data={'file_path': str(file_path.relative_to(self.project_root)),
+                                         'source_path': str(file_path)})
             
             # Get appropriate chunker
             try:
@@ -225,7 +246,8 @@ class IncrementalContextIndexer:
             chunk_data = []
             for i, chunk in enumerate(chunks):
                 try:
-                    embedding = embed_text(chunk.content)
+                    # Chunkers that embed while splitting hand their vectors over
+                    embedding = chunk.embedding if chunk.embedding is not None else embed_text(chunk.content)
                     if embedding is None:
                         continue
                     
@@ -245,7 +267,8 @@ class IncrementalContextIndexer:
                         'content_hash': hashlib.sha256(chunk.content.encode()).hexdigest(),
                         'language': '',
                         'lint_errors': [],
-                        'dependencies': []
+                        'dependencies': [],
+                        PROJECT_ID_FIELD: self.project_id,
                     }
                     
                     chunk_data.append(chunk_record)
@@ -254,11 +277,14 @@ class IncrementalContextIndexer:
                 except Exception as e:
                     errors.append(f"Chunk {i} error: {str(e)}")
             
-            # Add chunks to database
-            if chunk_data and self.code_table is not None:
+            # Replace this file's chunks within the project namespace
+            if self.code_table is not None:
                 try:
-                    # Use the table's add method directly instead of add_or_update_chunks
-                    self.code_table.add(chunk_data)
+                    self.code_table.delete(
+                        f"path = {sql_quote(metadata['file_path'])} AND {project_filter(self.project_id)}"
+                    )
+                    if chunk_data:
+                        self.code_table.add(add_signatures(self.code_table, chunk_data))
                 except Exception as e:
                     errors.append(f"Database insertion error: {str(e)}")
             
@@ -271,6 +297,54 @@ class IncrementalContextIndexer:
             errors.append(f"File processing error: {str(e)}")
             return str(file_path.relative_to(self.project_root)), 0, errors
     
+    def _rel_path(self, path) -> str:
+        path = Path(path)
+        if path.is_absolute():
+            path = path.relative_to(self.project_root)
+        return str(path)
+
+    def mark_deleted(self, path) -> None:
+        """Record a tombstone for a deleted file (change-feed entry point)."""
+        self._tombstones.add(self._rel_path(path))
+
+    def mark_renamed(self, old_path, new_path) -> None:
+        """Record a rename: the old path is tombstoned, the new one is indexed as new."""
+        self._tombstones.add(self._rel_path(old_path))
+        self._tombstones.discard(self._rel_path(new_path))
+
+    def collect_garbage(self, live_paths: Optional[Set[str]] = None) -> Dict:
+        """
+        Remove chunks and metadata for files that no longer exist.
+
+        With ``live_paths`` (relative paths of every live file) a full diff
+        against the indexed paths is done; otherwise only pending tombstones
+        are processed, which avoids walking the project.
+        """
+        result = {'files_removed': 0, 'chunks_removed': 0}
+        if (self.code_table is None or self.metadata_table is None) and self.db is not None:
+            self.code_table = get_or_create_table(self.db, TABLE_CODE_CONTEXT, SCHEMA_CODE_CONTEXT)
+            self.metadata_table = get_or_create_table(self.db, TABLE_FILE_METADATA, SCHEMA_FILE_METADATA)
+        if self.code_table is None or self.metadata_table is None:
+            return result
+
+        scope = project_filter(self.project_id)
+        if live_paths is None:
+            orphans = sorted(self._tombstones)
+            chunks_removed = delete_values(self.code_table, 'path', orphans, scope=scope)
+            delete_values(self.metadata_table, 'file_path', orphans, scope=scope)
+        else:
+            code_gc = collect_orphans(self.code_table, 'path', live_paths, scope=scope)
+            meta_gc = collect_orphans(self.metadata_table, 'file_path', live_paths, scope=scope)
+            orphans = sorted(set(code_gc['orphans']) | set(meta_gc['orphans']))
+            chunks_removed = code_gc['rows_removed']
+        self._tombstones.clear()
+
+        result['files_removed'] = len(orphans)
+        result['chunks_removed'] = chunks_removed
+        if orphans:
+            canvas.info(f"🗑️ Removed {chunks_removed} chunks from {len(orphans)} deleted files")
+        return result
+
     def index_project_incrementally(self) -> Dict:
         """
         Intelligently index only changed files in the project.
@@ -281,6 +355,8 @@ class IncrementalContextIndexer:
             'files_skipped': 0,
             'files_unchanged': 0,
             'chunks_indexed': 0,
+            'files_removed': 0,
+            'chunks_removed': 0,
             'errors': []
         }
         
@@ -342,6 +418,13 @@ class IncrementalContextIndexer:
         
         canvas.info(f"📝 {len(files_to_index)} files need indexing, {status['files_unchanged']} unchanged")
         
+        # Drop chunks of files that were deleted or renamed since the last run
+        try:
+            live_paths = {str(p.relative_to(self.project_root)) for p in files_to_check}
+            status.update(self.collect_garbage(live_paths))
+        except Exception as e:
+            status['errors'].append(f"Garbage collection error: {str(e)}")
+        
         if not files_to_index:
             canvas.success("✅ All files up to date!")
             return status
@@ -370,12 +453,15 @@ class IncrementalContextIndexer:
                     status['errors'].append(f"{rel_path}: {str(e)}")
                     status['files_skipped'] += 1
         
+        # Index the namespace column so per-project queries prune instead of scanning
+        ensure_scalar_index(self.code_table, PROJECT_ID_FIELD)
+
         canvas.success(f"✅ Incremental indexing complete!")
         canvas.info(f"📊 {status['files_indexed']} indexed, {status['files_unchanged']} unchanged")
         
         return status
 
 # Factory function
-def create_incremental_indexer(project_root: Path) -> IncrementalContextIndexer:
+def create_incremental_indexer(project_root: Path, project_id: Optional[str] = None) -> IncrementalContextIndexer:
     """Create an incremental context indexer"""
-    return IncrementalContextIndexer(project_root)
\ No newline at end of file
+    return IncrementalContextIndexer(project_root, project_id=project_id)
\ No newline at end of file
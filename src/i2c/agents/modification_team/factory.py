@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from agno.embedder.sentence_transformer import SentenceTransformerEmbedder
 from .context_utils import EMBEDDING_MODEL_NAME
@@ -19,11 +20,11 @@ from .chunkers.css_code import CSSCodeChunkingStrategy
 from .chunkers.markdown_code import MarkdownChunkingStrategy
 from .chunkers.shell_script import ShellScriptChunkingStrategy
 from .chunkers.jsx_code import JSXCodeChunkingStrategy
+from .chunkers.semantic_text import SemanticTextChunkingStrategy
+from .chunkers.pdf_layout import PDFLayoutChunkingStrategy, CachedAgenticChunking
 
 from agno.document.chunking.fixed import FixedSizeChunking
 from agno.document.chunking.recursive import RecursiveChunking
-from agno.document.chunking.semantic import SemanticChunking
-from agno.document.chunking.agentic import AgenticChunking
 
 # ✅ Reference only — NOT used for instantiation
 _EXTENSION_MAP = {
@@ -45,20 +46,20 @@ _EXTENSION_MAP = {
     '.yml':  'FixedSizeChunking',
     '.toml': 'FixedSizeChunking',
     '.ini':  'FixedSizeChunking',
-    '.txt':  'SemanticChunking',
-    '.pdf':  'AgenticChunking',
+    '.txt':  'SemanticTextChunkingStrategy',
+    '.pdf':  'PDFLayoutChunkingStrategy',  # CachedAgenticChunking with I2C_PDF_CHUNKING=agentic
 }
 
 # Pre-instantiated chunkers (custom args or models)
 _PRECONFIGURED_CHUNKERS = {
-    '.txt': SemanticChunking(
-        embedder=sentence_embedder,
+    '.txt': SemanticTextChunkingStrategy(
         chunk_size=1000,
         similarity_threshold=0.6,
     ),
-    '.pdf': AgenticChunking(
-        model=llm_ligthweight,
-        max_chunk_size=800,
+    '.pdf': (
+        CachedAgenticChunking(model=llm_ligthweight, max_chunk_size=800)
+        if os.getenv('I2C_PDF_CHUNKING', 'layout') == 'agentic'
+        else PDFLayoutChunkingStrategy(max_chunk_size=800)
     ),
     '.markdown': RecursiveChunking(chunk_size=2000, overlap=100),
     '.json': FixedSizeChunking(chunk_size=2000, overlap=200),
@@ -11,7 +11,8 @@ from typing import Any, Dict, List, Optional
 from agno.tools.function import Function
 
 # Import our working tool functions
-from .retrieval_tools import vector_retrieve, github_fetch, get_project_context
+from .retrieval_tools import vector_retrieve, github_fetch, get_project_context, _session_project_id
+from i2c.utils.retrieval_service import retrieval_service
 
 class GroqToolResponse:
     """Wrapper to ensure tool responses are compatible with Groq's expected format."""
@@ -22,10 +23,10 @@ class GroqToolResponse:
     def __str__(self):
         return self.content
 
-def groq_vector_retrieve(query: str, source: str = "knowledge", limit: int = 5) -> GroqToolResponse:
+def groq_vector_retrieve(query: str, source: str = "knowledge", limit: int = 5, project_id: Optional[str] = None) -> GroqToolResponse:
     """Groq-compatible vector retrieve function."""
     try:
-        result = vector_retrieve(query, source, limit)
+        result = vector_retrieve(query, source, limit, project_id=project_id)
         return GroqToolResponse(result)
     except Exception as e:
         error_response = json.dumps({"error": f"Vector search failed: {str(e)}"})
@@ -57,12 +58,18 @@ def create_groq_compatible_tools(session_state: Optional[Dict[str, Any]] = None)
         List of Function objects that work properly with Groq
     """
     tools = []
+    project_id = _session_project_id(session_state)
+    # Load the embedding model and open the tables before the first tool call
+    retrieval_service.warm_up()
+
+    def scoped_vector_retrieve(query: str, source: str = "knowledge", limit: int = 5) -> GroqToolResponse:
+        return groq_vector_retrieve(query, source, limit, project_id=project_id)
     
-    # Vector search tool with Groq compatibility
+    # Vector search tool with Groq compatibility (scoped to the session's project)
     vector_tool = Function(
         name="vector_retrieve",
         description="Retrieve context snippets from vector database using semantic search",
-        entrypoint=groq_vector_retrieve,
+        entrypoint=scoped_vector_retrieve,
         parameters={
             "type": "object",
             "properties": {
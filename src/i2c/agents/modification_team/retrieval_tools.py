@@ -3,56 +3,66 @@ from pathlib import Path
 from typing import Any, Dict, Optional, List
 from textwrap import dedent
 from agno.tools.function import Function
-from i2c.db_utils import get_db_connection, query_context, TABLE_CODE_CONTEXT, TABLE_KNOWLEDGE_BASE
-from i2c.workflow.modification.rag_config import get_embed_model
+from i2c.db_utils import get_project_id, query_context_by_text, TABLE_CODE_CONTEXT, TABLE_KNOWLEDGE_BASE
+from i2c.utils.context_packer import pack_context, token_budget
+from i2c.utils.retrieval_service import retrieval_service
 
 
-def vector_retrieve(query: str, source: str = "both", limit: int = 5) -> str:
+def _session_project_id(session_state: Optional[dict]) -> Optional[str]:
+    """Resolve the project namespace from shared session state, if any."""
+    if not session_state:
+        return None
+    if session_state.get("project_id"):
+        return session_state["project_id"]
+    if session_state.get("project_path"):
+        return get_project_id(session_state["project_path"])
+    return None
+
+
+@retrieval_service.instrument("vector_retrieve")
+def vector_retrieve(query: str, source: str = "both", limit: int = 5, project_id: Optional[str] = None) -> str:
     """
     Retrieve relevant context from vector database
     Args:
         query: Search query (e.g., "Agno Agent patterns", "LLM provider usage")  
         source: "code", "knowledge", or "both"
         limit: Max results to return
+        project_id: Restrict code results to one project namespace
     """
     try:
-        db = get_db_connection()
-        embed_model = get_embed_model()
+        # warm model and table handles shared by every tool call in the process
+        db = retrieval_service.db()
+        embed_model = retrieval_service.embed_model()
         if not db or not embed_model:
             return "Vector retrieval unavailable"
 
-        # compute vector
-        if hasattr(embed_model, 'encode'):
-            vector = embed_model.encode(query)
-        elif hasattr(embed_model, 'get_embedding_and_usage'):
-            vector, _ = embed_model.get_embedding_and_usage(query)
-        else:
-            return f"Unknown embedding model: {type(embed_model)}"
-
+        # the query is embedded once and repeats are served by the retrieval cache
         results = []
         # code context
         if source in ("code", "both"):
             try:
-                code_df = query_context(db, TABLE_CODE_CONTEXT, query_vector=vector, limit=limit)
+                code_df = query_context_by_text(db, TABLE_CODE_CONTEXT, query, embed_model, limit=limit, project_id=project_id, distinct=True)
                 if code_df is not None and not code_df.empty:
                     for _, row in code_df.iterrows():
                         results.append({
                             "source": "code",
                             "file": row.get('path', ''),
-                            "content": row.get('content', '')[:800]
+                            "content": row.get('content', ''),
+                            "_distance": row.get('_distance'),
                         })
             except Exception as e:
                 results.append({"error": f"Code context error: {e}"})
         # knowledge base
         if source in ("knowledge", "both"):
             try:
-                kb_df = query_context(db, TABLE_KNOWLEDGE_BASE, query_vector=vector, limit=limit)
+                kb_df = query_context_by_text(db, TABLE_KNOWLEDGE_BASE, query, embed_model, limit=limit, distinct=True)
                 if kb_df is not None and not kb_df.empty:
                     for _, row in kb_df.iterrows():
                         results.append({
                             "source": "knowledge",
                             "file": row.get('source', ''),
-                            "content": row.get('content', '')[:800]
+                            "content": row.get('content', ''),
+                            "_distance": row.get('_distance'),
                         })
             except Exception as e:
                 results.append({"error": f"Knowledge base error: {e}"})
@@ -60,15 +70,24 @@ def vector_retrieve(query: str, source: str = "both", limit: int = 5) -> str:
         if not results:
             return f"No context found for '{query}'"
 
-        # format for LLM
-        out = [f"--- Result {i+1} [{r.get('source')}] {r.get('file')}" for i, r in enumerate(results)]
-        for line in out:
-            pass
+        # pack the closest results into the tool's token budget
+        errors = [r for r in results if "error" in r]
+        packed = pack_context(
+            [r for r in results if "error" not in r],
+            token_budget("retrieval_tool"),
+            overhead=lambda r: len(str(r.get("file", ""))) // 4 + 12,
+            label="vector_retrieve",
+        )
+        results = errors + [
+            {"source": e["item"]["source"], "file": e["item"]["file"], "content": e["text"]}
+            for e in packed.entries
+        ]
         return json.dumps(results)
     except Exception as e:
         return f"vector_retrieve error: {e}"
 
 
+@retrieval_service.instrument("github_fetch")
 def github_fetch(repo_path: str, file_path: str = "") -> str:
     """
     Fetch content from GitHub repository via API
@@ -108,6 +127,7 @@ def github_fetch(repo_path: str, file_path: str = "") -> str:
         return f"GitHub fetch error: {str(e)}"  
 
 
+@retrieval_service.instrument("get_project_context")
 def get_project_context(project_path: str, focus: str = "") -> str:
     """
     List project files and extract focused lines
@@ -132,12 +152,18 @@ def get_project_context(project_path: str, focus: str = "") -> str:
 
 def create_retrieval_tools(session_state: dict = None) -> List[Function]:
     """Return Function tool wrappers"""
+    project_id = _session_project_id(session_state)
+    retrieval_service.warm_up()
+
+    def scoped_vector_retrieve(query: str, source: str = "both", limit: int = 5) -> str:
+        return vector_retrieve(query, source, limit, project_id=project_id)
+
     return [
         Function(
             name="vector_retrieve",
             description="Retrieve context snippets from vector DB",
             parameters={"type": "object", "properties": {"query": {"type": "string"}, "source": {"type": "string", "enum": ["code","knowledge","both"]}, "limit": {"type": "integer"}}, "required": ["query"]},
-            function=vector_retrieve
+            function=scoped_vector_retrieve
         ),
         Function(
             name="github_fetch",
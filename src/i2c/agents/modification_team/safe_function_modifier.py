@@ -9,6 +9,8 @@ from typing import Dict, Optional, Any, Tuple, List, Union, Set, Callable
 from agno.agent import Agent
 from builtins import llm_highest  # Use high-capacity model for code modification
 
+from i2c.utils.parse_cache import parse_cache
+
 from .patch import Patch
 
 class SafeFunctionModifierAgent(Agent):
@@ -82,7 +84,7 @@ class SafeFunctionModifierAgent(Agent):
             # Try AST parsing first
             try:
                 import ast
-                tree = ast.parse(source)
+                tree = parse_cache.parse_python(source)
                 
                 functions = []
                 
@@ -153,7 +155,7 @@ class SafeFunctionModifierAgent(Agent):
         functions = {}
         try:
             source = file_path.read_text(encoding='utf-8')
-            tree = ast.parse(source)
+            tree = parse_cache.parse_python(source)
             
             for node in ast.walk(tree):
                 if isinstance(node, ast.FunctionDef):
@@ -183,7 +185,7 @@ class SafeFunctionModifierAgent(Agent):
             # Try AST parsing first (for clean files)
             try:
                 import ast
-                tree = ast.parse(source)
+                tree = parse_cache.parse_python(source)
                 
                 # Find the function node by name
                 for node in ast.walk(tree):
@@ -273,7 +275,7 @@ class SafeFunctionModifierAgent(Agent):
             
             # Try parsing with AST
             try:
-                ast.parse(content)
+                parse_cache.parse_python(content)
                 # No syntax errors, file is valid
                 return
             except SyntaxError as e:
@@ -328,7 +330,7 @@ class SafeFunctionModifierAgent(Agent):
             # Try AST parsing first (for clean files)
             try:
                 import ast
-                tree = ast.parse(file_content)
+                tree = parse_cache.parse_python(file_content)
                 
                 # Find the function node
                 function_node = None
@@ -442,7 +444,7 @@ class SafeFunctionModifierAgent(Agent):
             # Validate the fixed file can be parsed
             try:
                 import ast
-                ast.parse(content)
+                parse_cache.parse_python(content)
             except SyntaxError as e:
                 print(f"Warning: Could not fully fix syntax errors in {file_path}: {e}")
         
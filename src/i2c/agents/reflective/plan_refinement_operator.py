@@ -15,6 +15,7 @@ from agno.agent import Agent
 from i2c.cli.controller import canvas
 from builtins import llm_highest,llm_deepseek
 from i2c.workflow.modification.rag_retrieval import retrieve_context_for_planner
+from i2c.db_utils import get_project_id
 from i2c.utils.json_extraction import extract_json_with_fallback
 
 from i2c.agents.reflective.context_aware_operator import (
@@ -122,7 +123,8 @@ class PlanRefinementOperator(ContextAwareOperator):
             parsed_plan = []
 
         retrieved_context = retrieve_context_for_planner(
-            user_request, self.rag_table, self.embed_model
+            user_request, self.rag_table, self.embed_model,
+            project_id=get_project_id(project_path) if project_path else None,
         )
 
         analysis_prompt = self._prepare_analysis_prompt(
@@ -0,0 +1,122 @@
+# src/i2c/cli/ingest_jobs.py
+"""CLI for inspecting and controlling knowledge ingestion jobs."""
+
+import argparse
+import json
+from datetime import datetime
+from pathlib import Path
+
+from i2c.agents.knowledge.ingestion_queue import JOB_CONCURRENCY, IngestionQueue
+
+
+def _describe(job) -> str:
+    done = job.files.get("done", 0)
+    total = sum(job.files.values())
+    line = (f"{job.id:>4}  {job.status:<8} {done:>5}/{total:<5} "
+            f"{job.knowledge_space:<20} {job.path}")
+    if job.error:
+        line += f"\n      error: {job.error}"
+    if job.next_attempt_at and job.status == "queued":
+        line += f"\n      next attempt: {datetime.fromtimestamp(job.next_attempt_at):%H:%M:%S}"
+    return line
+
+
+def _estimate(path: Path, recursive: bool) -> int:
+    from i2c.agents.knowledge.enhanced_knowledge_ingestor import list_supported_files
+    from i2c.agents.knowledge.ingestion_stats import get_ingestion_throughput
+    if not path.exists():
+        print(f"Not found: {path}")
+        return 1
+    files = list_supported_files(path, recursive) if path.is_dir() else [path]
+    estimate = get_ingestion_throughput().estimate(files)
+    print(estimate.describe())
+    print("workers   seconds   memory MiB")
+    for workers, (seconds, memory) in estimate.options.items():
+        marker = "  <- chosen" if workers == estimate.workers else ""
+        print(f"{workers:>7} {seconds:>9.1f} {memory:>12.0f}{marker}")
+    return 0
+
+
+def run_jobs_command(args=None) -> int:
+    """Run the ingestion jobs CLI; returns a process exit code."""
+    parser = argparse.ArgumentParser(description="I2C Factory knowledge ingestion jobs")
+    parser.add_argument("--queue", default=None, help="Job database (default: I2C_INGEST_QUEUE_PATH)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_cmd = commands.add_parser("list", help="List jobs")
+    list_cmd.add_argument("--status", choices=["queued", "running", "paused", "done", "failed"])
+    show_cmd = commands.add_parser("show", help="Show a job and its stats")
+    show_cmd.add_argument("job_id", type=int)
+    for name, text in (("pause", "Pause a job after its current batch"),
+                       ("resume", "Requeue a paused or failed job")):
+        commands.add_parser(name, help=text).add_argument("job_id", type=int)
+    run_cmd = commands.add_parser("run", help="Run queued jobs until none are left")
+    run_cmd.add_argument("--concurrency", "-c", type=int, default=JOB_CONCURRENCY)
+    enqueue_cmd = commands.add_parser("enqueue", help="Queue a file or folder for ingestion")
+    enqueue_cmd.add_argument("path")
+    enqueue_cmd.add_argument("--space", default="default", help="Knowledge space")
+    enqueue_cmd.add_argument("--type", default="documentation", help="Document type")
+    enqueue_cmd.add_argument("--no-recursive", action="store_true")
+    enqueue_cmd.add_argument("--force-refresh", action="store_true")
+    estimate_cmd = commands.add_parser("estimate", help="Predict time and memory of ingesting a file or folder")
+    estimate_cmd.add_argument("path")
+    estimate_cmd.add_argument("--no-recursive", action="store_true")
+
+    args = parser.parse_args(args)
+    if args.command == "estimate":
+        return _estimate(Path(args.path).expanduser(), not args.no_recursive)
+    queue = IngestionQueue(args.queue)
+
+    if args.command == "list":
+        jobs = queue.list(args.status)
+        print("  id  status    files       space                path")
+        for job in jobs:
+            print(_describe(job))
+        return 0
+
+    if args.command == "show":
+        job = queue.get(args.job_id)
+        if job is None:
+            print(f"No job {args.job_id}")
+            return 1
+        print(_describe(job))
+        print(json.dumps({"files": job.files, "metadata": job.metadata, "stats": job.stats}, indent=2))
+        return 0
+
+    if args.command in ("pause", "resume"):
+        ok = getattr(queue, args.command)(args.job_id)
+        job = queue.get(args.job_id)
+        print(f"Job {args.job_id}: {job.status if job else 'not found'}" + ("" if ok else " (unchanged)"))
+        return 0 if ok else 1
+
+    if args.command == "enqueue":
+        path = Path(args.path).expanduser()
+        if not path.exists():
+            print(f"Not found: {path}")
+            return 1
+        try:
+            job = queue.enqueue(path, args.space, args.type,
+                                recursive=not args.no_recursive, force_refresh=args.force_refresh)
+        except ValueError as e:
+            print(e)
+            return 1
+        print(_describe(job))
+        return 0
+
+    try:
+        jobs = queue.run(concurrency=args.concurrency)
+    except KeyboardInterrupt:
+        print("Interrupted; unfinished jobs resume from their last checkpoint")
+        return 130
+    for job in jobs:
+        print(_describe(job))
+    return 0 if all(job.succeeded or job.status == "paused" for job in jobs) else 1
+
+
+def main():
+    """CLI entry point"""
+    raise SystemExit(run_jobs_command())
+
+
+if __name__ == "__main__":
+    main()
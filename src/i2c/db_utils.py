@@ -8,10 +8,14 @@ import lancedb
 from pathlib import Path
 import pyarrow as pa
 import pandas as pd
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Union
+import hashlib
 import json
+import re
 from datetime import datetime
 
+from i2c.utils.near_dup import simhash, suppress_near_duplicates
+
 # Import CLI for logging
 try:
     from i2c.cli.controller import canvas
@@ -28,7 +32,13 @@ except ImportError:
 DB_PATH = "./data/lancedb"            # Store LanceDB data in a subdirectory
 TABLE_CODE_CONTEXT = "code_context"    # Table for code chunks
 TABLE_KNOWLEDGE_BASE = "knowledge_base" # Table for external knowledge
+TABLE_KNOWLEDGE_REFS = "knowledge_refs" # Extra sources of deduplicated knowledge chunks
+TABLE_KNOWLEDGE_USAGE = "knowledge_usage" # Usage and feedback counters of knowledge chunks
 VECTOR_DIMENSION = 384                 # For 'all-MiniLM-L6-v2'
+PROJECT_ID_FIELD = "project_id"        # Namespace column for per-project rows
+SIMHASH_FIELD = "simhash"              # Near-duplicate signature column
+CONTENT_HASH_FIELD = "content_hash"    # Exact-duplicate key of a chunk's text
+NEAR_DUP_OVERFETCH = 3                 # Candidates fetched per requested result when deduplicating
 
 # --- Schema for Code Context Table ---
 SCHEMA_CODE_CONTEXT = pa.schema([
@@ -44,6 +54,8 @@ SCHEMA_CODE_CONTEXT = pa.schema([
     pa.field("end_line", pa.int32()),
     pa.field("content_hash", pa.string()),
     pa.field("language", pa.string()),
+    pa.field(PROJECT_ID_FIELD, pa.string()),
+    pa.field(SIMHASH_FIELD, pa.int64()),
 ])
 
 # --- Schema for Knowledge Base Table (Enhanced V3 Schema) ---
@@ -66,8 +78,178 @@ SCHEMA_KNOWLEDGE_BASE = pa.schema([
     pa.field("application_context", pa.string()), # when to apply this knowledge
     pa.field("confidence_score", pa.float32()),   # how reliable (0.0-1.0)
     pa.field("usage_frequency", pa.int32()),      # how often this gets used
+    pa.field(SIMHASH_FIELD, pa.int64()),          # near-duplicate signature
+    pa.field(CONTENT_HASH_FIELD, pa.string()),    # exact-duplicate key
 ])
 
+# --- Schema for Knowledge References (a source of a chunk stored once) ---
+# A reference carries the referencing source's own metadata: the filterable
+# columns equal the stored row's (only chunks with identical filterable
+# metadata are deduplicated), the rest is handed over when it is promoted.
+SCHEMA_KNOWLEDGE_REFS = pa.schema([
+    pa.field(CONTENT_HASH_FIELD, pa.string()),
+    pa.field("knowledge_space", pa.string()),
+    pa.field("source", pa.string()),
+    pa.field("source_hash", pa.string()),
+    pa.field("chunk_type", pa.string()),
+    pa.field("last_updated", pa.string()),
+    pa.field("category", pa.string()),
+    pa.field("document_type", pa.string()),
+    pa.field("framework", pa.string()),
+    pa.field("version", pa.string()),
+    pa.field("parent_doc_id", pa.string()),
+    pa.field("metadata_json", pa.string()),
+    pa.field("knowledge_type", pa.string()),
+    pa.field("application_context", pa.string()),
+    pa.field("confidence_score", pa.float32()),
+])
+
+# --- Schema for Knowledge Usage (see i2c.utils.knowledge_usage) ---
+# Kept apart from knowledge_base so that counter updates do not create new
+# versions of it (and so do not invalidate cached retrieval results).
+SCHEMA_KNOWLEDGE_USAGE = pa.schema([
+    pa.field("knowledge_space", pa.string()),
+    pa.field(CONTENT_HASH_FIELD, pa.string()),
+    pa.field("usage_frequency", pa.int32()),
+    pa.field("confidence_score", pa.float32()),
+])
+
+# --- Project Namespaces ---
+
+def get_project_id(project_path: Union[str, Path]) -> str:
+    """Return a stable namespace id for a project root.
+
+    The id combines the directory name (for readability) with a short hash of
+    the resolved path, so two projects that share a folder name never collide.
+    """
+    resolved = Path(project_path).resolve()
+    digest = hashlib.sha1(str(resolved).encode()).hexdigest()[:10]
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", resolved.name).strip("_") or "project"
+    return f"{slug}-{digest}"
+
+def sql_quote(value: str) -> str:
+    """Quote a string literal for a LanceDB where clause."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+def project_filter(project_id: str) -> str:
+    """SQL predicate restricting a query to a single project namespace."""
+    return f"{PROJECT_ID_FIELD} = {sql_quote(project_id)}"
+
+def ensure_scalar_index(tbl, column: str, index_type: str = "BITMAP") -> bool:
+    """Create a scalar index on ``column`` unless one already exists.
+
+    Scalar indexes let LanceDB prune rows for ``where`` prefilters instead of
+    scanning the whole table. Failures (e.g. empty tables) are non-fatal.
+    """
+    try:
+        for idx in tbl.list_indices():
+            if column in getattr(idx, "columns", []):
+                return True
+        if tbl.count_rows() == 0:
+            return False
+        tbl.create_scalar_index(column, index_type=index_type, replace=False)
+        return True
+    except Exception as e:
+        canvas.warning(f"Could not create {index_type} index on '{column}': {e}")
+        return False
+
+def _column_default_sql(dtype: pa.DataType) -> Optional[str]:
+    """SQL default used to backfill a migrated column, or None if unsupported."""
+    if pa.types.is_string(dtype):
+        return "CAST('' AS STRING)"
+    if pa.types.is_int64(dtype):
+        return "CAST(0 AS BIGINT)"
+    if pa.types.is_int32(dtype):
+        return "CAST(0 AS INT)"
+    if pa.types.is_floating(dtype):
+        return "CAST(0 AS FLOAT)"
+    return None
+
+def _ensure_schema_columns(tbl, schema: pa.Schema) -> None:
+    """Add scalar columns that exist in ``schema`` but not in an older table."""
+    missing = [f.name for f in schema if f.name not in tbl.schema.names]
+    for name in missing:
+        default = _column_default_sql(schema.field(name).type)
+        if default is None:
+            canvas.warning(f"Cannot migrate column '{name}' of type {schema.field(name).type}; recreate the table")
+            continue
+        try:
+            tbl.add_columns({name: default})
+            canvas.info(f"Migrated table: added column '{name}'")
+        except Exception as e:
+            canvas.warning(f"Failed to add column '{name}': {e}")
+
+def add_signatures(tbl, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fill the near-duplicate signature of chunks bound for ``tbl``.
+
+    Chunks are returned unchanged when the table has no signature column.
+    """
+    if tbl is None or SIMHASH_FIELD not in tbl.schema.names:
+        return chunks
+    return [
+        c if c.get(SIMHASH_FIELD) else {**c, SIMHASH_FIELD: simhash(c.get("content", ""))}
+        for c in chunks
+    ]
+
+def scan_table(tbl, where: Optional[str] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Non-vector scan of a table, optionally filtered and projected."""
+    q = tbl.search()
+    if where:
+        q = q.where(where)
+    if columns:
+        q = q.select(columns)
+    return q.to_pandas()
+
+# --- Garbage Collection ---
+
+GC_BATCH_SIZE = 200  # identifiers per delete predicate
+
+def list_indexed_values(tbl, field: str, scope: Optional[str] = None) -> set:
+    """Distinct values of ``field`` currently stored, optionally within ``scope``."""
+    df = scan_table(tbl, where=scope, columns=[field])
+    if df.empty:
+        return set()
+    return set(df[field].dropna().unique().tolist())
+
+def delete_values(
+    tbl,
+    field: str,
+    values: List[str],
+    scope: Optional[str] = None,
+    batch_size: int = GC_BATCH_SIZE,
+) -> int:
+    """Delete rows whose ``field`` is in ``values``, in batched IN-list predicates.
+
+    Returns the number of rows removed.
+    """
+    values = sorted(set(values))
+    if not values:
+        return 0
+    before = tbl.count_rows()
+    for i in range(0, len(values), batch_size):
+        batch = ", ".join(sql_quote(v) for v in values[i:i + batch_size])
+        predicate = f"{field} IN ({batch})"
+        if scope:
+            predicate = f"{predicate} AND {scope}"
+        tbl.delete(predicate)
+    return before - tbl.count_rows()
+
+def collect_orphans(
+    tbl,
+    field: str,
+    live_values,
+    scope: Optional[str] = None,
+    batch_size: int = GC_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """Delete rows whose ``field`` value is no longer in ``live_values``.
+
+    Diffs the indexed identifiers (within ``scope``) against the live set and
+    removes the orphans in batches. Returns the orphan ids and rows removed.
+    """
+    orphans = sorted(list_indexed_values(tbl, field, scope) - set(live_values))
+    removed = delete_values(tbl, field, orphans, scope=scope, batch_size=batch_size)
+    return {"orphans": orphans, "rows_removed": removed}
+
 # --- Core DB Helpers ---
 
 def get_db_connection() -> Optional[lancedb.db.LanceDBConnection]:
@@ -102,6 +284,7 @@ def get_or_create_table(
                 # Try to open the table
                 tbl = db.open_table(table_name)
                 canvas.info(f"Opened existing table: {table_name}")
+                _ensure_schema_columns(tbl, schema)
                 return tbl
             except Exception as e:
                 canvas.error(f"Error opening existing table '{table_name}': {e}")
@@ -133,9 +316,14 @@ def add_or_update_chunks(
     schema: pa.Schema,
     identifier_field: str,
     identifier_value: str,
-    chunks: List[Dict[str, Any]]
+    chunks: List[Dict[str, Any]],
+    project_id: Optional[str] = None,
 ) -> bool:
-    """Add or update chunks in a table, removing existing ones with the same identifier."""
+    """Add or update chunks in a table, removing existing ones with the same identifier.
+
+    When ``project_id`` is given, the delete is scoped to that project's
+    namespace and every chunk is tagged with it.
+    """
     try:
         # Make sure database is connected
         if db is None:
@@ -179,6 +367,8 @@ def add_or_update_chunks(
             # Make sure to escape single quotes in SQL query
             escaped_value = identifier_value.replace("'", "''")
             query = f"{identifier_field} = '{escaped_value}'"
+            if project_id:
+                query = f"{query} AND {project_filter(project_id)}"
             canvas.info(f"Deleting with query: {query}")
             table.delete(query)
         except Exception as e:
@@ -186,6 +376,9 @@ def add_or_update_chunks(
             
         # Insert new chunks if any
         if chunks:
+            if project_id:
+                chunks = [{**c, PROJECT_ID_FIELD: project_id} for c in chunks]
+            chunks = add_signatures(table, chunks)
             try:
                 canvas.info(f"Adding {len(chunks)} chunks to {table_name}")
                 table.add(chunks)
@@ -206,7 +399,10 @@ def query_context(
     db: lancedb.db.LanceDBConnection,
     table_name: str,
     query_vector: List[float],
-    limit: int = 5
+    limit: int = 5,
+    project_id: Optional[str] = None,
+    where: Optional[str] = None,
+    with_vectors: bool = False,
 ) -> Optional[pd.DataFrame]:
     """Search for similar contexts using vector similarity.
     
@@ -215,6 +411,10 @@ def query_context(
         table_name: Name of the table to search
         query_vector: Vector representation of the query
         limit: Maximum number of results to return
+        project_id: Restrict results to one project namespace (tables
+            without a project column are searched unfiltered)
+        where: Additional SQL predicate, applied as a prefilter
+        with_vectors: Keep the ``vector`` column (e.g. for MMR reranking)
         
     Returns:
         DataFrame with search results or None if search fails
@@ -228,14 +428,108 @@ def query_context(
             canvas.error(f"Invalid vector length {len(query_vector)} != {exp_dim}")
             return None
             
-        # Execute search
-        df = tbl.search(query_vector).select([n for n in tbl.schema.names if n != "vector"]).limit(limit).to_pandas()
+        # Execute search (prefilter so the project index prunes before ANN)
+        q = tbl.search(query_vector)
+        conds = [f"({where})"] if where else []
+        if project_id and PROJECT_ID_FIELD in tbl.schema.names:
+            conds.append(project_filter(project_id))
+        if conds:
+            q = q.where(" AND ".join(conds), prefilter=True)
+        columns = [n for n in tbl.schema.names if with_vectors or n != "vector"]
+        df = q.select(columns).limit(limit).to_pandas()
         return df
     except Exception as e:
         canvas.error(f"query_context error: {e}")
         return None
+
+def query_context_by_text(
+    db: lancedb.db.LanceDBConnection,
+    table_name: str,
+    query_text: str,
+    embed_model: Any,
+    limit: int = 5,
+    project_id: Optional[str] = None,
+    distinct: bool = False,
+    where: Optional[str] = None,
+    with_vectors: bool = False,
+) -> Optional[pd.DataFrame]:
+    """Text-level ``query_context`` through the shared retrieval cache.
+
+    Repeated queries against an unchanged table are answered from the
+    process-wide cache without re-embedding or re-searching; any write to
+    the table moves its version and invalidates the cached results.
+
+    With ``distinct`` the search over-fetches and near-duplicate chunks
+    (by SimHash) are suppressed, backfilling the top ``limit`` from further
+    down the ranking. ``where`` is passed through as a prefilter.
+    ``with_vectors`` keeps the stored vectors for rerankers.
+    """
+    fetch = limit * NEAR_DUP_OVERFETCH if distinct else limit
+    from i2c.utils.retrieval_cache import retrieval_cache
+
+    def run():
+        try:
+            vector = retrieval_cache.embed_query(embed_model, query_text)
+        except Exception as e:
+            canvas.error(f"Error generating embedding: {e}")
+            return None
+        if vector is None:
+            return None
+        return query_context(db, table_name, vector, limit=fetch, project_id=project_id, where=where,
+                             with_vectors=with_vectors)
+
+    df = retrieval_cache.search(
+        db, table_name, query_text, run,
+        filters={PROJECT_ID_FIELD: project_id, "where": where, "vectors": with_vectors or None}, limit=fetch,
+        embed_model=embed_model,
+    )
+    if distinct and df is not None and not df.empty:
+        kept = suppress_near_duplicates(df.to_dict("records"), k=limit, sig_key=SIMHASH_FIELD)
+        df = pd.DataFrame(kept, columns=df.columns)
+    return df
+
 # --- Enhanced Knowledge API ---
 
+def query_knowledge(
+    db: lancedb.db.LanceDBConnection,
+    query_text: str,
+    embed_model: Any,
+    filters: Optional[Any] = None,
+    limit: int = 5,
+    distinct: bool = False,
+    with_vectors: bool = False,
+) -> Optional[pd.DataFrame]:
+    """Search the knowledge base with metadata filters pushed into the search.
+
+    ``filters`` is a ``KnowledgeFilter`` or a dict accepted by
+    ``KnowledgeFilter.from_dict`` (e.g. ``{"knowledge_type": "principle",
+    "framework": ["fastapi"], "min_confidence": 0.8}``). The compiled
+    predicate prefilters the vector search, so ``limit`` matching rows come
+    back without over-fetching and filtering afterwards.
+
+    Exact duplicates (same ``content_hash``, e.g. the same section stored
+    in two knowledge spaces) are collapsed to their best-ranked row. Among
+    the returned rows, confidence and usage break near-ties. Returning a row
+    does not count as a use: that is recorded when the row is placed into
+    an agent's context (see ``i2c.utils.knowledge_usage``).
+    """
+    from i2c.utils.knowledge_filter import KnowledgeFilter
+    knowledge_filter = KnowledgeFilter.coerce(filters)
+    where = knowledge_filter.to_where() if knowledge_filter else None
+    df = query_context_by_text(
+        db, TABLE_KNOWLEDGE_BASE, query_text, embed_model,
+        limit=limit, distinct=distinct, where=where, with_vectors=with_vectors,
+    )
+    if df is not None and CONTENT_HASH_FIELD in df.columns:
+        hashes = df[CONTENT_HASH_FIELD].fillna("")
+        df = df[(hashes == "") | ~hashes.duplicated()].reset_index(drop=True)
+    if df is not None and not df.empty:
+        from i2c.utils.knowledge_usage import usage_counters
+        df = usage_counters.rank(df, db=db)
+        if CONTENT_HASH_FIELD in df.columns and "knowledge_space" in df.columns:
+            usage_counters.note_origin(df[["knowledge_space", CONTENT_HASH_FIELD]].to_dict("records"), db=db)
+    return df
+
 def query_context_filtered(
     db: lancedb.db.LanceDBConnection,
     table_name: str,
@@ -249,7 +543,8 @@ def query_context_filtered(
         db: LanceDB connection
         table_name: Name of the table to search
         query_vector: Vector representation of the query
-        filters: Dictionary of field:value pairs to filter results
+        filters: Dictionary of field:value pairs to filter results, or a
+            ``KnowledgeFilter`` for lists and confidence ranges
         limit: Maximum number of results to return
         
     Returns:
@@ -268,7 +563,12 @@ def query_context_filtered(
         q = tbl.search(query_vector)
         
         # Add filters if provided
-        if filters:
+        from i2c.utils.knowledge_filter import KnowledgeFilter
+        if isinstance(filters, KnowledgeFilter):
+            where = filters.to_where()
+            if where:
+                q = q.where(where, prefilter=True)
+        elif filters:
             conds = []
             for k, v in filters.items():
                 if isinstance(v, str):
@@ -278,7 +578,7 @@ def query_context_filtered(
                     conds.append(f"{k} = {v}")
             
             if conds:
-                q = q.where(" AND ".join(conds))
+                q = q.where(" AND ".join(conds), prefilter=True)
         
         # Execute query
         df = q.select([n for n in tbl.schema.names if n != "vector"]).limit(limit).to_pandas()
@@ -340,10 +640,17 @@ def add_knowledge_chunks(
             
         prepared.append(chunk)
     
-    # Add to database
+    # Add to database; exact duplicates are stored once and referenced
     try:
-        tbl.add(prepared)
-        canvas.success(f"Added {len(prepared)} knowledge chunks")
+        from i2c.utils.knowledge_dedup import add_refs, split_duplicates
+        rows, refs = split_duplicates(tbl, prepared)
+        if rows:
+            tbl.add(add_signatures(tbl, rows))
+        add_refs(db, refs)
+        from i2c.utils.knowledge_filter import ensure_knowledge_indexes
+        ensure_knowledge_indexes(tbl)
+        canvas.success(f"Added {len(rows)} knowledge chunks"
+                       + (f" ({len(refs)} duplicates referenced)" if refs else ""))
         return True
     except Exception as e:
         canvas.error(f"Error adding knowledge chunks: {e}")
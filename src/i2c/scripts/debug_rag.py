@@ -81,7 +81,8 @@ def main():
     ctx = retrieve_context_for_step(
         dummy_step,
         db,
-        idx.embed_model if hasattr(idx, "embed_model") else (lambda t: zero_vec)
+        idx.embed_model if hasattr(idx, "embed_model") else (lambda t: zero_vec),
+        project_id=idx.project_id,
     )
     if ctx:
         print("\n✅ retrieve_context_for_step returned:")
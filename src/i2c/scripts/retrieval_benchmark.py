@@ -0,0 +1,99 @@
+# retrieval_benchmark.py
+"""
+Offline retrieval benchmark.
+
+Indexes a fixture project and its documentation into a scratch LanceDB,
+runs labeled queries through retrieve_combined_context, vector_retrieve
+and the session knowledge base, and writes a comparison report (recall@k,
+MRR, nDCG, p50/p99 latency, prompt tokens). The index is rebuilt for each
+chunk-size setting of a sweep.
+
+    python -m i2c.scripts.retrieval_benchmark \\
+        --project tests/fixtures/sample_project \\
+        --docs tests/fixtures/sample_docs \\
+        --queries tests/fixtures/retrieval_queries.json \\
+        --sweep i2c.workflow.modification.rag_retrieval:MAX_RAG_RESULTS_PLANNER=3,5,8 \\
+        --sweep i2c.agents.modification_team.context_reader.context_indexer:COARSE_CHUNK_SIZE=300,500 \\
+        --sweep env:I2C_CONTEXT_BUDGET_CODE_CONTEXT=600,1200
+"""
+from i2c.bootstrap import initialize_environment
+initialize_environment()
+
+import argparse
+import ast
+import tempfile
+from pathlib import Path
+
+from i2c.utils.retrieval_eval import (
+    RetrievalBenchmark,
+    apply_params,
+    build_index,
+    default_retrievers,
+    format_report,
+    load_labeled_queries,
+    write_report,
+)
+
+
+def _parse_sweep(specs):
+    """``name=v1,v2`` -> {name: [v1, v2]}, with Python literals where possible."""
+    grid = {}
+    for spec in specs or []:
+        name, _, values = spec.partition("=")
+        parsed = []
+        for v in values.split(","):
+            try:
+                parsed.append(ast.literal_eval(v))
+            except (ValueError, SyntaxError):
+                parsed.append(v)
+        grid[name] = parsed
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval quality and latency benchmark")
+    parser.add_argument("--project", default="tests/fixtures/sample_project")
+    parser.add_argument("--docs", default="tests/fixtures/sample_docs", help="documentation for the knowledge base")
+    parser.add_argument("--queries", default="tests/fixtures/retrieval_queries.json")
+    parser.add_argument("--db", default=None, help="directory for the scratch indexes (default: a temporary one)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--warm", action="store_true", help="keep the retrieval cache between calls")
+    parser.add_argument("--sweep", action="append", help="parameter grid, e.g. k=3,5 (repeatable)")
+    parser.add_argument("--out", default="benchmark_results")
+    args = parser.parse_args()
+
+    root = args.db or tempfile.mkdtemp(prefix="i2c_bench_")
+    Path(root).mkdir(parents=True, exist_ok=True)
+    with apply_params({"i2c.db_utils:DB_PATH": root}):
+        from i2c import db_utils
+        from i2c.workflow.modification.rag_config import get_embed_model
+        from i2c.workflow.scenario_processor import SessionKnowledgeBase
+
+        embed_model = get_embed_model()
+
+        def build():
+            # A fresh index per chunking setting; apply_params restores DB_PATH afterwards
+            db_utils.DB_PATH = tempfile.mkdtemp(prefix="index_", dir=root)
+            print(f"Indexing {args.project} and {args.docs} into {db_utils.DB_PATH} ...")
+            build_index(Path(args.project), project_id="benchmark",
+                        docs_path=Path(args.docs) if args.docs else None, embed_model=embed_model)
+            db = db_utils.get_db_connection()
+            return default_retrievers(
+                db, embed_model, project_id="benchmark",
+                knowledge_base=SessionKnowledgeBase(db, embed_model, "benchmark") if args.docs else None,
+            )
+
+        bench = RetrievalBenchmark(
+            None, load_labeled_queries(Path(args.queries)),
+            k=args.k, repeats=args.repeats, cold=not args.warm, build=build,
+        )
+        grid = _parse_sweep(args.sweep)
+        summaries = bench.sweep(grid) if grid else bench.run()
+
+    print(format_report(summaries))
+    print(f"Report written to {write_report(summaries, Path(args.out))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -35,7 +35,7 @@ def read_root():
     logger.info(f"Indexing result: {result}")
     
     # Get RAG components
-    from i2c.db_utils import get_db_connection
+    from i2c.db_utils import get_db_connection, get_project_id
     from i2c.workflow.modification.rag_config import get_embed_model
     
     db = get_db_connection()
@@ -46,7 +46,8 @@ def read_root():
     context = retrieve_context_for_planner(
         user_request="Add a /items/{item_id} endpoint",
         db=db,
-        embed_model=embed_model
+        embed_model=embed_model,
+        project_id=get_project_id(test_dir),
     )
     logger.info(f"Retrieved context: {len(context) if context else 0} characters")
     
@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import Dict, List, Optional, Any, Set
 import traceback
 
+from i2c.utils.parse_cache import parse_cache
 from i2c.tools.neurosymbolic.utils.ast_helpers import extract_imports, extract_definitions
 
 
@@ -127,7 +128,7 @@ class ProjectGraph:
                 
             # 2. Parse AST
             try:
-                tree = ast.parse(content, filename=str(abs_path))
+                tree = parse_cache.parse_python(content, filename=str(abs_path))
             except SyntaxError as e:
                 # For syntax errors, create a minimal node with just the content
                 self.nodes[key] = {
@@ -6,6 +6,8 @@ from pathlib import Path
 import ast
 import sys
 
+from i2c.utils.parse_cache import parse_cache
+
 # Handle conditional imports based on Python version
 try:
     # Import core type inference for Python
@@ -95,7 +97,7 @@ class PythonTypeSystem:
     def validate_content(self, content: str, env: Dict[str, Any], graph) -> Dict[str, Any]:
         errors: List[str] = []
         try:
-            tree = ast.parse(content)
+            tree = parse_cache.parse_python(content)
             # Check function signatures
             self._check_function_signatures(tree, env, errors)
             # Additional checks simplified for stability
@@ -127,10 +129,9 @@ class PythonTypeSystem:
 
     def _check_syntax_errors(self, content: str, errors: List[str]):
         """Basic syntax check"""
-        try:
-            ast.parse(content)
-        except SyntaxError as e:
-            errors.append(f"Syntax error: {e}")
+        error = parse_cache.python_syntax_error(content)
+        if error is not None:
+            errors.append(f"Syntax error: {error}")
 
     def _get_annotation_str(self, annotation) -> str:
         """Extract annotation string safely, with Python version handling"""
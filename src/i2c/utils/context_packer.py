@@ -0,0 +1,210 @@
+# src/i2c/utils/context_packer.py
+# Token-budgeted packing of retrieved chunks into prompt context.
+
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+try:
+    from i2c.cli.controller import canvas
+except ImportError:
+    class FallbackCanvas:
+        def info(self, msg):    print(f"[INFO_PACK] {msg}")
+        def warning(self, msg): print(f"[WARN_PACK] {msg}")
+    canvas = FallbackCanvas()
+
+# Context budgets (tokens) per prompt consumer; override with
+# I2C_CONTEXT_BUDGET_<NAME>, e.g. I2C_CONTEXT_BUDGET_PLANNER=3000.
+CONTEXT_BUDGETS = {
+    "planner": 1500,
+    "modifier": 800,
+    "code_context": 1200,
+    "knowledge": 1200,
+    "orchestrator": 2000,
+    "orchestration_team": 1000,
+    "agentic_evolution": 600,
+    "file_knowledge": 600,
+    "retrieval_tool": 1500,
+    "default": 1000,
+}
+
+# Fractions of a chunk offered as trimmed alternatives to the knapsack
+TRIM_FRACTIONS = (0.6, 0.3)
+# Capacity resolution of the knapsack table, in tokens
+KNAPSACK_UNIT = 8
+# Smallest leftover budget worth filling with a cut-down chunk, in tokens
+MIN_FILL_TOKENS = 16
+
+_CODE_BOUNDARY = re.compile(
+    r"^(?:async\s+def|def|class|function|export|const\s+\w+\s*=|@\w+)\b", re.MULTILINE
+)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Token estimate, ~4 characters per token (same heuristic as count_tokens for Groq)."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / 4)
+
+
+def token_budget(agent: str) -> int:
+    """Context budget for a prompt consumer, honoring environment overrides."""
+    env = os.getenv(f"I2C_CONTEXT_BUDGET_{agent.upper()}")
+    if env and env.isdigit():
+        return int(env)
+    return CONTEXT_BUDGETS.get(agent, CONTEXT_BUDGETS["default"])
+
+
+def boundaries(text: str) -> List[int]:
+    """
+    Offsets where ``text`` can be cut without breaking syntax: before a
+    top-level definition, at paragraph ends, then at line and sentence ends.
+    """
+    cuts = {m.start() for m in _CODE_BOUNDARY.finditer(text) if m.start() > 0}
+    cuts.update(m.start() for m in re.finditer(r"\n\s*\n", text))
+    if len(cuts) < 4:
+        cuts.update(m.start() for m in re.finditer(r"\n", text))
+        cuts.update(m.start() for m in _SENTENCE_END.finditer(text))
+    return sorted(c for c in cuts if 0 < c < len(text))
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Longest prefix of ``text`` within ``max_tokens`` that ends on a boundary;
+    falls back to a word boundary when no syntactic cut fits.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cuts = boundaries(text)
+    lo, hi, best = 0, len(cuts) - 1, ""
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        candidate = text[:cuts[mid]].rstrip()
+        if estimate_tokens(candidate) <= max_tokens:
+            best, lo = candidate, mid + 1
+        else:
+            hi = mid - 1
+    if not best and max_tokens > 0:
+        best = text[:max_tokens * 4].rsplit(" ", 1)[0].rstrip()
+    return best
+
+
+@dataclass
+class PackedContext:
+    """Result of packing: chosen (item, text) entries in input order plus usage."""
+    entries: List[Dict[str, Any]] = field(default_factory=list)
+    budget: int = 0
+    used_tokens: int = 0
+    trimmed: int = 0
+    dropped: int = 0
+
+    def report(self, label: str) -> str:
+        return (f"[ContextPacker:{label}] {self.used_tokens}/{self.budget} tokens, "
+                f"{len(self.entries)} chunks ({self.trimmed} trimmed, {self.dropped} dropped)")
+
+
+def _item_score(item: Dict[str, Any], rank: int) -> float:
+    if item.get("score") is not None:
+        return float(item["score"])
+    if item.get("_distance") is not None:
+        return 1.0 / (1.0 + float(item["_distance"]))
+    return 1.0 / (1 + rank)
+
+
+def pack_context(
+    items: Sequence[Dict[str, Any]],
+    budget: int,
+    text_key: str = "content",
+    overhead: Optional[Callable[[Dict[str, Any]], int]] = None,
+    label: Optional[str] = None,
+) -> PackedContext:
+    """
+    Choose which chunks (whole or trimmed) to include within ``budget`` tokens.
+
+    Each chunk is a group of alternatives: skip it, keep it whole, or keep a
+    boundary-trimmed prefix worth proportionally less. A multiple-choice
+    knapsack over the token budget maximizes total score. Budget left over
+    goes to the chunks left out, in order, cut down to what remains, so a
+    chunk larger than the whole budget still contributes its beginning.
+    ``overhead`` gives the per-chunk formatting cost (headers, separators)
+    in tokens. Knowledge chunks that make it in are counted as used.
+    """
+    packed = PackedContext(budget=budget)
+    capacity = max(budget // KNAPSACK_UNIT, 0)
+
+    groups = []
+    for rank, item in enumerate(items):
+        text = (item.get(text_key) or "").strip()
+        if not text:
+            continue
+        score = max(_item_score(item, rank), 1e-6)
+        extra = overhead(item) if overhead else 0
+        full = estimate_tokens(text)
+        options = [(text, full + extra, score, False)]
+        for fraction in TRIM_FRACTIONS:
+            cut = trim_to_tokens(text, int(full * fraction))
+            if cut and cut != options[-1][0]:
+                kept = estimate_tokens(cut)
+                options.append((cut, kept + extra, score * (kept / full) ** 0.5, True))
+        groups.append((item, options))
+
+    # dp[c] = (best value, choices) using at most c capacity units
+    dp: List[tuple] = [(0.0, ())] * (capacity + 1)
+    for g, (_, options) in enumerate(groups):
+        nxt = list(dp)
+        for o, (_, cost, value, _) in enumerate(options):
+            units = math.ceil(cost / KNAPSACK_UNIT)
+            for c in range(units, capacity + 1):
+                base_value, base_choice = dp[c - units]
+                if base_value + value > nxt[c][0]:
+                    nxt[c] = (base_value + value, base_choice + ((g, o),))
+        dp = nxt
+
+    chosen = dict(max(dp, key=lambda x: x[0])[1]) if groups else {}
+    left = budget - sum(groups[g][1][o][1] for g, o in chosen.items())
+    for g, (item, options) in enumerate(groups):
+        if g in chosen:
+            text, cost, _, was_trimmed = options[chosen[g]]
+        else:
+            extra = options[0][1] - estimate_tokens(options[0][0])
+            text = trim_to_tokens(options[0][0], left - extra) if left - extra >= MIN_FILL_TOKENS else ""
+            if not text:
+                packed.dropped += 1
+                continue
+            cost, was_trimmed = estimate_tokens(text) + extra, True
+            left -= cost
+        packed.entries.append({"item": item, "text": text, "trimmed": was_trimmed})
+        packed.used_tokens += cost
+        packed.trimmed += int(was_trimmed)
+
+    record_placed(e["item"] for e in packed.entries)
+    if label:
+        canvas.info(packed.report(label))
+    return packed
+
+
+def record_placed(items: Iterable[Dict[str, Any]]) -> None:
+    """Count knowledge chunks placed into an agent's context as used (see ``knowledge_usage``)."""
+    chunks = [item for item in items if item.get("knowledge_space")]
+    if not chunks:
+        return
+    try:
+        from i2c.utils.knowledge_usage import usage_counters
+        usage_counters.record_use(chunks)
+    except Exception as e:
+        canvas.warning(f"Failed to record knowledge usage: {e}")
+
+
+def pack_text(text: str, budget: int, label: Optional[str] = None, separator: str = "\n\n") -> str:
+    """
+    Fit already formatted context into ``budget`` tokens. Blocks keep their
+    order and earlier blocks are preferred; cuts fall on syntactic boundaries.
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    blocks = [{"content": b} for b in text.split(separator) if b.strip()]
+    packed = pack_context(blocks, budget, overhead=lambda _: 1, label=label)
+    return separator.join(e["text"] for e in packed.entries)
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def get_embedding_from_model(model, text: str):
     """Returns embedding vector from any supported model interface."""
     if hasattr(model, 'encode'):
@@ -7,4 +10,36 @@ def get_embedding_from_model(model, text: str):
     elif hasattr(model, 'get_embeddings'):
         return model.get_embeddings([text])[0]
     else:
-        raise AttributeError(f"Unsupported embedding model type: {type(model)}")
\ No newline at end of file
+        raise AttributeError(f"Unsupported embedding model type: {type(model)}")
+
+def _batch_encoder(model):
+    """The object whose ``encode`` takes a list of texts, if the model has one.
+
+    agno's SentenceTransformerEmbedder builds a new SentenceTransformer on
+    every ``get_embedding`` call; load its client once and keep it on the
+    embedder instead.
+    """
+    if hasattr(model, 'encode'):
+        return model
+    client = getattr(model, 'sentence_transformer_client', None)
+    if client is None and hasattr(model, 'sentence_transformer_client') and getattr(model, 'id', None):
+        from sentence_transformers import SentenceTransformer
+        client = SentenceTransformer(model_name_or_path=model.id)
+        model.sentence_transformer_client = client
+    return client
+
+
+def embed_batch(model, texts, batch_size: int = 64):
+    """Embed many texts with as few model calls as possible; returns one vector per text."""
+    texts = list(texts)
+    if not texts:
+        return []
+    encoder = _batch_encoder(model)
+    if encoder is not None:
+        vectors = encoder.encode(texts, batch_size=batch_size)
+    elif hasattr(model, 'get_embeddings'):
+        vectors = model.get_embeddings(texts)
+    else:
+        embed_one = getattr(model, 'get_embedding', None) or (lambda t: get_embedding_from_model(model, t))
+        vectors = [embed_one(t) for t in texts]
+    return np.asarray(vectors, dtype=np.float32).tolist()
@@ -0,0 +1,241 @@
+# src/i2c/utils/knowledge_context_cache.py
+# Bounded cache of assembled knowledge context (formatted orchestration
+# context, per-role expertise), keyed by content and knowledge-base version
+# (or, for knowledge bases without a versioned table, their location).
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    from i2c.cli.controller import canvas
+except ImportError:
+    class FallbackCanvas:
+        def info(self, msg):    print(f"[INFO_KCACHE] {msg}")
+        def warning(self, msg): print(f"[WARN_KCACHE] {msg}")
+    canvas = FallbackCanvas()
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("I2C_KNOWLEDGE_CACHE_ENTRIES", "128"))
+DEFAULT_MAX_MB = int(os.getenv("I2C_KNOWLEDGE_CACHE_MB", "16"))
+# Set to a file path to keep entries across runs
+DEFAULT_PATH = os.getenv("I2C_KNOWLEDGE_CACHE_PATH") or None
+CACHE_FORMAT = 1
+# Key marker of entries for unversioned knowledge bases (never persisted)
+_UNVERSIONED = "unversioned-"
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize NumPy scalars/arrays that come out of LanceDB rows."""
+    if hasattr(value, "item"):
+        try:
+            return value.item()
+        except ValueError:
+            pass
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+def knowledge_base_version(knowledge_base: Any) -> Optional[str]:
+    """
+    Version fingerprint of a knowledge base: database location, knowledge
+    space and the LanceDB version of its table. None when the knowledge base
+    exposes no versioned table, in which case its results are not cached.
+    """
+    db = getattr(knowledge_base, "db", None) or getattr(knowledge_base, "db_connection", None)
+    if db is None:
+        return None
+    from i2c.db_utils import TABLE_KNOWLEDGE_BASE
+    table_name = getattr(knowledge_base, "table_name", None) or TABLE_KNOWLEDGE_BASE
+    try:
+        version = db.open_table(table_name).version
+    except Exception:
+        return None
+    space = getattr(knowledge_base, "knowledge_space", "")
+    return f"{getattr(db, 'uri', '')}|{table_name}|{space}|{version}"
+
+
+def knowledge_base_identity(knowledge_base: Any) -> Optional[str]:
+    """
+    Stable identity of a knowledge base without a versioned table: its
+    path/URI, table and knowledge space (also looked up on its
+    ``vector_db``). None when it exposes none of them.
+    """
+    vector_db = getattr(knowledge_base, "vector_db", None)
+
+    def attr(*names: str) -> str:
+        for owner in (knowledge_base, vector_db):
+            for name in names:
+                value = getattr(owner, name, None) if owner is not None else None
+                if isinstance(value, (str, Path)) and str(value):
+                    return str(value)
+        return ""
+
+    path = attr("db_path", "uri", "path")
+    space = attr("knowledge_space")
+    if not (path or space):
+        return None
+    return f"{type(knowledge_base).__name__}|{path}|{attr('table_name')}|{space}"
+
+
+class KnowledgeContextCache:
+    """
+    LRU cache bounded by entry count and serialized size.
+
+    Keys hash the caller's namespace, the knowledge-base version and the
+    query parts, so a write to the knowledge table makes older entries
+    unreachable (they age out through LRU eviction) and keys stay valid
+    across processes. Knowledge bases without a versioned table are keyed
+    by their identity instead; as nothing invalidates those entries, they
+    are kept for this process only. With a ``path`` the cache is loaded at
+    start and written back atomically on ``flush`` (also at interpreter exit).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024,
+        path: Optional[Path] = DEFAULT_PATH,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path = Path(path) if path else None
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.path:
+            self._load()
+            atexit.register(self.flush)
+
+    def make_key(self, namespace: str, knowledge_base: Any, *parts: Any) -> Optional[str]:
+        """
+        Cache key for ``parts`` against the current knowledge-base version,
+        or its identity if unversioned; None if it has neither.
+        """
+        version = knowledge_base_version(knowledge_base)
+        marker = ""
+        if version is None:
+            version = knowledge_base_identity(knowledge_base)
+            marker = _UNVERSIONED
+            if version is None:
+                return None
+        raw = json.dumps([namespace, version, *parts], default=str, sort_keys=True)
+        return f"{namespace}:{marker}{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+    def get(self, key: Optional[str]) -> Any:
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return json.loads(entry["value"])
+
+    def put(self, key: Optional[str], value: Any) -> None:
+        if key is None:
+            return
+        try:
+            serialized = json.dumps(value, default=_json_default)
+        except (TypeError, ValueError) as e:
+            canvas.warning(f"[KnowledgeCache] value for {key} is not cacheable: {e}")
+            return
+        size = len(serialized)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old["size"]
+            self._entries[key] = {"value": serialized, "size": size}
+            self._bytes += size
+            self._dirty = True
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted["size"]
+            self.evictions += 1
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            canvas.warning(f"[KnowledgeCache] ignoring unreadable cache {self.path}: {e}")
+            return
+        if data.get("format") != CACHE_FORMAT:
+            return
+        for key, value in data.get("entries", []):
+            self._entries[key] = {"value": value, "size": len(value)}
+            self._bytes += len(value)
+        self._evict()
+
+    def flush(self) -> None:
+        """Write entries to ``path`` (least recently used first) if anything changed."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"format": CACHE_FORMAT, "entries": [[k, e["value"]] for k, e in self._entries.items()
+                                                           if f":{_UNVERSIONED}" not in k]}
+            self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(json.dumps(payload), encoding="utf-8")
+            tmp.replace(self.path)
+        except Exception as e:
+            canvas.warning(f"[KnowledgeCache] could not persist to {self.path}: {e}")
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Drop all entries, or only those of ``namespace``."""
+        with self._lock:
+            keys = [k for k in self._entries if namespace is None or k.startswith(f"{namespace}:")]
+            for k in keys:
+                self._bytes -= self._entries.pop(k)["size"]
+            self._dirty = self._dirty or bool(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "persistent": bool(self.path),
+            }
+
+    def log_stats(self, label: str = "KnowledgeCache") -> None:
+        s = self.stats()
+        if s["hits"] or s["misses"]:
+            canvas.info(
+                f"[{label}] {s['hits']} hits / {s['misses']} misses ({s['hit_rate']:.0%}), "
+                f"{s['entries']} entries, {s['bytes'] / 1024:.1f} KiB"
+            )
+
+
+# Shared process-wide instance
+knowledge_context_cache = KnowledgeContextCache()
+
+
+def get_knowledge_context_cache() -> KnowledgeContextCache:
+    """Return the process-wide knowledge context cache."""
+    return knowledge_context_cache
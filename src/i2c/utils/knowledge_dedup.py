@@ -0,0 +1,455 @@
+# src/i2c/utils/knowledge_dedup.py
+# Exact-duplicate handling for the knowledge base. Every chunk row carries
+# the hash of its text; when the same text arrives from another source in
+# the same knowledge space with the same filterable metadata, only a
+# reference row (knowledge_refs) is written. Text stored under other
+# metadata is not embedded again either: its vector is copied. Deleting a
+# source promotes one of the remaining references, so shared chunks live as
+# long as any source does.
+# The same hashes fingerprint a source's sections, so re-ingesting a changed
+# file only embeds the sections whose text is new (``sync_sections``); the
+# stored rows are brought up to date once the new ones are committed
+# (``apply_section_sync``).
+
+import hashlib
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from i2c.db_utils import (
+    CONTENT_HASH_FIELD, GC_BATCH_SIZE, SCHEMA_KNOWLEDGE_REFS, TABLE_KNOWLEDGE_BASE,
+    TABLE_KNOWLEDGE_REFS, VECTOR_DIMENSION, ensure_scalar_index, get_or_create_table,
+    scan_table, sql_quote,
+)
+
+try:
+    from i2c.cli.controller import canvas
+except ImportError:
+    class FallbackCanvas:
+        def info(self, msg):    print(f"[INFO_DEDUP] {msg}")
+        def warning(self, msg): print(f"[WARN_DEDUP] {msg}")
+        def error(self, msg):   print(f"[ERROR_DEDUP] {msg}")
+    canvas = FallbackCanvas()
+
+_REF_FIELDS = [f.name for f in SCHEMA_KNOWLEDGE_REFS]
+# Metadata a chunk must share with a stored row to be deduplicated against
+# it, so that metadata prefilters (``KnowledgeFilter``) match every source
+_DEDUP_METADATA = ["document_type", "framework", "version", "knowledge_type",
+                   "application_context", "confidence_score"]
+# Per-source fields a promoted reference hands over to the stored row
+_OWNER_FIELDS = ["source", "source_hash", "chunk_type", "last_updated",
+                 "category", "parent_doc_id", "metadata_json"]
+
+
+def content_hash(text: str) -> str:
+    """Key of a chunk's text; surrounding whitespace does not count."""
+    return hashlib.sha256((text or "").strip().encode("utf-8")).hexdigest()
+
+
+def _in_batches(values: List[str]) -> Iterable[str]:
+    for i in range(0, len(values), GC_BATCH_SIZE):
+        yield ", ".join(sql_quote(v) for v in values[i:i + GC_BATCH_SIZE])
+
+
+def _metadata_key(row: Dict[str, Any]) -> Tuple:
+    """The ``_DEDUP_METADATA`` values of a chunk or row, comparable across both."""
+    key = []
+    for name in _DEDUP_METADATA:
+        value = row.get(name)
+        if name == "confidence_score":
+            value = None if value is None or value != value else float(np.float32(value))
+        else:
+            value = "" if value is None else str(value)
+        key.append(value)
+    return tuple(key)
+
+
+def _metadata_where(key: Tuple) -> str:
+    """Predicate selecting the rows whose ``_DEDUP_METADATA`` equal ``key``."""
+    conds = []
+    for name, value in zip(_DEDUP_METADATA, key):
+        if value is None:
+            conds.append(f"{name} IS NULL")
+        elif name == "confidence_score":
+            conds.append(f"{name} = {float(value)!r}")
+        else:
+            conds.append(f"{name} = {sql_quote(value)}")
+    return " AND ".join(conds)
+
+
+def _scan_hashes(tbl: Any, hashes: List[str], knowledge_space: str, columns: List[str]):
+    """Rows of ``knowledge_space`` whose content hash is one of ``hashes``."""
+    import pandas as pd
+    space = sql_quote(knowledge_space)
+    frames = [
+        scan_table(tbl, where=f"knowledge_space = {space} AND {CONTENT_HASH_FIELD} IN ({batch})", columns=columns)
+        for batch in _in_batches(hashes)
+    ]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+
+def existing_hashes(tbl: Any, hashes: Iterable[str], knowledge_space: str) -> Set[str]:
+    """Which of ``hashes`` already have a stored row (and vector) in ``knowledge_space``."""
+    hashes = sorted({h for h in hashes if h})
+    if tbl is None or not hashes or CONTENT_HASH_FIELD not in tbl.schema.names:
+        return set()
+    return set(_scan_hashes(tbl, hashes, knowledge_space, [CONTENT_HASH_FIELD])[CONTENT_HASH_FIELD])
+
+
+def known_hashes(db: Any, knowledge_space: str):
+    """Lookup callable for ``IngestionPipeline(known_hashes=...)``."""
+    def lookup(hashes: List[str]) -> Set[str]:
+        if TABLE_KNOWLEDGE_BASE not in db.table_names():
+            return set()
+        return existing_hashes(db.open_table(TABLE_KNOWLEDGE_BASE), hashes, knowledge_space)
+    return lookup
+
+
+def embed_unique(
+    embed_model: Any,
+    texts: List[str],
+    known: Optional[Callable[[List[str]], Set[str]]] = None,
+    seen: Optional[Set[str]] = None,
+    batch_size: int = 64,
+) -> Tuple[List[Optional[List[float]]], float]:
+    """
+    Embed ``texts`` except exact duplicates: those ``known`` reports as
+    stored and those in ``seen`` (hashes embedded earlier by the caller,
+    updated in place). Skipped texts get ``None``. Returns the vectors and
+    the milliseconds spent embedding. Without ``known`` everything is embedded.
+    """
+    from i2c.utils.embedding import embed_batch
+
+    need = list(range(len(texts)))
+    if known is not None:
+        seen = set() if seen is None else seen
+        hashes = [content_hash(t) for t in texts]
+        stored = known(sorted(set(hashes) - seen))
+        need = []
+        for i, h in enumerate(hashes):
+            if h not in stored and h not in seen:
+                seen.add(h)
+                need.append(i)
+    vectors: List[Optional[List[float]]] = [None] * len(texts)
+    start = time.perf_counter()
+    for i, vector in zip(need, embed_batch(embed_model, [texts[i] for i in need], batch_size)):
+        vectors[i] = vector
+    elapsed = (time.perf_counter() - start) * 1000
+    dedup_stats.record_embedding(len(need), elapsed, skipped=len(texts) - len(need))
+    return vectors, elapsed
+
+
+def split_duplicates(tbl: Any, chunks: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Split prepared chunks into rows to store and references to rows already
+    stored (or stored earlier in the same list) with the same text and
+    filterable metadata. Chunks get their content hash filled in. A chunk
+    may come without a vector when its text is stored: a reference needs
+    none, and a row stored under different metadata gets the stored vector.
+    A chunk with no vector and no stored text raises ValueError.
+    """
+    for chunk in chunks:
+        chunk.setdefault(CONTENT_HASH_FIELD, content_hash(chunk.get("content", "")))
+
+    by_space: Dict[str, List[str]] = {}
+    for chunk in chunks:
+        by_space.setdefault(chunk["knowledge_space"], []).append(chunk[CONTENT_HASH_FIELD])
+    stored: Set[Tuple] = set()  # (space, hash, metadata key)
+    vectors: Dict[Tuple[str, str], Any] = {}  # (space, hash) -> a stored vector
+    if CONTENT_HASH_FIELD in tbl.schema.names:
+        metadata = [n for n in _DEDUP_METADATA if n in tbl.schema.names]
+        with_vectors = any(c.get("vector") is None for c in chunks)
+        for space, hashes in by_space.items():
+            df = _scan_hashes(tbl, sorted(set(hashes)), space,
+                              [CONTENT_HASH_FIELD] + metadata + (["vector"] if with_vectors else []))
+            for row in df.to_dict("records"):
+                stored.add((space, row[CONTENT_HASH_FIELD], _metadata_key(row)))
+                if with_vectors:
+                    vectors.setdefault((space, row[CONTENT_HASH_FIELD]), row["vector"])
+
+    rows, refs = [], []
+    for chunk in chunks:
+        text_key = (chunk["knowledge_space"], chunk[CONTENT_HASH_FIELD])
+        key = text_key + (_metadata_key(chunk),)
+        if key in stored:
+            refs.append({name: chunk.get(name, "") for name in _REF_FIELDS})
+            dedup_stats.record_duplicate(chunk.get("content", ""))
+            continue
+        if chunk.get("vector") is None:
+            if vectors.get(text_key) is None:
+                raise ValueError(f"chunk from {chunk.get('source')} has no vector and no stored duplicate")
+            chunk["vector"] = np.asarray(vectors[text_key], dtype=np.float32).tolist()
+        stored.add(key)
+        vectors.setdefault(text_key, chunk["vector"])
+        rows.append(chunk)
+    return rows, refs
+
+
+def add_refs(db: Any, refs: List[Dict[str, Any]]) -> None:
+    if not refs:
+        return
+    tbl = get_or_create_table(db, TABLE_KNOWLEDGE_REFS, SCHEMA_KNOWLEDGE_REFS)
+    if tbl is None:
+        raise RuntimeError(f"Failed to access {TABLE_KNOWLEDGE_REFS} table")
+    tbl.add(refs)
+    ensure_scalar_index(tbl, CONTENT_HASH_FIELD, "BTREE")
+    ensure_scalar_index(tbl, "source", "BTREE")
+
+
+def list_sources(db: Any, scope: Optional[str] = None) -> Set[str]:
+    """Every source in the knowledge base, including those only referenced."""
+    sources = set()
+    for name in (TABLE_KNOWLEDGE_BASE, TABLE_KNOWLEDGE_REFS):
+        if name in db.table_names():
+            df = scan_table(db.open_table(name), where=scope, columns=["source"])
+            sources.update(df["source"].dropna().tolist())
+    return sources
+
+
+def scan_source(db: Any, source: str, columns: List[str], scope: Optional[str] = None):
+    """
+    Rows of ``source`` (``columns`` only) from the knowledge base and its
+    references; columns a table lacks (e.g. ``content`` for references) are
+    left empty.
+    """
+    import pandas as pd
+    where = f"source = {sql_quote(source)}" + (f" AND {scope}" if scope else "")
+    frames = []
+    for name in (TABLE_KNOWLEDGE_BASE, TABLE_KNOWLEDGE_REFS):
+        if name in db.table_names():
+            tbl = db.open_table(name)
+            frames.append(scan_table(tbl, where=where, columns=[c for c in columns if c in tbl.schema.names]))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+
+def delete_sources(db: Any, sources: List[str], scope: Optional[str] = None) -> int:
+    """
+    Remove ``sources`` from the knowledge base. References go first; a stored
+    chunk that another source still references is handed over to that source
+    instead of being deleted. Returns how many rows the two tables shrank by.
+    ``scope`` is an extra predicate on both tables (e.g. a knowledge space).
+    """
+    sources = sorted(set(sources))
+    if not sources:
+        return 0
+    scoped = f" AND {scope}" if scope else ""
+    tables = [db.open_table(name) if name in db.table_names() else None
+              for name in (TABLE_KNOWLEDGE_BASE, TABLE_KNOWLEDGE_REFS)]
+    tbl, refs = tables
+    before = sum(t.count_rows() for t in tables if t is not None)
+
+    if refs is not None:
+        for batch in _in_batches(sources):
+            refs.delete(f"source IN ({batch}){scoped}")
+    if tbl is not None:
+        for batch in _in_batches(sources):
+            if refs is not None and CONTENT_HASH_FIELD in tbl.schema.names:
+                key_columns = [CONTENT_HASH_FIELD, "knowledge_space"] + _DEDUP_METADATA
+                owned = scan_table(tbl, where=f"source IN ({batch}){scoped}",
+                                   columns=[c for c in key_columns if c in tbl.schema.names])
+                owned_keys = {(r[CONTENT_HASH_FIELD], r["knowledge_space"], _metadata_key(r))
+                              for r in owned.to_dict("records")}
+                hashes = sorted({h for h, _, _ in owned_keys} - {""})
+                for hash_batch in _in_batches(hashes):
+                    shared = scan_table(refs, where=f"{CONTENT_HASH_FIELD} IN ({hash_batch})",
+                                        columns=[c for c in key_columns if c in refs.schema.names])
+                    shared_keys = {(r[CONTENT_HASH_FIELD], r["knowledge_space"], _metadata_key(r))
+                                   for r in shared.to_dict("records")}
+                    for digest, space, metadata in shared_keys & owned_keys:
+                        _promote(tbl, refs, digest, space, metadata, f"source IN ({batch}){scoped}")
+            tbl.delete(f"source IN ({batch}){scoped}")
+    return before - sum(t.count_rows() for t in tables if t is not None)
+
+
+@dataclass
+class SectionSync:
+    """
+    Outcome of ``sync_sections`` for one source: what to write now, and what
+    ``apply_section_sync`` changes in the stored rows once that is committed.
+    """
+    added: List[int]  # indices of sections still to embed and write
+    kept: int = 0     # stored sections left in place (their vectors reused)
+    moved: int = 0    # kept sections whose position changed
+    removed: int = 0  # stored sections to delete
+    deletes: Dict[Tuple, Set[str]] = field(default_factory=dict)  # metadata key -> hashes of rows to delete
+    refresh: List[Dict[str, Any]] = field(default_factory=list)  # new fields of the kept sections
+    refresh_older: List[Dict[str, Any]] = field(default_factory=list)  # same, for texts also added again
+
+
+def _metadata_changed(row: Dict[str, Any], section: Dict[str, Any]) -> bool:
+    """Whether ``section`` sets filterable metadata other than the stored ``row``'s."""
+    names = [name for name in _DEDUP_METADATA if name in section]
+    return _metadata_key({n: row.get(n) for n in names}) != _metadata_key({n: section[n] for n in names})
+
+
+def sync_sections(
+    db: Any,
+    source: str,
+    sections: List[Dict[str, Any]],
+    knowledge_space: str,
+) -> Optional[SectionSync]:
+    """
+    Match the new ``sections`` of ``source`` (in order; each a dict with the
+    section's content hash, its filterable metadata and the fields to refresh
+    on rows that are kept, e.g. ``chunk_type``, ``source_hash`` and
+    ``last_updated``) against its stored rows. A stored section is kept when
+    its hash recurs with the same filterable metadata; the rest are deleted,
+    so a section whose metadata changed is written again (with the stored
+    vector, not re-embedded). Returns which sections are new, or None when
+    the source has no stored rows to sync against (or rows stored without a
+    content hash), in which case the caller writes the source in full.
+
+    Nothing is changed here: the caller writes the ``added`` sections and
+    then calls ``apply_section_sync``, so a failed write leaves the stored
+    version as it was.
+    """
+    where = f"source = {sql_quote(source)} AND knowledge_space = {sql_quote(knowledge_space)}"
+    frames = []
+    for name in (TABLE_KNOWLEDGE_BASE, TABLE_KNOWLEDGE_REFS):
+        if name in db.table_names():
+            tbl = db.open_table(name)
+            if CONTENT_HASH_FIELD not in tbl.schema.names:
+                return None
+            columns = [CONTENT_HASH_FIELD, "chunk_type"] + [n for n in _DEDUP_METADATA if n in tbl.schema.names]
+            frames.append(scan_table(tbl, where=where, columns=columns).fillna({CONTENT_HASH_FIELD: ""}))
+    stored = [row for df in frames for row in df.to_dict("records")]
+    if not stored or any(not row[CONTENT_HASH_FIELD] for row in stored):
+        return None
+
+    first: Dict[str, Dict[str, Any]] = {}
+    for section in sections:
+        first.setdefault(section[CONTENT_HASH_FIELD], section)
+    counts, positions, deletes = Counter(), {}, {}
+    for row in stored:
+        digest = row[CONTENT_HASH_FIELD]
+        if digest in first and not _metadata_changed(row, first[digest]):
+            counts[digest] += 1
+            positions.setdefault(digest, row["chunk_type"])
+        else:
+            deletes.setdefault(_metadata_key(row), set()).add(digest)
+
+    # Occurrences beyond what is kept are new; the first of each kept hash refreshes its rows
+    added, seen = [], Counter()
+    for i, section in enumerate(sections):
+        seen[section[CONTENT_HASH_FIELD]] += 1
+        if seen[section[CONTENT_HASH_FIELD]] > counts[section[CONTENT_HASH_FIELD]]:
+            added.append(i)
+    refresh = [first[digest] for digest in positions]
+    moved = sum(1 for s in refresh if "chunk_type" in s and s["chunk_type"] != positions[s[CONTENT_HASH_FIELD]])
+    again = {sections[i][CONTENT_HASH_FIELD] for i in added}
+    return SectionSync(
+        added=added, kept=len(sections) - len(added), moved=moved,
+        removed=len(stored) - sum(counts.values()), deletes=deletes,
+        refresh=[s for s in refresh if s[CONTENT_HASH_FIELD] not in again],
+        refresh_older=[s for s in refresh if s[CONTENT_HASH_FIELD] in again],
+    )
+
+
+def apply_section_sync(db: Any, source: str, knowledge_space: str, synced: SectionSync) -> None:
+    """
+    Delete the stored rows of ``source`` that ``synced`` replaces and refresh
+    the kept ones in one merge_insert per table. Call it once the added
+    sections are committed.
+    """
+    scope = f"knowledge_space = {sql_quote(knowledge_space)}"
+    for metadata, hashes in synced.deletes.items():
+        for batch in _in_batches(sorted(hashes)):
+            delete_sources(db, [source], scope=f"{scope} AND {_metadata_where(metadata)} AND {CONTENT_HASH_FIELD} IN ({batch})")
+    for name in (TABLE_KNOWLEDGE_BASE, TABLE_KNOWLEDGE_REFS):
+        if name not in db.table_names():
+            continue
+        tbl = db.open_table(name)
+        if synced.refresh:
+            _refresh_rows(tbl, source, knowledge_space, synced.refresh)
+        # A text that was also written again: leave its new rows (newer than the sync) alone
+        for section in synced.refresh_older:
+            where = (f"source = {sql_quote(source)} AND knowledge_space = {sql_quote(knowledge_space)}"
+                     f" AND {CONTENT_HASH_FIELD} = {sql_quote(section[CONTENT_HASH_FIELD])}")
+            if section.get("last_updated"):
+                where += f" AND last_updated < {sql_quote(section['last_updated'])}"
+            tbl.update(where=where, values={n: section[n] for n in _refresh_fields(tbl, section)})
+
+
+def _refresh_fields(tbl: Any, section: Dict[str, Any]) -> List[str]:
+    """The fields of ``section`` a kept row takes over: not its keys or filterable metadata."""
+    keys = ["source", "knowledge_space", CONTENT_HASH_FIELD]
+    return [name for name in section if name not in keys + _DEDUP_METADATA and name in tbl.schema.names]
+
+
+def _refresh_rows(tbl: Any, source: str, knowledge_space: str, sections: List[Dict[str, Any]]) -> None:
+    import pyarrow as pa
+    keys = ["source", "knowledge_space", CONTENT_HASH_FIELD]
+    fields = _refresh_fields(tbl, sections[0])
+    schema = pa.schema([tbl.schema.field(name) for name in keys + fields])
+    rows = [{"source": source, "knowledge_space": knowledge_space, **{n: s.get(n) for n in [CONTENT_HASH_FIELD] + fields}}
+            for s in sections]
+    tbl.merge_insert(keys).when_matched_update_all().execute(pa.Table.from_pylist(rows, schema=schema))
+
+
+def _promote(tbl: Any, refs: Any, digest: str, space: str, metadata: Tuple, leaving: str) -> None:
+    """
+    Hand a stored chunk over to one of its remaining references (same text,
+    space and filterable metadata); ``leaving`` selects the old owner. The
+    row takes the heir's own source fields (``_OWNER_FIELDS``).
+    """
+    match = (f"{CONTENT_HASH_FIELD} = {sql_quote(digest)} AND knowledge_space = {sql_quote(space)}"
+             f" AND {_metadata_where(metadata)}")
+    heir = scan_table(refs, where=match, columns=_REF_FIELDS).head(1)
+    if heir.empty:
+        return
+    ref = heir.iloc[0]
+    tbl.update(where=f"{match} AND {leaving}",
+               values={name: ref[name] for name in _OWNER_FIELDS if name in tbl.schema.names})
+    refs.delete(f"{match} AND source = {sql_quote(ref['source'])} AND chunk_type = {sql_quote(ref['chunk_type'])}")
+
+
+class DedupStats:
+    """Process-wide savings from chunk deduplication."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.duplicate_rows = 0
+            self.bytes_saved = 0
+            self.embedded = 0
+            self.embed_ms = 0.0
+            self.embeddings_skipped = 0
+
+    def record_duplicate(self, content: str) -> None:
+        with self._lock:
+            self.duplicate_rows += 1
+            self.bytes_saved += VECTOR_DIMENSION * 4 + len(content.encode("utf-8"))
+
+    def record_embedding(self, embedded: int, elapsed_ms: float, skipped: int = 0) -> None:
+        with self._lock:
+            self.embedded += embedded
+            self.embed_ms += elapsed_ms
+            self.embeddings_skipped += skipped
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            per_text = self.embed_ms / self.embedded if self.embedded else 0.0
+            return {
+                "duplicate_rows": self.duplicate_rows,
+                "bytes_saved": self.bytes_saved,
+                "embeddings_skipped": self.embeddings_skipped,
+                "embed_ms_saved": round(self.embeddings_skipped * per_text, 1),
+            }
+
+    def log_stats(self, label: str = "Dedup") -> None:
+        s = self.stats()
+        if s["duplicate_rows"] or s["embeddings_skipped"]:
+            canvas.info(
+                f"[{label}] {s['duplicate_rows']} duplicate chunks stored as references "
+                f"(~{s['bytes_saved'] / 1024:.0f} KiB saved), {s['embeddings_skipped']} embeddings "
+                f"skipped (~{s['embed_ms_saved'] / 1000:.1f}s saved)"
+            )
+
+
+dedup_stats = DedupStats()
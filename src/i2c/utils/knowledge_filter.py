@@ -0,0 +1,129 @@
+# src/i2c/utils/knowledge_filter.py
+# Typed filters over the knowledge_base table's metadata columns, compiled
+# into LanceDB ``where`` prefilters so the search only ranks matching rows.
+
+import math
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from i2c.db_utils import ensure_scalar_index, sql_quote
+
+Values = Optional[Union[str, Sequence[str]]]
+
+# Scalar indexes that serve the filter columns: bitmaps for the
+# low-cardinality labels, a B-tree for range queries on confidence. The
+# content hash B-tree serves duplicate lookups at ingestion.
+KNOWLEDGE_FILTER_INDEXES = {
+    "knowledge_space": "BITMAP",
+    "knowledge_type": "BITMAP",
+    "application_context": "BITMAP",
+    "framework": "BITMAP",
+    "document_type": "BITMAP",
+    "confidence_score": "BTREE",
+    "content_hash": "BTREE",
+}
+
+
+def _float32_literal(value: float) -> str:
+    # confidence_score is float32: compare against the float32 rounding of the
+    # bound, so that min_confidence=0.7 still matches rows stored as 0.7
+    return repr(float(np.float32(value)))
+
+
+def _as_list(name: str, value: Values) -> Optional[List[str]]:
+    if value is None:
+        return None
+    items = [value] if isinstance(value, str) else list(value)
+    if not all(isinstance(v, str) for v in items):
+        raise ValueError(f"{name} filter values must be strings, got {items!r}")
+    return items
+
+
+@dataclass(frozen=True)
+class KnowledgeFilter:
+    """
+    Conditions on knowledge metadata. List fields match any of their values
+    (``IN``), a single string matches exactly; confidence bounds are
+    inclusive. Unset fields do not constrain the search.
+
+    >>> KnowledgeFilter(knowledge_type="principle", framework=["fastapi", "flask"]).to_where()
+    "knowledge_type IN ('principle') AND framework IN ('fastapi', 'flask')"
+    """
+    knowledge_type: Values = None
+    application_context: Values = None
+    framework: Values = None
+    knowledge_space: Values = None
+    document_type: Values = None
+    min_confidence: Optional[float] = None
+    max_confidence: Optional[float] = None
+
+    def __post_init__(self):
+        for name in ("knowledge_type", "application_context", "framework", "knowledge_space", "document_type"):
+            items = _as_list(name, getattr(self, name))
+            object.__setattr__(self, name, tuple(items) if items is not None else None)
+        for name in ("min_confidence", "max_confidence"):
+            value = getattr(self, name)
+            if value is not None:
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or math.isnan(value):
+                    raise ValueError(f"{name} must be a number, got {value!r}")
+                object.__setattr__(self, name, float(value))
+        if (self.min_confidence is not None and self.max_confidence is not None
+                and self.min_confidence > self.max_confidence):
+            raise ValueError("min_confidence is greater than max_confidence")
+
+    @classmethod
+    def from_dict(cls, filters: Dict[str, Any]) -> "KnowledgeFilter":
+        """
+        Build from a plain dict, as passed by agents and tools. Besides the
+        field names, ``confidence_score`` is accepted as a minimum or as a
+        ``(min, max)`` pair.
+        """
+        names = {f.name for f in fields(cls)}
+        kwargs = {}
+        for key, value in filters.items():
+            if value is None:
+                continue
+            if key == "confidence_score":
+                if isinstance(value, (list, tuple)):
+                    kwargs["min_confidence"], kwargs["max_confidence"] = value
+                else:
+                    kwargs["min_confidence"] = value
+            elif key in names:
+                kwargs[key] = value
+            else:
+                raise ValueError(f"Unknown knowledge filter '{key}'")
+        return cls(**kwargs)
+
+    @classmethod
+    def coerce(cls, filters: Union["KnowledgeFilter", Dict[str, Any], None]) -> Optional["KnowledgeFilter"]:
+        """Accept a filter, a dict or None."""
+        if filters is None or isinstance(filters, cls):
+            return filters
+        return cls.from_dict(filters)
+
+    def to_where(self) -> Optional[str]:
+        """The SQL predicate, or None when nothing is constrained."""
+        conds = []
+        for name in ("knowledge_space", "knowledge_type", "application_context", "framework", "document_type"):
+            values = getattr(self, name)
+            if values is not None:
+                if not values:
+                    return "FALSE"  # an empty IN-list matches nothing
+                conds.append(f"{name} IN ({', '.join(sql_quote(v) for v in values)})")
+        if self.min_confidence is not None:
+            conds.append(f"confidence_score >= {_float32_literal(self.min_confidence)}")
+        if self.max_confidence is not None:
+            conds.append(f"confidence_score <= {_float32_literal(self.max_confidence)}")
+        return " AND ".join(conds) or None
+
+
+def ensure_knowledge_indexes(tbl: Any) -> int:
+    """Create the scalar indexes used by knowledge filters and dedup; returns how many exist."""
+    names = set(tbl.schema.names)
+    return sum(
+        ensure_scalar_index(tbl, column, index_type)
+        for column, index_type in KNOWLEDGE_FILTER_INDEXES.items()
+        if column in names
+    )
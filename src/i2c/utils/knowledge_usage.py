@@ -0,0 +1,344 @@
+# src/i2c/utils/knowledge_usage.py
+# Write-behind usage and effectiveness counters for knowledge chunks.
+# A chunk counts as used when it is placed into an agent's context (see
+# ``context_packer.pack_context``), not each time a search returns it, so
+# benchmarks, prefetches and repeated lookups do not inflate the counts
+# that ranking feeds on. Uses and feedback only touch an in-memory buffer keyed by
+# (knowledge_space, content_hash); a background thread writes the buffer to
+# the knowledge_usage table as one merge_insert per flush, so the read path
+# never waits on a write. The counters live apart from knowledge_base: a
+# flush does not create a new knowledge_base version, and so does not
+# invalidate cached retrieval results for it.
+
+import atexit
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from i2c.db_utils import (
+    CONTENT_HASH_FIELD, GC_BATCH_SIZE, SCHEMA_KNOWLEDGE_USAGE, TABLE_KNOWLEDGE_BASE, TABLE_KNOWLEDGE_USAGE,
+    ensure_scalar_index, get_or_create_table, scan_table, sql_quote,
+)
+
+try:
+    from i2c.cli.controller import canvas
+except ImportError:
+    class FallbackCanvas:
+        def info(self, msg):    print(f"[INFO_USAGE] {msg}")
+        def warning(self, msg): print(f"[WARN_USAGE] {msg}")
+        def error(self, msg):   print(f"[ERROR_USAGE] {msg}")
+    canvas = FallbackCanvas()
+
+FLUSH_ROWS = int(os.getenv("I2C_KNOWLEDGE_USAGE_FLUSH_ROWS", "512"))
+FLUSH_SECONDS = float(os.getenv("I2C_KNOWLEDGE_USAGE_FLUSH_SECONDS", "60"))
+# Weight of a feedback score against the stored confidence (exponential moving average)
+FEEDBACK_ALPHA = float(os.getenv("I2C_KNOWLEDGE_FEEDBACK_ALPHA", "0.2"))
+# How much confidence and usage may shrink a result's distance when ranking (0 disables)
+RANKING_WEIGHT = float(os.getenv("I2C_KNOWLEDGE_USAGE_RANKING_WEIGHT", "0.1"))
+USAGE_SATURATION = 100  # uses at which the usage boost stops growing
+
+Key = Tuple[str, str]  # (knowledge_space, content_hash)
+
+
+def chunk_key(chunk: Any) -> Optional[Key]:
+    """Key of a retrieved row or chunk dict; None for rows stored without a content hash."""
+    getter = chunk.get if hasattr(chunk, "get") else (lambda k, d=None: getattr(chunk, k, d))
+    digest = getter(CONTENT_HASH_FIELD, "") or ""
+    if not isinstance(digest, str) or not digest:
+        return None
+    return (getter("knowledge_space", "") or "", digest)
+
+
+def _db_key(db: Any) -> Optional[str]:
+    """Counters are buffered per database; None is the default connection."""
+    return None if db is None else str(getattr(db, "uri", id(db)))
+
+
+class UsageCounters:
+    """Process-wide buffer of chunk usage and feedback, flushed in batches in the background."""
+
+    def __init__(self, flush_rows: int = FLUSH_ROWS, flush_seconds: float = FLUSH_SECONDS):
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            # db key -> chunk key -> [uses, score sum, score count]
+            self._pending: Dict[Optional[str], Dict[Key, List[float]]] = {}
+            self._dbs: Dict[Optional[str], Any] = {}
+            self._origin: Dict[Key, Optional[str]] = {}  # database a chunk was last retrieved from
+            self._stored: Dict[Optional[str], Dict[Key, Tuple[int, float]]] = {}  # flushed counters
+            self._last_flush = time.monotonic()
+            self.uses = 0
+            self.feedback = 0
+            self.flushes = 0
+            self.rows_updated = 0
+            self.flush_ms = 0.0
+
+    # --- recording (cheap, in memory) ---
+
+    def note_origin(self, chunks: Iterable[Any], db: Any) -> None:
+        """Remember the database retrieved chunks came from, where their counters are flushed to (not a use)."""
+        if db is None:
+            return
+        db_key = _db_key(db)
+        with self._lock:
+            self._dbs[db_key] = db
+            for chunk in chunks:
+                key = chunk_key(chunk)
+                if key:
+                    self._origin[key] = db_key
+
+    def record_use(self, chunks: Iterable[Any], db: Any = None) -> None:
+        """
+        Count one use of each chunk placed into an agent's context. ``db`` is
+        where they came from; it defaults to where each was last retrieved from.
+        """
+        if db is not None:
+            self.note_origin([], db)
+        recorded = False
+        with self._lock:
+            for chunk in chunks:
+                key = chunk_key(chunk)
+                if key:
+                    db_key = _db_key(db) if db is not None else self._origin.get(key)
+                    self._pending.setdefault(db_key, {}).setdefault(key, [0, 0.0, 0])[0] += 1
+                    self._origin[key] = db_key
+                    self.uses += 1
+                    recorded = True
+        if recorded:
+            self._schedule()
+
+    def record_effectiveness(self, chunks: Iterable[Any], score: float) -> None:
+        """Feed back how well the chunks behind an agent's output worked (0.0-1.0)."""
+        score = min(1.0, max(0.0, float(score)))
+        with self._lock:
+            for chunk in chunks:
+                key = chunk_key(chunk)
+                if key:
+                    entry = self._pending.setdefault(self._origin.get(key), {}).setdefault(key, [0, 0.0, 0])
+                    entry[1] += score
+                    entry[2] += 1
+                    self.feedback += 1
+        self._schedule()
+
+    def _pending_count(self) -> int:
+        with self._lock:
+            return sum(len(p) for p in self._pending.values())
+
+    def _schedule(self) -> None:
+        """Make sure the flusher runs; wake it early when the buffer is full."""
+        with self._lock:
+            if not self._closed and (self._flusher is None or not self._flusher.is_alive()):
+                self._flusher = threading.Thread(target=self._run_flusher, name="knowledge-usage", daemon=True)
+                self._flusher.start()
+        if self._pending_count() >= self.flush_rows:
+            self._wake.set()
+
+    def _run_flusher(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            if self._closed:
+                return
+            with self._lock:
+                due = self._pending_count() >= self.flush_rows or (
+                    time.monotonic() - self._last_flush >= self.flush_seconds
+                )
+            if due and self._pending_count():
+                self.flush()
+
+    # --- ranking ---
+
+    def _stored_counters(self, db: Any) -> Dict[Key, Tuple[int, float]]:
+        """Flushed counters of a database, read once and then kept up to date by our flushes."""
+        db_key = _db_key(db)
+        with self._lock:
+            stored = self._stored.get(db_key)
+        if stored is not None or db is None:
+            return stored or {}
+        stored = {}
+        try:
+            if TABLE_KNOWLEDGE_USAGE in db.table_names():
+                df = scan_table(db.open_table(TABLE_KNOWLEDGE_USAGE))
+                for space, digest, usage, confidence in df[list(SCHEMA_KNOWLEDGE_USAGE.names)].itertuples(index=False):
+                    stored[(space, digest)] = (int(usage), float(confidence))
+        except Exception as e:
+            canvas.warning(f"Failed to read knowledge usage counters: {e}")
+        with self._lock:
+            return self._stored.setdefault(db_key, stored)
+
+    def adjusted(self, key: Optional[Key], usage: Any, confidence: Any, db: Any = None) -> Tuple[int, float]:
+        """
+        A row's usage and confidence: flushed counters (else the row's own)
+        plus what is still buffered. ``db`` defaults to where the chunk was
+        last retrieved from.
+        """
+        usage = int(usage) if usage is not None and not _isnan(usage) else 0
+        confidence = float(confidence) if confidence is not None and not _isnan(confidence) else 0.5
+        with self._lock:
+            db_key = _db_key(db) if db is not None else self._origin.get(key)
+            db = db if db is not None else self._dbs.get(db_key)
+        stored = self._stored_counters(db).get(key) if key else None
+        if stored:
+            usage, confidence = stored
+        with self._lock:
+            entry = self._pending.get(db_key, {}).get(key) if key else None
+            if entry:
+                usage += int(entry[0])
+                if entry[2]:
+                    confidence = _blend(confidence, entry[1] / entry[2])
+        return usage, confidence
+
+    def rank(self, df, weight: float = RANKING_WEIGHT, db: Any = None):
+        """
+        Reorder search results so that, among close matches, chunks with
+        higher confidence and more use come first. Only the returned rows
+        are touched: ``_distance`` is shrunk by up to ``weight``.
+        """
+        if df is None or df.empty or not weight or "_distance" not in df.columns:
+            return df
+        boosts = []
+        for _, row in df.iterrows():
+            usage, confidence = self.adjusted(chunk_key(row), row.get("usage_frequency"),
+                                              row.get("confidence_score"), db=db)
+            use_boost = min(1.0, math.log1p(usage) / math.log1p(USAGE_SATURATION))
+            boosts.append(weight * (0.5 * confidence + 0.5 * use_boost))
+        ranked = df.assign(_rank_distance=df["_distance"].to_numpy() * (1 - np.asarray(boosts)))
+        return ranked.sort_values("_rank_distance", kind="stable").drop(columns="_rank_distance").reset_index(drop=True)
+
+    # --- flushing ---
+
+    def flush(self) -> int:
+        """Write buffered counters, one merge_insert per database; returns the rows updated."""
+        with self._flush_lock:
+            with self._lock:
+                batches, self._pending = self._pending, {}
+                dbs = dict(self._dbs)
+                self._last_flush = time.monotonic()
+            updated = 0
+            for db_key, pending in batches.items():
+                if not pending:
+                    continue
+                start = time.perf_counter()
+                try:
+                    written = self._write(dbs.get(db_key), pending)
+                except Exception as e:
+                    canvas.warning(f"Failed to flush knowledge usage counters: {e}")
+                    with self._lock:  # keep them for the next flush
+                        for key, (uses, total, count) in pending.items():
+                            entry = self._pending.setdefault(db_key, {}).setdefault(key, [0, 0.0, 0])
+                            entry[0] += uses
+                            entry[1] += total
+                            entry[2] += count
+                    continue
+                with self._lock:
+                    self.flushes += 1
+                    self.rows_updated += len(written)
+                    self.flush_ms += (time.perf_counter() - start) * 1000
+                    if db_key in self._stored:
+                        self._stored[db_key].update(written)
+                updated += len(written)
+            return updated
+
+    def _write(self, db: Any, pending: Dict[Key, List[float]]) -> Dict[Key, Tuple[int, float]]:
+        import pyarrow as pa
+        if db is None:
+            from i2c.db_utils import get_db_connection
+            db = get_db_connection()
+        if db is None or TABLE_KNOWLEDGE_BASE not in db.table_names():
+            return {}
+        kb = db.open_table(TABLE_KNOWLEDGE_BASE)
+        if CONTENT_HASH_FIELD not in kb.schema.names:
+            return {}
+        tbl = get_or_create_table(db, TABLE_KNOWLEDGE_USAGE, SCHEMA_KNOWLEDGE_USAGE)
+        if tbl is None:
+            raise RuntimeError(f"Failed to access {TABLE_KNOWLEDGE_USAGE} table")
+
+        # Current counters of the buffered keys; chunks without any yet start
+        # from the values stored with them at ingestion (one scan per batch of hashes)
+        columns = ["knowledge_space", CONTENT_HASH_FIELD, "usage_frequency", "confidence_score"]
+        hashes = sorted({h for _, h in pending})
+        rows: Dict[Key, Tuple[int, float]] = {}
+        for source in (kb, tbl):
+            for i in range(0, len(hashes), GC_BATCH_SIZE):
+                batch = ", ".join(sql_quote(h) for h in hashes[i:i + GC_BATCH_SIZE])
+                df = scan_table(source, where=f"{CONTENT_HASH_FIELD} IN ({batch})", columns=columns)
+                for space, digest, usage, confidence in df.itertuples(index=False):
+                    if (space, digest) in pending:
+                        rows[(space, digest)] = (usage, confidence)
+        if not rows:
+            return {}
+
+        written: Dict[Key, Tuple[int, float]] = {}
+        for key, (usage, confidence) in rows.items():
+            uses, total, count = pending[key]
+            usage = (int(usage) if not _isnan(usage) else 0) + int(uses)
+            confidence = float(confidence) if not _isnan(confidence) else 0.5
+            if count:
+                confidence = _blend(confidence, total / count)
+            written[key] = (usage, confidence)
+        source = pa.table({
+            "knowledge_space": pa.array([k[0] for k in written], pa.string()),
+            CONTENT_HASH_FIELD: pa.array([k[1] for k in written], pa.string()),
+            "usage_frequency": pa.array([v[0] for v in written.values()], pa.int32()),
+            "confidence_score": pa.array([v[1] for v in written.values()], pa.float32()),
+        })
+        (tbl.merge_insert(["knowledge_space", CONTENT_HASH_FIELD])
+            .when_matched_update_all().when_not_matched_insert_all().execute(source))
+        ensure_scalar_index(tbl, CONTENT_HASH_FIELD, "BTREE")
+        return written
+
+    def close(self) -> None:
+        """Stop the background flusher and write what is left (at exit)."""
+        self._closed = True
+        self._wake.set()
+        flusher = self._flusher
+        if flusher is not None and flusher is not threading.current_thread():
+            flusher.join(timeout=30)
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "uses": self.uses,
+                "feedback": self.feedback,
+                "pending": self._pending_count(),
+                "flushes": self.flushes,
+                "rows_updated": self.rows_updated,
+                "avg_flush_ms": round(self.flush_ms / self.flushes, 1) if self.flushes else 0.0,
+            }
+
+    def log_stats(self, label: str = "KnowledgeUsage") -> None:
+        s = self.stats()
+        if s["uses"] or s["feedback"]:
+            canvas.info(
+                f"[{label}] {s['uses']} uses, {s['feedback']} feedback scores → "
+                f"{s['rows_updated']} rows in {s['flushes']} flushes "
+                f"(avg {s['avg_flush_ms']:.0f} ms), {s['pending']} pending"
+            )
+
+
+def _isnan(value: Any) -> bool:
+    try:
+        return value is None or math.isnan(float(value))
+    except (TypeError, ValueError):
+        return True
+
+
+def _blend(confidence: float, score: float) -> float:
+    return min(1.0, max(0.0, (1 - FEEDBACK_ALPHA) * confidence + FEEDBACK_ALPHA * score))
+
+
+usage_counters = UsageCounters()
+atexit.register(usage_counters.close)
@@ -0,0 +1,89 @@
+# src/i2c/utils/near_dup.py
+# SimHash signatures for near-duplicate chunk suppression.
+
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+SIMHASH_BITS = 64
+# Hamming distance at or below which two chunks count as near-duplicates
+NEAR_DUP_DISTANCE = 3
+# Bands for bucketed lookup; with NEAR_DUP_DISTANCE < SIMHASH_BANDS any two
+# near-duplicates agree on at least one band (pigeonhole)
+SIMHASH_BANDS = 4
+SHINGLE_SIZE = 3
+
+_MASK = (1 << SIMHASH_BITS) - 1
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+_BIT_POSITIONS = np.arange(SIMHASH_BITS, dtype=np.uint64)
+_WORD = re.compile(r"\w+")
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash over word shingles, returned as a signed int64 so it can
+    be stored in an Arrow/LanceDB ``int64`` column. 0 means "no signature".
+    """
+    words = _WORD.findall((text or "").lower())
+    if not words:
+        return 0
+    if len(words) < SHINGLE_SIZE:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little") for s in shingles),
+        dtype=np.uint64, count=len(shingles),
+    )
+    ones = ((hashes[:, None] >> _BIT_POSITIONS) & np.uint64(1)).sum(axis=0)
+    bits = ones * 2 > len(shingles)
+    value = int(np.sum(np.left_shift(np.uint64(1), _BIT_POSITIONS[bits]), dtype=np.uint64)) if bits.any() else 0
+    return value - (1 << SIMHASH_BITS) if value >= (1 << (SIMHASH_BITS - 1)) else value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin((a ^ b) & _MASK).count("1")
+
+
+def _signature(item: Dict[str, Any], sig_key: str, text_key: str) -> int:
+    sig = item.get(sig_key)
+    try:
+        sig = int(sig) if sig is not None else 0
+    except (TypeError, ValueError):
+        sig = 0
+    # Rows indexed before signatures existed carry 0; sign them on the fly
+    return sig if sig else simhash(item.get(text_key, ""))
+
+
+def suppress_near_duplicates(
+    items: Sequence[Dict[str, Any]],
+    k: Optional[int] = None,
+    max_distance: int = NEAR_DUP_DISTANCE,
+    sig_key: str = "simhash",
+    text_key: str = "content",
+) -> List[Dict[str, Any]]:
+    """
+    Keep the first (best ranked) item of every near-duplicate group, in
+    order, until ``k`` items are kept. Later items backfill the slots of
+    suppressed ones, so callers should pass an over-fetched ranking.
+
+    Candidates are looked up through band buckets, so the filter is O(n)
+    in the number of items inspected rather than O(n * k).
+    """
+    buckets: Dict[tuple, List[int]] = {}
+    kept: List[Dict[str, Any]] = []
+    for item in items:
+        if k is not None and len(kept) >= k:
+            break
+        sig = _signature(item, sig_key, text_key) & _MASK
+        bands = [(b, (sig >> (b * _BAND_BITS)) & ((1 << _BAND_BITS) - 1)) for b in range(SIMHASH_BANDS)]
+        candidates = {s for band in bands for s in buckets.get(band, ())}
+        if any(hamming(sig, other) <= max_distance for other in candidates):
+            continue
+        for band in bands:
+            buckets.setdefault(band, []).append(sig)
+        kept.append(item)
+    return kept
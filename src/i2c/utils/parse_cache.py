@@ -0,0 +1,165 @@
+# src/i2c/utils/parse_cache.py
+# Process-wide parse-tree cache shared by chunkers, the project graph,
+# validators and modifiers, so the same source is parsed once per content.
+
+import ast
+import copy
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import esprima
+except ImportError:
+    esprima = None
+
+try:
+    from i2c.cli.controller import canvas
+except ImportError:
+    class FallbackCanvas:
+        def info(self, msg):    print(f"[INFO_PARSE] {msg}")
+        def warning(self, msg): print(f"[WARN_PARSE] {msg}")
+    canvas = FallbackCanvas()
+
+# Parse trees are far larger than their source; this factor turns source
+# bytes into a rough in-memory size for the budget.
+TREE_SIZE_FACTOR = 16
+ERROR_ENTRY_SIZE = 512
+DEFAULT_BUDGET_MB = int(os.getenv("I2C_PARSE_CACHE_MB", "64"))
+
+
+class ParseCache:
+    """
+    LRU cache of parse results keyed by (language, options, content hash).
+
+    Trees are shared between callers and must be treated as read-only.
+    Syntax errors are cached too, so invalid code is not re-parsed just to
+    fail again. Counters track hits, misses, evictions and the parse time
+    saved by hits.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_BUDGET_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_ms = 0.0
+
+    # ------------------------------------------------------------------
+    # Public parse helpers
+    # ------------------------------------------------------------------
+    def parse_python(self, content: str, filename: str = "<unknown>") -> ast.Module:
+        """Cached ``ast.parse``; raises the (cached) SyntaxError/ValueError on failure."""
+        # The filename ends up in node/error locations, so it is part of the key
+        return self._get(f"python:{filename}", content, lambda: ast.parse(content, filename=filename))
+
+    def python_syntax_error(
+        self, content: str, filename: str = "<unknown>", compile_check: bool = False
+    ) -> Optional[SyntaxError]:
+        """
+        Return the SyntaxError for ``content`` or None if it is valid.
+
+        With ``compile_check`` the cached tree is also compiled, which catches
+        errors ``ast.parse`` accepts (e.g. ``return`` outside a function),
+        matching the behaviour of ``compile(content, filename, 'exec')``.
+        """
+        try:
+            tree = self.parse_python(content, filename)
+            if compile_check:
+                self._get(f"python-compile:{filename}", content, lambda: compile(tree, filename, "exec") and True)
+        except (SyntaxError, ValueError) as e:
+            if isinstance(e, SyntaxError):
+                return e
+            return SyntaxError(str(e))
+        return None
+
+    def parse_js(self, content: str, **options) -> Any:
+        """Cached ``esprima.parseScript``; options are part of the cache key."""
+        if esprima is None:
+            raise ImportError("esprima parser not installed")
+        key_lang = "javascript:" + ",".join(f"{k}={options[k]}" for k in sorted(options))
+        return self._get(key_lang, content, lambda: esprima.parseScript(content, **options))
+
+    # ------------------------------------------------------------------
+    # Bookkeeping
+    # ------------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "saved_ms": round(self.saved_ms, 2),
+            }
+
+    def log_stats(self, label: str = "ParseCache") -> None:
+        s = self.stats()
+        canvas.info(
+            f"[{label}] {s['hits']} hits / {s['misses']} misses "
+            f"({s['hit_rate']:.0%}), saved {s['saved_ms']:.1f} ms parse time, "
+            f"{s['entries']} entries, {s['bytes'] // 1024} KiB"
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _get(self, language: str, content: str, parse: Callable[[], Any]) -> Any:
+        key = (language, hashlib.sha256(content.encode("utf-8", "surrogatepass")).hexdigest())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_ms += entry["parse_ms"]
+        if entry is not None:
+            if entry["error"] is not None:
+                # A fresh copy per hit: re-raising the stored object would grow its traceback
+                raise copy.copy(entry["error"]).with_traceback(None)
+            return entry["tree"]
+
+        start = time.perf_counter()
+        tree, error = None, None
+        try:
+            tree = parse()
+        except Exception as e:
+            error = e.with_traceback(None)
+        parse_ms = (time.perf_counter() - start) * 1000
+        size = ERROR_ENTRY_SIZE if error is not None else len(content) * TREE_SIZE_FACTOR + ERROR_ENTRY_SIZE
+
+        with self._lock:
+            self.misses += 1
+            if size <= self.max_bytes:
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self._bytes -= old["size"]
+                self._entries[key] = {"tree": tree, "error": error, "parse_ms": parse_ms, "size": size}
+                self._bytes += size
+                while self._bytes > self.max_bytes and self._entries:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= evicted["size"]
+                    self.evictions += 1
+        if error is not None:
+            raise copy.copy(error)
+        return tree
+
+
+# Shared process-wide instance
+parse_cache = ParseCache()
+
+
+def get_parse_cache() -> ParseCache:
+    """Return the process-wide parse cache."""
+    return parse_cache
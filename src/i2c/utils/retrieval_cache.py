@@ -0,0 +1,222 @@
+# src/i2c/utils/retrieval_cache.py
+# Process-wide cache of vector retrieval results, keyed by table version so
+# that any write to a table invalidates its cached results automatically.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+try:
+    from i2c.cli.controller import canvas
+except ImportError:
+    class FallbackCanvas:
+        def info(self, msg):    print(f"[INFO_RCACHE] {msg}")
+        def warning(self, msg): print(f"[WARN_RCACHE] {msg}")
+    canvas = FallbackCanvas()
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("I2C_RETRIEVAL_CACHE_ENTRIES", "256"))
+DEFAULT_MAX_MB = int(os.getenv("I2C_RETRIEVAL_CACHE_MB", "32"))
+QUERY_VECTOR_ENTRIES = 512
+
+
+def _freeze(value: Any) -> Hashable:
+    """Turn filter dicts/lists into a hashable, order-independent key part."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items() if v is not None))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+_MODEL_NAME_ATTRS = ("id", "model_name", "model_name_or_path", "name")
+
+
+def model_key(embed_model: Any, _depth: int = 0) -> Hashable:
+    """
+    Stable identity of an embedding model: class, model name and dimensions.
+
+    Unlike ``id()``, the key survives the model being garbage collected and
+    is never inherited by a different model allocated at the same address.
+    Wrappers holding the real model in ``.model`` are unwrapped; a
+    SentenceTransformer is named by its tokenizer's ``name_or_path``.
+    """
+    if embed_model is None:
+        return None
+    name = next((v for v in (getattr(embed_model, a, None) for a in _MODEL_NAME_ATTRS)
+                 if isinstance(v, str) and v), None)
+    inner = getattr(embed_model, "model", None)
+    if name is None and isinstance(inner, str):
+        name = inner
+    elif name is None and inner is not None and _depth < 2:
+        return model_key(inner, _depth + 1)
+    if name is None:
+        name = getattr(getattr(embed_model, "tokenizer", None), "name_or_path", None)
+
+    dims = getattr(embed_model, "dimensions", None)
+    if dims is None and callable(getattr(embed_model, "get_sentence_embedding_dimension", None)):
+        try:
+            dims = embed_model.get_sentence_embedding_dimension()
+        except Exception:
+            dims = None
+    cls = type(embed_model)
+    return (f"{cls.__module__}.{cls.__qualname__}", name, dims)
+
+
+class RetrievalCache:
+    """
+    LRU cache of retrieval results keyed by
+    (database, table, table version, embedding model, query text, filters, limit).
+
+    A lookup reads the table's current version first, so results cached
+    against an older version are never served; they are dropped as soon as
+    a newer version is seen. The cache is bounded by entry count and by the
+    in-memory size of the cached DataFrames. Hits skip both the query
+    embedding and the vector search; the time they saved is accumulated.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._vectors: "OrderedDict[Tuple[Hashable, str], Any]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.saved_ms = 0.0
+
+    def search(
+        self,
+        db: Any,
+        table_name: str,
+        query_text: str,
+        run: Callable[[], Optional[pd.DataFrame]],
+        filters: Optional[Dict[str, Any]] = None,
+        limit: int = 5,
+        embed_model: Any = None,
+    ) -> Optional[pd.DataFrame]:
+        """Return cached results for the query or call ``run`` and cache them.
+
+        ``embed_model`` is the model ``run`` embeds the query with; results
+        from different models are cached separately (see ``model_key``).
+        """
+        db_key = str(getattr(db, "uri", id(db)))
+        try:
+            version = db.open_table(table_name).version
+        except Exception:
+            return run()
+
+        key = (db_key, table_name, version, model_key(embed_model), query_text, _freeze(filters), limit)
+        with self._lock:
+            self._note_version(db_key, table_name, version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_ms += entry["cost_ms"]
+                return entry["df"].copy()
+
+        start = time.perf_counter()
+        df = run()
+        cost_ms = (time.perf_counter() - start) * 1000
+        if df is None:
+            return None
+
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            self.misses += 1
+            if size <= self.max_bytes and self._versions.get((db_key, table_name)) == version:
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self._bytes -= old["size"]
+                self._entries[key] = {"df": df.copy(), "cost_ms": cost_ms, "size": size}
+                self._bytes += size
+                self._evict()
+        return df
+
+    def embed_query(self, embed_model: Any, text: str) -> Any:
+        """Embed a query once per model and text; shared by all tables."""
+        key = (model_key(embed_model), text)
+        with self._lock:
+            if key in self._vectors:
+                self._vectors.move_to_end(key)
+                return self._vectors[key]
+
+        from i2c.utils.embedding import get_embedding_from_model
+        if not any(hasattr(embed_model, a) for a in ("encode", "get_embedding_and_usage", "get_embeddings")):
+            vector = embed_model.get_embedding(text)
+        else:
+            vector = get_embedding_from_model(embed_model, text)
+
+        with self._lock:
+            self._vectors[key] = vector
+            while len(self._vectors) > QUERY_VECTOR_ENTRIES:
+                self._vectors.popitem(last=False)
+        return vector
+
+    def _note_version(self, db_key: str, table_name: str, version: int) -> None:
+        """Drop entries cached against an older version of the table."""
+        table_key = (db_key, table_name)
+        seen = self._versions.get(table_key)
+        if seen is not None and version <= seen:
+            return
+        self._versions[table_key] = version
+        if seen is None:
+            return
+        stale = [k for k in self._entries if k[0] == db_key and k[1] == table_name and k[2] != version]
+        for k in stale:
+            self._bytes -= self._entries.pop(k)["size"]
+        self.invalidations += len(stale)
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted["size"]
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "saved_ms": round(self.saved_ms, 2),
+            }
+
+    def log_stats(self, label: str = "RetrievalCache") -> None:
+        s = self.stats()
+        if not (s["hits"] or s["misses"]):
+            return
+        canvas.info(
+            f"[{label}] {s['hits']} hits / {s['misses']} misses ({s['hit_rate']:.0%}), "
+            f"saved {s['saved_ms']:.1f} ms, {s['entries']} entries, "
+            f"{s['invalidations']} invalidated by table writes"
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._vectors.clear()
+            self._bytes = 0
+
+
+# Shared process-wide instance
+retrieval_cache = RetrievalCache()
+
+
+def get_retrieval_cache() -> RetrievalCache:
+    """Return the process-wide retrieval cache."""
+    return retrieval_cache
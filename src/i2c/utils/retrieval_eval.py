@@ -0,0 +1,353 @@
+# src/i2c/utils/retrieval_eval.py
+# Offline retrieval benchmark: ranking quality (recall@k, MRR, nDCG),
+# latency percentiles and prompt tokens per query, with parameter sweeps.
+
+import contextlib
+import importlib
+import itertools
+import json
+import math
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from i2c.utils.context_packer import estimate_tokens
+
+try:
+    from i2c.cli.controller import canvas
+except ImportError:
+    class FallbackCanvas:
+        def info(self, msg):    print(f"[INFO_BENCH] {msg}")
+        def warning(self, msg): print(f"[WARN_BENCH] {msg}")
+    canvas = FallbackCanvas()
+
+# A retriever takes (query, k) and returns (ranked chunk keys, prompt text)
+Retriever = Callable[[str, int], Tuple[List[str], str]]
+
+_CHUNK_HEADER = re.compile(r"--- Start Chunk: (.*?) \((?:.*?): (.*?)\) ---")
+
+# Parameters that set the number of results when no explicit ``k`` is swept
+K_PARAMS = ("k", "i2c.workflow.modification.rag_retrieval:MAX_RAG_RESULTS_PLANNER")
+
+
+def is_index_param(name: str) -> bool:
+    """Parameters that change how content is chunked need a fresh index."""
+    return "CHUNK" in name.upper()
+
+
+@dataclass
+class LabeledQuery:
+    """A query and the chunks a good retriever should return for it."""
+    query: str
+    expected: List[str]
+    retrievers: Optional[List[str]] = None  # restrict to these retrievers
+
+
+@dataclass
+class RunSummary:
+    """Aggregated metrics of one retriever under one parameter setting."""
+    retriever: str
+    params: Dict[str, Any]
+    queries: int
+    recall: float
+    mrr: float
+    ndcg: float
+    p50_ms: float
+    p99_ms: float
+    mean_tokens: float
+    per_query: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def load_labeled_queries(path: Path) -> List[LabeledQuery]:
+    """Read labeled queries from a JSON list or a JSONL file."""
+    text = Path(path).read_text(encoding="utf-8")
+    rows = json.loads(text) if text.lstrip().startswith("[") else [
+        json.loads(line) for line in text.splitlines() if line.strip()
+    ]
+    return [LabeledQuery(r["query"], list(r["expected"]), r.get("retrievers")) for r in rows]
+
+
+def chunk_key(record: Dict[str, Any]) -> str:
+    """Stable identifier of a retrieved chunk: ``path::chunk_name`` or the source."""
+    path = record.get("path") or record.get("file") or record.get("source") or ""
+    name = record.get("chunk_name")
+    return f"{path}::{name}" if name else str(path)
+
+
+def parse_context_keys(text: str) -> List[str]:
+    """Chunk keys, in order, from context formatted by ``_format_rag_results``."""
+    return [f"{path}::{name}" for path, name in _CHUNK_HEADER.findall(text or "")]
+
+
+def _matches(key: str, expected: str) -> bool:
+    """
+    Paths match exactly or as a suffix (indexers may store absolute paths);
+    chunk names are compared only when both sides carry one, so file-level
+    results (e.g. from ``vector_retrieve``) are credited at file level.
+    """
+    key_path, _, key_name = key.partition("::")
+    exp_path, _, exp_name = expected.partition("::")
+    if not (key_path == exp_path or key_path.endswith("/" + exp_path)):
+        return False
+    return not (key_name and exp_name) or key_name == exp_name
+
+
+def _relevance(keys: Sequence[str], expected: Sequence[str]) -> List[int]:
+    """Binary relevance per rank; each expected chunk is credited once."""
+    remaining = list(expected)
+    gains = []
+    for key in keys:
+        hit = next((e for e in remaining if _matches(key, e)), None)
+        if hit is not None:
+            remaining.remove(hit)
+        gains.append(int(hit is not None))
+    return gains
+
+
+def recall_at_k(keys: Sequence[str], expected: Sequence[str], k: int) -> float:
+    if not expected:
+        return 0.0
+    return sum(_relevance(keys[:k], expected)) / len(expected)
+
+
+def reciprocal_rank(keys: Sequence[str], expected: Sequence[str]) -> float:
+    for rank, gain in enumerate(_relevance(keys, expected), start=1):
+        if gain:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(keys: Sequence[str], expected: Sequence[str], k: int) -> float:
+    gains = _relevance(keys[:k], expected)
+    dcg = sum(g / math.log2(i + 2) for i, g in enumerate(gains))
+    ideal = sum(1 / math.log2(i + 2) for i in range(min(len(expected), k)))
+    return dcg / ideal if ideal else 0.0
+
+
+@contextlib.contextmanager
+def apply_params(params: Dict[str, Any]) -> Iterator[None]:
+    """
+    Temporarily apply benchmark parameters.
+
+    ``env:NAME`` sets an environment variable and ``package.module:ATTR``
+    sets a module attribute (e.g. ``i2c.workflow.modification.rag_retrieval:
+    MAX_RAG_RESULTS_PLANNER``). Other keys (such as ``k``) are read by the
+    benchmark itself. Everything is restored on exit.
+    """
+    restore: List[Callable[[], None]] = []
+    try:
+        for name, value in params.items():
+            if name.startswith("env:"):
+                var = name[4:]
+                old = os.environ.get(var)
+                os.environ[var] = str(value)
+                restore.append(lambda v=var, o=old: os.environ.pop(v, None) if o is None else os.environ.__setitem__(v, o))
+            elif ":" in name:
+                module_name, attr = name.split(":", 1)
+                module = importlib.import_module(module_name)
+                old = getattr(module, attr)
+                setattr(module, attr, value)
+                restore.append(lambda m=module, a=attr, o=old: setattr(m, a, o))
+        yield
+    finally:
+        for undo in reversed(restore):
+            undo()
+
+
+class RetrievalBenchmark:
+    """
+    Runs labeled queries through named retrievers and scores the rankings.
+
+    Latency is measured per call; with ``cold`` (default) the shared
+    retrieval cache is cleared before every call so repeated queries are
+    not answered from memory. The number of results comes from the first
+    of ``K_PARAMS`` in the run's parameters, else ``k``.
+
+    With ``build`` (a callable that indexes the content under the current
+    parameters and returns the retrievers over that index) the index is
+    built before the first run and rebuilt whenever a run changes an
+    index parameter (see ``is_index_param``), e.g. a chunk size.
+    """
+
+    def __init__(
+        self,
+        retrievers: Optional[Dict[str, Retriever]],
+        queries: Sequence[LabeledQuery],
+        k: int = 5,
+        repeats: int = 1,
+        cold: bool = True,
+        build: Optional[Callable[[], Dict[str, Retriever]]] = None,
+    ):
+        self.retrievers = retrievers or {}
+        self.queries = list(queries)
+        self.k = k
+        self.repeats = max(repeats, 1)
+        self.cold = cold
+        self.build = build
+        self._index_key: Optional[Tuple] = None
+        self.builds = 0
+
+    def _ensure_index(self, params: Dict[str, Any]) -> None:
+        """(Re)build the index if the index parameters differ from the last build."""
+        if self.build is None:
+            return
+        key = tuple(sorted((n, repr(v)) for n, v in params.items() if is_index_param(n)))
+        if self.builds and key == self._index_key:
+            return
+        canvas.info(f"[Bench] building index for {dict(key) or 'default settings'}")
+        self.retrievers = self.build()
+        self._index_key = key
+        self.builds += 1
+
+    def _call(self, retriever: Retriever, query: str, k: int) -> Tuple[List[str], str, float]:
+        if self.cold:
+            from i2c.utils.retrieval_cache import retrieval_cache
+            retrieval_cache.clear()
+        start = time.perf_counter()
+        keys, text = retriever(query, k)
+        return keys, text, (time.perf_counter() - start) * 1000
+
+    def run(self, params: Optional[Dict[str, Any]] = None) -> List[RunSummary]:
+        params = dict(params or {})
+        k = int(next((params[n] for n in K_PARAMS if n in params), self.k))
+        summaries = []
+        with apply_params(params):
+            self._ensure_index(params)
+            for name, retriever in self.retrievers.items():
+                per_query, latencies = [], []
+                for lq in self.queries:
+                    if lq.retrievers and name not in lq.retrievers:
+                        continue
+                    for _ in range(self.repeats):
+                        try:
+                            keys, text, ms = self._call(retriever, lq.query, k)
+                        except Exception as e:
+                            canvas.warning(f"[Bench:{name}] '{lq.query}' failed: {e}")
+                            keys, text, ms = [], "", float("nan")
+                        latencies.append(ms)
+                    per_query.append({
+                        "query": lq.query,
+                        "keys": keys,
+                        "recall": recall_at_k(keys, lq.expected, k),
+                        "rr": reciprocal_rank(keys[:k], lq.expected),
+                        "ndcg": ndcg_at_k(keys, lq.expected, k),
+                        "tokens": estimate_tokens(text),
+                    })
+                summaries.append(self._summarize(name, params, per_query, latencies))
+        return summaries
+
+    @staticmethod
+    def _summarize(name: str, params: Dict[str, Any], per_query: List[Dict[str, Any]], latencies: List[float]) -> RunSummary:
+        lat = np.array([l for l in latencies if not math.isnan(l)], dtype=np.float64)
+        mean = lambda key: float(np.mean([q[key] for q in per_query])) if per_query else 0.0
+        return RunSummary(
+            retriever=name,
+            params=params,
+            queries=len(per_query),
+            recall=round(mean("recall"), 4),
+            mrr=round(mean("rr"), 4),
+            ndcg=round(mean("ndcg"), 4),
+            p50_ms=round(float(np.percentile(lat, 50)), 2) if lat.size else float("nan"),
+            p99_ms=round(float(np.percentile(lat, 99)), 2) if lat.size else float("nan"),
+            mean_tokens=round(mean("tokens"), 1),
+            per_query=per_query,
+        )
+
+    def sweep(self, grid: Dict[str, Sequence[Any]]) -> List[RunSummary]:
+        """Run every combination of the parameter grid, index parameters outermost."""
+        names = sorted(grid, key=lambda n: not is_index_param(n))
+        summaries = []
+        for values in itertools.product(*(grid[n] for n in names)):
+            params = dict(zip(names, values))
+            canvas.info(f"[Bench] params {params}")
+            summaries.extend(self.run(params))
+        return summaries
+
+
+def format_report(summaries: Sequence[RunSummary]) -> str:
+    """Markdown comparison table, best nDCG first within each retriever."""
+    lines = [
+        "| retriever | params | queries | recall@k | MRR | nDCG | p50 ms | p99 ms | tokens |",
+        "|---|---|---|---|---|---|---|---|---|",
+    ]
+    for s in sorted(summaries, key=lambda s: (s.retriever, -s.ndcg, s.p50_ms)):
+        params = ", ".join(f"{k.split(':')[-1]}={v}" for k, v in s.params.items()) or "default"
+        lines.append(
+            f"| {s.retriever} | {params} | {s.queries} | {s.recall:.3f} | {s.mrr:.3f} | {s.ndcg:.3f} "
+            f"| {s.p50_ms:.1f} | {s.p99_ms:.1f} | {s.mean_tokens:.0f} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def write_report(summaries: Sequence[RunSummary], out_dir: Path) -> Path:
+    """Write ``report.md`` (comparison table) and ``results.json`` (per-query detail)."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "results.json").write_text(json.dumps([asdict(s) for s in summaries], indent=2, default=str))
+    report = out_dir / "report.md"
+    report.write_text("# Retrieval benchmark\n\n" + format_report(summaries))
+    return report
+
+
+# --- Retrievers over the real retrieval paths ---
+
+def build_index(
+    project_path: Path,
+    project_id: Optional[str] = None,
+    docs_path: Optional[Path] = None,
+    embed_model: Any = None,
+    knowledge_space: str = "benchmark",
+) -> Dict[str, Any]:
+    """
+    Index ``project_path`` into the current ``db_utils.DB_PATH`` with the
+    production indexer and, with ``docs_path``, ingest those documents into
+    the knowledge base with the production ingestor.
+    """
+    from i2c.agents.modification_team.context_reader.context_indexer import ContextIndexer
+    status = ContextIndexer(Path(project_path), project_id=project_id).index_project()
+    if docs_path is not None:
+        from i2c import db_utils
+        from i2c.agents.knowledge.enhanced_knowledge_ingestor import EnhancedKnowledgeIngestorAgent
+        ingestor = EnhancedKnowledgeIngestorAgent(
+            budget_manager=None, knowledge_space=knowledge_space, embed_model=embed_model,
+            cache_file=Path(db_utils.DB_PATH) / "ingest_cache.db",
+        )
+        status["knowledge"] = ingestor.execute(Path(docs_path), "documentation")[1]
+    return status
+
+
+def default_retrievers(
+    db: Any,
+    embed_model: Any,
+    project_id: Optional[str] = None,
+    knowledge_base: Any = None,
+) -> Dict[str, Retriever]:
+    """Named retrievers for ``retrieve_combined_context``, ``vector_retrieve`` and a knowledge base."""
+
+    def combined(query: str, k: int) -> Tuple[List[str], str]:
+        from i2c.workflow.modification.rag_retrieval import retrieve_combined_context
+        ctx = retrieve_combined_context(query, db, embed_model, code_limit=k, knowledge_limit=k, project_id=project_id)
+        text = ctx.get("code_context", "") + ctx.get("knowledge_context", "")
+        return parse_context_keys(text), text
+
+    def vector(query: str, k: int) -> Tuple[List[str], str]:
+        from i2c.agents.modification_team.retrieval_tools import vector_retrieve
+        text = vector_retrieve(query, source="both", limit=k, project_id=project_id)
+        try:
+            rows = json.loads(text)
+        except ValueError:
+            return [], text
+        return [chunk_key(r) for r in rows if "error" not in r], text
+
+    retrievers: Dict[str, Retriever] = {"combined": combined, "vector_retrieve": vector}
+    if knowledge_base is not None:
+        def knowledge(query: str, k: int) -> Tuple[List[str], str]:
+            rows = knowledge_base.retrieve_knowledge(query=query, limit=k) or []
+            return [chunk_key(r) for r in rows], "\n\n".join(r.get("content", "") for r in rows)
+        retrievers["knowledge"] = knowledge
+    return retrievers
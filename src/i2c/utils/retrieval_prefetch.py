@@ -0,0 +1,128 @@
+# src/i2c/utils/retrieval_prefetch.py
+# Speculative retrieval: start knowledge lookups for every planned file or
+# modification step as soon as the plan is known, and hand the results to
+# the generation/modification agents in place of their own lookups. A
+# lookup that is not ready yet is not waited for: the consumer falls back to
+# its usual lazy lookup.
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from i2c.cli.controller import canvas
+except ImportError:
+    class FallbackCanvas:
+        def info(self, msg):    print(f"[INFO_PREFETCH] {msg}")
+        def warning(self, msg): print(f"[WARN_PREFETCH] {msg}")
+    canvas = FallbackCanvas()
+
+PREFETCH_WORKERS = int(os.getenv("I2C_PREFETCH_WORKERS", "4"))
+# Longest a consumer waits for an in-flight lookup before falling back to its
+# own lookup; 0 never blocks (the fallback would redo the same work anyway)
+PREFETCH_WAIT_SECONDS = float(os.getenv("I2C_PREFETCH_WAIT_SECONDS", "0"))
+PREFETCH_LIMIT = 4
+
+
+class RetrievalPrefetcher:
+    """
+    Runs ``fetch(query)`` for many keys on a small thread pool.
+
+    ``prefetch`` returns immediately; ``get`` returns the result if it is
+    ready (by default without waiting) and None otherwise, in which case the
+    caller does its own lookup; a slow or failed prefetch never blocks it.
+    Lookups that were not ready count as ``missed``; retrieval time
+    overlapped with other work is accumulated as ``overlapped_ms``.
+    """
+
+    def __init__(self, fetch: Callable[[str], Any], max_workers: int = PREFETCH_WORKERS, label: str = "Prefetch"):
+        self.fetch = fetch
+        self.label = label
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="i2c-prefetch")
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.ready = 0
+        self.waited = 0
+        self.missed = 0
+        self.errors = 0
+        self.overlapped_ms = 0.0
+
+    def _timed_fetch(self, query: str):
+        start = time.perf_counter()
+        result = self.fetch(query)
+        return result, (time.perf_counter() - start) * 1000
+
+    def prefetch(self, queries: Dict[str, str]) -> None:
+        """Start lookups for ``{key: query}``; keys already in flight are kept."""
+        with self._lock:
+            for key, query in queries.items():
+                if key not in self._futures and query:
+                    self._futures[key] = self._pool.submit(self._timed_fetch, query)
+
+    def get(self, key: str, timeout: float = PREFETCH_WAIT_SECONDS) -> Optional[Any]:
+        """Result for ``key`` if available within ``timeout`` seconds, else None."""
+        with self._lock:
+            future = self._futures.get(key)
+        if future is None:
+            return None
+        was_done = future.done()
+        try:
+            result, cost_ms = future.result(timeout=0 if was_done else timeout)
+        except FutureTimeoutError:
+            self.missed += 1
+            return None
+        except Exception as e:
+            self.errors += 1
+            canvas.warning(f"[{self.label}] lookup for {key} failed: {e}")
+            return None
+        if was_done:
+            self.ready += 1
+            self.overlapped_ms += cost_ms
+        else:
+            self.waited += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "submitted": len(self._futures),
+            "ready": self.ready,
+            "waited": self.waited,
+            "missed": self.missed,
+            "errors": self.errors,
+            "overlapped_ms": round(self.overlapped_ms, 2),
+        }
+
+    def log_stats(self) -> None:
+        s = self.stats()
+        if s["submitted"]:
+            canvas.info(
+                f"[{self.label}] {s['submitted']} lookups: {s['ready']} ready, {s['waited']} waited, "
+                f"{s['missed']} missed, {s['errors']} failed; {s['overlapped_ms']:.1f} ms overlapped"
+            )
+
+    def shutdown(self) -> None:
+        """Stop accepting work; pending lookups are cancelled, running ones finish in the background."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def knowledge_prefetcher(knowledge_base: Any, limit: int = PREFETCH_LIMIT, label: str = "Prefetch") -> Optional[RetrievalPrefetcher]:
+    """Prefetcher over ``knowledge_base.retrieve_knowledge``, or None without a knowledge base."""
+    if knowledge_base is None or not hasattr(knowledge_base, "retrieve_knowledge"):
+        return None
+    return RetrievalPrefetcher(lambda q: knowledge_base.retrieve_knowledge(query=q, limit=limit), label=label)
+
+
+def format_prefetched(chunks: Optional[List[Dict[str, Any]]], budget_tokens: int, label: Optional[str] = None) -> str:
+    """Pack prefetched knowledge chunks into a prompt section within ``budget_tokens``."""
+    if not chunks:
+        return ""
+    from i2c.utils.context_packer import pack_context
+
+    def header(chunk: Dict[str, Any]) -> str:
+        return f"[{chunk.get('source', 'knowledge')}]"
+
+    packed = pack_context(chunks, budget_tokens, overhead=lambda c: len(header(c)) // 4 + 2, label=label)
+    return "\n\n".join(f"{header(e['item'])}\n{e['text']}" for e in packed.entries)
@@ -0,0 +1,221 @@
+# src/i2c/utils/retrieval_service.py
+# Long-lived retrieval resources for agent tools: one embedding model and one
+# LanceDB connection with warm table handles per process, plus per-call
+# latency metrics for every tool that goes through the service.
+
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, Optional
+
+import numpy as np
+
+try:
+    from i2c.cli.controller import canvas
+except ImportError:
+    class FallbackCanvas:
+        def info(self, msg):    print(f"[INFO_RSERVICE] {msg}")
+        def warning(self, msg): print(f"[WARN_RSERVICE] {msg}")
+    canvas = FallbackCanvas()
+
+# After a failed model load, wait this long before trying again
+MODEL_RETRY_SECONDS = float(os.getenv("I2C_RETRIEVAL_MODEL_RETRY_SECONDS", "30"))
+# Recent calls kept per operation for latency percentiles
+LATENCY_WINDOW = 512
+
+
+class WarmConnection:
+    """
+    LanceDB connection that hands out cached table handles.
+
+    ``open_table`` moves a cached handle to the table's latest version
+    (``checkout_latest``) instead of reopening it, so reads see every write
+    while skipping the manifest load and handle setup. Everything else is
+    delegated to the wrapped connection.
+    """
+
+    def __init__(self, db: Any):
+        self._db = db
+        self._tables: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def open_table(self, name: str) -> Any:
+        with self._lock:
+            tbl = self._tables.get(name)
+        if tbl is not None:
+            try:
+                tbl.checkout_latest()
+                return tbl
+            except Exception:
+                pass  # dropped or recreated: reopen below
+        tbl = self._db.open_table(name)
+        with self._lock:
+            self._tables[name] = tbl
+        return tbl
+
+    def drop_table(self, name: str, *args, **kwargs) -> Any:
+        with self._lock:
+            self._tables.pop(name, None)
+        return self._db.drop_table(name, *args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._db, name)
+
+
+class _OpStats:
+    __slots__ = ("calls", "errors", "total_ms", "recent")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.recent: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+
+class RetrievalService:
+    """
+    Process-wide holder of the retrieval model and database.
+
+    The embedding model is loaded once (failed loads are retried after
+    ``MODEL_RETRY_SECONDS`` rather than on every call) and the connection is
+    reused until ``db_utils.DB_PATH`` changes. ``timed``/``instrument``
+    record per-operation latency, including the one-off model load.
+    """
+
+    def __init__(self, model_factory: Optional[Callable[[], Any]] = None):
+        self._model_factory = model_factory
+        self._model = None
+        self._model_failed_at: Optional[float] = None
+        self._db: Optional[WarmConnection] = None
+        self._db_path: Optional[str] = None
+        self._lock = threading.Lock()
+        self._ops: Dict[str, _OpStats] = {}
+        self.model_load_ms: Optional[float] = None
+
+    def embed_model(self) -> Any:
+        """The shared embedding model, loading it on first use; None if unavailable."""
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is not None:
+                return self._model
+            if self._model_failed_at is not None and time.monotonic() - self._model_failed_at < MODEL_RETRY_SECONDS:
+                return None
+            factory = self._model_factory
+            if factory is None:
+                from i2c.workflow.modification.rag_config import get_embed_model as factory
+            start = time.perf_counter()
+            try:
+                model = factory()
+            except Exception as e:
+                canvas.warning(f"[RetrievalService] embedding model unavailable: {e}")
+                model = None
+            if model is None:
+                self._model_failed_at = time.monotonic()
+                return None
+            self.model_load_ms = (time.perf_counter() - start) * 1000
+            self._model, self._model_failed_at = model, None
+            canvas.info(f"[RetrievalService] embedding model loaded in {self.model_load_ms:.0f} ms")
+            return model
+
+    def db(self) -> Optional[WarmConnection]:
+        """The shared connection for the current ``db_utils.DB_PATH``; None if it cannot be opened."""
+        from i2c import db_utils
+        path = str(db_utils.DB_PATH)
+        with self._lock:
+            if self._db is None or self._db_path != path:
+                raw = db_utils.get_db_connection()
+                self._db = WarmConnection(raw) if raw is not None else None
+                self._db_path = path
+            return self._db
+
+    def warm_up(self, background: bool = True) -> None:
+        """Open the database and load the model now (in a daemon thread by default)."""
+        def load():
+            with self.timed("warm_up"):
+                self.db()
+                self.embed_model()
+
+        if background:
+            threading.Thread(target=load, name="i2c-retrieval-warmup", daemon=True).start()
+        else:
+            load()
+
+    @contextmanager
+    def timed(self, op: str) -> Iterator[None]:
+        """Record the latency of the enclosed block under ``op``; exceptions count as errors."""
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                stats = self._ops.setdefault(op, _OpStats())
+                stats.calls += 1
+                stats.errors += failed
+                stats.total_ms += ms
+                stats.recent.append(ms)
+
+    def instrument(self, op: str) -> Callable:
+        """Decorator form of ``timed``."""
+        def decorate(fn: Callable) -> Callable:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timed(op):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            ops = {}
+            for op, s in self._ops.items():
+                recent = np.fromiter(s.recent, dtype=np.float64, count=len(s.recent))
+                ops[op] = {
+                    "calls": s.calls,
+                    "errors": s.errors,
+                    "mean_ms": round(s.total_ms / s.calls, 2) if s.calls else 0.0,
+                    "p50_ms": round(float(np.percentile(recent, 50)), 2) if recent.size else 0.0,
+                    "p95_ms": round(float(np.percentile(recent, 95)), 2) if recent.size else 0.0,
+                }
+            return {
+                "model_loaded": self._model is not None,
+                "model_load_ms": round(self.model_load_ms, 1) if self.model_load_ms is not None else None,
+                "ops": ops,
+            }
+
+    def log_stats(self, label: str = "RetrievalService") -> None:
+        s = self.stats()
+        for op, o in s["ops"].items():
+            if op == "warm_up":
+                continue
+            canvas.info(
+                f"[{label}] {op}: {o['calls']} calls ({o['errors']} failed), "
+                f"p50 {o['p50_ms']:.1f} ms, p95 {o['p95_ms']:.1f} ms"
+            )
+
+    def reset(self) -> None:
+        """Drop the model, connection and metrics (e.g. after swapping the model factory)."""
+        with self._lock:
+            self._model = None
+            self._model_failed_at = None
+            self._db = None
+            self._db_path = None
+            self._ops.clear()
+            self.model_load_ms = None
+
+
+# Shared process-wide instance
+retrieval_service = RetrievalService()
+
+
+def get_retrieval_service() -> RetrievalService:
+    """Return the process-wide retrieval service."""
+    return retrieval_service
@@ -584,13 +584,19 @@ async def execute_agentic_evolution(
                 canvas.info(f"🔍 DEBUG: knowledge_base.retrieve_knowledge returned {len(knowledge_items) if knowledge_items else 0} items")
     
                 if knowledge_items:
-                    # Create retrieved_context with FIXED content structure
+                    # Pack the retrieved items into the evolution context budget
+                    from i2c.utils.context_packer import pack_context, token_budget
+                    packed = pack_context(
+                        knowledge_items,
+                        token_budget("agentic_evolution"),
+                        overhead=lambda item: len(str(item.get('source', ''))) // 4 + 4,
+                        label="agentic_evolution",
+                    )
                     context_parts = []
-                    for item in knowledge_items[:3]:  # Limit to 3 items
-                        source = item.get('source', 'Unknown')
-                        content = item.get('content', '')[:500]  # Limit content to 500 chars
+                    for entry in packed.entries:
+                        source = entry["item"].get('source', 'Unknown')
                         context_parts.append(f"Source: {source}")
-                        context_parts.append(content)
+                        context_parts.append(entry["text"])
                         context_parts.append("---")
                     
                     session_state["retrieved_context"] = "\n".join(context_parts)
@@ -13,7 +13,7 @@ from rich.table import Table
 from rich.panel import Panel
 
 # Import the components we need to analyze
-from i2c.db_utils import get_db_connection
+from i2c.db_utils import get_db_connection, get_project_id
 from i2c.workflow.modification.rag_retrieval import retrieve_context_for_planner
 from i2c.workflow.modification.plan_generator import generate_modification_plan
 from i2c.workflow.modification.code_executor import execute_modification_steps
@@ -68,7 +68,7 @@ class ModificationAnalyzer:
             
             # Step 2: Analyze RAG Retrieval
             start_time = time.time()
-            rag_context, rag_metrics = self._analyze_rag_retrieval(user_request, db, embed_model)
+            rag_context, rag_metrics = self._analyze_rag_retrieval(user_request, db, embed_model, project_path)
             self.report_data["execution_time"]["rag_retrieval"] = time.time() - start_time
             
             # Step 3: Analyze Plan Generation
@@ -170,7 +170,8 @@ class ModificationAnalyzer:
         
         return db, embed_model
     
-    def _analyze_rag_retrieval(self, user_request: str, db, embed_model) -> Tuple[str, Dict[str, Any]]:
+    def _analyze_rag_retrieval(self, user_request: str, db, embed_model,
+                               project_path: Path = None) -> Tuple[str, Dict[str, Any]]:
         """Analyze the RAG retrieval process."""
         self.console.print("[bold blue]Stage 2:[/bold blue] Analyzing RAG retrieval")
         
@@ -187,7 +188,8 @@ class ModificationAnalyzer:
             context = retrieve_context_for_planner(
                 user_request=user_request,
                 db=db,
-                embed_model=embed_model
+                embed_model=embed_model,
+                project_id=get_project_id(project_path) if project_path else None,
             )
             
             # Analyze the retrieved context
@@ -17,6 +17,7 @@ from i2c.workflow.modification.execute_cycle import execute_modification_cycle
 from i2c.cli.controller import canvas
 from i2c.db_utils import get_db_connection
 from i2c.workflow.modification.rag_retrieval import retrieve_combined_context
+from i2c.db_utils import get_project_id
 
 
 class FeaturePipeline:
@@ -138,7 +139,8 @@ class FeaturePipeline:
             combined_context = retrieve_combined_context(
                 query,
                 self.db_connection, 
-                self.embed_model
+                self.embed_model,
+                project_id=get_project_id(self.project_path),
             )
             
             return {
@@ -20,6 +20,8 @@ class GenerationWorkflow(Workflow):
         
         # Initialize ONLY missing workflow-specific keys (preserve existing session state)
         self.session_state.setdefault("generation_memory", [])
+        # Background knowledge lookups for planned files (see _start_file_prefetch)
+        self._prefetcher = None
         
         # Debug session state initialization (without modifying)
         canvas.info(f"🔍 DEBUG: GenerationWorkflow initialized with {len(self.session_state)} session keys")
@@ -90,6 +92,10 @@ class GenerationWorkflow(Workflow):
         # Step 2: Code Generation
         for item in self.code_generation_phase():
             yield item
+        if self._prefetcher:
+            self._prefetcher.log_stats()
+            self._prefetcher.shutdown()
+            self._prefetcher = None
 
         # Step 3: Unit Tests
         for item in self.unit_test_phase():
@@ -257,6 +263,10 @@ class GenerationWorkflow(Workflow):
                 
             # Store in session state
             self.session_state["file_plan"] = file_plan
+
+            # Start knowledge retrieval for every planned file now, so
+            # generation does not wait on embed + search per file
+            self._start_file_prefetch(file_plan, objective)
             
             canvas.success(f"Planned files: {file_plan}")
             yield RunResponse(
@@ -544,13 +554,41 @@ class GenerationWorkflow(Workflow):
                 extra_data={"error": str(e)}
             )
     
+    def _start_file_prefetch(self, file_plan: list, objective: str) -> None:
+        """Speculatively retrieve knowledge for each planned file in the background."""
+        from i2c.utils.retrieval_prefetch import knowledge_prefetcher
+
+        if self._prefetcher:
+            self._prefetcher.shutdown()
+        self._prefetcher = knowledge_prefetcher(self.session_state.get("knowledge_base"), label="FilePrefetch")
+        if self._prefetcher:
+            self._prefetcher.prefetch({fp: f"{objective} {fp}" for fp in file_plan})
+            canvas.info(f"🔍 Prefetching knowledge for {len(file_plan)} planned files")
+
+    def _prefetched_file_knowledge(self, chunks) -> str:
+        """Prompt section with the knowledge prefetched for a file."""
+        from i2c.utils.context_packer import token_budget
+        from i2c.utils.retrieval_prefetch import format_prefetched
+
+        section = format_prefetched(chunks, token_budget("file_knowledge"))
+        return f"\n\n# RELEVANT KNOWLEDGE FOR THIS FILE:\n{section}\n" if section else ""
+
     def _generate_single_file(self, file_path: str, objective: str, language: str, constraints_text: str, generated_code: dict, enhance_with_api: bool = False) -> str:
         """Generate code for a single file using the RAG-enabled code builder."""
         try:
             from i2c.agents.core_agents import get_rag_enabled_agent
             
+            # Knowledge prefetched for this file goes into the prompt, packed to the
+            # file_knowledge budget, in place of the agent's own lookup; if it is
+            # not ready yet the agent looks up as usual (no waiting)
+            prefetched = self._prefetcher.get(file_path) if self._prefetcher else None
+            file_knowledge = self._prefetched_file_knowledge(prefetched)
+
             # Get the enhanced code builder
-            code_builder = get_rag_enabled_agent("code_builder", session_state=self.session_state)
+            code_builder = get_rag_enabled_agent(
+                "code_builder", session_state=self.session_state,
+                knowledge_context=prefetched if file_knowledge else None,
+            )
             
             # Build context from already generated files
             existing_context = ""
@@ -604,13 +642,14 @@ class GenerationWorkflow(Workflow):
                 for endpoint in sorted(unique_endpoints):
                     api_context += f"- {endpoint}\n"
                 api_context += "\nPlease integrate these existing API endpoints into your frontend code.\n"
+
             # Build the generation prompt
             generation_prompt = f"""Generate code for: {file_path}
 
 Project Objective: {objective}
 Language: {language}{constraints_text}{architectural_rules}
 
-{existing_context}{api_context}
+{existing_context}{api_context}{file_knowledge}
 
 IMPORTANT: Return ONLY the code content for this file. No explanations, no markdown blocks, no extra text.
 Use best practices and follow the AGNO framework patterns from your knowledge context."""
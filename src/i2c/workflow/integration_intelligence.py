@@ -14,6 +14,8 @@ from agno.agent import Agent
 from agno.team import Team
 from builtins import llm_highest, llm_middle
 
+from i2c.utils.context_packer import pack_text, token_budget
+
 try:
     from i2c.cli.controller import canvas
 except ImportError:
@@ -105,7 +107,7 @@ class ArchitecturalIntelligenceAgent(Agent):
         System Type: {context['system_type']}
         Constraints: {context['constraints']}
         
-        Context: {context['knowledge_context'][:1000] if context['knowledge_context'] else 'No additional context'}
+        Context: {pack_text(context['knowledge_context'], token_budget('knowledge'), label='integration_contract') if context['knowledge_context'] else 'No additional context'}
         
         Create a detailed integration contract that ensures all components work together.
         Include specific API endpoints, data models, component interfaces, and integration flows.
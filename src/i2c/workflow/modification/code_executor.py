@@ -10,6 +10,7 @@ from typing import Any, Dict, List, Tuple
 
 # Import RAG retrieval function for per-step context
 from .rag_retrieval import retrieve_context_for_step
+from i2c.db_utils import get_project_id
 # Import CLI controller
 from i2c.cli.controller import canvas
 
@@ -34,19 +35,22 @@ def execute_modification_steps(
         isolation still work.
     """
     shared = session_state if session_state is not None else {}
+    project_id = shared.get("project_id") or get_project_id(project_path)
     
     canvas.step("Executing modification plan (generating code with step-specific context)...")
     modified_code_map: Dict[str, str] = {}
     files_to_delete: List[Path] = []
     all_steps_succeeded = True  # Assume success initially
 
-    # Check if database has any indexed chunks
+    # Check if database has any indexed chunks for this project
     db_has_chunks = False
     try:
-        from i2c.db_utils import TABLE_CODE_CONTEXT
+        from i2c.db_utils import TABLE_CODE_CONTEXT, PROJECT_ID_FIELD, project_filter
         table = db.open_table(TABLE_CODE_CONTEXT)
-        df = table.to_pandas()
-        db_has_chunks = len(df) > 0
+        if PROJECT_ID_FIELD in table.schema.names:
+            db_has_chunks = table.count_rows(project_filter(project_id)) > 0
+        else:
+            db_has_chunks = table.count_rows() > 0
         
         if not db_has_chunks:
             canvas.warning("  ⚠️ Warning: No indexed code chunks found in database. RAG retrieval will be limited.")
@@ -72,7 +76,7 @@ def execute_modification_steps(
             # --- RAG Query for THIS Specific Step ---
             canvas.info(f"   -> Retrieving context for '{action}' on '{file_rel_path}': {step.get('what', '')[:40]}...")
             try:
-                ctx = retrieve_context_for_step(step, db, embed_model)
+                ctx = retrieve_context_for_step(step, db, embed_model, project_id=project_id)
             except Exception as e:
                 canvas.error(f"   -> Context retrieval error: {e}")
                 ctx = ""
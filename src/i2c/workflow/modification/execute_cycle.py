@@ -17,13 +17,16 @@ from .file_operations import write_files_to_disk, delete_files
 from i2c.agents.modification_team import context_reader_agent
 
 # Import DB utils
-from i2c.db_utils import get_db_connection
+from i2c.db_utils import get_db_connection, get_project_id
 
 # Import CLI controller
 from i2c.cli.controller import canvas
 
 # Import Utils 
 from i2c.workflow.utils import deduplicate_code_map
+from i2c.utils.parse_cache import parse_cache
+from i2c.utils.retrieval_cache import retrieval_cache
+from i2c.utils.retrieval_service import retrieval_service
 
 
 def execute_modification_cycle(
@@ -53,6 +56,7 @@ def execute_modification_cycle(
     shared: Dict[str, Any] = session_state if session_state is not None else {}
     # (store a few useful facts for anyone downstream)
     shared["project_path"] = str(project_path)
+    shared.setdefault("project_id", get_project_id(project_path))
     shared["user_request"] = user_request
     canvas.start_process(f"Modification Cycle for: {project_path.name}")
     result = {"success": False, "language": language, "code_map": None}
@@ -90,7 +94,8 @@ def execute_modification_cycle(
                 planner_ctx = retrieve_context_for_planner(
                     user_request=user_request,
                     db=db,
-                    embed_model=embed_model
+                    embed_model=embed_model,
+                    project_id=shared["project_id"],
                 )
                 canvas.info(f"[RAG] Planner context retrieved: {len(planner_ctx.split()) if planner_ctx else 0} words")
             except Exception as e:
@@ -184,6 +189,9 @@ def execute_modification_cycle(
         # ───── Step 7: Write Files & Cleanup ────────────────────────────
         write_files_to_disk(final_code_map, project_path)
         delete_files(files_to_delete, project_path)
+        parse_cache.log_stats()
+        retrieval_cache.log_stats()
+        retrieval_service.log_stats()
         canvas.end_process(f"Modification cycle for {project_path.name} completed successfully.")
 
         # ───── All Done ───────────────────────────────────────────────
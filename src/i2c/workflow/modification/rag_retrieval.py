@@ -3,16 +3,21 @@
 
 from pathlib import Path
 import pandas as pd
-from typing import Any, Optional, List, Dict    
+from typing import Any, Optional, List, Dict, Union
 
 # Import DB Utils directly (absolute import)
 
 from i2c.db_utils import (
     query_context,
+    query_context_by_text,
     TABLE_CODE_CONTEXT,
     TABLE_KNOWLEDGE_BASE,
 )
 
+from i2c.utils.context_packer import pack_context, token_budget
+from i2c.utils.rerank import RERANK_OVERFETCH, mmr_rerank
+from i2c.utils.retrieval_cache import retrieval_cache
+
 # Use AGNO's embedder (has .dimensions & get_embedding_and_usage)
 from agno.embedder.sentence_transformer import SentenceTransformerEmbedder
 
@@ -39,66 +44,39 @@ def retrieve_combined_context(
     embed_model: Any,
     code_limit: int = MAX_RAG_RESULTS_PLANNER,
     knowledge_limit: int = MAX_RAG_RESULTS_MODIFIER,
+    project_id: Optional[str] = None,
 ) -> Dict[str, str]:
     """
     Retrieve context from both code_context & knowledge_base tables.
+    Code chunks are restricted to ``project_id`` when one is given.
     """
     try:
-        import hashlib
-
-        def deduplicate_chunks(chunks):
-            seen_hashes = set()
-            deduped = []
-            for r in chunks:
-                h = hashlib.sha256(r["content"].encode()).hexdigest()
-                if h not in seen_hashes:
-                    seen_hashes.add(h)
-                    deduped.append(r)
-            return deduped
-
-        def boost_relevance(chunks, query_text: str):
-            query = query_text.lower()
-            for r in chunks:
-                boost = 0
-                if "title" in query and "title" in r.get("content", "").lower():
-                    boost += 2
-                if "title" in query and "title" in r.get("chunk_name", "").lower():
-                    boost += 3
-                if "test" in r.get("chunk_name", "").lower():
-                    boost -= 1
-                r["score"] = r.get("score", 0) + boost * 0.05
-            return sorted(chunks, key=lambda x: x.get("score", 0), reverse=True)
-
-        # 1) Embed the query
         try:
-            if hasattr(embed_model, 'encode'):
-                vector = embed_model.encode(query_text)
-            elif hasattr(embed_model, 'get_embedding_and_usage'):
-                vector, _ = embed_model.get_embedding_and_usage(query_text)
-            else:
-                canvas.error(f"Unknown embedding model type: {type(embed_model)}")
-                return {"code_context": "", "knowledge_context": ""}
-            if vector is None:
-                return {"code_context": "", "knowledge_context": ""}
-        except Exception as e:
-            canvas.error(f"Error generating embedding: {str(e)}")
-            return {"code_context": "", "knowledge_context": ""}
-
-        # 2) Retrieve and process from code_context
-        res = query_context(db, TABLE_CODE_CONTEXT, query_vector=vector, limit=code_limit)
-        res = deduplicate_chunks(res)
-        res = boost_relevance(res, query_text)
+            query_vector = retrieval_cache.embed_query(embed_model, query_text)
+        except Exception:
+            query_vector = None  # rerank on search distances only
+
+        # 1) Retrieve and process from code_context (the query is embedded
+        #    once, repeated queries are served by the retrieval cache and
+        #    near-duplicate chunks are suppressed with backfill); the
+        #    over-fetched candidates are reranked to the limit by MMR
+        res = query_context_by_text(db, TABLE_CODE_CONTEXT, query_text, embed_model,
+                                    limit=code_limit * RERANK_OVERFETCH, project_id=project_id, distinct=True,
+                                    with_vectors=True)
+        res = mmr_rerank(_to_records(res), k=code_limit, query_vector=query_vector,
+                         query_text=query_text, bm25_weight=0.2)
         for i, r in enumerate(res):
             canvas.info(f"[RAG:code] {i+1:02d} | chunk={r.get('chunk_name')} | file={r.get('path')} | score={r.get('score'):.2f}")
-        code_ctx = _format_rag_results(res, "code-context", 500)
+        code_ctx = _format_rag_results(res, "code-context", budget_tokens=token_budget("code_context"))
 
-        # 3) Retrieve and process from knowledge_base
-        res = query_context(db, TABLE_KNOWLEDGE_BASE, query_vector=vector, limit=knowledge_limit)
-        res = deduplicate_chunks(res)
-        res = boost_relevance(res, query_text)
+        # 2) Retrieve and process from knowledge_base
+        res = query_context_by_text(db, TABLE_KNOWLEDGE_BASE, query_text, embed_model,
+                                    limit=knowledge_limit * RERANK_OVERFETCH, distinct=True, with_vectors=True)
+        res = mmr_rerank(_to_records(res), k=knowledge_limit, query_vector=query_vector,
+                         query_text=query_text, bm25_weight=0.2, recency_weight=0.1)
         for i, r in enumerate(res):
             canvas.info(f"[RAG:kb]   {i+1:02d} | chunk={r.get('chunk_name')} | file={r.get('path')} | score={r.get('score'):.2f}")
-        kb_ctx = _format_rag_results(res, "knowledge-base", 500)
+        kb_ctx = _format_rag_results(res, "knowledge-base", budget_tokens=token_budget("knowledge"))
 
         return {"code_context": code_ctx, "knowledge_context": kb_ctx}
 
@@ -106,35 +84,53 @@ def retrieve_combined_context(
         canvas.error(f"Error retrieving combined context: {e}")
         return {"code_context": "", "knowledge_context": ""}
 
-def _format_rag_results(rag_results: pd.DataFrame, context_description: str, max_content_len: int = 500) -> str:
+def _to_records(rag_results: Union[pd.DataFrame, List[Dict], None]) -> List[Dict]:
+    """Normalize LanceDB results (DataFrame or list of dicts) to a list of dicts."""
+    if rag_results is None:
+        return []
+    if isinstance(rag_results, pd.DataFrame):
+        return rag_results.to_dict("records")
+    return list(rag_results)
+
+def _chunk_header(row: Dict) -> str:
+    return f"--- Start Chunk: {row.get('path', 'N/A')} ({row.get('chunk_type', 'N/A')}: {row.get('chunk_name', 'N/A')}) ---"
+
+def _format_rag_results(
+    rag_results: Union[pd.DataFrame, List[Dict], None],
+    context_description: str,
+    budget_tokens: Optional[int] = None,
+) -> str:
     """
     Formats LanceDB query results into a string for LLM prompts.
     
     Args:
-        rag_results: DataFrame from LanceDB containing retrieval results
+        rag_results: DataFrame (or records) from LanceDB containing retrieval results
         context_description: Description of what this context is for (planner, step, etc.)
-        max_content_len: Maximum length to include from each chunk
+        budget_tokens: Token budget for the packed chunks (defaults to the planner budget)
         
     Returns:
         Formatted string with all relevant context
     """
     default_message = f"No relevant context chunks found via vector search for {context_description}."
-    if rag_results is None or rag_results.empty:
+    records = _to_records(rag_results)
+    if not records:
         return default_message
 
-    canvas.info(f"   Retrieved {len(rag_results)} relevant context chunks for {context_description}.")
+    canvas.info(f"   Retrieved {len(records)} relevant context chunks for {context_description}.")
     context_lines = [f"[Retrieved Context for {context_description}:]"]
-    
-    for _, row in rag_results.iterrows():
-        # Safely get values with defaults
-        chunk_path = row.get('path', 'N/A')
-        chunk_type = row.get('chunk_type', 'N/A')
-        chunk_name = row.get('chunk_name', 'N/A')
-        chunk_content = row.get('content', '')
 
-        context_lines.append(f"--- Start Chunk: {chunk_path} ({chunk_type}: {chunk_name}) ---")
-        content_snippet = chunk_content[:max_content_len] + ('...' if len(chunk_content) > max_content_len else '')
-        context_lines.append(content_snippet)
+    # Pack the best chunks into the token budget, trimming at syntactic boundaries
+    packed = pack_context(
+        records,
+        budget_tokens or token_budget("planner"),
+        overhead=lambda row: len(_chunk_header(row)) // 4 + 12,
+        label=context_description,
+    )
+    for entry in packed.entries:
+        row = entry["item"]
+        chunk_path = row.get('path', 'N/A')
+        context_lines.append(_chunk_header(row))
+        context_lines.append(entry["text"] + ("\n..." if entry["trimmed"] else ""))
         context_lines.append(f"--- End Chunk: {chunk_path} ---")
 
     # Check if only the header was added
@@ -146,10 +142,12 @@ def _format_rag_results(rag_results: pd.DataFrame, context_description: str, max
 def retrieve_context_for_planner(
     user_request: str,
     db: Any,                         # LanceDBConnection
-    embed_model: Any                # Could be SentenceTransformerEmbedder or other type
+    embed_model: Any,               # Could be SentenceTransformerEmbedder or other type
+    project_id: Optional[str] = None,
 ) -> str:
     """
     Generates embedding for user request and retrieves context for the planner.
+    Pass ``project_id`` to keep results inside one project's namespace.
     """
     canvas.step("Analyzing user request for planning context...")
 
@@ -165,39 +163,26 @@ def retrieve_context_for_planner(
     if not query_text:
         return "No relevant context could be retrieved for planning."
 
-    # 1) Embed - handle different embedding model types
-    try:
-        # Check if it has encode method (standard for SentenceTransformer)
-        if hasattr(embed_model, 'encode'):
-            vector = embed_model.encode(query_text)
-        # Check if the model has get_embedding_and_usage method (Agno custom)
-        elif hasattr(embed_model, 'get_embedding_and_usage'):
-            vector, _ = embed_model.get_embedding_and_usage(query_text)
-        else:
-            canvas.error(f"Unknown embedding model type: {type(embed_model)}")
-            return "No relevant context could be retrieved for planning."
-            
-        # Skip only if embedding actually failed
-        if vector is None:
-            return "No relevant context could be retrieved for planning."
-    except Exception as e:
-        canvas.error(f"Error generating embedding: {str(e)}")
-        return "No relevant context could be retrieved for planning."
-
-    # 2) Query LanceDB for planner context
-    res = query_context(
+    # 1) Embed and query LanceDB for planner context (cached per table version)
+    res = query_context_by_text(
         db,
         TABLE_CODE_CONTEXT,
-        query_vector=vector,
-        limit=MAX_RAG_RESULTS_PLANNER
+        query_text,
+        embed_model,
+        limit=MAX_RAG_RESULTS_PLANNER,
+        project_id=project_id,
+        distinct=True,
     )
+    if res is None:
+        return "No relevant context could be retrieved for planning."
 
-    # 3) Format and return
-    return _format_rag_results(res, "planning", max_content_len=500)
+    # 2) Format and return
+    return _format_rag_results(res, "planning", budget_tokens=token_budget("planner"))
 
-def retrieve_context_for_step(step: dict, db, embed_model: Any) -> Optional[str]:
+def retrieve_context_for_step(step: dict, db, embed_model: Any, project_id: Optional[str] = None) -> Optional[str]:
     """
     Generates embedding for a modification step and retrieves relevant context.
+    Pass ``project_id`` to keep results inside one project's namespace.
     """
     # Extract step information
     file_path   = step.get('file', '')
@@ -215,40 +200,25 @@ def retrieve_context_for_step(step: dict, db, embed_model: Any) -> Optional[str]
     retrieved_contexts: List[str] = []
 
     for query_text in query_texts:
-        # 1) Embed
-        try:
-            # Check if it has encode method (standard for SentenceTransformer)
-            if hasattr(embed_model, 'encode'):
-                vector = embed_model.encode(query_text)
-            # Check if the model has get_embedding_and_usage method (Agno custom)
-            elif hasattr(embed_model, 'get_embedding_and_usage'):
-                vector, _ = embed_model.get_embedding_and_usage(query_text)
-            else:
-                canvas.error(f"Unknown embedding model type: {type(embed_model)}")
-                continue
-                
-            if vector is None:
-                continue
-        except Exception as e:
-            canvas.error(f"Error generating embedding: {str(e)}")
-            continue
-
-        # 2) Query LanceDB
-        rag_results = query_context(
+        # 1) Embed and query LanceDB (cached per table version)
+        rag_results = query_context_by_text(
             db,
             TABLE_CODE_CONTEXT,
-            query_vector=vector,
-            limit=MAX_RAG_RESULTS_MODIFIER
+            query_text,
+            embed_model,
+            limit=MAX_RAG_RESULTS_MODIFIER,
+            project_id=project_id,
+            distinct=True,
         )
         # explicitly guard against None *and* empty DataFrame
         if rag_results is None or rag_results.empty:
             continue
 
-        # 3) Format
+        # 2) Format (the modifier budget is shared by the step's queries)
         formatted = _format_rag_results(
             rag_results,
             f"step '{what_to_do[:30]}...' ({file_path})",
-            max_content_len=300
+            budget_tokens=token_budget("modifier") // len(query_texts),
         )
         # Skip the “no context” message
         if "No relevant context" not in formatted:
@@ -16,6 +16,7 @@ from i2c.cli.controller import canvas
 from i2c.workflow.modification.rag_retrieval import (
     retrieve_context_for_planner,
 )
+from i2c.db_utils import get_project_id
 from i2c.workflow.modification.plan_generator import generate_modification_plan
 from i2c.workflow.modification.code_executor import execute_modification_steps
 from i2c.workflow.modification.test_and_quality import (
@@ -59,6 +60,7 @@ class ModificationWorkflow(Workflow):
             {
                 "language": language,
                 "project_path": str(project_path),
+                "project_id": get_project_id(project_path),
                 "user_request": user_request,
             }
         )
@@ -76,6 +78,7 @@ class ModificationWorkflow(Workflow):
                 user_request=user_request,
                 db=db,
                 embed_model=embed_model,
+                project_id=self.session_state["project_id"],
             )
             self.session_state["planner_context"] = planner_ctx
             canvas.info("[RAG] Planner context retrieved.")
@@ -76,18 +76,21 @@ def build_orchestration_team(session_state=None) -> Team:
     # === SIMPLE: Use retrieved_context if available ===
     retrieved_context = session_state.get("retrieved_context", "")
     if retrieved_context:
-        # Add concise knowledge context without bloat
+        # Add concise knowledge context without bloat, packed into the team's token budget
+        from i2c.utils.context_packer import pack_text, token_budget
+        packed_context = pack_text(retrieved_context, token_budget("orchestration_team"),
+                                   label="orchestration_team")
         knowledge_instructions = [
             "",
             "=== KNOWLEDGE CONTEXT ===",
             f"Relevant patterns and best practices:",
-            retrieved_context[:1000] + "..." if len(retrieved_context) > 1000 else retrieved_context,
+            packed_context,
             ""
         ]
         
         # Insert after core instructions
         instructions = instructions[:25] + knowledge_instructions + instructions[25:]
-        canvas.success(f"✅ Knowledge context added ({len(retrieved_context)} chars, trimmed to 1000)")
+        canvas.success(f"✅ Knowledge context added ({len(packed_context)}/{len(retrieved_context)} chars)")
     else:
         canvas.warning("⚠️ No retrieved_context available for orchestration team")
 
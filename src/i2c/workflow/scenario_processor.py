@@ -69,18 +69,17 @@ class SessionKnowledgeBase:
         """Recreate from dictionary"""
         return cls(db, embed_model, data.get("knowledge_space", "default"))
     
-    def retrieve_knowledge(self, query, limit=5):
-        from i2c.db_utils import query_context, TABLE_KNOWLEDGE_BASE
+    def retrieve_knowledge(self, query, limit=5, filters=None):
+        """Search the knowledge base; ``filters`` (KnowledgeFilter or dict) prefilter the search."""
+        from i2c.db_utils import query_knowledge
         
         try:
-            # Convert text query to vector using embed model
-            query_vector = self.embed_model.get_embedding(query)
-            
-            # Query the knowledge base table
-            df = query_context(
+            # Embed and query the knowledge base table (cached per table version)
+            df = query_knowledge(
                 db=self.db,
-                table_name=TABLE_KNOWLEDGE_BASE,
-                query_vector=query_vector,
+                query_text=query,
+                embed_model=self.embed_model,
+                filters=filters,
                 limit=limit
             )
             
@@ -95,7 +94,12 @@ class SessionKnowledgeBase:
                     'content': row.get('content', ''),
                     'category': row.get('category', ''),
                     'knowledge_space': row.get('knowledge_space', ''),
-                    'framework': row.get('framework', '')
+                    'framework': row.get('framework', ''),
+                    'knowledge_type': row.get('knowledge_type', ''),
+                    'confidence_score': row.get('confidence_score'),
+                    'usage_frequency': row.get('usage_frequency'),
+                    'content_hash': row.get('content_hash', ''),
+                    'simhash': row.get('simhash', 0),
                 })
             
             return results
@@ -129,6 +133,9 @@ class ScenarioProcessor:
         self.session_state: Dict[str, Any] = {}
         self.current_structured_goal: Optional[Dict] = None
         self.reader_agent: Optional[ContextReaderAgent] = None
+        # Ingestion jobs started by background knowledge_folder steps
+        self._ingestion_queue = None
+        self.background_ingestion_jobs: List[int] = []
     
     def _process_agentic_evolution_step(self, step: Dict[str, Any]) -> None:
         """
@@ -355,7 +362,9 @@ class ScenarioProcessor:
                 TABLE_CODE_CONTEXT, 
                 SCHEMA_CODE_CONTEXT,
                 TABLE_KNOWLEDGE_BASE, 
-                SCHEMA_KNOWLEDGE_BASE
+                SCHEMA_KNOWLEDGE_BASE,
+                get_project_id,
+                project_filter,
             )
             
             # Connect to DB
@@ -376,14 +385,16 @@ class ScenarioProcessor:
             except Exception as e:
                 canvas.warning(f"Error checking knowledge_base: {e}")
             
-            # Handle code_context table (always recreate)
+            # Handle code_context table (reset only this project's namespace)
             try:
-                if TABLE_CODE_CONTEXT in db.table_names():
-                    canvas.info(f"Dropping existing {TABLE_CODE_CONTEXT} table")
-                    db.drop_table(TABLE_CODE_CONTEXT)
-                canvas.info(f"Creating {TABLE_CODE_CONTEXT} table")
-                code_tbl = db.create_table(TABLE_CODE_CONTEXT, schema=SCHEMA_CODE_CONTEXT)
-                canvas.success(f"Created {TABLE_CODE_CONTEXT} table")
+                code_tbl = get_or_create_table(db, TABLE_CODE_CONTEXT, SCHEMA_CODE_CONTEXT)
+                if code_tbl is None:
+                    raise RuntimeError("table unavailable")
+                if self.current_project_path:
+                    project_id = get_project_id(self.current_project_path)
+                    canvas.info(f"Clearing {TABLE_CODE_CONTEXT} rows of project {project_id}")
+                    code_tbl.delete(project_filter(project_id))
+                canvas.success(f"{TABLE_CODE_CONTEXT} table ready")
             except Exception as e:
                 canvas.error(f"Failed to create {TABLE_CODE_CONTEXT} table: {e}")
                 return False
@@ -480,10 +491,26 @@ class ScenarioProcessor:
                     logger.exception(f"Error processing step {i+1}")
                     # Continue with next step instead of aborting entirely
             
+            self._wait_for_background_ingestion()
+
             # Show budget summary at the end
             show_budget_summary(self.budget_manager)
             tokens, cost = self.budget_manager.get_session_consumption()
             canvas.info(f"Scenario complete! Consumed ~{tokens} tokens (~${cost:.6f})")
+            from i2c.utils.retrieval_cache import retrieval_cache
+            from i2c.utils.knowledge_context_cache import knowledge_context_cache
+            from i2c.utils.retrieval_service import retrieval_service
+            from i2c.utils.knowledge_dedup import dedup_stats
+            from i2c.utils.knowledge_usage import usage_counters
+            from i2c.agents.knowledge.query_analysis import query_analysis_cache
+            usage_counters.flush()
+            usage_counters.log_stats()
+            retrieval_cache.log_stats()
+            retrieval_service.log_stats()
+            knowledge_context_cache.log_stats()
+            query_analysis_cache.log_stats()
+            dedup_stats.log_stats()
+            knowledge_context_cache.flush()
             canvas.info("=" * 60)
             
             return True
@@ -1208,26 +1235,49 @@ class ScenarioProcessor:
                 "explicit project_name is required to define a knowledge space."
             )
 
-        # 2. Import and instantiate the enhanced ingestor
-        from i2c.agents.knowledge.enhanced_knowledge_ingestor import EnhancedKnowledgeIngestorAgent
-        
-        ingestor = EnhancedKnowledgeIngestorAgent(
-            budget_manager=self.budget_manager,     # required by the agent
-            knowledge_space=project_name            # injects your per-step project name
-        )
+        # 2. Run it as a resumable ingestion job (checkpointed per batch of files)
+        from i2c.agents.knowledge.ingestion_queue import DONE, PAUSED
 
-        # 3. Execute ingestion
-        success, stats = ingestor.execute(
-            document_path=document_path,
-            document_type=doc_type,
-            metadata=metadata,
-            recursive=is_folder,
-            force_refresh=force_refresh
+        queue = self._get_ingestion_queue()
+        job = queue.enqueue(
+            document_path, project_name, doc_type, metadata=metadata,
+            recursive=is_folder, force_refresh=force_refresh
         )
+        job = queue.run_job(job.id)
+        if not job.finished and job.status != PAUSED:  # failed files waiting for a retry
+            job = queue.wait([job.id])[0]
 
-        # 4. Log or print summary
+        # 3. Log or print summary
+        stats = {"successful_files": 0, "skipped_files": 0, **job.stats, "job_id": job.id}
         canvas.info(f"[Knowledge Ingestion] Space: '{project_name}' → stats: {stats}")
-        return success, stats
+        return job.status == DONE, stats
+
+    def _get_ingestion_queue(self):
+        """Ingestion job queue whose ingestors share this scenario's budget manager."""
+        if self._ingestion_queue is None:
+            from i2c.agents.knowledge.ingestion_queue import IngestionQueue
+
+            def make_ingestor(knowledge_space: str):
+                from i2c.agents.knowledge.enhanced_knowledge_ingestor import EnhancedKnowledgeIngestorAgent
+                return EnhancedKnowledgeIngestorAgent(
+                    budget_manager=self.budget_manager,
+                    knowledge_space=knowledge_space
+                )
+            self._ingestion_queue = IngestionQueue(ingestor_factory=make_ingestor)
+        return self._ingestion_queue
+
+    def _wait_for_background_ingestion(self) -> None:
+        """Let background ingestion jobs finish before the scenario reports."""
+        if not self.background_ingestion_jobs:
+            return
+        canvas.info(f"Waiting for {len(self.background_ingestion_jobs)} background ingestion job(s)...")
+        for job in self._get_ingestion_queue().wait(self.background_ingestion_jobs):
+            if job.succeeded:
+                canvas.success(f"✅ Ingestion job {job.id} ({Path(job.path).name}) complete: "
+                               f"{job.stats.get('successful_files', 0)} files")
+            else:
+                canvas.warning(f"Ingestion job {job.id} ({Path(job.path).name}) is {job.status}: {job.error}")
+        self.background_ingestion_jobs = []
 
     def _process_knowledge_step(self, step: Dict[str, Any]) -> None:
         """Process a knowledge step - add documentation to knowledge base"""
@@ -1333,6 +1383,19 @@ class ScenarioProcessor:
             # Get force_refresh from step
             force_refresh = step.get("force_refresh", False)
 
+            if step.get("background", False):
+                if not metadata["project_name"]:
+                    raise ValueError("No 'project_name' defined in step metadata")
+                queue = self._get_ingestion_queue()
+                job = queue.enqueue(
+                    folder_path, metadata["project_name"], step.get("doc_type", "Docs"),
+                    metadata=metadata, recursive=True, force_refresh=force_refresh
+                )
+                self.background_ingestion_jobs.append(job.id)
+                queue.start_background()
+                canvas.info(f"Ingesting {folder_path.name} in the background (job {job.id}); continuing")
+                return
+
             success, results = self._handle_knowledge_ingestion(
                 folder_path, 
                 step.get("doc_type", "Docs"), 
@@ -243,13 +243,13 @@ class SelfHealingController:
         """Basic syntax validation for different languages"""
         try:
             if language == "python":
-                import ast
+                from i2c.utils.parse_cache import parse_cache
                 for py_file in project_path.glob("**/*.py"):
                     try:
                         with open(py_file, 'r', encoding='utf-8') as f:
                             content = f.read()
                         if content.strip():  # Only check non-empty files
-                            ast.parse(content)
+                            parse_cache.parse_python(content)
                     except (SyntaxError, ValueError):
                         return False
                         
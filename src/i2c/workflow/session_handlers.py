@@ -550,15 +550,36 @@ def handle_add_documentation_folder(project_path: Path):
     framework = canvas.get_user_input("Framework/Library (optional, e.g., React, Django): ").strip()
     version = canvas.get_user_input("Version (optional, e.g., 3.0.0): ").strip()
     
-    # Process the folder
-    ingest_documentation(
-        project_path=project_path,
-        doc_path=folder_path,
-        document_type=document_type,
-        framework=framework,
-        version=version,
-        recursive=recursive
-    )
+    # Process the folder as a resumable job: an interrupted run continues
+    # from its last checkpoint (see `python -m i2c.cli.ingest_jobs`)
+    from i2c.agents.knowledge.ingestion_queue import DONE, PAUSED, get_ingestion_queue
+
+    queue = get_ingestion_queue()
+    try:
+        job = queue.enqueue(
+            folder_path,
+            knowledge_space=f"project_{project_path.name}",
+            document_type=document_type,
+            metadata={"framework": framework, "version": version, "project_path": str(project_path)},
+            recursive=recursive
+        )
+    except ValueError as e:  # already being ingested with other settings
+        canvas.error(str(e))
+        return
+    canvas.info(f"Ingestion job {job.id}: {folder_path} → {job.knowledge_space}")
+    try:
+        job = queue.run_job(job.id)
+        if not job.finished and job.status != PAUSED:  # failed files waiting for a retry
+            job = queue.wait([job.id])[0]
+    except KeyboardInterrupt:
+        canvas.warning("Ingestion interrupted; resume with: python -m i2c.cli.ingest_jobs run")
+        return
+
+    if job.status == DONE:
+        canvas.success(f"✅ Ingested {job.stats.get('successful_files', 0)} files "
+                       f"({job.stats.get('skipped_files', 0)} unchanged)")
+    else:
+        canvas.error(f"Ingestion job {job.id} is {job.status}: {job.error}")
 
 def handle_refresh_documentation(project_path: Path):
     """Refresh/update previously loaded documentation."""
@@ -567,11 +588,22 @@ def handle_refresh_documentation(project_path: Path):
     canvas.info("1. Refresh a specific file")
     canvas.info("2. Refresh a specific folder")
     canvas.info("3. Refresh all documentation")
-    canvas.info("4. Return to knowledge menu")
+    canvas.info("4. Refresh web documentation")
+    canvas.info("5. Return to knowledge menu")
+    
+    choice = canvas.get_user_input("Select option (1-5): ").strip()
     
-    choice = canvas.get_user_input("Select option (1-4): ").strip()
+    if choice == '5':
+        return
     
     if choice == '4':
+        # Conditional requests: only pages that changed are downloaded and re-embedded
+        from i2c.agents.knowledge.base import refresh_web_documentation
+        knowledge_space = f"project_{project_path.name}"
+        if refresh_web_documentation(knowledge_space):
+            canvas.success(f"✅ Web documentation in {knowledge_space} is up to date")
+        else:
+            canvas.error("Some web documentation could not be refreshed.")
         return
     
     if choice == '1':
@@ -702,6 +734,9 @@ def ingest_documentation(
                 
             def get_embedding(self, text):
                 return self.model.encode(text).tolist()
+
+            def encode(self, texts, **kwargs):
+                return self.model.encode(texts, **kwargs)
         
         # Use the project's knowledge space
         knowledge_space = f"project_{project_path.name}"
@@ -840,8 +875,15 @@ def ingest_documentation(
         canvas.error(traceback.format_exc())
         return False
     
-def process_pdf_file(file_path, document_type, knowledge_space, embed_model, db, metadata=None):
-    """Process a PDF file into knowledge chunks"""
+def process_pdf_file(file_path, document_type, knowledge_space, embed_model, db, metadata=None, progress=None,
+                     force_refresh=False):
+    """
+    Stream a PDF into knowledge chunks, one chunk per page (see
+    ``ingestion_pipeline.ingest_pdf``): pages are committed as they are
+    embedded, and a re-run resumes after the last committed page unless
+    ``force_refresh`` is set. ``progress`` is called with
+    ``(last_committed_page, page_count)``.
+    """
     try:
         canvas.info(f"Processing PDF: {file_path}")
         
@@ -851,67 +893,12 @@ def process_pdf_file(file_path, document_type, knowledge_space, embed_model, db,
         except ImportError:
             canvas.error("pypdf package not installed. Install with 'pip install pypdf'")
             return False
-            
-        # Calculate file hash
-        with open(file_path, 'rb') as f:
-            file_hash = hashlib.sha256(f.read()).hexdigest()
-        
-        # Read PDF
-        pdf_reader = pypdf.PdfReader(open(file_path, 'rb'))
-        num_pages = len(pdf_reader.pages)
-        
-        canvas.info(f"PDF has {num_pages} pages")
-        
-        # Process pages
-        chunks = []
-        for i in range(num_pages):
-            try:
-                if i % 10 == 0:
-                    canvas.info(f"Processing page {i+1}/{num_pages}...")
-                
-                page = pdf_reader.pages[i]
-                text = page.extract_text()
-                
-                # Skip empty pages
-                if not text or len(text.strip()) < 10:
-                    continue
-                
-                # Create vector
-                vector = embed_model.get_embedding(text)
-                
-                # Create chunk
-                chunk = {
-                    "source": str(file_path),
-                    "content": text,
-                    "vector": vector,
-                    "category": document_type,
-                    "last_updated": datetime.now().isoformat(),
-                    "knowledge_space": knowledge_space,
-                    "document_type": document_type,
-                    "framework": metadata.get("framework", "") if metadata else "",
-                    "version": metadata.get("version", "") if metadata else "",
-                    "parent_doc_id": "",
-                    "chunk_type": f"page_{i+1}",
-                    "source_hash": file_hash,
-                    "metadata_json": json.dumps(metadata or {}),
-                }
-                chunks.append(chunk)
-            except Exception as e:
-                canvas.warning(f"Error processing page {i+1}: {e}")
-        
-        # Add chunks to database
-        from i2c.db_utils import add_or_update_chunks, TABLE_KNOWLEDGE_BASE, SCHEMA_KNOWLEDGE_BASE
-        
-        add_or_update_chunks(
-            db=db,
-            table_name=TABLE_KNOWLEDGE_BASE,
-            schema=SCHEMA_KNOWLEDGE_BASE,
-            identifier_field="source",
-            identifier_value=str(file_path),
-            chunks=chunks
-        )
-        
-        canvas.success(f"Added {len(chunks)} chunks from PDF: {file_path}")
+
+        from i2c.agents.knowledge.ingestion_pipeline import ingest_pdf
+
+        added = ingest_pdf(str(file_path), document_type, knowledge_space, embed_model, db,
+                           metadata=metadata, progress=progress, force_refresh=force_refresh)
+        canvas.success(f"Added {added} chunks from PDF: {file_path}")
         return True
     except Exception as e:
         canvas.error(f"Error processing PDF: {e}")
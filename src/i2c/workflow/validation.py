@@ -8,6 +8,7 @@ import re
 from typing import Dict, List, Tuple, Any
 
 from i2c.cli.controller import canvas
+from i2c.utils.parse_cache import parse_cache
 
 def validate_generated_application(code_map, project_path, language):
     """
@@ -86,17 +87,14 @@ def validate_file(content, file_path, language):
     result = {"success": True, "issues": []}
     
     if language.lower() == "python" and file_path.endswith('.py'):
-        try:
-            import ast
-            ast.parse(content)
-        except SyntaxError as e:
+        error = parse_cache.python_syntax_error(content, file_path)
+        if error is not None:
             result["success"] = False
-            result["issues"].append(f"Syntax error: {str(e)}")
+            result["issues"].append(f"Syntax error: {str(error)}")
     
     elif language.lower() == "javascript" and (file_path.endswith('.js') or file_path.endswith('.jsx')):
         try:
-            import esprima
-            esprima.parseScript(content)
+            parse_cache.parse_js(content)
         except Exception as e:
             result["success"] = False
             result["issues"].append(f"JavaScript syntax error: {str(e)}")
@@ -319,7 +317,7 @@ def fix_python_syntax_errors(project_path: Path):
         try:
             content = py_file.read_text(encoding='utf-8')
             # Try parsing with ast
-            ast.parse(content)
+            parse_cache.parse_python(content)
             # No syntax error, continue
         except SyntaxError:
             # Try to fix the syntax
@@ -1,6 +1,33 @@
 # tests/conftest.py
 
+import tempfile
+
+import pytest
+
+from i2c import db_utils
 from i2c.bootstrap import initialize_environment
 
+# The tables created at startup go to a scratch directory, not ./data/lancedb
+db_utils.DB_PATH = tempfile.mkdtemp(prefix="i2c-lancedb-")
+
 # Run your one‐time env + builtins setup before any tests
 initialize_environment()
+
+
+@pytest.fixture(autouse=True)
+def ingest_stats_path(tmp_path, monkeypatch):
+    """Keep throughput measured by tests out of the real ./data/ingest_stats.db."""
+    from i2c.agents.knowledge import ingestion_stats
+    path = str(tmp_path / "ingest_stats.db")
+    monkeypatch.setenv("I2C_INGEST_STATS_PATH", path)
+    monkeypatch.setattr(ingestion_stats, "STATS_PATH", path)
+    monkeypatch.setattr(ingestion_stats, "_throughput", None)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def lancedb_path(tmp_path, monkeypatch):
+    """Keep tables created by tests out of the real ./data/lancedb."""
+    path = str(tmp_path / "lancedb")
+    monkeypatch.setattr(db_utils, "DB_PATH", path)
+    return path
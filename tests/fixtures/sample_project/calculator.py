@@ -0,0 +1,11 @@
+# tests/fixtures/sample_project/calculator.py
+def add(a, b):
+    """Return the sum of two numbers."""
+    return a + b
+
+
+def divide(a, b):
+    """Divide a by b, refusing to divide by zero."""
+    if b == 0:
+        raise ZeroDivisionError("cannot divide by zero")
+    return a / b
@@ -0,0 +1,15 @@
+# tests/fixtures/sample_project/users.py
+import json
+from dataclasses import dataclass
+
+
+@dataclass
+class User:
+    name: str
+    email: str
+
+
+def load_users(path):
+    """Load users from a JSON file of {name, email} records."""
+    with open(path) as f:
+        return [User(**row) for row in json.load(f)]
@@ -0,0 +1,59 @@
+from i2c.utils.context_packer import (
+    estimate_tokens,
+    pack_context,
+    pack_text,
+    token_budget,
+    trim_to_tokens,
+)
+
+CODE = (
+    "def first():\n    return 1\n\n"
+    "def second():\n    return 2\n\n"
+    "def third():\n    return 3\n"
+)
+
+
+def test_pack_respects_budget_and_prefers_high_scores():
+    items = [
+        {"content": "low " * 100, "score": 0.1},
+        {"content": "high " * 100, "score": 0.9},
+        {"content": "mid " * 100, "score": 0.5},
+    ]
+    packed = pack_context(items, budget=260)
+
+    assert packed.used_tokens <= 260
+    kept = [e["item"]["score"] for e in packed.entries]
+    assert 0.9 in kept and 0.5 in kept
+    assert packed.dropped + len(packed.entries) == 3
+
+
+def test_trimming_stops_at_function_boundaries():
+    trimmed = trim_to_tokens(CODE, estimate_tokens(CODE) - 3)
+
+    assert trimmed.endswith("return 2")
+    assert "def third" not in trimmed
+
+
+def test_trimmed_alternative_used_when_whole_chunk_does_not_fit():
+    packed = pack_context([{"content": CODE, "score": 1.0}], budget=16)
+
+    assert len(packed.entries) == 1
+    assert packed.entries[0]["trimmed"]
+    assert packed.entries[0]["text"].startswith("def first():")
+
+
+def test_chunk_larger_than_the_budget_is_cut_to_fit():
+    text = "\n\n".join(f"Paragraph {i}: " + "word " * 40 for i in range(30))  # ~1500 tokens
+    packed = pack_context([{"content": text, "score": 1.0}], budget=200)
+
+    assert len(packed.entries) == 1 and packed.entries[0]["trimmed"]
+    assert text.startswith(packed.entries[0]["text"]) and 150 < packed.used_tokens <= 200
+    assert 150 < estimate_tokens(pack_text(text, 200)) <= 200
+    assert 150 < estimate_tokens(pack_text("word " * 2000, 200)) <= 200  # one block, no cut points
+
+
+def test_pack_text_keeps_short_text_and_env_budget(monkeypatch):
+    assert pack_text("short", 100) == "short"
+    monkeypatch.setenv("I2C_CONTEXT_BUDGET_PLANNER", "42")
+    assert token_budget("planner") == 42
+    assert token_budget("unknown-agent") == token_budget("default")
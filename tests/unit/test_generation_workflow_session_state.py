@@ -201,6 +201,22 @@ def test_code_generation_phase_preserves_session_state(sample_session_state):
             
             print("   ✅ Code generation phase preserves session state correctly")
 
+def test_prefetched_knowledge_reaches_the_code_builder_once(sample_session_state):
+    """Prefetched chunks are packed into the prompt; the agent is told not to add them again"""
+    workflow = GenerationWorkflow(session_id="test-prefetch")
+    workflow.session_state.update(sample_session_state)
+    chunks = [{"source": "guide.md", "content": "Register services through dependency injection."}]
+    workflow._prefetcher = Mock(get=Mock(return_value=chunks))
+
+    mock_agent = Mock()
+    mock_agent.run.return_value = Mock(content='Generated code content')
+    with patch('i2c.agents.core_agents.get_rag_enabled_agent', return_value=mock_agent) as factory:
+        workflow._generate_single_file('backend/main.py', 'Create a test application', 'Python', '', {})
+
+    assert factory.call_args.kwargs["knowledge_context"] == chunks
+    prompt = mock_agent.run.call_args.args[0]
+    assert prompt.count("Register services through dependency injection.") == 1
+
 def test_api_route_extraction_preserves_session_state(sample_session_state, temp_project):
     """Test that API route extraction preserves existing session state"""
     print("🔄 Testing API route extraction preserves session state...")
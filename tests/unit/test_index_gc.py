@@ -0,0 +1,41 @@
+import lancedb
+import pyarrow as pa
+import pytest
+
+from i2c.db_utils import collect_orphans, delete_values, list_indexed_values, project_filter
+
+SCHEMA = pa.schema([
+    pa.field("path", pa.string()),
+    pa.field("project_id", pa.string()),
+    pa.field("content", pa.string()),
+])
+
+
+@pytest.fixture
+def table(tmp_path):
+    db = lancedb.connect(str(tmp_path / "lancedb"))
+    tbl = db.create_table("code_context", schema=SCHEMA)
+    rows = [{"path": f"f{i}.py", "project_id": "p1", "content": "x"} for i in range(10)]
+    rows += [{"path": "f0.py", "project_id": "p1", "content": "second chunk"}]
+    rows += [{"path": "gone.py", "project_id": "p2", "content": "other project"}]
+    tbl.add(rows)
+    return tbl
+
+
+def test_collect_orphans_removes_only_dead_paths_in_scope(table):
+    live = {"f0.py", "f1.py"}
+    result = collect_orphans(table, "path", live, scope=project_filter("p1"), batch_size=3)
+
+    assert result["orphans"] == [f"f{i}.py" for i in range(2, 10)]
+    assert result["rows_removed"] == 8
+    assert list_indexed_values(table, "path", project_filter("p1")) == live
+    # Other namespaces are untouched even though their path is not live
+    assert list_indexed_values(table, "path", project_filter("p2")) == {"gone.py"}
+
+
+def test_delete_values_handles_quotes_and_empty_input(table):
+    table.add([{"path": "it's.py", "project_id": "p1", "content": "q"}])
+
+    assert delete_values(table, "path", []) == 0
+    assert delete_values(table, "path", ["it's.py"]) == 1
+    assert "it's.py" not in list_indexed_values(table, "path")
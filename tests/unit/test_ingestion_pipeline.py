@@ -0,0 +1,159 @@
+import lancedb
+
+from i2c import db_utils
+from i2c.agents.knowledge.ingestion_pipeline import IngestionPipeline, extract_file, iter_extracted
+from i2c.agents.knowledge.ingestion_stats import IngestionThroughput
+
+DIM = db_utils.VECTOR_DIMENSION
+
+
+class BatchModel:
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, batch_size=None):
+        self.batches.append(len(texts))
+        return [[float(len(t))] + [0.0] * (DIM - 1) for t in texts]
+
+
+def _docs(tmp_path, count=5, sections=3):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"doc{i}.md"
+        path.write_text("\n".join(f"# Section {j}\nbody {i}.{j}" for j in range(sections)))
+        paths.append(path)
+    return paths
+
+
+def _run(paths, model, write, **kwargs):
+    done, failed = [], []
+    pipeline = IngestionPipeline(
+        model,
+        make_row=lambda f, i, text, vector: {"source": f.path, "content": text, "vector": vector},
+        write=write,
+        on_done=lambda f, n: done.append((f.path, n)),
+        on_failed=lambda path, error: failed.append(path),
+        **kwargs,
+    )
+    return pipeline.run(paths), done, failed
+
+
+def test_extract_file_splits_markdown_and_hashes(tmp_path):
+    (path,) = _docs(tmp_path, count=1)
+    extracted = extract_file(str(path))
+    assert len(extracted.texts) == 3 and extracted.texts[1].startswith("# Section 1")
+    assert len(extracted.file_hash) == 64 and extracted.error is None
+
+    (tmp_path / "bad.json").write_text("{not json")
+    assert extract_file(str(tmp_path / "bad.json")).error
+
+
+def test_process_pool_extracts_every_file(tmp_path):
+    paths = _docs(tmp_path, count=6)
+    results = list(iter_extracted(paths, workers=2))
+    assert sorted(r.path for r in results) == sorted(str(p) for p in paths)
+    assert all(len(r.texts) == 3 for r in results)
+
+
+def test_embeds_in_batches_and_commits_in_batches(tmp_path):
+    model, commits = BatchModel(), []
+    stats, done, failed = _run(
+        _docs(tmp_path, count=5), model,
+        write=lambda rows, new: commits.append((len(rows), list(new))) or True,
+        workers=1, embed_batch_size=4, commit_rows=6,
+    )
+
+    assert model.batches == [4, 4, 4, 3]  # 15 sections, one encoder call per batch
+    assert [n for n, _ in commits] == [8, 7]
+    assert sum(len(new) for _, new in commits) == 5  # each source announced once
+    assert sorted(n for _, n in done) == [3] * 5 and not failed
+    assert stats["rows"] == 15
+
+
+def test_failed_commit_fails_its_files_only(tmp_path):
+    paths = _docs(tmp_path, count=2)
+    stats, done, failed = _run(
+        paths, BatchModel(),
+        write=lambda rows, new: not any(r["source"] == str(paths[1]) for r in rows),
+        workers=1, embed_batch_size=3, commit_rows=3,
+    )
+    assert [p for p, _ in done] == [str(paths[0])]
+    assert failed == [str(paths[1])]
+
+
+def test_buffered_rows_of_a_failed_file_are_not_written(tmp_path):
+    class FailingModel(BatchModel):
+        def encode(self, texts, batch_size=None):
+            if len(self.batches) == 1:
+                raise RuntimeError("encoder unavailable")
+            return super().encode(texts, batch_size)
+
+    written = []
+    stats, done, failed = _run(
+        _docs(tmp_path, count=2), FailingModel(),
+        write=lambda rows, new: written.extend(rows) or True,
+        workers=1, embed_batch_size=2, commit_rows=100,
+    )
+    assert not written and not done and len(failed) == 2  # doc0's first batch was buffered, not committed
+
+
+def test_agent_streams_directory_into_knowledge_base(tmp_path, monkeypatch):
+    from i2c.agents.knowledge.enhanced_knowledge_ingestor import EnhancedKnowledgeIngestorAgent
+
+    monkeypatch.setattr(db_utils, "DB_PATH", str(tmp_path / "lancedb"))
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    _docs(docs, count=3, sections=40)  # 120 sections: no per-file cap
+    model = BatchModel()
+    store = IngestionThroughput(tmp_path / "stats.db")
+    agent = EnhancedKnowledgeIngestorAgent(
+        budget_manager=None, knowledge_space="test", embed_model=model,
+        cache_file=tmp_path / "cache.db", throughput=store,
+    )
+
+    ok, stats = agent.execute(docs, "documentation", metadata={"framework": "demo"})
+    assert ok and stats["successful_files"] == 3 and stats["chunks_created"] == 120
+    assert store.format(".md").files == 3
+    assert max(model.batches) > 1
+
+    tbl = lancedb.connect(db_utils.DB_PATH).open_table(db_utils.TABLE_KNOWLEDGE_BASE)
+    assert tbl.count_rows() == 120
+    assert all(agent.cache.get_cached_metadata(p).chunk_count == 40 for p in docs.iterdir())
+
+    # a changed file replaces its chunks instead of adding duplicates
+    (docs / "doc0.md").write_text("# Only\nsection")
+    ok, stats = agent.execute(docs, "documentation")
+    assert ok and stats["successful_files"] == 1
+    tbl.checkout_latest()
+    assert tbl.count_rows() == 81
+
+
+def test_failed_file_leaves_no_rows_and_is_retried(tmp_path, monkeypatch):
+    from i2c.agents.knowledge import enhanced_knowledge_ingestor as ingestor
+
+    monkeypatch.setattr(db_utils, "DB_PATH", str(tmp_path / "lancedb"))
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (path,) = _docs(docs, count=1, sections=700)  # more than one commit batch
+    agent = ingestor.EnhancedKnowledgeIngestorAgent(
+        budget_manager=None, knowledge_space="test", embed_model=BatchModel(),
+        cache_file=tmp_path / "cache.db", throughput=IngestionThroughput(tmp_path / "stats.db"),
+    )
+    writes = []
+    add_chunks = ingestor.add_knowledge_chunks
+
+    def fail_second_commit(db, rows, space):
+        writes.append(len(rows))
+        return len(writes) == 1 and add_chunks(db, rows, space)
+
+    monkeypatch.setattr(ingestor, "add_knowledge_chunks", fail_second_commit)
+    ok, stats = agent.execute(docs, "documentation")
+    assert not ok and stats["failed_paths"] == [str(path)] and len(writes) == 2
+    tbl = lancedb.connect(db_utils.DB_PATH).open_table(db_utils.TABLE_KNOWLEDGE_BASE)
+    assert tbl.count_rows() == 0 and agent.cache.get_cached_metadata(path) is None
+
+    monkeypatch.setattr(ingestor, "add_knowledge_chunks", add_chunks)
+    ok, stats = agent.execute(docs, "documentation")
+    assert ok and stats["successful_files"] == 1 and stats["chunks_created"] == 700
+    tbl.checkout_latest()
+    assert tbl.count_rows() == 700
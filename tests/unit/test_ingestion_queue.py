@@ -0,0 +1,157 @@
+import pytest
+
+from i2c import db_utils
+from i2c.agents.knowledge import ingestion_queue
+from i2c.agents.knowledge.ingestion_queue import IngestionQueue
+
+DIM = db_utils.VECTOR_DIMENSION
+
+
+class FakeIngestor:
+    """Records batches; fails listed files a number of times; can run a hook per batch."""
+
+    def __init__(self, fail=None, on_batch=None):
+        self.batches = []
+        self.fail = dict(fail or {})
+        self.on_batch = on_batch
+        self.collected = None
+
+    def execute(self, document_path, document_type, metadata, force_refresh, recursive, selected_files):
+        batch = [str(f) for f in selected_files]
+        self.batches.append(batch)
+        if self.on_batch:
+            self.on_batch(len(self.batches))
+        failed = []
+        for f in batch:
+            if self.fail.get(f):
+                self.fail[f] -= 1
+                failed.append(f)
+        return not failed, {"successful_files": len(batch) - len(failed), "failed_files": len(failed),
+                            "failed_paths": failed, "errors": [f"Error processing {f}: boom" for f in failed]}
+
+    def collect_garbage(self, directory_path, live_files):
+        self.collected = live_files
+        return 0
+
+
+def _docs(tmp_path, count):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for i in range(count):
+        (docs / f"{i:02}.md").write_text(f"# Doc {i}\nbody {i}")
+    return docs
+
+
+def _queue(tmp_path, ingestor, batch_files=2, max_attempts=3):
+    return IngestionQueue(tmp_path / "jobs.db", ingestor_factory=lambda space: ingestor,
+                          batch_files=batch_files, max_attempts=max_attempts)
+
+
+def test_failed_files_are_retried_with_backoff(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestion_queue, "RETRY_BASE_SECONDS", 0.05)
+    docs = _docs(tmp_path, 3)
+    flaky, broken = str(docs / "01.md"), str(docs / "02.md")
+    ingestor = FakeIngestor(fail={flaky: 1, broken: 99})
+    queue = _queue(tmp_path, ingestor)
+    job = queue.enqueue(docs, "space")
+    assert queue.enqueue(docs, "space").id == job.id  # unfinished jobs are not duplicated
+
+    after_first_run = queue.run_job(job.id)
+    assert after_first_run.status == "queued" and after_first_run.next_attempt_at > 0
+
+    [job] = queue.run(concurrency=2)
+    assert job.status == "failed" and job.files == {"done": 2, "failed": 1}
+    assert sum(b.count(broken) for b in ingestor.batches) == 3 and sum(b.count(flaky) for b in ingestor.batches) == 2
+    assert job.stats["successful_files"] == 2 and ingestion_queue.backoff_seconds(3) == pytest.approx(0.2)
+
+    ingestor.fail[broken] = 0
+    assert queue.resume(job.id)
+    assert queue.run_job(job.id).status == "done"
+    assert ingestor.batches[-1] == [broken]
+
+
+def test_pause_stops_between_batches_and_resume_continues(tmp_path):
+    docs = _docs(tmp_path, 5)
+    holder = {}
+    ingestor = FakeIngestor(on_batch=lambda n: n == 1 and holder["queue"].pause(holder["job"]))
+    queue = holder["queue"] = _queue(tmp_path, ingestor)
+    holder["job"] = queue.enqueue(docs, "space").id
+
+    job = queue.run_job(holder["job"])
+    assert job.status == "paused" and job.files == {"done": 2, "pending": 3}
+    assert queue.run_job(job.id).status == "paused"  # paused jobs are not picked up
+
+    assert queue.resume(job.id)
+    job = queue.run_job(job.id)
+    assert job.status == "done" and len(ingestor.batches) == 3
+    assert sorted(f for b in ingestor.batches for f in b) == [str(docs / f"{i:02}.md") for i in range(5)]
+    assert len(ingestor.collected) == 5
+
+
+def test_interrupted_job_resumes_from_last_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_utils, "DB_PATH", str(tmp_path / "lancedb"))
+    docs = _docs(tmp_path, 5)
+    texts, crash = [], [True]
+
+    class Model:
+        def encode(self, batch, batch_size=None):
+            batch = [batch] if isinstance(batch, str) else batch
+            if crash[0] and len(texts) >= 2:  # dies during the second batch
+                raise KeyboardInterrupt
+            texts.extend(batch)
+            vectors = [[1.0] + [0.0] * (DIM - 1) for _ in batch]
+            return vectors if len(vectors) > 1 or batch_size else vectors[0]
+
+    def agent(space):
+        from i2c.agents.knowledge.enhanced_knowledge_ingestor import EnhancedKnowledgeIngestorAgent
+        return EnhancedKnowledgeIngestorAgent(budget_manager=None, knowledge_space=space, embed_model=Model(),
+                                              cache_file=tmp_path / "cache.db")
+
+    queue = IngestionQueue(tmp_path / "jobs.db", ingestor_factory=agent, batch_files=2)
+    job = queue.enqueue(docs, "docs")
+    with pytest.raises(KeyboardInterrupt):
+        queue.run_job(job.id)
+    assert queue.get(job.id).status == "queued" and queue.get(job.id).files == {"done": 2, "pending": 3}
+
+    embedded_before = len(texts)
+    texts.clear()
+    crash[0] = False
+    job = IngestionQueue(tmp_path / "jobs.db", ingestor_factory=agent, batch_files=2).run_job(job.id)
+    assert job.status == "done" and job.stats["successful_files"] == 5
+    assert embedded_before == 2 and len(texts) == 3  # done files are not embedded again
+    assert sorted(db_utils.scan_table(
+        db_utils.get_db_connection().open_table(db_utils.TABLE_KNOWLEDGE_BASE), columns=["source"]
+    )["source"].unique()) == [str(docs / f"{i:02}.md") for i in range(5)]
+
+
+def test_enqueue_with_new_params_restarts_a_waiting_job_and_rejects_a_running_one(tmp_path):
+    docs = _docs(tmp_path, 3)
+    holder = {}
+
+    def on_batch(n):
+        with pytest.raises(ValueError):
+            holder["queue"].enqueue(docs, "space", metadata={"version": "3"})
+        holder["queue"].pause(holder["job"])
+
+    queue = holder["queue"] = _queue(tmp_path, FakeIngestor(on_batch=on_batch))
+    holder["job"] = queue.enqueue(docs, "space", metadata={"version": "2"}).id
+    assert queue.run_job(holder["job"]).files == {"done": 2, "pending": 1}
+
+    job = queue.enqueue(docs, "space", metadata={"version": "3"})
+    assert job.id == holder["job"] and job.status == "queued" and job.metadata == {"version": "3"}
+    assert job.files == {} and job.stats == {}  # starts over with the new settings
+
+
+def test_batches_of_a_job_share_one_worker_pool(tmp_path):
+    pools = []
+
+    class PooledIngestor(FakeIngestor):
+        pool = None
+
+    ingestor = PooledIngestor(on_batch=lambda n: pools.append(ingestor.pool))
+    queue = _queue(tmp_path, ingestor)
+    job = queue.run_job(queue.enqueue(_docs(tmp_path, 5), "space").id)
+
+    assert job.status == "done" and len(pools) == 3
+    assert pools[0] is not None and all(p is pools[0] for p in pools)
+    assert ingestor.pool is None
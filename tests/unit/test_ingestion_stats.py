@@ -0,0 +1,67 @@
+from i2c import db_utils
+from i2c.agents.knowledge.ingestion_pipeline import IngestionPipeline
+from i2c.agents.knowledge.ingestion_stats import MB, FileSample, IngestionThroughput, RunSample, get_ingestion_throughput
+
+DIM = db_utils.VECTOR_DIMENSION
+
+
+class BatchModel:
+    def encode(self, texts, batch_size=None):
+        return [[float(len(t))] + [0.0] * (DIM - 1) for t in texts]
+
+
+def _files(tmp_path, ext, count, size):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"f{i}{ext}"
+        path.write_bytes(b"x" * size)
+        paths.append(path)
+    return paths
+
+
+def test_pipeline_records_measured_throughput(tmp_path):
+    store = IngestionThroughput(tmp_path / "stats.db")
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"doc{i}.md"
+        path.write_text("\n".join(f"# Section {j}\nbody {i}.{j}" for j in range(3)))
+        paths.append(path)
+    assert store.format(".md") is None and not store.estimate(paths).measured
+
+    IngestionPipeline(
+        BatchModel(), make_row=lambda f, i, text, vector: {"source": f.path, "content": text},
+        write=lambda rows, sources: True, on_done=lambda f, n: None, on_failed=lambda p, e: None,
+        workers=1, embed_batch_size=4, throughput=store, predicted_ms=5.0,
+    ).run(paths)
+
+    md = store.format(".md")
+    assert md.files == 3 and md.chunks == 9 and md.embedded == 9 and md.extract_ms > 0
+    run = store.runs()[0]
+    assert run["rows"] == 9 and run["embed_batch_size"] == 4 and run["predicted_ms"] == 5.0
+    estimate = store.estimate(paths, max_workers=4)
+    assert estimate.measured and estimate.chunks == 9 and estimate.workers == 1  # too few files for a pool
+
+
+def test_estimate_picks_workers_and_batch_size_from_measurements(tmp_path):
+    store = IngestionThroughput(tmp_path / "stats.db")
+    # PDFs: slow to extract, cheap to embed; markdown: the other way round
+    store.record([FileSample(".pdf", MB, pages=20, chunks=50, text_bytes=MB // 10, extract_ms=8000,
+                             embedded=50, embed_ms=100)])
+    store.record([FileSample(".md", MB, chunks=500, text_bytes=MB, extract_ms=20, embedded=500, embed_ms=5000)])
+    for size, ms in ((32, 400.0), (64, 250.0)):
+        store.record([], RunSample(files=1, bytes=MB, rows=100, workers=1, embed_batch_size=size,
+                                   embedded=100, embed_ms=ms, commit_ms=10, wall_ms=1000))
+
+    pdfs = _files(tmp_path, ".pdf", 8, MB // 4)
+    wide = store.estimate(pdfs, max_workers=4, memory_budget_mb=4096)
+    assert wide.workers == 4 and wide.embed_batch_size == 64 and wide.pages == 40
+    assert wide.seconds < wide.options[1][0] and wide.memory_mb > wide.options[1][1]
+    assert store.estimate(pdfs, max_workers=4, memory_budget_mb=200).workers == 1
+
+    docs = _files(tmp_path, ".md", 8, MB // 4)
+    assert store.estimate(docs, max_workers=4).workers == 1  # embedding-bound: workers would not help
+
+
+def test_tests_get_their_own_default_store(tmp_path):
+    # conftest points STATS_PATH at the test's directory, not ./data
+    assert get_ingestion_throughput().path == tmp_path / "ingest_stats.db"
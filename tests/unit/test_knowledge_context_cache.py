@@ -0,0 +1,85 @@
+import lancedb
+import numpy as np
+import pyarrow as pa
+
+from i2c.utils.knowledge_context_cache import KnowledgeContextCache, knowledge_base_version
+
+SCHEMA = pa.schema([pa.field("source", pa.string()), pa.field("content", pa.string())])
+
+
+class FakeKnowledgeBase:
+    def __init__(self, db, knowledge_space="default"):
+        self.db = db
+        self.knowledge_space = knowledge_space
+
+
+def make_kb(tmp_path):
+    db = lancedb.connect(str(tmp_path / "lancedb"))
+    db.create_table("knowledge_base", schema=SCHEMA).add([{"source": "a.md", "content": "alpha"}])
+    return FakeKnowledgeBase(db)
+
+
+def test_keys_follow_content_and_knowledge_base_version(tmp_path):
+    kb = make_kb(tmp_path)
+    cache = KnowledgeContextCache()
+    key = cache.make_key("orchestration", kb, "add login", "web_app")
+    cache.put(key, "context")
+
+    assert cache.get(cache.make_key("orchestration", kb, "add login", "web_app")) == "context"
+    assert cache.make_key("orchestration", FakeKnowledgeBase(kb.db), "add login", "web_app") == key
+
+    kb.db.open_table("knowledge_base").add([{"source": "b.md", "content": "beta"}])
+    assert cache.get(cache.make_key("orchestration", kb, "add login", "web_app")) is None
+
+
+def test_unidentifiable_knowledge_bases_are_not_cached():
+    cache = KnowledgeContextCache()
+    assert knowledge_base_version(object()) is None
+    key = cache.make_key("expertise", object(), "planner")
+    cache.put(key, ["x"])
+    assert cache.get(key) is None and cache.stats()["entries"] == 0
+
+
+class VectorDb:
+    uri = "./data/lancedb"
+    table_name = "knowledge_docs"
+
+
+class UnversionedKnowledgeBase:
+    def __init__(self, knowledge_space):
+        self.knowledge_space = knowledge_space
+        self.vector_db = VectorDb()
+
+
+def test_unversioned_knowledge_bases_are_keyed_by_location_for_this_process(tmp_path):
+    path = tmp_path / "knowledge_cache.json"
+    cache = KnowledgeContextCache(path=path)
+    key = cache.make_key("expertise", UnversionedKnowledgeBase("docs"), "planner")
+    cache.put(key, ["tip"])
+
+    assert cache.get(cache.make_key("expertise", UnversionedKnowledgeBase("docs"), "planner")) == ["tip"]
+    assert cache.make_key("expertise", UnversionedKnowledgeBase("other"), "planner") != key
+    cache.flush()
+    assert KnowledgeContextCache(path=path).get(key) is None  # nothing invalidates them across runs
+
+
+def test_lru_bounds_and_namespace_clear():
+    cache = KnowledgeContextCache(max_entries=2)
+    cache.put("a:1", "one")
+    cache.put("b:2", "two")
+    cache.get("a:1")
+    cache.put("a:3", "three")
+
+    assert cache.get("b:2") is None  # least recently used
+    cache.clear(namespace="a")
+    assert cache.stats()["entries"] == 0
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = tmp_path / "knowledge_cache.json"
+    cache = KnowledgeContextCache(path=path)
+    cache.put("expertise:1", [{"content": "tip", "confidence_score": np.float32(0.5)}])
+    cache.flush()
+
+    reloaded = KnowledgeContextCache(path=path)
+    assert reloaded.get("expertise:1") == [{"content": "tip", "confidence_score": 0.5}]
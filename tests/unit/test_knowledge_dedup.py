@@ -0,0 +1,112 @@
+import lancedb
+
+from i2c import db_utils
+from i2c.utils.knowledge_dedup import content_hash, scan_source
+from i2c.utils.retrieval_cache import retrieval_cache
+
+DIM = db_utils.VECTOR_DIMENSION
+SHARED = "# Install\npip install the-library"
+
+
+class CountingModel:
+    def __init__(self):
+        self.texts = []
+
+    def encode(self, texts, batch_size=None):
+        texts = [texts] if isinstance(texts, str) else texts
+        self.texts.extend(texts)
+        vectors = [[1.0] + [0.0] * (DIM - 1) for _ in texts]
+        return vectors if len(vectors) > 1 or batch_size else vectors[0]
+
+
+def _agent(tmp_path, monkeypatch, model):
+    from i2c.agents.knowledge.enhanced_knowledge_ingestor import EnhancedKnowledgeIngestorAgent
+    monkeypatch.setattr(db_utils, "DB_PATH", str(tmp_path / "lancedb"))
+    return EnhancedKnowledgeIngestorAgent(
+        budget_manager=None, knowledge_space="docs", embed_model=model, cache_file=tmp_path / "cache.db",
+    )
+
+
+def _tables():
+    db = lancedb.connect(db_utils.DB_PATH)
+    return db, db.open_table(db_utils.TABLE_KNOWLEDGE_BASE), db.open_table(db_utils.TABLE_KNOWLEDGE_REFS)
+
+
+def test_duplicate_sections_are_stored_once_and_not_re_embedded(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    (docs / "vendored").mkdir(parents=True)
+    (docs / "guide.md").write_text(f"{SHARED}\n# Usage\ncall it")
+    (docs / "vendored" / "copy.md").write_text(f"{SHARED}\n# Changelog\nv2")
+    model = CountingModel()
+
+    ok, stats = _agent(tmp_path, monkeypatch, model).execute(docs, "documentation")
+
+    assert ok and stats["chunks_created"] == 4
+    _, kb, refs = _tables()
+    assert kb.count_rows() == 3 and refs.count_rows() == 1
+    assert sorted(model.texts).count(SHARED) == 1
+    assert stats["dedup"]["duplicate_rows"] == 1 and stats["dedup"]["embeddings_skipped"] == 1
+    assert stats["dedup"]["bytes_saved"] >= DIM * 4
+
+
+def test_removing_a_source_hands_shared_chunks_to_the_other(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text(f"{SHARED}\n# A\nonly in a")
+    (docs / "b.md").write_text(f"{SHARED}\n# B\nonly in b")
+    agent = _agent(tmp_path, monkeypatch, CountingModel())
+    agent.execute(docs, "documentation")
+
+    db, kb, refs = _tables()
+    owner = db_utils.scan_table(kb, where=f"content = {db_utils.sql_quote(SHARED)}", columns=["source"])
+    leaving = owner["source"].iloc[0]  # the source whose row the other one references
+    staying = str(docs / "b.md") if leaving == str(docs / "a.md") else str(docs / "a.md")
+    assert agent.remove_sources([leaving]) == 2
+
+    kb.checkout_latest()
+    refs.checkout_latest()
+    remaining = scan_source(db, staying, ["content", "chunk_type"])
+    assert sorted(remaining["chunk_type"]) == ["raw_0", "raw_1"]
+    assert kb.count_rows() == 2 and refs.count_rows() == 0
+    assert scan_source(db, leaving, ["content"]).empty
+
+
+def test_query_collapses_exact_duplicates(tmp_path):
+    db = lancedb.connect(str(tmp_path / "lancedb"))
+    vector = [1.0] + [0.0] * (DIM - 1)
+    for space in ("team-a", "team-b"):
+        db_utils.add_knowledge_chunks(db, [{"source": f"{space}.md", "content": SHARED, "vector": vector}], space)
+    db_utils.add_knowledge_chunks(db, [{"source": "other.md", "content": "other", "vector": vector}], "team-a")
+    retrieval_cache.clear()
+
+    df = db_utils.query_knowledge(db, "install", CountingModel(), limit=5)
+
+    assert db.open_table(db_utils.TABLE_KNOWLEDGE_BASE).count_rows() == 3  # spaces stay separate
+    assert sorted(df["content"]) == sorted(["other", SHARED])
+    assert content_hash(f"  {SHARED}\n") == content_hash(SHARED)
+
+
+def test_dedup_keeps_filterable_metadata_per_source(tmp_path):
+    from i2c.utils.knowledge_dedup import delete_sources
+    db = lancedb.connect(str(tmp_path / "lancedb"))
+    vector = [1.0] + [0.0] * (DIM - 1)
+    chunk = {"content": SHARED, "confidence_score": 0.7}
+    db_utils.add_knowledge_chunks(db, [{**chunk, "source": "flask.md", "framework": "flask", "vector": vector,
+                                        "metadata": {"owner": "flask"}}], "docs")
+    db_utils.add_knowledge_chunks(db, [
+        {**chunk, "source": "flask-copy.md", "framework": "flask", "metadata": {"owner": "copy"}},
+        {**chunk, "source": "fastapi.md", "framework": "fastapi"},  # stored text: vector is reused
+    ], "docs")
+    kb, refs = db.open_table(db_utils.TABLE_KNOWLEDGE_BASE), db.open_table(db_utils.TABLE_KNOWLEDGE_REFS)
+    assert kb.count_rows() == 2 and refs.count_rows() == 1
+    retrieval_cache.clear()
+    for framework, source in (("flask", "flask.md"), ("fastapi", "fastapi.md")):
+        df = db_utils.query_knowledge(db, "install", CountingModel(), {"framework": framework}, limit=5)
+        assert df["source"].tolist() == [source]
+
+    delete_sources(db, ["flask.md"])
+    kb.checkout_latest()
+    refs.checkout_latest()
+    heir = db_utils.scan_table(kb, where="framework = 'flask'", columns=["source", "metadata_json"])
+    assert heir.to_dict("records") == [{"source": "flask-copy.md", "metadata_json": '{"owner": "copy"}'}]
+    assert refs.count_rows() == 0
@@ -0,0 +1,80 @@
+import lancedb
+import pytest
+
+from i2c import db_utils
+from i2c.utils.knowledge_filter import KnowledgeFilter, ensure_knowledge_indexes
+from i2c.utils.retrieval_cache import retrieval_cache
+
+DIM = db_utils.VECTOR_DIMENSION
+
+
+class FixedModel:
+    def encode(self, text):
+        return [1.0] + [0.0] * (DIM - 1)
+
+
+def _row(source, knowledge_type, framework, confidence, x):
+    return {
+        "source": source, "content": source, "vector": [x] + [1.0 - x] + [0.0] * (DIM - 2),
+        "knowledge_type": knowledge_type, "framework": framework, "confidence_score": confidence,
+        "application_context": "general_reference", "knowledge_space": "default",
+    }
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = lancedb.connect(str(tmp_path / "lancedb"))
+    db_utils.add_knowledge_chunks(db, [
+        _row("fastapi-principle", "principle", "fastapi", 0.9, 0.5),
+        _row("fastapi-raw", "raw", "fastapi", 0.7, 1.0),
+        _row("flask-principle", "principle", "flask", 0.7, 0.9),
+        _row("django-principle", "principle", "django", 1.0, 0.95),
+        _row("fastapi-weak", "principle", "fastapi", 0.5, 0.99),
+    ])
+    retrieval_cache.clear()
+    return db
+
+
+def test_filter_compiles_in_lists_and_ranges():
+    where = KnowledgeFilter.from_dict({
+        "knowledge_type": "principle", "framework": ["fastapi", "o'reilly"], "confidence_score": (0.5, 0.9),
+    }).to_where()
+
+    assert "knowledge_type IN ('principle')" in where
+    assert "framework IN ('fastapi', 'o''reilly')" in where
+    assert "confidence_score >= 0.5" in where and "confidence_score <= 0.89" in where
+    assert KnowledgeFilter().to_where() is None
+    with pytest.raises(ValueError):
+        KnowledgeFilter.from_dict({"colour": "red"})
+    with pytest.raises(ValueError):
+        KnowledgeFilter(min_confidence=0.9, max_confidence=0.1)
+
+
+def test_query_knowledge_prefilters_instead_of_overfetching(db):
+    df = db_utils.query_knowledge(
+        db, "principles for fastapi", FixedModel(),
+        filters={"knowledge_type": "principle", "framework": ["fastapi", "flask"], "min_confidence": 0.7},
+        limit=5,
+    )
+
+    # closer but filtered-out rows (raw, django, low confidence) never take a slot
+    assert df["source"].tolist() == ["flask-principle", "fastapi-principle"]
+
+
+def test_confidence_bound_matches_float32_scores(db):
+    df = db_utils.query_knowledge(db, "q", FixedModel(), filters=KnowledgeFilter(min_confidence=0.7, max_confidence=0.7))
+    assert sorted(df["source"]) == ["fastapi-raw", "flask-principle"]
+
+
+def test_filter_is_part_of_the_cache_key(db):
+    model = FixedModel()
+    principles = db_utils.query_knowledge(db, "q", model, filters={"knowledge_type": "principle"}, limit=10)
+    raw = db_utils.query_knowledge(db, "q", model, filters={"knowledge_type": "raw"}, limit=10)
+    assert len(principles) == 4 and raw["source"].tolist() == ["fastapi-raw"]
+
+
+def test_scalar_indexes_cover_filter_columns(db):
+    tbl = db.open_table(db_utils.TABLE_KNOWLEDGE_BASE)
+    indexed = {c for idx in tbl.list_indices() for c in idx.columns}
+    assert {"knowledge_type", "framework", "confidence_score"} <= indexed
+    assert ensure_knowledge_indexes(tbl) == len(indexed)
@@ -0,0 +1,70 @@
+import json
+import os
+from dataclasses import asdict
+
+from i2c.agents.knowledge.enhanced_knowledge_ingestor import DocumentMetadata, IntelligentKnowledgeCache
+
+
+def _meta(path, content_hash=None):
+    stat = path.stat()
+    return DocumentMetadata(
+        source_path=str(path), file_hash=content_hash or IntelligentKnowledgeCache._compute_file_hash(path),
+        file_size=stat.st_size, last_modified=stat.st_mtime, document_type="documentation", chunk_count=2,
+    )
+
+
+def test_unchanged_files_are_skipped_without_hashing(tmp_path):
+    doc = tmp_path / "a.md"
+    doc.write_text("# A\nalpha")
+    cache = IntelligentKnowledgeCache(tmp_path / "cache.db")
+    assert cache.should_process_file(doc)
+
+    cache.mark_processed(doc, _meta(doc))
+    assert not cache.should_process_file(doc)
+    assert cache.stats()["hashed"] == 0
+
+    # touched but identical: hashed once, not reprocessed, new mtime remembered
+    os.utime(doc, (1_000_000, 1_000_000))
+    assert not cache.should_process_file(doc)
+    assert not cache.should_process_file(doc)
+    assert cache.stats()["hashed"] == 1
+
+    doc.write_text("# A\nomega")  # same size, new content
+    os.utime(doc, (2_000_000, 2_000_000))
+    assert cache.should_process_file(doc)
+    doc.write_text("# A\nlonger body")
+    assert cache.should_process_file(doc)
+
+
+def test_writes_are_batched_and_survive_reopen(tmp_path, monkeypatch):
+    monkeypatch.setattr(IntelligentKnowledgeCache, "FLUSH_ROWS", 3)
+    monkeypatch.setattr(IntelligentKnowledgeCache, "FLUSH_SECONDS", 3600)
+    docs = []
+    for i in range(4):
+        docs.append(tmp_path / f"{i}.md")
+        docs[-1].write_text(f"doc {i}")
+    cache = IntelligentKnowledgeCache(tmp_path / "cache.db")
+    for doc in docs:
+        cache.mark_processed(doc, _meta(doc))
+
+    assert cache.stats()["flushes"] == 1 and cache.stats()["pending"] == 1
+    # a "crash" before the next flush loses only the buffered entry
+    assert len(IntelligentKnowledgeCache(tmp_path / "cache.db")) == 3
+
+    cache.invalidate_file(docs[0])
+    assert cache.get_cached_metadata(docs[0]) is None
+    cache.flush()
+    reopened = IntelligentKnowledgeCache(tmp_path / "cache.db")
+    assert reopened.get_cached_metadata(docs[3]) == _meta(docs[3])
+    assert reopened.cleanup_cache({docs[1]}) == sorted(str(d) for d in docs[2:])
+    assert len(reopened) == 1
+
+
+def test_legacy_json_cache_is_imported(tmp_path):
+    doc = tmp_path / "a.md"
+    doc.write_text("alpha")
+    (tmp_path / "cache.json").write_text(json.dumps({str(doc): asdict(_meta(doc))}))
+
+    cache = IntelligentKnowledgeCache(tmp_path / "cache.json")
+    assert cache.cache_file == tmp_path / "cache.db"
+    assert not cache.should_process_file(doc)
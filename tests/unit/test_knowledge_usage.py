@@ -0,0 +1,95 @@
+import time
+
+import lancedb
+import pytest
+
+from i2c import db_utils
+from i2c.utils.knowledge_dedup import content_hash
+from i2c.utils.knowledge_usage import UsageCounters, usage_counters
+from i2c.utils.retrieval_cache import retrieval_cache
+
+DIM = db_utils.VECTOR_DIMENSION
+
+
+class Model:
+    def encode(self, texts, batch_size=None):
+        return [1.0] + [0.0] * (DIM - 1)
+
+
+def _vector(x):
+    return [1.0, x] + [0.0] * (DIM - 2)
+
+
+def _db(tmp_path, texts, space="docs"):
+    db = lancedb.connect(str(tmp_path / "lancedb"))
+    chunks = [{"source": f"{i}.md", "content": t, "vector": _vector(0.1 + 0.002 * i)} for i, t in enumerate(texts)]
+    db_utils.add_knowledge_chunks(db, chunks, space)
+    return db, db.open_table(db_utils.TABLE_KNOWLEDGE_BASE)
+
+
+def test_counters_are_buffered_and_flushed_in_one_merge(tmp_path):
+    db, tbl = _db(tmp_path, ["alpha", "beta", "gamma"])
+    counters = UsageCounters(flush_rows=100, flush_seconds=3600)
+    alpha = {"knowledge_space": "docs", "content_hash": content_hash("alpha")}
+    beta = {"knowledge_space": "docs", "content_hash": content_hash("beta")}
+    version = tbl.version
+
+    for _ in range(3):
+        counters.record_use([alpha, beta, {"knowledge_space": "docs", "content_hash": ""}], db=db)
+    counters.record_effectiveness([alpha], 1.0)
+    counters.record_effectiveness([alpha], 0.0)
+    tbl.checkout_latest()
+    assert tbl.version == version and counters.stats()["pending"] == 2
+    assert counters.adjusted(("docs", alpha["content_hash"]), 0, 0.7)[0] == 3
+
+    assert counters.flush() == 2
+    tbl.checkout_latest()
+    assert tbl.version == version  # counters live in their own table
+    rows = db_utils.scan_table(db.open_table(db_utils.TABLE_KNOWLEDGE_USAGE)).set_index("content_hash")
+    assert rows.loc[alpha["content_hash"], "usage_frequency"] == 3 and len(rows) == 2
+    before = db_utils.scan_table(tbl, where="content = 'beta'", columns=["confidence_score"]).iloc[0, 0]
+    assert rows.loc[alpha["content_hash"], "confidence_score"] == pytest.approx(0.8 * before + 0.2 * 0.5, abs=1e-6)
+    assert counters.adjusted(("docs", alpha["content_hash"]), 0, 0.7, db=db)[0] == 3
+    assert counters.flush() == 0 and counters.stats()["flushes"] == 1
+
+    counters.record_use([alpha], db=db)
+    assert counters.flush() == 1
+    assert counters.adjusted(("docs", alpha["content_hash"]), 0, 0.7, db=db)[0] == 4
+
+
+def test_full_buffer_is_flushed_in_the_background(tmp_path):
+    db, tbl = _db(tmp_path, ["alpha", "beta"])
+    counters = UsageCounters(flush_rows=2, flush_seconds=3600)
+    chunks = [{"knowledge_space": "docs", "content_hash": content_hash(t)} for t in ("alpha", "beta")]
+
+    counters.record_use(chunks[:1], db=db)
+    assert counters.stats()["flushes"] == 0
+    counters.record_use(chunks, db=db)  # returns without writing
+    deadline = time.time() + 10
+    while counters.stats()["flushes"] == 0 and time.time() < deadline:
+        time.sleep(0.02)
+    assert counters.stats()["rows_updated"] == 2 and counters.stats()["pending"] == 0
+
+
+def test_only_chunks_placed_in_context_count_as_used_and_usage_breaks_near_ties(tmp_path, monkeypatch):
+    from i2c.utils.context_packer import pack_context
+    db, tbl = _db(tmp_path, ["closest", "runner-up"])
+    usage_counters.reset()
+    monkeypatch.setattr(usage_counters, "flush_seconds", 3600)
+    retrieval_cache.clear()
+
+    first = db_utils.query_knowledge(db, "q", Model(), limit=2)
+    assert list(first["content"]) == ["closest", "runner-up"]
+    assert usage_counters.stats()["uses"] == 0  # a search result is not a use
+
+    pack_context(first.to_dict("records")[:1], budget=100)
+    assert usage_counters.stats()["uses"] == 1
+    usage_counters.flush()  # to the database the chunk was retrieved from
+    usage = db.open_table(db_utils.TABLE_KNOWLEDGE_USAGE).to_pandas()
+    assert dict(zip(usage["content_hash"], usage["usage_frequency"])) == {content_hash("closest"): 1}
+
+    tbl.update(where="content = 'runner-up'", values={"usage_frequency": 80})
+    retrieval_cache.clear()
+    ranked = db_utils.query_knowledge(db, "q", Model(), limit=2)
+    assert list(ranked["content"]) == ["runner-up", "closest"]
+    usage_counters.reset()
@@ -0,0 +1,83 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+from i2c.agents.knowledge.enhanced_knowledge_ingestor import (
+    SUPPORTED_EXTENSIONS, DocumentMetadata, IntelligentKnowledgeCache,
+)
+from i2c.agents.knowledge.knowledge_management import KnowledgeManagementWorkflow
+
+
+class FakeIngestor:
+    def __init__(self, cache):
+        self.cache = cache
+        self.supported_extensions = set(SUPPORTED_EXTENSIONS)
+        self.runs = []
+        self.removed = []
+
+    def execute(self, document_path, document_type, metadata, recursive, selected_files):
+        self.runs.append(sorted(p.name for p in selected_files))
+        for path in selected_files:
+            self.cache.mark_processed(path, _meta(path))
+        return True, {"successful_files": len(selected_files), "failed_files": 0}
+
+    def remove_sources(self, paths):
+        self.removed.extend(paths)
+        return len(paths)
+
+
+def _meta(path):
+    stat = path.stat()
+    return DocumentMetadata(
+        source_path=str(path), file_hash=IntelligentKnowledgeCache._compute_file_hash(path),
+        file_size=stat.st_size, last_modified=stat.st_mtime, document_type="documentation", chunk_count=1,
+    )
+
+
+def _event(path, directory=False):
+    return SimpleNamespace(src_path=str(path), is_directory=directory)
+
+
+def _workflow(tmp_path, **kwargs):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    ingestor = FakeIngestor(IntelligentKnowledgeCache(tmp_path / "cache.db"))
+    return docs, ingestor, KnowledgeManagementWorkflow(ingestor, [docs], **kwargs)
+
+
+def test_bursts_of_events_coalesce_into_one_batched_run(tmp_path):
+    docs, ingestor, workflow = _workflow(tmp_path, debounce_seconds=10, batch_files=2)
+    handler = workflow.update_handler
+    for i in range(5):
+        (docs / f"{i}.md").write_text(f"doc {i}")
+        handler.on_created(_event(docs / f"{i}.md"))
+        for _ in range(3):  # editor saving repeatedly
+            handler.on_modified(_event(docs / f"{i}.md"))
+    (docs / ".0.md.swp").write_text("swap")
+    handler.on_modified(_event(docs / ".0.md.swp"))
+    handler.on_modified(_event(docs, directory=True))
+
+    assert handler.drain() == []  # still inside the debounce window
+    ready = handler.drain(force=True)
+    assert len(ready) == 6 and handler.events == 21 and handler.coalesced == 15
+
+    counts = asyncio.run(workflow.process_updates(ready))
+    assert ingestor.runs == [["0.md", "1.md"], ["2.md", "3.md"], ["4.md"]]
+    assert counts == {"runs": 3, "ingested": 5, "unchanged": 0, "removed": 0, "failed": 0}
+
+
+def test_unchanged_content_is_skipped_and_deletes_are_removed(tmp_path):
+    docs, ingestor, workflow = _workflow(tmp_path)
+    kept, edited, deleted = docs / "kept.md", docs / "edited.md", docs / "deleted.md"
+    for path in (kept, edited, deleted):
+        path.write_text(f"{path.stem} v1")
+        ingestor.cache.mark_processed(path, _meta(path))
+
+    os.utime(kept, (1_000_000, 1_000_000))  # touched by a build tool
+    edited.write_text("edited v2")
+    deleted.unlink()
+    counts = asyncio.run(workflow.process_updates([deleted, edited, kept]))
+
+    assert counts == {"runs": 1, "ingested": 1, "unchanged": 1, "removed": 1, "failed": 0}
+    assert ingestor.runs == [["edited.md"]] and ingestor.removed == [deleted]
+    assert workflow.stats()["ingested"] == 1
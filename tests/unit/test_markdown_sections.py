@@ -0,0 +1,104 @@
+import lancedb
+
+from i2c import db_utils
+from i2c.utils.knowledge_dedup import content_hash, scan_source, sync_sections
+
+DIM = db_utils.VECTOR_DIMENSION
+
+
+class CountingModel:
+    def __init__(self):
+        self.texts = []
+        self.fail = False
+
+    def encode(self, texts, batch_size=None):
+        if self.fail:
+            raise RuntimeError("encoder unavailable")
+        texts = [texts] if isinstance(texts, str) else texts
+        self.texts.extend(texts)
+        vectors = [[1.0] + [0.0] * (DIM - 1) for _ in texts]
+        return vectors if len(vectors) > 1 or batch_size else vectors[0]
+
+
+def _doc(*sections):
+    return "\n".join(f"# {name}\n{body}" for name, body in sections)
+
+
+def test_reingest_embeds_only_new_sections_and_deletes_removed(tmp_path, monkeypatch):
+    from i2c.agents.knowledge.enhanced_knowledge_ingestor import EnhancedKnowledgeIngestorAgent
+    monkeypatch.setattr(db_utils, "DB_PATH", str(tmp_path / "lancedb"))
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    guide = docs / "guide.md"
+    guide.write_text(_doc(*[(f"S{i}", f"body {i}") for i in range(5)]))
+    model = CountingModel()
+    agent = EnhancedKnowledgeIngestorAgent(budget_manager=None, knowledge_space="docs", embed_model=model,
+                                           cache_file=tmp_path / "cache.db")
+    agent.execute(docs, "documentation")
+    db = lancedb.connect(db_utils.DB_PATH)
+    kb = db.open_table(db_utils.TABLE_KNOWLEDGE_BASE)
+    kb.update(where="content = '# S3\nbody 3'", values={"usage_frequency": 7})
+    model.texts.clear()
+
+    # New section on top (everything moves), S1 edited, S4 removed
+    guide.write_text(_doc(("Intro", "new"), ("S0", "body 0"), ("S1", "body 1 edited"), ("S2", "body 2"), ("S3", "body 3")))
+    ok, stats = agent.execute(docs, "documentation")
+
+    assert ok and sorted(model.texts) == ["# Intro\nnew", "# S1\nbody 1 edited"]
+    assert stats["sections_unchanged"] == 3 and stats["sections_removed"] == 2
+    kb.checkout_latest()
+    rows = scan_source(db, str(guide), ["content", "chunk_type", "source_hash", "usage_frequency"])
+    assert dict(zip(rows["content"], rows["chunk_type"])) == {
+        "# Intro\nnew": "raw_0", "# S0\nbody 0": "raw_1", "# S1\nbody 1 edited": "raw_2",
+        "# S2\nbody 2": "raw_3", "# S3\nbody 3": "raw_4",
+    }
+    assert rows["source_hash"].nunique() == 1 and rows.set_index("content").loc["# S3\nbody 3", "usage_frequency"] == 7
+
+
+def test_failed_update_keeps_the_stored_version_until_a_rerun_stores_every_section(tmp_path, monkeypatch):
+    from i2c.agents.knowledge.enhanced_knowledge_ingestor import EnhancedKnowledgeIngestorAgent
+    monkeypatch.setattr(db_utils, "DB_PATH", str(tmp_path / "lancedb"))
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    guide = docs / "guide.md"
+    guide.write_text(_doc(*[(f"S{i}", f"body {i}") for i in range(3)]))
+    model = CountingModel()
+    agent = EnhancedKnowledgeIngestorAgent(budget_manager=None, knowledge_space="docs", embed_model=model,
+                                           cache_file=tmp_path / "cache.db")
+    agent.execute(docs, "documentation")
+    db = lancedb.connect(db_utils.DB_PATH)
+    old = scan_source(db, str(guide), ["content", "source_hash"])
+
+    # S1 edited, S2 removed, S3 new, and a new framework; the encoder fails mid-sync
+    guide.write_text(_doc(("S0", "body 0"), ("S1", "body 1 edited"), ("S3", "body 3")))
+    model.fail = True
+    ok, _ = agent.execute(docs, "documentation", metadata={"framework": "demo"})
+    assert not ok
+    rows = scan_source(db, str(guide), ["content", "source_hash"])
+    assert sorted(rows["content"]) == sorted(old["content"]) and set(rows["source_hash"]) == set(old["source_hash"])
+
+    model.fail = False
+    model.texts.clear()
+    ok, stats = agent.execute(docs, "documentation", metadata={"framework": "demo"})
+    assert ok and stats["successful_files"] == 1 and not stats["skipped_files"]
+    assert sorted(model.texts) == ["# S1\nbody 1 edited", "# S3\nbody 3"]  # S0 keeps its vector
+    rows = scan_source(db, str(guide), ["content", "chunk_type", "source_hash", "framework"])
+    assert dict(zip(rows["content"], rows["chunk_type"])) == {
+        "# S0\nbody 0": "raw_0", "# S1\nbody 1 edited": "raw_1", "# S3\nbody 3": "raw_2",
+    }
+    assert rows["source_hash"].nunique() == 1 and set(rows["framework"]) == {"demo"}
+
+
+def test_sync_falls_back_to_full_write_without_stored_hashes(tmp_path):
+    db = lancedb.connect(str(tmp_path / "lancedb"))
+    vector = [1.0] + [0.0] * (DIM - 1)
+    sections = [{db_utils.CONTENT_HASH_FIELD: content_hash("a"), "chunk_type": "raw_0"}]
+
+    assert sync_sections(db, "doc.md", sections, "docs") is None  # nothing stored yet
+    db_utils.add_knowledge_chunks(db, [{"source": "doc.md", "content": "a", "vector": vector}], "docs")
+    synced = sync_sections(db, "doc.md", sections + [{db_utils.CONTENT_HASH_FIELD: content_hash("a"), "chunk_type": "raw_1"}], "docs")
+    assert synced.added == [1] and synced.kept == 1 and synced.removed == 0
+
+    tbl = db.open_table(db_utils.TABLE_KNOWLEDGE_BASE)
+    tbl.update(where="source = 'doc.md'", values={db_utils.CONTENT_HASH_FIELD: ""})  # stored before hashing
+    assert sync_sections(db, "doc.md", sections, "docs") is None
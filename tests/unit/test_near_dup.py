@@ -0,0 +1,76 @@
+import lancedb
+import pyarrow as pa
+
+from i2c.db_utils import _ensure_schema_columns, add_signatures, query_context_by_text
+from i2c.utils.near_dup import hamming, simhash, suppress_near_duplicates
+from i2c.utils.retrieval_cache import retrieval_cache
+
+BASE = (
+    "The retrieval layer embeds the query once, searches the code context table "
+    "and the knowledge base, then packs the best chunks into the prompt budget "
+    "so that planners and modifiers see the most relevant snippets first."
+)
+NEAR = BASE.replace("snippets first.", "snippets first!")
+OTHER = "Completely unrelated text about database migrations and schema upgrades for tables."
+
+SCHEMA = pa.schema([
+    pa.field("source", pa.string()),
+    pa.field("content", pa.string()),
+    pa.field("vector", pa.list_(pa.float32(), 4)),
+    pa.field("simhash", pa.int64()),
+])
+
+
+class FixedModel:
+    def encode(self, text):
+        return [1.0, 0.0, 0.0, 0.0]
+
+
+def test_simhash_is_stable_and_close_for_near_duplicates():
+    assert simhash(BASE) == simhash(BASE)
+    assert simhash("") == 0
+    assert hamming(simhash(BASE), simhash(NEAR)) <= 3
+    assert hamming(simhash(BASE), simhash(OTHER)) > 3
+
+
+def test_suppression_keeps_best_ranked_copy_and_backfills():
+    items = [
+        {"content": BASE, "rank": 0},
+        {"content": NEAR, "rank": 1},
+        {"content": BASE, "rank": 2},
+        {"content": OTHER, "rank": 3},
+    ]
+    kept = suppress_near_duplicates(items, k=2)
+
+    assert [i["rank"] for i in kept] == [0, 3]
+
+
+def test_distinct_query_backfills_from_overfetched_ranking(tmp_path):
+    db = lancedb.connect(str(tmp_path / "lancedb"))
+    tbl = db.create_table("knowledge_base", schema=SCHEMA)
+    rows = [
+        {"source": "a.md", "content": BASE, "vector": [1.0, 0.0, 0.0, 0.0]},
+        {"source": "b.md", "content": NEAR, "vector": [1.0, 0.01, 0.0, 0.0]},
+        {"source": "c.md", "content": OTHER, "vector": [1.0, 0.5, 0.0, 0.0]},
+    ]
+    tbl.add(add_signatures(tbl, rows))
+    retrieval_cache.clear()
+
+    plain = query_context_by_text(db, "knowledge_base", "q", FixedModel(), limit=2)
+    distinct = query_context_by_text(db, "knowledge_base", "q", FixedModel(), limit=2, distinct=True)
+
+    assert plain["source"].tolist() == ["a.md", "b.md"]
+    assert distinct["source"].tolist() == ["a.md", "c.md"]
+
+
+def test_legacy_table_gains_signature_column(tmp_path):
+    db = lancedb.connect(str(tmp_path / "lancedb"))
+    legacy = pa.schema([f for f in SCHEMA if f.name != "simhash"])
+    tbl = db.create_table("code_context", schema=legacy)
+    tbl.add([{"source": "a.py", "content": BASE, "vector": [1.0, 0.0, 0.0, 0.0]}])
+    assert add_signatures(tbl, [{"content": BASE}]) == [{"content": BASE}]
+
+    _ensure_schema_columns(tbl, SCHEMA)
+
+    assert "simhash" in tbl.schema.names
+    assert tbl.to_pandas()["simhash"].tolist() == [0]
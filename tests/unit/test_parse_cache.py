@@ -0,0 +1,65 @@
+import ast
+import traceback
+
+import pytest
+
+from i2c.utils.parse_cache import ParseCache
+
+
+def test_same_content_is_parsed_once():
+    cache = ParseCache()
+    src = "def f(x):\n    return x + 1\n"
+
+    first = cache.parse_python(src)
+    second = cache.parse_python(src)
+
+    assert first is second
+    assert isinstance(first, ast.Module)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_syntax_errors_are_cached_and_reraised():
+    cache = ParseCache()
+    bad = "def f(:\n"
+
+    for _ in range(2):
+        with pytest.raises(SyntaxError):
+            cache.parse_python(bad)
+    assert cache.stats()["hits"] == 1
+    assert cache.python_syntax_error(bad) is not None
+    assert cache.python_syntax_error("x = 1\n") is None
+
+
+def test_cached_errors_are_fresh_and_keyed_by_filename():
+    cache = ParseCache()
+    bad = "def f(:\n"
+    errors = []
+    for _ in range(3):
+        try:
+            cache.parse_python(bad, filename="a.py")
+        except SyntaxError as e:
+            errors.append(e)
+
+    assert errors[1] is not errors[2]
+    assert len(traceback.extract_tb(errors[2].__traceback__)) == len(traceback.extract_tb(errors[1].__traceback__))
+    assert errors[2].lineno == errors[0].lineno and errors[2].filename == "a.py"
+    assert cache.python_syntax_error(bad, filename="b.py").filename == "b.py"
+
+
+def test_compile_check_matches_compile():
+    cache = ParseCache()
+    src = "return 1\n"  # parses, but does not compile
+
+    assert cache.python_syntax_error(src) is None
+    assert cache.python_syntax_error(src, compile_check=True) is not None
+
+
+def test_lru_eviction_respects_byte_budget():
+    cache = ParseCache(max_bytes=4096)
+    for i in range(20):
+        cache.parse_python(f"value_{i} = {i}\n" * 4)
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 4096
+    assert stats["evictions"] > 0
@@ -0,0 +1,76 @@
+from agno.document.base import Document
+
+from i2c.agents.modification_team.chunkers.pdf_layout import (
+    CachedAgenticChunking,
+    PDFLayoutChunkingStrategy,
+)
+
+
+def _write_pdf(path, pages):
+    """Write a minimal Helvetica PDF; pages is a list of [(font_size, text), ...]."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        y, ops = 750, []
+        for size, text in lines:
+            ops.append(f"BT /F1 {size} Tf 72 {y} Td ({text}) Tj ET")
+            y -= size + 8
+        stream = "\n".join(ops)
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out, offsets = "%PDF-1.4\n", []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    path.write_bytes(out.encode("latin-1"))
+
+
+BODY = "Body text that explains the topic in a plain sentence."
+
+
+def test_layout_chunker_splits_on_font_size_headings(tmp_path):
+    pdf = tmp_path / "guide.pdf"
+    _write_pdf(pdf, [
+        [(20, "Installation"), (11, BODY), (11, BODY)],
+        [(20, "Configuration"), (11, BODY)],
+    ])
+
+    doc = Document(content="", name="guide.pdf", meta_data={"file_path": str(pdf)})
+    chunks = PDFLayoutChunkingStrategy(max_chunk_size=800).chunk(doc)
+
+    assert [c.meta_data["chunk_name"] for c in chunks] == ["Installation", "Configuration"]
+    assert chunks[1].meta_data["page_start"] == 2
+    assert BODY in chunks[0].content
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def response(self, messages):
+        self.calls += 1
+        return type("R", (), {"content": "40"})()
+
+
+def test_agentic_boundaries_are_cached_by_pdf_hash(tmp_path):
+    pdf = tmp_path / "notes.pdf"
+    _write_pdf(pdf, [[(11, BODY)] * 4])
+    doc = Document(content="", name="notes.pdf", meta_data={"file_path": str(pdf)})
+    model = CountingModel()
+    cache = tmp_path / "pdf_chunks.json"
+
+    first = CachedAgenticChunking(model=model, max_chunk_size=100, cache_file=cache).chunk(doc)
+    calls = model.calls
+    second = CachedAgenticChunking(model=model, max_chunk_size=100, cache_file=cache).chunk(doc)
+
+    assert calls > 0 and model.calls == calls
+    assert [c.content for c in first] == [c.content for c in second]
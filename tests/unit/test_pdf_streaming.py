@@ -0,0 +1,78 @@
+from i2c.agents.knowledge.ingestion_pipeline import extract_pdf_pages, iter_pdf_pages, pdf_page_count
+
+
+def _write_pdf(path, pages):
+    """Minimal PDF with one line of Helvetica text per page."""
+    count = len(pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(count))
+        + b"] /Count %d >>" % count,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode() + b") Tj ET"
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+    return str(path)
+
+
+def test_page_ranges_are_yielded_in_order_from_the_pool(tmp_path):
+    pdf = _write_pdf(tmp_path / "manual.pdf", [f"Page number {i} of the manual" for i in range(1, 12)])
+    assert pdf_page_count(pdf) == 11
+
+    ranges = list(iter_pdf_pages(pdf, workers=2, pages_per_task=3))
+    assert [[n for n, _ in r] for r in ranges] == [[1, 2, 3], [4, 5, 6], [7, 8, 9], [10, 11]]
+    assert "Page number 10" in ranges[-1][0][1]
+
+
+def test_extraction_resumes_from_a_page(tmp_path):
+    pdf = _write_pdf(tmp_path / "manual.pdf", [f"Page number {i} of the manual" for i in range(1, 6)])
+    pages = [p for r in iter_pdf_pages(pdf, start=3, workers=1, pages_per_task=10) for p in r]
+    assert [n for n, _ in pages] == [4, 5]
+    assert extract_pdf_pages(pdf, 4, 99) == [(5, pages[-1][1])]
+
+
+def test_ingestor_streams_pdfs_page_by_page(tmp_path, monkeypatch):
+    from i2c import db_utils
+    from i2c.agents.knowledge.enhanced_knowledge_ingestor import EnhancedKnowledgeIngestorAgent
+    from i2c.utils.knowledge_dedup import scan_source
+
+    class Model:
+        embedded = 0
+
+        def encode(self, texts, batch_size=None):
+            texts = [texts] if isinstance(texts, str) else texts
+            Model.embedded += len(texts)
+            vectors = [[float(len(t))] + [0.0] * (db_utils.VECTOR_DIMENSION - 1) for t in texts]
+            return vectors if len(vectors) > 1 or batch_size else vectors[0]
+
+    monkeypatch.setattr(db_utils, "DB_PATH", str(tmp_path / "lancedb"))
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    pdf = _write_pdf(docs / "manual.pdf", [f"Page number {i} of the manual" for i in range(1, 4)])
+    agent = EnhancedKnowledgeIngestorAgent(budget_manager=None, knowledge_space="docs", embed_model=Model(),
+                                           cache_file=tmp_path / "cache.db")
+
+    ok, stats = agent.execute(docs, "documentation")
+
+    assert ok and stats["successful_files"] == 1 and stats["chunks_created"] == 3
+    rows = scan_source(db_utils.get_db_connection(), pdf, ["chunk_type"])
+    assert sorted(rows["chunk_type"]) == ["page_1", "page_2", "page_3"]
+
+    # A forced re-ingest of the unchanged file starts over instead of resuming past the last page
+    ok, stats = agent.execute(docs, "documentation", force_refresh=True)
+    assert ok and stats["chunks_created"] == 3 and Model.embedded == 6
+    rows = scan_source(db_utils.get_db_connection(), pdf, ["chunk_type"])
+    assert sorted(rows["chunk_type"]) == ["page_1", "page_2", "page_3"]
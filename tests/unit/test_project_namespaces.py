@@ -0,0 +1,84 @@
+import lancedb
+import pyarrow as pa
+import pytest
+
+from i2c.db_utils import (
+    SCHEMA_CODE_CONTEXT,
+    TABLE_CODE_CONTEXT,
+    VECTOR_DIMENSION,
+    add_or_update_chunks,
+    ensure_scalar_index,
+    get_or_create_table,
+    get_project_id,
+    query_context,
+)
+
+
+def _chunk(path, project_id, axis=0, content="x"):
+    vec = [0.0] * VECTOR_DIMENSION
+    vec[axis] = 1.0
+    return {
+        "chunk_id": f"{project_id}:{path}:{content}",
+        "path": path,
+        "chunk_name": "",
+        "chunk_type": "",
+        "content": content,
+        "vector": vec,
+        "lint_errors": [],
+        "dependencies": [],
+        "start_line": -1,
+        "end_line": -1,
+        "content_hash": "",
+        "language": "python",
+        "project_id": project_id,
+    }
+
+
+@pytest.fixture
+def db(tmp_path):
+    return lancedb.connect(str(tmp_path / "lancedb"))
+
+
+def test_project_id_is_stable_and_distinct(tmp_path):
+    a = tmp_path / "one" / "app"
+    b = tmp_path / "two" / "app"
+    a.mkdir(parents=True)
+    b.mkdir(parents=True)
+
+    assert get_project_id(a) == get_project_id(str(a))
+    assert get_project_id(a) != get_project_id(b)
+    assert get_project_id(a).startswith("app-")
+
+
+def test_query_context_is_scoped_to_project(db):
+    tbl = get_or_create_table(db, TABLE_CODE_CONTEXT, SCHEMA_CODE_CONTEXT)
+    tbl.add([_chunk("main.py", "p1", content="one"), _chunk("main.py", "p2", content="two")])
+    ensure_scalar_index(tbl, "project_id")
+
+    query = [1.0] + [0.0] * (VECTOR_DIMENSION - 1)
+    df = query_context(db, TABLE_CODE_CONTEXT, query, limit=10, project_id="p1")
+    assert df["content"].tolist() == ["one"]
+
+    unscoped = query_context(db, TABLE_CODE_CONTEXT, query, limit=10)
+    assert sorted(unscoped["content"]) == ["one", "two"]
+
+
+def test_add_or_update_chunks_only_replaces_own_project(db):
+    get_or_create_table(db, TABLE_CODE_CONTEXT, SCHEMA_CODE_CONTEXT)
+    add_or_update_chunks(db, TABLE_CODE_CONTEXT, SCHEMA_CODE_CONTEXT, "path", "main.py",
+                         [_chunk("main.py", "p1", content="old")], project_id="p1")
+    add_or_update_chunks(db, TABLE_CODE_CONTEXT, SCHEMA_CODE_CONTEXT, "path", "main.py",
+                         [_chunk("main.py", "p2", content="other")], project_id="p2")
+    add_or_update_chunks(db, TABLE_CODE_CONTEXT, SCHEMA_CODE_CONTEXT, "path", "main.py",
+                         [_chunk("main.py", "p1", content="new")], project_id="p1")
+
+    rows = db.open_table(TABLE_CODE_CONTEXT).to_pandas()
+    assert sorted(zip(rows["project_id"], rows["content"])) == [("p1", "new"), ("p2", "other")]
+
+
+def test_legacy_table_gains_project_column(db):
+    legacy_schema = pa.schema([f for f in SCHEMA_CODE_CONTEXT if f.name != "project_id"])
+    db.create_table(TABLE_CODE_CONTEXT, schema=legacy_schema)
+
+    tbl = get_or_create_table(db, TABLE_CODE_CONTEXT, SCHEMA_CODE_CONTEXT)
+    assert "project_id" in tbl.schema.names
@@ -0,0 +1,37 @@
+from i2c.agents.knowledge.query_analysis import (
+    MIN_LOCAL_CONFIDENCE,
+    QueryAnalysisCache,
+    analyze_query,
+    split_identifier,
+)
+
+
+def test_frameworks_versions_and_identifiers_are_extracted():
+    analysis = analyze_query("How do I use useState in React 18 with select_related?")
+
+    assert analysis.frameworks == ["react"]
+    assert analysis.versions == ["react 18"]
+    assert "useState" in analysis.identifiers and "select_related" in analysis.identifiers
+    assert {"state", "select", "related", "react", "react 18"} <= set(analysis.terms)
+    assert "how" not in analysis.terms
+    assert analysis.confidence >= MIN_LOCAL_CONFIDENCE
+
+
+def test_vague_queries_have_low_confidence():
+    assert analyze_query("make it better").confidence < MIN_LOCAL_CONFIDENCE
+    assert analyze_query("").terms == []
+
+
+def test_split_identifier_handles_mixed_styles():
+    assert split_identifier("api_client.fetchAll") == ["api", "client", "fetch", "all"]
+    assert split_identifier("HTTPServerError") == ["http", "server", "error"]
+
+
+def test_cache_is_keyed_by_normalized_query():
+    cache = QueryAnalysisCache(max_entries=1)
+    cache.put("React  Hooks", ["react", "hooks"])
+
+    assert cache.get("react hooks") == ["react", "hooks"]
+    cache.put("other", ["other"])
+    assert cache.get("react hooks") is None
+    assert cache.stats()["hits"] == 1
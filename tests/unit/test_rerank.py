@@ -0,0 +1,76 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from i2c.utils.rerank import bm25_scores, mmr_rerank, recency_prior
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+def test_mmr_prefers_diverse_results_over_near_copies():
+    items = [
+        {"id": "a", "vector": [1.0, 0.2, 0.0]},
+        {"id": "a-copy", "vector": [1.0, 0.21, 0.0]},
+        {"id": "b", "vector": [1.0, -0.25, 0.0]},
+        {"id": "off-topic", "vector": [0.0, 0.0, 1.0]},
+    ]
+    top = mmr_rerank(items, k=2, query_vector=[1.0, 0.0, 0.0])
+
+    assert [r["id"] for r in top] == ["a", "b"]
+    assert mmr_rerank(items, k=2, query_vector=[1.0, 0.0, 0.0], lambda_=1.0)[1]["id"] == "a-copy"
+
+
+def test_bm25_and_distance_fallback_without_vectors():
+    items = [
+        {"content": "unrelated text", "_distance": 0.1},
+        {"content": "react hooks and react state", "_distance": 0.2},
+    ]
+    scores = bm25_scores("react hooks", [i["content"] for i in items])
+    assert scores[1] > scores[0] == 0
+
+    top = mmr_rerank(items, k=1, query_text="react hooks", bm25_weight=0.8)
+    assert top[0]["content"].startswith("react")
+
+
+def test_recency_prior_decays_and_is_neutral_for_undated():
+    fresh = NOW.isoformat()
+    old = (NOW - timedelta(days=180)).isoformat()
+    prior = recency_prior([fresh, old, None, "not a date"], now=NOW)
+
+    assert np.allclose(prior, [1.0, 0.5, 0.5, 0.5])
+
+
+def test_reranking_200_candidates_returns_k_unique_items_within_budget():
+    rng = np.random.default_rng(0)
+    words = [f"term{i}" for i in range(2000)]
+    items = [
+        {"id": i, "vector": rng.normal(size=384).astype(np.float32),
+         "content": " ".join(rng.choice(words, size=250)), "last_updated": NOW.isoformat()}
+        for i in range(200)
+    ]
+    query = rng.normal(size=384)
+
+    def rerank():
+        return mmr_rerank(items, k=10, query_vector=query, query_text="term3 handler for term42 state",
+                          bm25_weight=0.2, recency_weight=0.1)
+
+    top = rerank()
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        rerank()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    assert len({r["id"] for r in top}) == 10
+    assert all("score" in r for r in top)
+    assert min(timings) < 2.0
+
+
+def test_missing_vectors_warn_when_a_query_vector_is_given():
+    items = [{"content": "a", "_distance": 0.2}, {"content": "b", "_distance": 0.1}]
+
+    with pytest.warns(RuntimeWarning, match="no 'vector' column"):
+        top = mmr_rerank(items, k=1, query_vector=[1.0, 0.0])
+    assert top[0]["content"] == "b"
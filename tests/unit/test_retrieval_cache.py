@@ -0,0 +1,106 @@
+import lancedb
+import pyarrow as pa
+import pytest
+
+from i2c.db_utils import query_context_by_text
+from i2c.utils.retrieval_cache import RetrievalCache, retrieval_cache
+
+SCHEMA = pa.schema([
+    pa.field("source", pa.string()),
+    pa.field("content", pa.string()),
+    pa.field("vector", pa.list_(pa.float32(), 4)),
+])
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        return [1.0, 0.0, 0.0, 0.0]
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = lancedb.connect(str(tmp_path / "lancedb"))
+    tbl = db.create_table("knowledge_base", schema=SCHEMA)
+    tbl.add([{"source": "a.md", "content": "alpha", "vector": [1.0, 0.0, 0.0, 0.0]}])
+    retrieval_cache.clear()
+    return db
+
+
+def test_repeated_query_skips_embedding_and_search(db):
+    model = CountingModel()
+
+    first = query_context_by_text(db, "knowledge_base", "alpha?", model, limit=3)
+    second = query_context_by_text(db, "knowledge_base", "alpha?", model, limit=3)
+
+    assert model.calls == 1
+    assert first["content"].tolist() == second["content"].tolist() == ["alpha"]
+    assert retrieval_cache.stats()["hits"] == 1
+
+
+def test_table_write_invalidates_cached_results(db):
+    model = CountingModel()
+    query_context_by_text(db, "knowledge_base", "alpha?", model, limit=3)
+
+    db.open_table("knowledge_base").add(
+        [{"source": "b.md", "content": "beta", "vector": [1.0, 0.1, 0.0, 0.0]}]
+    )
+    df = query_context_by_text(db, "knowledge_base", "alpha?", model, limit=3)
+
+    assert sorted(df["content"]) == ["alpha", "beta"]
+    assert retrieval_cache.stats()["invalidations"] == 1
+
+
+def test_limit_and_filters_are_part_of_the_key(db):
+    cache = RetrievalCache(max_entries=2)
+    runs = []
+
+    def run():
+        runs.append(1)
+        return db.open_table("knowledge_base").search().limit(1).to_pandas()
+
+    cache.search(db, "knowledge_base", "q", run, limit=1)
+    cache.search(db, "knowledge_base", "q", run, limit=2)
+    cache.search(db, "knowledge_base", "q", run, filters={"project_id": "p"}, limit=1)
+    cache.search(db, "knowledge_base", "q", run, limit=1)
+
+    assert len(runs) == 4  # the first entry was evicted by the entry budget
+    assert cache.stats()["entries"] == 2
+
+
+class NamedModel(CountingModel):
+    def __init__(self, name, value):
+        super().__init__()
+        self.model_name, self.value = name, value
+
+    def encode(self, text):
+        self.calls += 1
+        return [self.value, 0.0, 0.0, 0.0]
+
+
+def test_vectors_and_results_are_keyed_by_model_identity(db):
+    mini, mpnet = NamedModel("mini", 1.0), NamedModel("mpnet", 2.0)
+    hits = retrieval_cache.stats()["hits"]
+
+    assert retrieval_cache.embed_query(mini, "q") == [1.0, 0.0, 0.0, 0.0]
+    assert retrieval_cache.embed_query(mpnet, "q") == [2.0, 0.0, 0.0, 0.0]
+    query_context_by_text(db, "knowledge_base", "alpha?", mini, limit=3)
+    query_context_by_text(db, "knowledge_base", "alpha?", mpnet, limit=3)
+    assert retrieval_cache.stats()["hits"] == hits
+
+    # A new instance of the same model shares the entries (id() would not)
+    query_context_by_text(db, "knowledge_base", "alpha?", NamedModel("mini", 1.0), limit=3)
+    assert retrieval_cache.stats()["hits"] == hits + 1
+
+
+def test_with_vectors_keeps_the_vector_column_for_reranking(db):
+    model = CountingModel()
+
+    plain = query_context_by_text(db, "knowledge_base", "alpha?", model, limit=3)
+    full = query_context_by_text(db, "knowledge_base", "alpha?", model, limit=3, with_vectors=True)
+
+    assert "vector" not in plain.columns
+    assert list(full["vector"][0]) == [1.0, 0.0, 0.0, 0.0]
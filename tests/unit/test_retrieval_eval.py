@@ -0,0 +1,98 @@
+import os
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+from i2c.utils.retrieval_eval import (
+    LabeledQuery,
+    RetrievalBenchmark,
+    apply_params,
+    load_labeled_queries,
+    ndcg_at_k,
+    parse_context_keys,
+    recall_at_k,
+    reciprocal_rank,
+    write_report,
+)
+
+FIXTURES = Path(__file__).resolve().parents[1] / "fixtures"
+
+
+def test_ranking_metrics():
+    keys = ["/abs/users.py::User", "calculator.py::add", "users.py::load_users"]
+    expected = ["users.py::load_users", "users.py::User"]
+
+    assert recall_at_k(keys, expected, 1) == 0.5
+    assert recall_at_k(keys, expected, 3) == 1.0
+    assert reciprocal_rank(["calculator.py::add"] + keys, expected) == 0.5
+    assert ndcg_at_k(keys[:1] + keys[2:], expected, 2) == pytest.approx(1.0)
+    # file-level results are credited against chunk-level labels
+    assert recall_at_k(["calculator.py"], ["calculator.py::divide"], 1) == 1.0
+
+
+def test_context_headers_are_parsed_in_rank_order():
+    text = (
+        "--- Start Chunk: foo.py (function: hello) ---\ndef hello(): ...\n--- End Chunk ---\n"
+        "--- Start Chunk: users.py (class: User) ---\nclass User: ...\n--- End Chunk ---"
+    )
+    assert parse_context_keys(text) == ["foo.py::hello", "users.py::User"]
+
+
+def test_labeled_fixture_queries_load():
+    queries = load_labeled_queries(FIXTURES / "retrieval_queries.json")
+    assert queries and all(q.expected for q in queries)
+    for q in queries:
+        root = FIXTURES / ("sample_docs" if q.retrievers == ["knowledge"] else "sample_project")
+        for expected in q.expected:
+            assert (root / expected.split("::")[0]).exists()
+
+
+def test_sweep_applies_params_and_writes_report(tmp_path, monkeypatch):
+    monkeypatch.delenv("I2C_BENCH_PROBE", raising=False)
+    seen = []
+
+    def retriever(query, k):
+        seen.append((k, os.environ.get("I2C_BENCH_PROBE")))
+        keys = ["calculator.py::add", "calculator.py::divide"]
+        return keys[:k], "x" * 40
+
+    bench = RetrievalBenchmark(
+        {"fake": retriever},
+        [LabeledQuery("divide numbers", ["calculator.py::divide"])],
+        cold=False,
+    )
+    summaries = bench.sweep({"k": [1, 2], "env:I2C_BENCH_PROBE": ["on"]})
+
+    assert seen == [(1, "on"), (2, "on")]
+    assert [s.recall for s in summaries] == [0.0, 1.0]
+    assert summaries[1].mrr == 0.5 and summaries[1].mean_tokens == 10
+    assert "I2C_BENCH_PROBE" not in os.environ
+    report = write_report(summaries, tmp_path)
+    assert "| fake | k=2, I2C_BENCH_PROBE=on |" in report.read_text()
+
+
+def test_apply_params_restores_module_attributes():
+    import i2c.utils.context_packer as packer
+
+    with apply_params({"i2c.utils.context_packer:KNAPSACK_UNIT": 1}):
+        assert packer.KNAPSACK_UNIT == 1
+    assert packer.KNAPSACK_UNIT == 8
+
+
+def test_planner_setting_drives_k_and_chunk_settings_rebuild_the_index(monkeypatch):
+    planner = "i2c.workflow.modification.rag_retrieval:MAX_RAG_RESULTS_PLANNER"
+    # the real module loads the embedding model on import
+    monkeypatch.setitem(sys.modules, planner.split(":")[0], types.SimpleNamespace(MAX_RAG_RESULTS_PLANNER=5))
+    monkeypatch.delenv("I2C_COARSE_CHUNK_SIZE", raising=False)
+    seen, builds = [], []
+
+    def build():
+        builds.append(os.environ["I2C_COARSE_CHUNK_SIZE"])
+        return {"fake": lambda query, k: (seen.append(k) or ["calculator.py::divide"], "")}
+
+    bench = RetrievalBenchmark(None, [LabeledQuery("divide", ["calculator.py::divide"])], cold=False, build=build)
+    bench.sweep({planner: [3, 8], "env:I2C_COARSE_CHUNK_SIZE": [300, 500]})
+
+    assert builds == ["300", "500"] and seen == [3, 8, 3, 8]
@@ -0,0 +1,67 @@
+import threading
+import time
+
+from i2c.utils.retrieval_prefetch import RetrievalPrefetcher, format_prefetched, knowledge_prefetcher
+
+
+class FakeKnowledgeBase:
+    def __init__(self):
+        self.queries = []
+
+    def retrieve_knowledge(self, query, limit=5):
+        self.queries.append(query)
+        return [{"source": "guide.md", "content": f"notes for {query}"}]
+
+
+def test_prefetched_results_are_handed_to_consumers():
+    kb = FakeKnowledgeBase()
+    prefetcher = knowledge_prefetcher(kb)
+    prefetcher.prefetch({"backend/main.py": "api backend/main.py", "frontend/App.jsx": "ui frontend/App.jsx"})
+
+    chunks = prefetcher.get("backend/main.py", timeout=5)
+    assert chunks[0]["content"] == "notes for api backend/main.py"
+    assert prefetcher.get("unknown.py") is None
+    assert "[guide.md]" in format_prefetched(chunks, budget_tokens=100)
+    prefetcher.shutdown()
+
+
+def test_slow_lookup_does_not_block_past_grace_period():
+    release = threading.Event()
+
+    def slow_fetch(query):
+        release.wait(5)
+        return ["late"]
+
+    prefetcher = RetrievalPrefetcher(slow_fetch)
+    prefetcher.prefetch({"a": "q"})
+
+    assert prefetcher.get("a", timeout=0.01) is None
+    release.set()
+    assert prefetcher.get("a", timeout=5) == ["late"]
+    assert prefetcher.stats()["missed"] == 1
+    prefetcher.shutdown()
+
+
+def test_failed_lookup_returns_none():
+    def broken(query):
+        raise RuntimeError("table missing")
+
+    prefetcher = RetrievalPrefetcher(broken)
+    prefetcher.prefetch({"a": "q"})
+
+    assert prefetcher.get("a", timeout=5) is None
+    assert prefetcher.stats()["errors"] == 1
+    assert knowledge_prefetcher(None) is None
+    prefetcher.shutdown()
+
+
+def test_get_does_not_wait_for_a_running_lookup_by_default():
+    release = threading.Event()
+    prefetcher = RetrievalPrefetcher(lambda q: release.wait(5) and ["late"])
+    prefetcher.prefetch({"a": "q"})
+
+    start = time.perf_counter()
+    assert prefetcher.get("a") is None  # the caller falls back to its own lookup
+    assert time.perf_counter() - start < 0.5
+    release.set()
+    prefetcher.shutdown()
@@ -0,0 +1,82 @@
+import lancedb
+import pyarrow as pa
+import pytest
+
+from i2c import db_utils
+from i2c.utils.retrieval_cache import retrieval_cache
+from i2c.utils.retrieval_service import RetrievalService, WarmConnection
+
+SCHEMA = pa.schema([
+    pa.field("source", pa.string()),
+    pa.field("content", pa.string()),
+    pa.field("vector", pa.list_(pa.float32(), 4)),
+])
+
+
+class CountingModel:
+    def encode(self, text):
+        return [1.0, 0.0, 0.0, 0.0]
+
+
+def test_model_is_loaded_once_and_failures_are_not_retried_immediately():
+    loads = []
+    service = RetrievalService(model_factory=lambda: loads.append(1) or CountingModel())
+    assert service.embed_model() is service.embed_model()
+    assert len(loads) == 1
+
+    failing = []
+    broken = RetrievalService(model_factory=lambda: failing.append(1))
+    assert broken.embed_model() is None
+    assert broken.embed_model() is None
+    assert len(failing) == 1
+
+
+def test_warm_connection_reuses_handles_and_sees_writes(tmp_path):
+    raw = lancedb.connect(str(tmp_path / "lancedb"))
+    raw.create_table("knowledge_base", schema=SCHEMA)
+    db = WarmConnection(raw)
+
+    first = db.open_table("knowledge_base")
+    raw.open_table("knowledge_base").add(
+        [{"source": "a.md", "content": "alpha", "vector": [1.0, 0.0, 0.0, 0.0]}]
+    )
+    second = db.open_table("knowledge_base")
+
+    assert second is first
+    assert second.count_rows() == 1
+    assert db.uri == raw.uri
+
+
+def test_timed_records_latency_and_errors():
+    service = RetrievalService(model_factory=CountingModel)
+    with service.timed("lookup"):
+        pass
+    with pytest.raises(ValueError):
+        with service.timed("lookup"):
+            raise ValueError("boom")
+
+    ops = service.stats()["ops"]["lookup"]
+    assert ops["calls"] == 2 and ops["errors"] == 1
+    assert ops["p95_ms"] >= ops["p50_ms"] >= 0
+
+
+def test_repeated_searches_share_model_and_connection(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_utils, "DB_PATH", str(tmp_path / "lancedb"))
+    lancedb.connect(db_utils.DB_PATH).create_table("knowledge_base", schema=SCHEMA).add(
+        [{"source": "a.md", "content": "alpha", "vector": [1.0, 0.0, 0.0, 0.0]}]
+    )
+    loads = []
+    service = RetrievalService(model_factory=lambda: loads.append(1) or CountingModel())
+    retrieval_cache.clear()
+
+    for query in ("alpha?", "alpha again?"):
+        with service.timed("search"):
+            df = db_utils.query_context_by_text(service.db(), "knowledge_base", query, service.embed_model(), limit=2)
+        assert df["content"].tolist() == ["alpha"]
+
+    assert len(loads) == 1
+    assert service.db() is service.db()
+    assert service.stats()["ops"]["search"]["calls"] == 2
+
+    monkeypatch.setattr(db_utils, "DB_PATH", str(tmp_path / "other"))
+    assert service.db().uri != str(tmp_path / "lancedb")
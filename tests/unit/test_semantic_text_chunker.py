@@ -0,0 +1,43 @@
+import numpy as np
+
+from agno.document.base import Document
+
+from i2c.agents.modification_team.chunkers.semantic_text import SemanticTextChunkingStrategy
+
+
+class CountingEncoder:
+    """Maps sentences about cats and about databases onto orthogonal axes."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts):
+        self.calls += 1
+        return np.array([[1.0, 0.0] if "cat" in t else [0.0, 1.0] for t in texts])
+
+
+TEXT = (
+    "The cat sat on the mat. Every cat likes warm places.\n\n"
+    "Databases store rows. Indexes make queries fast. Tables have schemas."
+)
+
+
+def test_sentences_are_embedded_in_one_batch_and_split_on_topic_change():
+    encoder = CountingEncoder()
+    chunks = SemanticTextChunkingStrategy(encoder=encoder).chunk(Document(content=TEXT, name="a.txt"))
+
+    assert encoder.calls == 1
+    assert [c.content for c in chunks] == [
+        "The cat sat on the mat. Every cat likes warm places.",
+        "Databases store rows. Indexes make queries fast. Tables have schemas.",
+    ]
+    assert chunks[0].embedding == [1.0, 0.0]
+    assert chunks[1].meta_data["start_line"] == 3
+
+
+def test_chunk_size_forces_split_within_a_topic():
+    chunker = SemanticTextChunkingStrategy(encoder=CountingEncoder(), chunk_size=50)
+    chunks = chunker.chunk(Document(content=TEXT, name="a.txt"))
+
+    assert len(chunks) == 4
+    assert all(np.isclose(np.linalg.norm(c.embedding), 1.0) for c in chunks)
@@ -0,0 +1,130 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from i2c.agents.knowledge.web_fetcher import WebFetcher, html_to_text
+
+PAGES = {
+    "/docs/index.html": '<html><body><main>Welcome <a href="guide.html">guide</a> '
+                        '<a href="api.html#top">api</a> <a href="/blog/x.html">blog</a></main></body></html>',
+    "/docs/guide.html": "<html><body><main>Guide v1</main></body></html>",
+    "/docs/api.html": "<html><body><script>x()</script><main>API reference</main></body></html>",
+}
+
+
+@pytest.fixture
+def site():
+    pages = dict(PAGES)
+    state = {"active": 0, "peak": 0, "hits": [], "lock": threading.Lock()}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with state["lock"]:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+                state["hits"].append(self.path)
+            try:
+                time.sleep(0.05)
+                body = pages.get(self.path.split("?")[0])
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                etag = f'"{hash(body)}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            finally:
+                with state["lock"]:
+                    state["active"] -= 1
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", pages, state
+    server.shutdown()
+
+
+def test_refresh_only_downloads_changed_pages(site, tmp_path):
+    base, pages, state = site
+    fetcher = WebFetcher(cache_path=tmp_path / "web.db")
+
+    first = fetcher.crawl(f"{base}/docs/index.html", max_depth=2, max_links=10)
+    assert sorted(r.url.rsplit("/", 1)[1] for r in first) == ["api.html", "guide.html", "index.html"]
+    assert all(r.status == "new" for r in first)
+    assert html_to_text(next(r.content for r in first if r.url.endswith("api.html"))) == "API reference"
+
+    pages["/docs/guide.html"] = "<html><body><main>Guide v2</main></body></html>"
+    again = {r.url.rsplit("/", 1)[1]: r for r in WebFetcher(cache_path=tmp_path / "web.db").crawl(
+        f"{base}/docs/index.html", max_depth=2, max_links=10)}
+    assert {name: r.status for name, r in again.items()} == {
+        "index.html": "unchanged", "guide.html": "changed", "api.html": "unchanged"}
+    assert "Welcome" in again["index.html"].content  # served from the cache on 304
+    assert "/blog/x.html" not in state["hits"]
+
+
+def test_per_host_limit_and_errors(site, tmp_path):
+    base, _, state = site
+    fetcher = WebFetcher(cache_path=tmp_path / "web.db", per_host=2)
+    urls = [f"{base}/docs/guide.html?n={i}" for i in range(6)] + [f"{base}/missing"]
+
+    results = fetcher.fetch_all(urls)
+
+    assert [r.status for r in results] == ["new"] * 6 + ["error"]
+    assert results[-1].http_status == 404 and state["peak"] <= 2
+    assert fetcher.stats()["requests"] == 7 and fetcher.stats()["errors"] == 1
+
+
+def test_per_host_limit_holds_across_crawl_roots(site, tmp_path):
+    base, _, state = site
+    fetcher = WebFetcher(cache_path=tmp_path / "web.db", per_host=2)
+
+    results = fetcher.crawl_all([f"{base}/docs/guide.html?root={i}" for i in range(8)], max_depth=1)
+
+    assert len(results) == 8 and all(r.status == "new" for r in results)
+    assert state["peak"] <= 2
+
+
+def test_changed_page_replaces_its_stored_sections(site, tmp_path, monkeypatch):
+    from dataclasses import dataclass
+
+    from agno.embedder.base import Embedder
+
+    from i2c import db_utils
+    from i2c.agents.knowledge.base import EnhancedLanceDb, WebDocumentationKnowledgeBase
+    from i2c.utils.knowledge_dedup import scan_source
+
+    @dataclass
+    class FakeEmbedder(Embedder):
+        dimensions: int = db_utils.VECTOR_DIMENSION
+
+        def get_embedding(self, text):
+            return [float(len(text))] + [0.0] * (self.dimensions - 1)
+
+    base, pages, _ = site
+    monkeypatch.setattr(db_utils, "DB_PATH", str(tmp_path / "lancedb"))
+    kb = WebDocumentationKnowledgeBase(
+        knowledge_space="web", max_depth=1,
+        vector_db=EnhancedLanceDb(knowledge_space="web", uri=str(tmp_path / "agno"), embedder=FakeEmbedder()),
+    )
+    kb._fetcher = WebFetcher(cache_path=tmp_path / "web.db")
+    url = f"{base}/docs/guide.html"
+
+    assert kb.load_url(url)
+    pages["/docs/guide.html"] = "<html><body><main>Guide v2</main></body></html>"
+    assert kb.load_url(url)
+
+    rows = scan_source(db_utils.get_db_connection(), url, ["content"])
+    assert list(rows["content"]) == ["Guide v2"]